@@ -5,31 +5,59 @@
 import clr
 import sys
 import re
+import traceback
 
 # 引入 .NET GUI 庫
 try:
     clr.AddReference("System.Windows.Forms")
     clr.AddReference("System.Drawing")
-    from System.Windows.Forms import (Application, Form, Label, TextBox, Button, 
-                                      RadioButton, GroupBox, DialogResult, FormStartPosition, MessageBox)
+    from System.Windows.Forms import (Application, Form, Label, TextBox, Button, ProgressBar,
+                                      RadioButton, GroupBox, ComboBox, ComboBoxStyle, DialogResult,
+                                      FormStartPosition, MessageBox)
     from System.Drawing import Point, Size
 except Exception as e:
     print("無法載入 GUI 庫: " + str(e))
 
+# 共用的背景執行類別 (V0/BackgroundJob.py)；依你的環境放工具庫位置
+TOOL_DIR = r"D:\Sky_CAETool\V0"
+if TOOL_DIR not in sys.path:
+    sys.path.append(TOOL_DIR)
+try:
+    from BackgroundJob import BackgroundJob
+except ImportError as e:
+    # 找不到共用檔時不在載入階段中斷，由 main() 顯示要修改的路徑
+    BackgroundJob = None
+    BACKGROUND_JOB_ERROR = ("找不到 BackgroundJob.py ({})。\n請把 V0/BackgroundJob.py 放在 {}，"
+                            "或修改腳本開頭的 TOOL_DIR。".format(e, TOOL_DIR))
+    print(BACKGROUND_JOB_ERROR)
+
 # ==========================================
 # 1. 後端邏輯類別
 # ==========================================
 class AutoBCGenerator:
-    def __init__(self, api):
+    def __init__(self, api, analysis=None):
         self.api = api
         self.model = api.DataModel.Project.Model
-        # 取得當前分析環境
-        if self.model.Analyses.Count > 0:
-            self.analysis = self.model.Analyses[0]
-        else:
-            raise Exception("專案中沒有任何分析系統！")
+        self.analysis = self._resolve_analysis(analysis)
 
         self.ns_list = self.model.NamedSelections.Children
+        # Regex 規則
+        self.p_fixed = re.compile(r"Fixed", re.IGNORECASE)
+        self.p_disp = re.compile(r"Disp", re.IGNORECASE)
+
+    def _resolve_analysis(self, analysis):
+        """要處理的分析系統 (analysis : None 為第一個 / 序號 int / 名稱 str)"""
+        analyses = [self.model.Analyses[i] for i in range(self.model.Analyses.Count)]
+        if not analyses:
+            raise Exception("錯誤：專案中沒有任何分析系統！")
+        if analysis is None:
+            return analyses[0]
+        if isinstance(analysis, int):
+            return analyses[analysis]
+        for candidate in analyses:
+            if candidate.Name == analysis:
+                return candidate
+        raise Exception("錯誤：找不到分析系統 '{}'".format(analysis))
 
     def clear_existing_bcs(self):
         """清除舊的自動化邊界條件"""
@@ -54,71 +82,104 @@ class AutoBCGenerator:
         count_fixed = 0
         count_disp = 0
 
-        # Regex 規則
-        p_fixed = re.compile(r"Fixed", re.IGNORECASE)
-        p_disp = re.compile(r"Disp", re.IGNORECASE)
-
-        for ns in self.ns_list:
-            # 1. 處理 Fixed Support
-            if p_fixed.search(ns.Name):
-                if ns.Location.Ids.Count > 0:
-                    fix = self.analysis.AddFixedSupport()
-                    fix.Name = "AutoFixed_" + ns.Name
-                    fix.Location = ns.Location
-                    count_fixed += 1
-                    print("   已建立固定支撐: " + fix.Name)
-
-            # 2. 處理 Displacement
-            elif p_disp.search(ns.Name):
-                if ns.Location.Ids.Count > 0:
-                    disp = self.analysis.AddDisplacement()
-                    disp.Name = "AutoDisp_" + ns.Name
-                    disp.Location = ns.Location
-                    disp.DefineBy = LoadDefineBy.Components
-                    
-                    # ★★★ 修正點：使用 Inputs 強制賦值，避免 Output 為 Null 的錯誤 ★★★
-                    # 設定 X 為 0
-                    disp.XComponent.Output.DiscreteValues = [Quantity("0[mm]")]
-                    
-                    # 設定 Y 為 0
-                    disp.YComponent.Output.DiscreteValues = [Quantity("0[mm]")]
-                    
-                    # 設定 Z 軸位移
-                    disp.ZComponent.Output.DiscreteValues = [Quantity(str(final_z_value) + " [mm]")]
-                    
-                    count_disp += 1
-                    print("   已建立位移: " + disp.Name)
+        for ns in self.target_named_selections():
+            kind = self.apply_one(ns, final_z_value)
+            if kind == "fixed":
+                count_fixed += 1
+            elif kind == "disp":
+                count_disp += 1
 
         print("總計建立: Fixed x {}, Disp x {}".format(count_fixed, count_disp))
         return count_fixed, count_disp
 
+    def target_named_selections(self):
+        """名稱含 Fixed / Disp 且有選取內容的 Named Selection"""
+        return [ns for ns in self.ns_list
+                if (self.p_fixed.search(ns.Name) or self.p_disp.search(ns.Name))
+                and ns.Location.Ids.Count > 0]
+
+    def apply_one(self, ns, final_z_value):
+        """對單一 Named Selection 建立邊界條件；回傳 "fixed" / "disp" / None"""
+        # 1. 處理 Fixed Support
+        if self.p_fixed.search(ns.Name):
+            if ns.Location.Ids.Count > 0:
+                fix = self.analysis.AddFixedSupport()
+                fix.Name = "AutoFixed_" + ns.Name
+                fix.Location = ns.Location
+                print("   已建立固定支撐: " + fix.Name)
+                return "fixed"
+
+        # 2. 處理 Displacement
+        elif self.p_disp.search(ns.Name):
+            if ns.Location.Ids.Count > 0:
+                disp = self.analysis.AddDisplacement()
+                disp.Name = "AutoDisp_" + ns.Name
+                disp.Location = ns.Location
+                disp.DefineBy = LoadDefineBy.Components
+
+                # ★★★ 修正點：使用 Inputs 強制賦值，避免 Output 為 Null 的錯誤 ★★★
+                # 設定 X 為 0
+                disp.XComponent.Output.DiscreteValues = [Quantity("0[mm]")]
+
+                # 設定 Y 為 0
+                disp.YComponent.Output.DiscreteValues = [Quantity("0[mm]")]
+
+                # 設定 Z 軸位移
+                disp.ZComponent.Output.DiscreteValues = [Quantity(str(final_z_value) + " [mm]")]
+
+                print("   已建立位移: " + disp.Name)
+                return "disp"
+        return None
+
 # ==========================================
 # 2. 前端 GUI 類別
 # ==========================================
 class BCInputForm(Form):
-    def __init__(self):
+    def __init__(self, api):
+        self.api = api
+        self.job = None
+        self.close_requested = False
+        self.final_val = None
         self.Text = "Jetsoft 邊界條件設定"
-        self.Size = Size(350, 280)
+        self.Size = Size(350, 390)
         self.StartPosition = FormStartPosition.CenterScreen
         self.TopMost = True
 
+        # 分析系統 (專案中有多個分析時選擇要處理哪一個)
+        self.lbl_analysis = Label()
+        self.lbl_analysis.Text = "分析系統 (Analysis):"
+        self.lbl_analysis.Location = Point(20, 20)
+        self.lbl_analysis.Size = Size(280, 20)
+        self.Controls.Add(self.lbl_analysis)
+
+        self.cmb_analysis = ComboBox()
+        self.cmb_analysis.DropDownStyle = ComboBoxStyle.DropDownList
+        self.cmb_analysis.Location = Point(20, 42)
+        self.cmb_analysis.Size = Size(280, 20)
+        analyses = api.DataModel.Project.Model.Analyses
+        for i in range(analyses.Count):
+            self.cmb_analysis.Items.Add(analyses[i].Name)
+        if self.cmb_analysis.Items.Count > 0:
+            self.cmb_analysis.SelectedIndex = 0
+        self.Controls.Add(self.cmb_analysis)
+
         # 輸入標籤
         self.lbl_val = Label()
         self.lbl_val.Text = "Z 軸位移量 (Magnitude, mm):"
-        self.lbl_val.Location = Point(20, 20)
+        self.lbl_val.Location = Point(20, 70)
         self.lbl_val.Size = Size(250, 20)
         self.Controls.Add(self.lbl_val)
 
         # 輸入框
         self.txt_val = TextBox()
         self.txt_val.Text = "5.0"
-        self.txt_val.Location = Point(20, 45)
+        self.txt_val.Location = Point(20, 95)
         self.Controls.Add(self.txt_val)
 
         # 方向選擇
         self.grp_dir = GroupBox()
         self.grp_dir.Text = "移動方向 (Direction)"
-        self.grp_dir.Location = Point(20, 80)
+        self.grp_dir.Location = Point(20, 130)
         self.grp_dir.Size = Size(280, 80)
         self.Controls.Add(self.grp_dir)
 
@@ -135,54 +196,118 @@ class BCInputForm(Form):
         self.rb_pos.Size = Size(200, 20)
         self.grp_dir.Controls.Add(self.rb_pos)
 
+        # 進度
+        self.progress = ProgressBar()
+        self.progress.Location = Point(20, 225)
+        self.progress.Size = Size(295, 20)
+        self.Controls.Add(self.progress)
+
+        self.lbl_status = Label()
+        self.lbl_status.Text = "就緒"
+        self.lbl_status.Location = Point(20, 250)
+        self.lbl_status.Size = Size(295, 20)
+        self.Controls.Add(self.lbl_status)
+
         # 按鈕
         self.btn_ok = Button()
         self.btn_ok.Text = "套用邊界條件"
-        self.btn_ok.Location = Point(100, 180)
+        self.btn_ok.Location = Point(40, 285)
         self.btn_ok.Size = Size(120, 40)
-        self.btn_ok.DialogResult = DialogResult.OK
+        self.btn_ok.Click += self.on_run
         self.Controls.Add(self.btn_ok)
 
-# ==========================================
-# 3. 主執行區
-# ==========================================
-def main():
-    print("--- 啟動邊界條件設定工具 ---")
-    try:
-        # 1. 顯示 GUI
-        form = BCInputForm()
-        result = form.ShowDialog()
+        self.btn_cancel = Button()
+        self.btn_cancel.Text = "關閉"
+        self.btn_cancel.Location = Point(180, 285)
+        self.btn_cancel.Size = Size(120, 40)
+        self.btn_cancel.Click += self.on_cancel
+        self.Controls.Add(self.btn_cancel)
 
-        if result != DialogResult.OK:
-            print("使用者取消。")
-            return
+        self.FormClosing += self.on_closing
 
-        # 2. 取得數據
+    def build_steps(self):
+        """讀取輸入並建立步驟 (清除舊的 + 每個 Named Selection 一步)；輸入錯誤時回傳 None"""
         try:
-            mag = float(form.txt_val.Text)
+            mag = float(self.txt_val.Text)
         except ValueError:
             MessageBox.Show("請輸入有效的數字！")
-            return
+            return None
+
+        sign = -1.0 if self.rb_neg.Checked else 1.0
+        self.final_val = mag * sign
+        bc_gen = AutoBCGenerator(self.api, analysis=self.cmb_analysis.SelectedIndex)
+        print("-> 目標 Z 軸位移值: {} mm".format(self.final_val))
 
-        sign = -1.0 if form.rb_neg.Checked else 1.0
-        
-        # 3. 執行後端邏輯
-        bc_gen = AutoBCGenerator(ExtAPI)
-        
         # ★★★ 修正點：移除 Transaction ★★★
         # 讓物件建立後立即初始化，避免 Null Reference
-        bc_gen.clear_existing_bcs()
-        c_fix, c_disp = bc_gen.apply_boundary_conditions(mag, sign)
+        steps = [("清除舊的邊界條件", bc_gen.clear_existing_bcs)]
+        for ns in bc_gen.target_named_selections():
+            steps.append(("建立 " + ns.Name,
+                          lambda ns=ns: bc_gen.apply_one(ns, self.final_val)))
+        return steps
+
+    def set_inputs_enabled(self, enabled):
+        for control in (self.cmb_analysis, self.txt_val, self.grp_dir, self.btn_ok):
+            control.Enabled = enabled
+        self.btn_cancel.Text = "關閉" if enabled else "取消"
 
-        # 4. 完成提示
-        if c_fix == 0 and c_disp == 0:
+    def on_run(self, sender, e):
+        steps = self.build_steps()
+        if steps is None:
+            return
+        self.set_inputs_enabled(False)
+        self.job = BackgroundJob(self.api, self, steps, self.on_finished)
+        self.job.start()
+
+    def on_cancel(self, sender, e):
+        if self.job is not None and self.job.running:
+            self.job.cancel()
+            self.lbl_status.Text = "取消中... (等待目前步驟結束)"
+        else:
+            self.Close()
+
+    def on_closing(self, sender, e):
+        # 執行中關閉視窗：先要求取消，步驟結束後再關閉
+        if self.job is not None and self.job.running:
+            self.job.cancel()
+            self.close_requested = True
+            e.Cancel = True
+
+    def on_finished(self, job):
+        self.set_inputs_enabled(True)
+        c_fix = job.results.count("fixed")
+        c_disp = job.results.count("disp")
+        print("總計建立: Fixed x {}, Disp x {}".format(c_fix, c_disp))
+        if job.error is not None:
+            MessageBox.Show("發生錯誤: " + str(job.error))
+        elif job.cancelled:
+            MessageBox.Show("已取消 (完成 {}/{} 步)\nFixed: {}\nDisp: {}".format(
+                job.done, len(job.steps), c_fix, c_disp))
+        elif c_fix == 0 and c_disp == 0:
             MessageBox.Show("警告：未建立任何邊界條件！\n請檢查 Named Selection 是否包含 'Fixed' 或 'Disp'。")
         else:
-            final_val = mag * sign
-            MessageBox.Show("設定完成！\nFixed: {}\nDisp: {}\nZ軸位移: {} mm".format(c_fix, c_disp, final_val))
+            MessageBox.Show("設定完成！\nFixed: {}\nDisp: {}\nZ軸位移: {} mm".format(
+                c_fix, c_disp, self.final_val))
+        if self.close_requested:
+            self.Close()
+
+# ==========================================
+# 3. 主執行區
+# ==========================================
+def main():
+    print("--- 啟動邊界條件設定工具 ---")
+    if BackgroundJob is None:
+        MessageBox.Show(BACKGROUND_JOB_ERROR)
+        return
+    try:
+        # 顯示 GUI：邊界條件在背景執行緒逐一建立 (見 V0/BackgroundJob.py)，視窗顯示進度並可取消
+        form = BCInputForm(ExtAPI)
+        form.ShowDialog()
+
+        if form.job is None:
+            print("使用者取消。")
 
     except Exception as e:
-        import traceback
         print(traceback.format_exc())
         MessageBox.Show("發生錯誤: " + str(e))
 
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# Jetsoft V0 工具共用：背景執行 (進度回報 / 取消)
+# - Mesh.py / BC.py / Post.py 的視窗共用同一個 BackgroundJob
+# - Mechanical API 必須在 UI 執行緒呼叫，所以每個步驟仍回到 UI 執行緒執行：
+#   步驟之間視窗會更新進度並可取消，但單一步驟 (例如 GenerateMesh / 單一結果 Evaluate)
+#   執行期間視窗一樣無法回應，直到該步驟結束
+# ==========================================
+import clr
+import traceback
+
+try:
+    clr.AddReference("System.Windows.Forms")
+    from System import Action
+    from System.Threading import Thread, ThreadStart
+except Exception as e:
+    print("無法載入 .NET 執行緒庫: " + str(e))
+
+
+class BackgroundJob(object):
+    """
+    在背景執行緒依序執行多個步驟，避免長時間操作讓 Mechanical 看起來像當掉
+    - Mechanical API 不可在背景執行緒呼叫：每個步驟透過 ExtAPI.Application.InvokeUIThread 回到 UI 執行緒執行
+    - 每個步驟之間更新表單的進度列，並檢查是否已要求取消 (取消只在步驟之間生效)
+    - 表單已關閉 / 釋放時不再更新 (BeginInvoke 失敗或 UI 端例外只印出，不會讓 Mechanical 當掉)
+    form : 需有 progress (ProgressBar) 與 lbl_status (Label)
+    steps : [(說明, 無參數函式)]；執行中可再以 add_steps() 加入步驟
+    """
+
+    def __init__(self, api, form, steps, on_finished):
+        self.api = api
+        self.form = form
+        self.steps = list(steps)
+        self.on_finished = on_finished  # 結束後在 UI 執行緒呼叫 on_finished(job)
+        self.results = []
+        self.done = 0
+        self.error = None
+        self.cancel_requested = False
+        self.cancelled = False
+        self.finished = False
+        self.thread = None
+
+    @property
+    def running(self):
+        return self.thread is not None and not self.finished
+
+    def start(self):
+        self.thread = Thread(ThreadStart(self._work))
+        self.thread.IsBackground = True
+        self.thread.Start()
+
+    def cancel(self):
+        """要求取消：目前步驟完成後停止"""
+        self.cancel_requested = True
+
+    def add_steps(self, steps):
+        self.steps.extend(steps)
+
+    def _on_ui(self, fn):
+        """[內部] 在 UI 執行緒執行 fn 並等待完成；例外轉回背景執行緒"""
+        box = {}
+
+        def call(arg):
+            try:
+                box["value"] = fn()
+            except Exception as e:
+                box["error"] = e
+                box["trace"] = traceback.format_exc()
+
+        self.api.Application.InvokeUIThread(call, None)
+        if "error" in box:
+            print(box["trace"])
+            raise box["error"]
+        return box.get("value")
+
+    def _form_alive(self):
+        try:
+            return not self.form.IsDisposed and self.form.IsHandleCreated
+        except Exception:
+            return False
+
+    def _notify(self, fn):
+        """[內部] 非同步更新表單 (不等待 UI 執行緒)；回傳是否已送出"""
+        def guarded():
+            # 送出後到執行前表單仍可能被關閉；UI 執行緒上的例外不可往外丟
+            if not self._form_alive():
+                return
+            try:
+                fn()
+            except Exception:
+                print(traceback.format_exc())
+
+        if not self._form_alive():
+            return False
+        try:
+            self.form.BeginInvoke(Action(guarded))
+            return True
+        except Exception as e:
+            print("   警告：無法更新視窗 ({})".format(e))
+            return False
+
+    def _show_progress(self, index, label):
+        total = len(self.steps)
+        self.form.progress.Maximum = max(total, 1)
+        self.form.progress.Value = min(index, total)
+        self.form.lbl_status.Text = "[{}/{}] {}".format(min(index + 1, total), total, label)
+
+    def _work(self):
+        i = 0
+        try:
+            while i < len(self.steps):
+                if self.cancel_requested:
+                    self.cancelled = True
+                    break
+                label, fn = self.steps[i]
+                self._notify(lambda i=i, label=label: self._show_progress(i, label))
+                self.results.append(self._on_ui(fn))
+                i += 1
+                self.done = i
+        except Exception as e:
+            self.error = e
+        self.finished = True
+        if not self._notify(self._finish):
+            print("背景工作結束 ({}/{} 步)，視窗已關閉。".format(self.done, len(self.steps)))
+
+    def _finish(self):
+        total = len(self.steps)
+        self.form.progress.Maximum = max(total, 1)
+        self.form.progress.Value = min(self.done, total)
+        state = "已取消" if self.cancelled else ("發生錯誤" if self.error is not None else "完成")
+        self.form.lbl_status.Text = "{} ({}/{} 步)".format(state, self.done, total)
+        self.on_finished(self)
@@ -5,17 +5,31 @@
 import clr
 import sys
 import re
+import traceback
 
 # 引入必要的 .NET 函式庫
 try:
     clr.AddReference("System.Windows.Forms")
     clr.AddReference("System.Drawing")
-    from System.Windows.Forms import (Application, Form, Label, TextBox, Button, 
+    from System.Windows.Forms import (Application, Form, Label, TextBox, Button, ProgressBar,
                                       CheckBox, RadioButton, GroupBox, DialogResult, FormStartPosition, MessageBox)
     from System.Drawing import Point, Size
 except Exception as e:
     print("錯誤：無法載入 Windows Forms 函式庫。" + str(e))
 
+# 共用的背景執行類別 (V0/BackgroundJob.py)；依你的環境放工具庫位置
+TOOL_DIR = r"D:\Sky_CAETool\V0"
+if TOOL_DIR not in sys.path:
+    sys.path.append(TOOL_DIR)
+try:
+    from BackgroundJob import BackgroundJob
+except ImportError as e:
+    # 找不到共用檔時不在載入階段中斷，由 main() 顯示要修改的路徑
+    BackgroundJob = None
+    BACKGROUND_JOB_ERROR = ("找不到 BackgroundJob.py ({})。\n請把 V0/BackgroundJob.py 放在 {}，"
+                            "或修改腳本開頭的 TOOL_DIR。".format(e, TOOL_DIR))
+    print(BACKGROUND_JOB_ERROR)
+
 # ==========================================
 # 1. 後端邏輯類別
 # ==========================================
@@ -109,9 +123,12 @@ class AutoMesher:
 # 2. 前端 GUI 類別
 # ==========================================
 class MeshInputForm(Form):
-    def __init__(self):
+    def __init__(self, api):
+        self.api = api
+        self.job = None
+        self.close_requested = False
         self.Text = "Jetsoft 網格設定與生成"
-        self.Size = Size(350, 320)
+        self.Size = Size(350, 380)
         self.StartPosition = FormStartPosition.CenterScreen
         self.TopMost = True
         
@@ -154,52 +171,116 @@ class MeshInputForm(Form):
         self.chk_refine.Checked = True
         self.Controls.Add(self.chk_refine)
         
+        # 進度
+        self.progress = ProgressBar()
+        self.progress.Location = Point(20, 215)
+        self.progress.Size = Size(295, 20)
+        self.Controls.Add(self.progress)
+
+        self.lbl_status = Label()
+        self.lbl_status.Text = "就緒"
+        self.lbl_status.Location = Point(20, 240)
+        self.lbl_status.Size = Size(295, 20)
+        self.Controls.Add(self.lbl_status)
+
         # 按鈕
         self.btn_run = Button()
         self.btn_run.Text = "執行設定並生成"
-        self.btn_run.Location = Point(100, 220)
+        self.btn_run.Location = Point(40, 275)
         self.btn_run.Size = Size(120, 40)
-        self.btn_run.DialogResult = DialogResult.OK
+        self.btn_run.Click += self.on_run
         self.Controls.Add(self.btn_run)
 
+        self.btn_cancel = Button()
+        self.btn_cancel.Text = "關閉"
+        self.btn_cancel.Location = Point(180, 275)
+        self.btn_cancel.Size = Size(120, 40)
+        self.btn_cancel.Click += self.on_cancel
+        self.Controls.Add(self.btn_cancel)
+
+        self.FormClosing += self.on_closing
+
+    def build_steps(self):
+        """讀取輸入並建立步驟；輸入錯誤時回傳 None"""
+        try:
+            global_size = float(self.txt_size.Text)
+        except ValueError:
+            MessageBox.Show("請輸入有效的數字！")
+            return None
+
+        is_quadratic = self.rb_quad.Checked
+        do_refine = self.chk_refine.Checked
+        mesher = AutoMesher(self.api)
+
+        def apply_settings():
+            with Transaction():
+                mesher.set_global_mesh(global_size, is_quadratic)
+                mesher.apply_body_method()
+                if do_refine:
+                    mesher.apply_contact_sizing(global_size, 0.5)
+
+        # 網格生成在 Transaction 之外 (確保網格生成介面會刷新)
+        return [("套用網格設定", apply_settings),
+                ("生成網格 (Generate Mesh)", mesher.run_mesh_generation)]
+
+    def set_inputs_enabled(self, enabled):
+        for control in (self.txt_size, self.grp_order, self.chk_refine, self.btn_run):
+            control.Enabled = enabled
+        self.btn_cancel.Text = "關閉" if enabled else "取消"
+
+    def on_run(self, sender, e):
+        steps = self.build_steps()
+        if steps is None:
+            return
+        self.set_inputs_enabled(False)
+        self.job = BackgroundJob(self.api, self, steps, self.on_finished)
+        self.job.start()
+
+    def on_cancel(self, sender, e):
+        if self.job is not None and self.job.running:
+            self.job.cancel()
+            self.lbl_status.Text = "取消中... (等待目前步驟結束)"
+        else:
+            self.Close()
+
+    def on_closing(self, sender, e):
+        # 執行中關閉視窗：先要求取消，步驟結束後再關閉
+        if self.job is not None and self.job.running:
+            self.job.cancel()
+            self.close_requested = True
+            e.Cancel = True
+
+    def on_finished(self, job):
+        self.set_inputs_enabled(True)
+        if job.error is not None:
+            MessageBox.Show("錯誤：" + str(job.error))
+        elif job.cancelled:
+            print("使用者取消 (完成 {}/{} 步)。".format(job.done, len(job.steps)))
+            if job.done > 0:
+                MessageBox.Show("已取消：網格設定已套用，但尚未生成網格。")
+        else:
+            print("--- 全部完成 ---")
+            MessageBox.Show("完成！")
+        if self.close_requested:
+            self.Close()
+
 # ==========================================
 # 3. 主執行區
 # ==========================================
 def main():
     print("--- Mesh 腳本開始執行 ---")
+    if BackgroundJob is None:
+        MessageBox.Show(BACKGROUND_JOB_ERROR)
+        return
     try:
-        form = MeshInputForm()
-        result = form.ShowDialog()
-        
-        if result != DialogResult.OK:
+        # 設定與網格生成在背景執行緒依序執行 (見 V0/BackgroundJob.py)，視窗顯示進度並可取消
+        form = MeshInputForm(ExtAPI)
+        form.ShowDialog()
+
+        if form.job is None:
             print("使用者取消。")
-            return
 
-        try:
-            global_size = float(form.txt_size.Text)
-        except ValueError:
-            MessageBox.Show("請輸入有效的數字！")
-            return
-            
-        is_quadratic = form.rb_quad.Checked
-        do_refine = form.chk_refine.Checked
-        
-        mesher = AutoMesher(ExtAPI)
-        
-        with Transaction():
-            mesher.set_global_mesh(global_size, is_quadratic)
-            mesher.apply_body_method()
-            if do_refine:
-                mesher.apply_contact_sizing(global_size, 0.5)
-        
-        # 移出 Transaction 以確保網格生成介面會刷新
-        mesher.run_mesh_generation()
-        
-        print("--- 全部完成 ---")
-        MessageBox.Show("完成！")
-        
     except Exception as e:
-        import traceback
         print("錯誤:\n" + traceback.format_exc())
         MessageBox.Show("錯誤：" + str(e))
 
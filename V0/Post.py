@@ -3,31 +3,60 @@
 # Jetsoft 自動後處理工具 (Connector Post-Processing)
 # ==========================================
 import clr
+import sys
 import re
+import traceback
 
 # 引入 .NET GUI 庫
 try:
     clr.AddReference("System.Windows.Forms")
     clr.AddReference("System.Drawing")
-    from System.Windows.Forms import (Application, Form, Label, Button, CheckBox, 
-                                      GroupBox, DialogResult, FormStartPosition, MessageBox)
+    from System.Windows.Forms import (Application, Form, Label, Button, CheckBox, ProgressBar,
+                                      GroupBox, ComboBox, ComboBoxStyle, DialogResult, FormStartPosition,
+                                      MessageBox)
     from System.Drawing import Point, Size
 except Exception as e:
     print("無法載入 GUI 庫: " + str(e))
 
+# 共用的背景執行類別 (V0/BackgroundJob.py)；依你的環境放工具庫位置
+TOOL_DIR = r"D:\Sky_CAETool\V0"
+if TOOL_DIR not in sys.path:
+    sys.path.append(TOOL_DIR)
+try:
+    from BackgroundJob import BackgroundJob
+except ImportError as e:
+    # 找不到共用檔時不在載入階段中斷，由 main() 顯示要修改的路徑
+    BackgroundJob = None
+    BACKGROUND_JOB_ERROR = ("找不到 BackgroundJob.py ({})。\n請把 V0/BackgroundJob.py 放在 {}，"
+                            "或修改腳本開頭的 TOOL_DIR。".format(e, TOOL_DIR))
+    print(BACKGROUND_JOB_ERROR)
+
 # ==========================================
 # 1. 後端邏輯類別
 # ==========================================
 class AutoPostProcessor:
-    def __init__(self, api):
+    def __init__(self, api, analysis=None):
         self.api = api
         self.model = api.DataModel.Project.Model
-        
-        if self.model.Analyses.Count > 0:
-            self.analysis = self.model.Analyses[0]
-            self.solution = self.analysis.Solution
-        else:
+        self.analysis = self._resolve_analysis(analysis)
+        self.solution = self.analysis.Solution
+
+        # 本工具建立的結果物件 (計算時只算這些，不動使用者自己加的結果)
+        self.created = []
+
+    def _resolve_analysis(self, analysis):
+        """要處理的分析系統 (analysis : None 為第一個 / 序號 int / 名稱 str)"""
+        analyses = [self.model.Analyses[i] for i in range(self.model.Analyses.Count)]
+        if not analyses:
             raise Exception("錯誤：專案中沒有任何分析系統！")
+        if analysis is None:
+            return analyses[0]
+        if isinstance(analysis, int):
+            return analyses[analysis]
+        for candidate in analyses:
+            if candidate.Name == analysis:
+                return candidate
+        raise Exception("錯誤：找不到分析系統 '{}'".format(analysis))
 
     def _find_bc_by_name_pattern(self, pattern):
         """
@@ -47,15 +76,18 @@ class AutoPostProcessor:
         # 總變形
         deform = self.solution.AddTotalDeformation()
         deform.Name = "Total Deformation"
+        self.created.append(deform)
         
         # Z 軸方向變形 (觀察插入深度)
         dir_deform = self.solution.AddDirectionalDeformation()
         dir_deform.Name = "Directional Deformation (Z)"
         dir_deform.NormalOrientation = NormalOrientationType.ZAxis
+        self.created.append(dir_deform)
         
         # 等效應力 (Von-Mises)
         stress = self.solution.AddEquivalentStress()
         stress.Name = "Equivalent Stress (Von-Mises)"
+        self.created.append(stress)
 
     def add_contact_tool(self):
         """加入接觸工具 (Contact Tool) 以檢視接觸壓力與狀態"""
@@ -69,6 +101,7 @@ class AutoPostProcessor:
         c_tool.AddPressure()
         # 加入子結果：滑移距離 (Sliding Distance)
         c_tool.AddSlidingDistance()
+        self.created.append(c_tool)
 
     def add_insertion_force_probe(self):
         """加入反力探針 (Force Reaction) 來測量插拔力"""
@@ -90,29 +123,59 @@ class AutoPostProcessor:
             
             # 設定顯示 Z 軸分量 (插拔方向)
             probe.ResultSelection = ProbeDisplayFilter.ZAxis
+            self.created.append(probe)
             print("   已將探針綁定至: " + target_bc.Name)
         else:
             print("   警告：找不到 'Auto_Fixed' 或 'Auto_Disp'，無法自動建立反力探針。")
 
     def evaluate_results(self):
-        """計算所有結果 (讓黃色閃電變成綠色打勾)"""
-        print("-> 正在提取結果數值 (Evaluate All Results)...")
-        self.solution.EvaluateAllResults()
+        """
+        只計算本工具剛建立的結果 (讓黃色閃電變成綠色打勾)
+        不使用 Solution.EvaluateAllResults()：大型接觸模型中那會連同樹上所有舊結果一起重算
+        """
+        print("-> 正在提取結果數值 ({} 個結果物件)...".format(len(self.created)))
+        for obj in self.created:
+            self.evaluate_one(obj)
+
+    def evaluate_one(self, obj):
+        """計算單一結果物件 (背景執行時每個物件一步，之間可取消)"""
+        obj.EvaluateAllResults()
 
 # ==========================================
 # 2. 前端 GUI 類別
 # ==========================================
 class PostInputForm(Form):
-    def __init__(self):
+    def __init__(self, api):
+        self.api = api
+        self.job = None
+        self.close_requested = False
         self.Text = "Jetsoft 後處理設定"
-        self.Size = Size(300, 300)
+        self.Size = Size(300, 410)
         self.StartPosition = FormStartPosition.CenterScreen
         self.TopMost = True
 
+        # 分析系統 (專案中有多個分析時選擇要處理哪一個)
+        self.lbl_analysis = Label()
+        self.lbl_analysis.Text = "分析系統 (Analysis):"
+        self.lbl_analysis.Location = Point(20, 20)
+        self.lbl_analysis.Size = Size(240, 20)
+        self.Controls.Add(self.lbl_analysis)
+
+        self.cmb_analysis = ComboBox()
+        self.cmb_analysis.DropDownStyle = ComboBoxStyle.DropDownList
+        self.cmb_analysis.Location = Point(20, 42)
+        self.cmb_analysis.Size = Size(240, 20)
+        analyses = api.DataModel.Project.Model.Analyses
+        for i in range(analyses.Count):
+            self.cmb_analysis.Items.Add(analyses[i].Name)
+        if self.cmb_analysis.Items.Count > 0:
+            self.cmb_analysis.SelectedIndex = 0
+        self.Controls.Add(self.cmb_analysis)
+
         # GroupBox
         self.grp = GroupBox()
         self.grp.Text = "選擇要輸出的結果"
-        self.grp.Location = Point(20, 20)
+        self.grp.Location = Point(20, 70)
         self.grp.Size = Size(240, 160)
         self.Controls.Add(self.grp)
 
@@ -145,45 +208,110 @@ class PostInputForm(Form):
         self.chk_eval.Checked = True # 預設直接算出結果
         self.grp.Controls.Add(self.chk_eval)
 
+        # 進度
+        self.progress = ProgressBar()
+        self.progress.Location = Point(20, 240)
+        self.progress.Size = Size(240, 20)
+        self.Controls.Add(self.progress)
+
+        self.lbl_status = Label()
+        self.lbl_status.Text = "就緒"
+        self.lbl_status.Location = Point(20, 265)
+        self.lbl_status.Size = Size(240, 20)
+        self.Controls.Add(self.lbl_status)
+
         # Button
         self.btn_run = Button()
         self.btn_run.Text = "生成結果物件"
-        self.btn_run.Location = Point(80, 200)
-        self.btn_run.Size = Size(120, 40)
-        self.btn_run.DialogResult = DialogResult.OK
+        self.btn_run.Location = Point(20, 300)
+        self.btn_run.Size = Size(110, 40)
+        self.btn_run.Click += self.on_run
         self.Controls.Add(self.btn_run)
 
+        self.btn_cancel = Button()
+        self.btn_cancel.Text = "關閉"
+        self.btn_cancel.Location = Point(150, 300)
+        self.btn_cancel.Size = Size(110, 40)
+        self.btn_cancel.Click += self.on_cancel
+        self.Controls.Add(self.btn_cancel)
+
+        self.FormClosing += self.on_closing
+
+    def build_steps(self):
+        """依勾選項目建立步驟；Evaluate 在結果物件建立後才展開成每個物件一步"""
+        post = AutoPostProcessor(self.api, analysis=self.cmb_analysis.SelectedIndex)
+
+        # 這裡不需要 Transaction，因為建立結果物件很快，且 Evaluate 需要即時更新
+        steps = []
+        if self.chk_basic.Checked:
+            steps.append(("加入基本結果", post.add_basic_results))
+        if self.chk_contact.Checked:
+            steps.append(("加入接觸工具", post.add_contact_tool))
+        if self.chk_force.Checked:
+            steps.append(("設定插拔力探針", post.add_insertion_force_probe))
+
+        def queue_evaluation():
+            print("-> 正在提取結果數值 ({} 個結果物件)...".format(len(post.created)))
+            self.job.add_steps([("計算 " + obj.Name, lambda obj=obj: post.evaluate_one(obj))
+                                for obj in post.created])
+
+        if self.chk_eval.Checked:
+            steps.append(("準備計算結果", queue_evaluation))
+        return steps
+
+    def set_inputs_enabled(self, enabled):
+        for control in (self.cmb_analysis, self.grp, self.btn_run):
+            control.Enabled = enabled
+        self.btn_cancel.Text = "關閉" if enabled else "取消"
+
+    def on_run(self, sender, e):
+        steps = self.build_steps()
+        if not steps:
+            return
+        self.set_inputs_enabled(False)
+        self.job = BackgroundJob(self.api, self, steps, self.on_finished)
+        self.job.start()
+
+    def on_cancel(self, sender, e):
+        if self.job is not None and self.job.running:
+            self.job.cancel()
+            self.lbl_status.Text = "取消中... (等待目前步驟結束)"
+        else:
+            self.Close()
+
+    def on_closing(self, sender, e):
+        # 執行中關閉視窗：先要求取消，步驟結束後再關閉
+        if self.job is not None and self.job.running:
+            self.job.cancel()
+            self.close_requested = True
+            e.Cancel = True
+
+    def on_finished(self, job):
+        self.set_inputs_enabled(True)
+        if job.error is not None:
+            MessageBox.Show("發生錯誤: " + str(job.error))
+        elif job.cancelled:
+            MessageBox.Show("已取消 (完成 {}/{} 步)，未計算的結果物件可稍後再 Evaluate。".format(
+                job.done, len(job.steps)))
+        else:
+            MessageBox.Show("後處理物件建立完成！")
+        if self.close_requested:
+            self.Close()
+
 # ==========================================
 # 3. 主執行區
 # ==========================================
 def main():
     print("--- 啟動後處理工具 ---")
+    if BackgroundJob is None:
+        MessageBox.Show(BACKGROUND_JOB_ERROR)
+        return
     try:
-        form = PostInputForm()
-        result = form.ShowDialog()
-
-        if result != DialogResult.OK:
-            return
-
-        post = AutoPostProcessor(ExtAPI)
-
-        # 這裡不需要 Transaction，因為建立結果物件很快，且 Evaluate 需要即時更新
-        if form.chk_basic.Checked:
-            post.add_basic_results()
-            
-        if form.chk_contact.Checked:
-            post.add_contact_tool()
-            
-        if form.chk_force.Checked:
-            post.add_insertion_force_probe()
-
-        if form.chk_eval.Checked:
-            post.evaluate_results()
-            
-        MessageBox.Show("後處理物件建立完成！")
+        # 結果物件的建立與計算在背景執行緒依序執行 (見 V0/BackgroundJob.py)，視窗顯示進度並可取消
+        form = PostInputForm(ExtAPI)
+        form.ShowDialog()
 
     except Exception as e:
-        import traceback
         print(traceback.format_exc())
         MessageBox.Show("發生錯誤: " + str(e))
 
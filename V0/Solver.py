@@ -9,17 +9,28 @@ import clr
 # 但通常在 Scripting 環境中這些是預載的
 
 class SolverSetup:
-    def __init__(self, api):
+    def __init__(self, api, analysis=None):
         self.api = api
         self.model = api.DataModel.Project.Model
         self.config = api.Application
         
-        # 取得當前分析系統 (預設抓第一個)
-        if self.model.Analyses.Count > 0:
-            self.analysis = self.model.Analyses[0]
-            self.settings = self.analysis.AnalysisSettings
-        else:
+        # 取得要設定的分析系統 (未指定時抓第一個)
+        self.analysis = self._resolve_analysis(analysis)
+        self.settings = self.analysis.AnalysisSettings
+
+    def _resolve_analysis(self, analysis):
+        """要處理的分析系統 (analysis : None 為第一個 / 序號 int / 名稱 str)"""
+        analyses = [self.model.Analyses[i] for i in range(self.model.Analyses.Count)]
+        if not analyses:
             raise Exception("錯誤：專案中沒有任何分析系統！")
+        if analysis is None:
+            return analyses[0]
+        if isinstance(analysis, int):
+            return analyses[analysis]
+        for candidate in analyses:
+            if candidate.Name == analysis:
+                return candidate
+        raise Exception("錯誤：找不到分析系統 '{}'".format(analysis))
 
     def configure_step_controls(self, init_time, min_time, max_time):
         """
@@ -77,8 +88,8 @@ def main():
     print("--- 開始執行求解設定 ---")
     
     try:
-        # 1. 初始化工具
-        setup_tool = SolverSetup(ExtAPI)
+        # 1. 初始化工具 (analysis: 分析系統名稱或序號，None 為第一個)
+        setup_tool = SolverSetup(ExtAPI, analysis=None)
         
         # 2. 執行分析設定 (Analysis Settings)
         # 參數: Initial, Min, Max
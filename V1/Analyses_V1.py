@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 多分析系統支援
+# - 同一個專案中的多個分析 (例如插入 / 拔出) 共用網格與接觸，
+#   BC / 求解設定 / 後處理則對每個選定的分析各做一次
+# - Manifest 以分析區分：第一個分析沿用原本的工具名稱 (與舊紀錄相容)，其餘加上 @ObjectId
+# - SolveQueue：依核心數同時送出多個分析的求解 (背景求解)，完成一個再送下一個
+# ==========================================
+import os
+import time
+
+try:
+    _STRING_TYPES = (str, unicode)  # IronPython 2.7
+except NameError:
+    _STRING_TYPES = (str,)
+
+# Solution.Status / ObjectState 中代表「已結束」的值 (成功或失敗皆算)
+FINISHED_STATES = ("Done", "Solved", "SolveFailed", "Failed", "PartialSolved", "Underdefined")
+
+# 背景求解的預設逾時 [s]：狀態一直沒有結束 (例如求解器當掉) 時不會無限等待
+DEFAULT_SOLVE_TIMEOUT = 12 * 3600.0
+
+
+def analysis_list(model):
+    return [model.Analyses[i] for i in range(model.Analyses.Count)]
+
+
+def resolve_analysis(model, analysis=None):
+    """
+    取得要操作的分析系統
+    analysis : None (第一個分析，與原本行為相同) / 分析物件 / 序號 (int) / 名稱 (str)
+    """
+    if model.Analyses.Count == 0:
+        raise Exception("錯誤：專案中沒有任何分析系統！")
+    if analysis is None:
+        return model.Analyses[0]
+    if isinstance(analysis, int):
+        return model.Analyses[analysis]
+    if isinstance(analysis, _STRING_TYPES):
+        for candidate in analysis_list(model):
+            if candidate.Name == analysis:
+                return candidate
+        raise Exception("錯誤：找不到分析系統 '{}' (現有: {})".format(
+            analysis, ", ".join(a.Name for a in analysis_list(model))))
+    return analysis
+
+
+def select_analyses(model, select=None, all_analyses=False):
+    """
+    依設定選出要處理的分析 (順序同樹狀結構)
+    all_analyses=True 時為全部；select 為名稱 / 序號 list；都未指定時只有第一個分析
+    """
+    if all_analyses:
+        return analysis_list(model)
+    if not select:
+        return [resolve_analysis(model)]
+    return [resolve_analysis(model, item) for item in select]
+
+
+def analysis_scope(tool_name, analysis, model):
+    """Manifest 中的工具名稱：第一個分析為 tool_name，其餘為 tool_name@ObjectId"""
+    if model.Analyses.Count == 0 or analysis.ObjectId == model.Analyses[0].ObjectId:
+        return tool_name
+    return "{}@{}".format(tool_name, analysis.ObjectId)
+
+
+def cpu_count():
+    """可用的 CPU 核心數 (IronPython 取 .NET 的 ProcessorCount)"""
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        pass
+    try:
+        import System
+        return System.Environment.ProcessorCount
+    except ImportError:
+        return int(os.environ.get("NUMBER_OF_PROCESSORS", "1"))
+
+
+def solve_slots(cores_per_solve, max_concurrent=0):
+    """同時求解的數量：max_concurrent > 0 時直接使用，否則為 CPU 核心數 / 每次求解的核心數"""
+    if max_concurrent and max_concurrent > 0:
+        return int(max_concurrent)
+    return max(1, cpu_count() // max(1, int(cores_per_solve or 1)))
+
+
+def _state(solution):
+    """[內部] 求解狀態字串 (Status 與 ObjectState)"""
+    states = []
+    for name in ("Status", "ObjectState"):
+        try:
+            states.append(str(getattr(solution, name)))
+        except Exception:
+            pass
+    return states
+
+
+class SolveQueue(object):
+    """
+    多個分析的求解佇列
+    max_concurrent = 1 時依序以 Solve(True) 求解；大於 1 時以 Solve(False) 送出背景求解，
+    輪詢狀態，有分析完成就送出下一個 (需將 "My Computer" 設為背景求解)
+    timeout : 背景求解每個分析的逾時 [s] (None 代表不限，不建議)；依序求解時 Solve(True)
+    會阻塞到求解結束，無法中途逾時
+    Solve() 丟出例外的分析記為 "failed" (含 error)，不影響其餘分析
+    """
+
+    def __init__(self, analyses, max_concurrent=1, poll_interval=2.0,
+                 timeout=DEFAULT_SOLVE_TIMEOUT):
+        self.analyses = list(analyses)
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.results = {}  # 分析名稱 -> {"status", "elapsed"} (失敗時另有 "error")
+
+    def _finished(self, analysis):
+        return any(state in FINISHED_STATES for state in _state(analysis.Solution))
+
+    def _record(self, analysis, start):
+        status = str(getattr(analysis.Solution, "Status", ""))
+        self.results[analysis.Name] = {"status": status, "elapsed": time.time() - start}
+        print("   [{}] 求解結束 ({})，耗時 {:.1f} s".format(
+            analysis.Name, status, self.results[analysis.Name]["elapsed"]))
+
+    def _fail(self, analysis, start, error):
+        self.results[analysis.Name] = {"status": "failed", "error": str(error),
+                                       "elapsed": time.time() - start}
+        print("   [{}] 求解失敗：{}".format(analysis.Name, error))
+
+    def run(self):
+        print("-> 求解 {} 個分析 (同時 {} 個)...".format(len(self.analyses), self.max_concurrent))
+        if self.max_concurrent == 1 or len(self.analyses) == 1:
+            for analysis in self.analyses:
+                start = time.time()
+                try:
+                    analysis.Solution.Solve(True)
+                except Exception as e:
+                    self._fail(analysis, start, e)
+                    continue
+                self._record(analysis, start)
+            return self.results
+
+        pending = list(self.analyses)
+        running = []  # [(analysis, start)]
+        while pending or running:
+            while pending and len(running) < self.max_concurrent:
+                analysis = pending.pop(0)
+                print("   [{}] 送出求解".format(analysis.Name))
+                start = time.time()
+                try:
+                    analysis.Solution.Solve(False)
+                except Exception as e:
+                    self._fail(analysis, start, e)
+                    continue
+                running.append((analysis, start))
+            if not running:
+                continue
+
+            time.sleep(self.poll_interval)
+            for analysis, start in list(running):
+                if self._finished(analysis):
+                    running.remove((analysis, start))
+                    self._record(analysis, start)
+                elif self.timeout is not None and time.time() - start > self.timeout:
+                    running.remove((analysis, start))
+                    self.results[analysis.Name] = {"status": "timeout",
+                                                   "elapsed": time.time() - start}
+                    print("   [{}] 求解逾時 ({} s)".format(analysis.Name, self.timeout))
+        return self.results
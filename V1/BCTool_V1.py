@@ -1,35 +1,112 @@
 # -*- coding: utf-8 -*-
 import re
 
+from Analyses_V1 import analysis_scope, resolve_analysis
+from LoadProfile_V1 import merge_time_grid, hold, step_values
+from TransactionBatch_V1 import run_in_transaction, run_after_commit
+
+# ==========================================================
+# BC 類型註冊表：類型 -> (Analysis 的 Add 方法, 自動命名前綴)
+# 新增 BC 類型只需在此登記，並在 BCTool._write_values 補上數值寫入方式
+# ==========================================================
+BC_TYPES = {
+    "FixedSupport":        ("AddFixedSupport",        "AutoFixed_"),
+    "Displacement":        ("AddDisplacement",        "AutoDisp_"),
+    "Pressure":            ("AddPressure",            "AutoPressure_"),
+    "RemoteDisplacement":  ("AddRemoteDisplacement",  "AutoRemoteDisp_"),
+    "FrictionlessSupport": ("AddFrictionlessSupport", "AutoFrictionless_"),
+}
+
+# 預設規則表 (依序比對，第一個符合的規則生效)：(NS 名稱 Regex, BC 類型, 參數)
+# Displacement 參數：x / y / z 可為數值 [mm] 或 LoadProfile；未指定的分量為 0
+# Pressure 參數：magnitude [MPa]
+DEFAULT_BC_RULES = (
+    (r"Fixed", "FixedSupport", {}),
+    (r"Disp",  "Displacement", {}),
+)
+
+# 對稱縮減後的對稱面 NS ([Sym]_[X] / [Sym]_[Y]，見 SymmetryTool_V1)：鏡射對稱 = 法向拘束
+SYMMETRY_BC_RULE = (r"^\[Sym\]_", "FrictionlessSupport", {})
+
+
+class BCRule(object):
+    """已編譯的單條規則"""
+    def __init__(self, pattern, bc_type, params=None, flags=re.IGNORECASE):
+        if bc_type not in BC_TYPES:
+            raise ValueError("未知的 BC 類型: {} (可用: {})".format(
+                bc_type, ", ".join(sorted(BC_TYPES))))
+        self.pattern = pattern
+        self.regex = re.compile(pattern, flags)
+        self.bc_type = bc_type
+        self.params = dict(params or {})
+        self.add_method, self.prefix = BC_TYPES[bc_type]
+
+
+def compile_bc_rules(rules):
+    """將規則表 [(pattern, bc_type, params), ...] 編譯一次 (已編譯的 BCRule 直接沿用)"""
+    compiled = []
+    for rule in rules:
+        if isinstance(rule, BCRule):
+            compiled.append(rule)
+        else:
+            compiled.append(BCRule(*rule))
+    return compiled
+
+
+def classify_named_selections(ns_list, compiled_rules):
+    """
+    單次掃描 Named Selection，回傳 [(ns, rule), ...]
+    每個 NS 只套用第一個符合的規則；沒有幾何的 NS 直接略過
+    """
+    matched = []
+    for ns in ns_list:
+        name = ns.Name
+        for rule in compiled_rules:
+            if rule.regex.search(name):
+                if ns.Location.Ids.Count > 0:
+                    matched.append((ns, rule))
+                break
+    return matched
+
+
 class BCTool(object):
     """
     邊界條件自動生成工具 (Logic Only)
-    負責：清除舊 BC、掃描 Named Selection、自動建立 Fixed 與 Displacement
+    負責：清除舊 BC、掃描 Named Selection、依規則表自動建立 BC (Fixed / Displacement / Pressure ...)
     """
     def __init__(self, ext_api, model=None, transaction_cls=None,
-                 quantity_cls=None, load_define_by_enum=None):
+                 quantity_cls=None, load_define_by_enum=None, manifest=None,
+                 batcher=None, analysis=None):
         
         self.api = ext_api
         self.model = model if model is not None else ext_api.DataModel.Project.Model
         self.transaction_cls = transaction_cls
+        self.manifest = manifest  # ObjectManifest (可選)：有傳入時以 ObjectId 追蹤/清除
+        self.batcher = batcher    # TransactionBatcher (可選)：有傳入時排入共用批次
         
         # 注入的 Enum 與 Class
         self.Quantity = quantity_cls
         self.LoadDefineBy = load_define_by_enum
         
-        # 取得當前分析環境 (通常是第一個分析系統)
-        if self.model.Analyses.Count > 0:
-            self.analysis = self.model.Analyses[0]
-        else:
-            raise Exception("錯誤：專案中沒有任何分析系統！")
+        # 取得要設定的分析系統 (未指定時為第一個分析系統)
+        self.analysis = resolve_analysis(self.model, analysis)
+        self.tool_name = analysis_scope("BCTool", self.analysis, self.model)
 
         self.ns_list = self.model.NamedSelections.Children
 
     def clear_existing_bcs(self):
         """清除舊的自動化邊界條件"""
+        if self.manifest is not None:
+            # 只刪除本工具先前建立的物件，不掃描整棵樹
+            count = self.manifest.delete_tracked(self.tool_name)
+            if count:
+                print("已清除 {} 個舊的自動化邊界條件。".format(count))
+            return
+
+        prefixes = tuple(prefix for _, prefix in BC_TYPES.values())
         objects_to_delete = []
         for child in self.analysis.Children:
-            if child.Name.startswith("AutoFixed_") or child.Name.startswith("AutoDisp_"):
+            if child.Name.startswith(prefixes):
                 objects_to_delete.append(child)
         
         if objects_to_delete:
@@ -37,79 +114,216 @@ class BCTool(object):
                 obj.Delete()
             print("已清除 {} 個舊的自動化邊界條件。".format(len(objects_to_delete)))
 
-    def apply_boundary_conditions(self, z_magnitude, direction_sign):
+    def existing_bcs(self):
+        """本工具先前建立且仍存在的 BC：{名稱: 物件} (有 Manifest 時以 ObjectId 取回)"""
+        if self.manifest is not None:
+            objects = self.manifest.get_objects(self.tool_name)
+        else:
+            prefixes = tuple(prefix for _, prefix in BC_TYPES.values())
+            objects = [child for child in self.analysis.Children if child.Name.startswith(prefixes)]
+        return dict((obj.Name, obj) for obj in objects)
+
+    def apply_load_profile(self, disp, x_profile=None, y_profile=None, z_profile=None):
         """
-        掃描 Named Selection 並套用邊界條件
-        注意：此函式建議在 Transaction 之外執行
+        將位移-時間曲線 (LoadProfile) 一次寫入 Displacement 的 Tabular DiscreteValues
+        三個分量會先重新取樣到同一組時間點；None 的分量為 0
+        注意：與單值寫入相同，必須在 Transaction 之外執行
         """
-        final_z_value = z_magnitude * direction_sign
-        print("-> 目標 Z 軸位移值: {} mm".format(final_z_value))
+        profiles = merge_time_grid([x_profile, y_profile, z_profile])
+        components = (disp.XComponent, disp.YComponent, disp.ZComponent)
+
+        for comp, profile in zip(components, profiles):
+            t_list, v_list = profile.to_discrete_values(self.Quantity)
+            # 先寫時間欄 (Inputs[0])，再寫數值欄 (Output)，長度需一致
+            comp.Inputs[0].DiscreteValues = t_list
+            comp.Output.DiscreteValues = v_list
+
+        return len(profiles[2])
 
-        count_fixed = 0
-        count_disp = 0
+    def _write_values(self, obj, rule):
+        """[內部] 寫入 BC 的數值 (DiscreteValues)，必須在 Transaction 之外執行"""
+        params = rule.params
 
-        # Regex 規則 (忽略大小寫)
-        p_fixed = re.compile(r"Fixed", re.IGNORECASE)
-        p_disp = re.compile(r"Disp", re.IGNORECASE)
+        if rule.bc_type in ("Displacement", "RemoteDisplacement"):
+            comps = [params.get(key, 0.0) for key in ("x", "y", "z")]
+            if any(hasattr(c, "times") for c in comps):
+                # 有任一分量為曲線：數值分量轉成常數曲線後一起寫入 Tabular
+                end_time = max(c.end_time for c in comps if hasattr(c, "times"))
+                comps = [c if hasattr(c, "times") else hold(float(c), end_time) for c in comps]
+                self.apply_load_profile(obj, comps[0], comps[1], comps[2])
+            else:
+                obj.XComponent.Output.DiscreteValues = [self.Quantity(str(comps[0]) + " [mm]")]
+                obj.YComponent.Output.DiscreteValues = [self.Quantity(str(comps[1]) + " [mm]")]
+                obj.ZComponent.Output.DiscreteValues = [self.Quantity(str(comps[2]) + " [mm]")]
+
+        elif rule.bc_type == "Pressure":
+            magnitude = params.get("magnitude", 0.0)
+            obj.Magnitude.Output.DiscreteValues = [self.Quantity(str(magnitude) + " [MPa]")]
+
+    def apply_rules(self, rules=DEFAULT_BC_RULES, create_in_transaction=True, update_in_place=False):
+        """
+        [規則引擎] 依規則表一次建立所有 BC
+        1. 編譯規則並單次掃描 NS 分類
+        2. 批次建立 BC 物件 (可包在單一 Transaction 中)
+        3. 於 Transaction 之外批次寫入 DiscreteValues
+
+        update_in_place=True 時同名的既有 BC 不重建，只改寫數值 (Tabular 位移)，
+        其餘本工具建立的 BC 刪除；刪除 / 重建 BC 會讓 Mechanical 的重啟點失效 (見 VariantFamily_V1)
+
+        Returns
+        -------
+        dict
+            {BC 類型: 建立數量}
+        """
+        compiled = compile_bc_rules(rules)
+        matched = classify_named_selections(self.model.NamedSelections.Children, compiled)
+        counts = dict((rule.bc_type, 0) for rule in compiled)
+        for _, rule in matched:
+            counts[rule.bc_type] += 1
+
+        if not matched:
+            return counts
+
+        needs_values = any(r.bc_type in ("Displacement", "RemoteDisplacement", "Pressure")
+                           for _, r in matched)
+        if needs_values and not self.Quantity:
+            print("錯誤：未傳入 Quantity，無法設定 BC 數值。")
+            return counts
+
+        pending = []
+        existing = self.existing_bcs() if update_in_place else {}
+
+        def _do_create():
+            reused = 0
+            for ns, rule in matched:
+                obj = existing.pop(rule.prefix + ns.Name, None)
+                if obj is not None:
+                    reused += 1
+                else:
+                    obj = getattr(self.analysis, rule.add_method)()
+                    obj.Name = rule.prefix + ns.Name
+                    obj.Location = ns.Location
+                    if rule.bc_type == "Displacement" and self.LoadDefineBy:
+                        # 設定定義方式為 Components (Remote Displacement 沒有 DefineBy，直接用分量)
+                        obj.DefineBy = self.LoadDefineBy.Components
+                pending.append((obj, rule))
+                if self.manifest is not None:
+                    self.manifest.record(self.tool_name, obj)
+            for obj in existing.values():
+                obj.Delete()
+            if update_in_place:
+                print("沿用 {} 個既有邊界條件 (只更新數值)，刪除 {} 個。".format(reused, len(existing)))
+
+        def _do_write():
+            for obj, rule in pending:
+                self._write_values(obj, rule)
+            if self.manifest is not None:
+                self.manifest.save()
+
+        if create_in_transaction:
+            run_in_transaction(_do_create, self.transaction_cls, self.batcher, tool="BCTool")
+        else:
+            _do_create()
+
+        # 【重要】DiscreteValues 在 Transaction 內賦值常會報錯 (Null Reference)，
+        # 所以全部物件建立完成後，才在 Transaction 外統一寫入 (有 batcher 時延後到提交之後)
+        run_after_commit(_do_write, self.batcher, tool="BCTool")
+
+        return counts
+
+    def apply_boundary_conditions(self, z_magnitude, direction_sign,
+                                  x_profile=None, y_profile=None, z_profile=None,
+                                  extra_rules=None, update_in_place=False):
+        """
+        掃描 Named Selection 並套用邊界條件 (Fixed / Disp 預設規則)
+        注意：此函式建議在 Transaction 之外執行
+
+        若傳入任一 *_profile (LoadProfile)，Displacement 改用 Tabular 曲線，
+        z_magnitude / direction_sign 不再使用 (曲線數值即為最終位移)
+        extra_rules 會接在預設規則之後 (例如 Pressure / Frictionless Support)
+        """
+        use_profile = x_profile is not None or y_profile is not None or z_profile is not None
+        final_z_value = z_magnitude * direction_sign
+        if use_profile:
+            print("-> 使用位移曲線 (Tabular Load)")
+            disp_params = {"x": x_profile if x_profile is not None else 0.0,
+                           "y": y_profile if y_profile is not None else 0.0,
+                           "z": z_profile if z_profile is not None else 0.0}
+        else:
+            print("-> 目標 Z 軸位移值: {} mm".format(final_z_value))
+            disp_params = {"x": 0.0, "y": 0.0, "z": final_z_value}
 
         # 檢查依賴是否注入成功
         if not self.Quantity or not self.LoadDefineBy:
             print("錯誤：未傳入 Quantity 或 LoadDefineBy，無法設定位移值。")
             return 0, 0
 
-        for ns in self.ns_list:
-            # 1. 處理 Fixed Support
-            if p_fixed.search(ns.Name):
-                if ns.Location.Ids.Count > 0:
-                    fix = self.analysis.AddFixedSupport()
-                    fix.Name = "AutoFixed_" + ns.Name
-                    fix.Location = ns.Location
-                    count_fixed += 1
-                    print("   已建立固定支撐: " + fix.Name)
-
-            # 2. 處理 Displacement
-            elif p_disp.search(ns.Name):
-                if ns.Location.Ids.Count > 0:
-                    disp = self.analysis.AddDisplacement()
-                    disp.Name = "AutoDisp_" + ns.Name
-                    disp.Location = ns.Location
-                    
-                    # 設定定義方式為 Components
-                    disp.DefineBy = self.LoadDefineBy.Components
-                    
-                    # 設定 X, Y 為 0
-                    disp.XComponent.Output.DiscreteValues = [self.Quantity("0[mm]")]
-                    disp.YComponent.Output.DiscreteValues = [self.Quantity("0[mm]")]
-                    
-                    # 設定 Z 軸位移
-                    z_qty = self.Quantity(str(final_z_value) + " [mm]")
-                    disp.ZComponent.Output.DiscreteValues = [z_qty]
-                    
-                    count_disp += 1
-                    print("   已建立位移: " + disp.Name)
+        rules = [(r"Fixed", "FixedSupport", {}),
+                 (r"Disp", "Displacement", disp_params),
+                 SYMMETRY_BC_RULE]
+        if extra_rules:
+            rules.extend(extra_rules)
+
+        counts = self.apply_rules(rules, update_in_place=update_in_place)
+        count_fixed = counts.get("FixedSupport", 0)
+        count_disp = counts.get("Displacement", 0)
 
         print("總計建立: Fixed x {}, Disp x {}".format(count_fixed, count_disp))
         return count_fixed, count_disp
 
 
 def runBC(ext_api, z_magnitude=5.0, direction_sign=-1.0,
+          x_profile=None, y_profile=None, z_profile=None,
+          rules=None,
+          z_steps=None, step_end_times=None,
           model=None, transaction_cls=None,
-          quantity_cls=None, load_define_by_enum=None):
+          quantity_cls=None, load_define_by_enum=None,
+          manifest=None, batcher=None, analysis=None, update_in_place=False):
     """
     Caller 呼叫用的便利函式
+    rules : list, optional
+        自訂規則表 [(NS Regex, BC 類型, 參數), ...]；指定時取代預設的 Fixed / Disp 規則
+    z_steps : list, optional
+        逐步的 Z 位移 [mm] (帶正負號，第 i 步結束時的位移)；搭配 step_end_times 轉成 z_profile
+    manifest : ObjectManifest, optional
+        有傳入時，清除舊 BC 改以 Manifest 記錄的 ObjectId 進行
+    batcher : TransactionBatcher, optional
+        有傳入時，清除與建立排入共用批次，DiscreteValues 寫入延後到批次提交之後
+    analysis : optional
+        要設定的分析系統 (物件 / 序號 / 名稱)；未指定時為第一個分析系統
+    update_in_place : bool
+        True 時不清除舊 BC，同名的既有 BC 只改寫數值 (保留重啟點，見 VariantFamily_V1)
     """
     tool = BCTool(ext_api, model=model, transaction_cls=transaction_cls,
                   quantity_cls=quantity_cls,
-                  load_define_by_enum=load_define_by_enum)
+                  load_define_by_enum=load_define_by_enum,
+                  manifest=manifest,
+                  batcher=batcher,
+                  analysis=analysis)
+    if manifest is not None:
+        manifest.begin_run(tool.tool_name)
+    if z_steps is not None and z_profile is None:
+        z_profile = step_values(z_steps, step_end_times or range(1, len(z_steps) + 1))
 
-    # 1. 清除舊資料 (可以用 Transaction 加速)
-    if transaction_cls:
-        with transaction_cls():
-            tool.clear_existing_bcs()
-    else:
-        tool.clear_existing_bcs()
+    # 1. 清除舊資料 (可以用 Transaction 加速)；就地更新時由 apply_rules 沿用既有 BC
+    if not update_in_place:
+        run_in_transaction(tool.clear_existing_bcs, transaction_cls, batcher, tool="BCTool")
 
     # 2. 建立新資料
-    # 【重要】這裡故意不使用 Transaction
-    # 因為 Displacement.Output.DiscreteValues 在 Transaction 內賦值常會報錯 (Null Reference)
-    tool.apply_boundary_conditions(z_magnitude, direction_sign)
\ No newline at end of file
+    # 物件建立包在 Transaction 中；DiscreteValues 則在 Transaction 之外統一寫入
+    # (Displacement.Output.DiscreteValues 在 Transaction 內賦值常會報錯 (Null Reference))
+    def _do_apply():
+        if rules is not None:
+            counts = tool.apply_rules(rules, update_in_place=update_in_place)
+            print("總計建立: " + ", ".join("{} x {}".format(k, v) for k, v in sorted(counts.items())))
+            return counts
+
+        # 若使用位移曲線，SolverTool 的步結束時間請用 z_profile.step_table() 產生以保持對齊
+        return tool.apply_boundary_conditions(z_magnitude, direction_sign,
+                                              x_profile=x_profile, y_profile=y_profile, z_profile=z_profile,
+                                              update_in_place=update_in_place)
+
+    if batcher is not None:
+        # 整個流程 (含 NS 分類) 排入批次，才看得到批次中前面步驟建立的 NS (例如 ZFaceSelector)
+        return run_in_transaction(_do_apply, None, batcher, tool="BCTool")
+    return _do_apply()
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 多專案批次執行器 (在 Mechanical 之外執行，例如 python BatchRunner_V1.py batch.json)
+# - 批次清單：每個專案的路徑與參數 (覆蓋 Pipeline_V1.DEFAULT_PARAMS)
+# - 執行後端可抽換：SubprocessBackend 以無介面的 Mechanical 行程執行；
+#   FakeBackend 在同一行程中模擬，供測試與流程驗證使用
+# - 結果 (狀態 / 耗時 / 關鍵結果) 彙整成一份 JSON + CSV 報告
+# ==========================================
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from Parallel_V1 import parallel_map
+
+TOOL_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_SCRIPT = os.path.join(TOOL_DIR, "BatchWorker_V1.py")
+
+# Mechanical 批次模式啟動指令；{script} 會替換成 Mechanical 端執行的腳本
+DEFAULT_MECHANICAL_COMMAND = [
+    "AnsysWBU.exe", "-DSApplet", "-AppModeMech", "-nosplash", "-notabctrl", "-b",
+    "-script", "{script}",
+]
+
+
+class BatchJob(object):
+    """單一專案的批次工作與執行結果"""
+
+    def __init__(self, name, project, params=None, solve=False, save=True, stages=None,
+                 family=None, property_cache=False):
+        self.name = name
+        self.project = project
+        self.params = params or {}
+        self.family = family  # [{"name", "params"}]：以重啟點接續求解的變體族群 (見 VariantFamily_V1)
+        self.solve = solve
+        self.save = save
+        self.stages = stages
+        self.property_cache = property_cache  # 以 PropertyCache_V1 快取 API 屬性讀取
+        self.status = "pending"
+        self.error = None
+        self.traceback = None
+        self.elapsed = None
+        self.timings = {}
+        self.results = {}
+
+    def apply_report(self, report, elapsed):
+        self.status = report.get("status", "failed")
+        self.error = report.get("error")
+        self.traceback = report.get("traceback")
+        self.timings = report.get("timings") or {}
+        self.results = report.get("results") or {}
+        self.elapsed = elapsed
+
+    def request_params(self):
+        """請求雜湊使用的參數 (族群工作以所有變體的參數計算)"""
+        return {"family": self.family} if self.family else self.params
+
+    def to_dict(self):
+        return {"name": self.name, "project": self.project, "params": self.params,
+                "family": [v["name"] for v in self.family] if self.family else None,
+                "status": self.status, "error": self.error, "traceback": self.traceback,
+                "elapsed": self.elapsed,
+                "timings": self.timings, "results": self.results}
+
+
+def _entry_configs(entry, default_config, base_dir):
+    """[內部] 專案對應的 RunConfig：無設定檔時回傳 [None]，"variants": "all" 時展開所有變體"""
+    from Config_V1 import load_config, load_variants
+
+    config_path = entry.get("config", default_config)
+    if not config_path:
+        return [None]
+    if not os.path.isabs(config_path):
+        config_path = os.path.join(base_dir, config_path)
+    if entry.get("variants") == "all":
+        return load_variants(config_path)
+    return [load_config(config_path, variant=entry.get("variant"))]
+
+
+def load_batch_manifest(path):
+    """
+    讀取批次清單 (JSON)：
+        {"config": "family.json", "defaults": {stage: {...}}, "solve": false,
+         "projects": [{"name": ..., "project": ..., "params": {stage: {...}},
+                       "config": ..., "variant": ... | "variants": "all",
+                       "restart_families": false, "property_cache": false}, ...]}
+    參數優先順序：設定檔 (含 extends / 變體) < defaults < 專案的 params
+    restart_families=True (搭配 "variants": "all" 與求解) 時，變體依共用參數分成族群，
+    每個族群在同一個 Mechanical 行程中由重啟點接續求解 (見 VariantFamily_V1)
+    所有工作在啟動前先以 Config_V1 的 schema 驗證，有錯誤時整批不執行
+    """
+    from Config_V1 import ConfigError, validate_params
+    from Pipeline_V1 import merge_params
+
+    with open(path, "r") as f:
+        data = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    defaults = data.get("defaults", {})
+
+    jobs = []
+    names = set()
+    errors = []
+    for entry in data["projects"]:
+        project = entry["project"]
+        if not os.path.isabs(project):
+            project = os.path.join(base_dir, project)
+        base_name = entry.get("name") or os.path.splitext(os.path.basename(project))[0]
+
+        entry_jobs = []
+        for config in _entry_configs(entry, data.get("config"), base_dir):
+            name = base_name
+            if config is not None and entry.get("variants") == "all":
+                name = "{}__{}".format(base_name, config.name)
+            if name in names:
+                raise ValueError("批次清單中的名稱重複: {}".format(name))
+            names.add(name)
+
+            params = merge_params(config.params if config else None, defaults, entry.get("params"))
+            try:
+                validate_params(params, name)
+            except ConfigError as e:
+                errors.extend("[{}] {}".format(name, msg) for msg in e.errors)
+            entry_jobs.append(BatchJob(name, project, params=params,
+                                       solve=entry.get("solve", data.get("solve", config.solve if config else False)),
+                                       save=entry.get("save", data.get("save", True)),
+                                       stages=list(config.stages) if config else None,
+                                       property_cache=entry.get("property_cache",
+                                                                data.get("property_cache", False))))
+        if entry.get("restart_families") and len(entry_jobs) > 1 and entry_jobs[0].solve:
+            entry_jobs = _family_jobs(base_name, entry_jobs)
+        jobs.extend(entry_jobs)
+    if errors:
+        raise ConfigError(path, errors)
+    return jobs
+
+
+def _family_jobs(base_name, jobs):
+    """[內部] 同一專案的變體工作依族群合併 (只有一個變體的族群維持原本的工作)"""
+    from VariantFamily_V1 import plan_families
+
+    by_name = dict((job.name, job) for job in jobs)
+    merged = []
+    for i, family in enumerate(plan_families([(job.name, job.params) for job in jobs])):
+        if len(family.plan) == 1:
+            merged.append(by_name[family.names[0]])
+            continue
+        first = by_name[family.names[0]]
+        merged.append(BatchJob("{}__family{}".format(base_name, i + 1), first.project,
+                               params=first.params, solve=True, save=first.save,
+                               stages=first.stages, property_cache=first.property_cache,
+                               family=[{"name": entry["name"], "params": entry["params"]}
+                                       for entry in family.plan]))
+    return merged
+
+
+# ==========================================================
+# 執行後端
+# ==========================================================
+class FakeBackend(object):
+    """
+    測試用後端：不啟動 Mechanical，直接在同一行程中回傳報告
+    handler(job) 可自訂回傳的 report 或丟出例外模擬失敗
+    """
+
+    def __init__(self, handler=None, delay=0.0):
+        self.handler = handler
+        self.delay = delay
+
+    def run(self, job, job_dir):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.handler is not None:
+            return self.handler(job)
+        from Pipeline_V1 import STAGES
+        return {"status": "ok", "error": None,
+                "timings": dict((stage, self.delay) for stage in STAGES),
+                "results": {"key": {"project": job.project}}}
+
+
+class SubprocessBackend(object):
+    """
+    每個工作啟動一個無介面的 Mechanical 行程執行 BatchWorker_V1.py
+    工作內容經由 job.json 傳遞，結果由 result.json 讀回
+    """
+
+    def __init__(self, command=None, timeout=None, worker_script=WORKER_SCRIPT, poll_interval=1.0):
+        self.command = list(command or DEFAULT_MECHANICAL_COMMAND)
+        self.timeout = timeout
+        self.worker_script = worker_script
+        self.poll_interval = poll_interval
+
+    def run(self, job, job_dir):
+        job_path = os.path.join(job_dir, "job.json")
+        result_path = os.path.join(job_dir, "result.json")
+        log_path = os.path.join(job_dir, "mechanical.log")
+        if os.path.exists(result_path):
+            os.remove(result_path)
+
+        with open(job_path, "w") as f:
+            json.dump({"name": job.name, "project": job.project, "params": job.params,
+                       "solve": job.solve, "family": job.family,
+                       "save": job.save, "stages": job.stages,
+                       "property_cache": job.property_cache,
+                       "tool_dir": TOOL_DIR, "result_path": result_path},
+                      f, indent=1, sort_keys=True)
+
+        env = dict(os.environ)
+        env["SKY_CAE_JOB"] = job_path
+        cmd = [arg.replace("{script}", self.worker_script) for arg in self.command]
+
+        start = time.time()
+        with open(log_path, "w") as log:
+            proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, env=env, cwd=job_dir)
+            while proc.poll() is None:
+                if self.timeout and time.time() - start > self.timeout:
+                    proc.kill()
+                    proc.wait()
+                    return {"status": "timeout",
+                            "error": "超過時間限制 {} s".format(self.timeout)}
+                time.sleep(self.poll_interval)
+
+        if not os.path.exists(result_path):
+            return {"status": "failed",
+                    "error": "Mechanical 結束碼 {}，未產生結果 (見 {})".format(proc.returncode, log_path)}
+        with open(result_path, "r") as f:
+            return json.load(f)
+
+
+# ==========================================================
+# 批次執行
+# ==========================================================
+class BatchRunner(object):
+    """
+    批次執行器
+    負責：以 workers 個並行工作執行所有 BatchJob、收集結果、輸出報告
+    (每個工作由後端啟動獨立的 Mechanical 行程，因此以執行緒管理即可)
+    """
+
+    def __init__(self, backend=None, workers=2, work_dir=None, store=None, reuse=True):
+        """
+        store : RunStore, optional
+            有傳入時記錄每個工作；reuse=True 時相同請求直接取回先前成功的結果 (狀態為 cached)
+        """
+        self.backend = backend if backend is not None else SubprocessBackend()
+        self.workers = workers
+        self.store = store
+        self.reuse = reuse
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="SkyCAETool_batch_")
+        self.jobs = []
+        self.elapsed = None
+        self._print_lock = threading.Lock()
+
+    def _run_one(self, job):
+        job_dir = os.path.join(self.work_dir, job.name)
+        if not os.path.isdir(job_dir):
+            os.makedirs(job_dir)
+
+        request_key = None
+        if self.store is not None:
+            request_key = self.store.request_key(job.project, job.request_params(), job.stages,
+                                                 job.solve)
+            cached = self.store.lookup(request_key) if self.reuse else None
+            if cached is not None:
+                job.apply_report(cached, 0.0)
+                job.status = "cached"
+                print("[cached] {} (沿用執行紀錄 #{})".format(job.name, cached["cached_run_id"]))
+                return job
+
+        started = time.time()
+        try:
+            report = self.backend.run(job, job_dir)
+        except Exception as e:
+            report = {"status": "failed", "error": str(e), "traceback": traceback.format_exc()}
+        job.apply_report(report, time.time() - started)
+        if self.store is not None:
+            self.store.record(request_key, job.name, job.project, job.params, report,
+                              elapsed=job.elapsed, solve=job.solve, started=started)
+            if job.save and job.status == "ok":
+                # 工作結束時存檔，專案內容已改變：存檔後的請求雜湊也對應到這次結果
+                self.store.add_alias(self.store.request_key(job.project, job.request_params(),
+                                                            job.stages, job.solve), request_key)
+        with self._print_lock:
+            print("[{}] {} ({:.1f} s){}".format(job.status, job.name, job.elapsed,
+                                                "：" + str(job.error) if job.error else ""))
+        return job
+
+    def run(self, jobs):
+        self.jobs = list(jobs)
+        print("-> 批次執行 {} 個專案 (並行 {}) ...".format(len(self.jobs), self.workers))
+        start = time.time()
+        parallel_map(self._run_one, self.jobs, workers=self.workers, parallel=True,
+                     fallback_serial=False)
+        self.elapsed = time.time() - start
+        self.summary()
+        return self.jobs
+
+    def summary(self):
+        counts = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        print("-> 批次完成：{} (總耗時 {:.1f} s)".format(
+            ", ".join("{} x {}".format(k, v) for k, v in sorted(counts.items())),
+            self.elapsed or 0.0))
+        return counts
+
+    def write_report(self, path=None):
+        """輸出 JSON (完整內容) 與 CSV (每個專案一列：狀態、耗時、各階段耗時、關鍵結果)"""
+        if path is None:
+            path = os.path.join(self.work_dir, "batch_report.json")
+        with open(path, "w") as f:
+            json.dump({"elapsed": self.elapsed, "jobs": [job.to_dict() for job in self.jobs]},
+                      f, indent=1, sort_keys=True)
+
+        stage_keys = sorted(set(k for job in self.jobs for k in job.timings))
+        result_keys = sorted(set(k for job in self.jobs for k in job.results.get("key", {})))
+        csv_path = os.path.splitext(path)[0] + ".csv"
+        with open(csv_path, "w") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(["name", "status", "elapsed"] +
+                            ["t_" + k for k in stage_keys] + result_keys + ["error"])
+            for job in self.jobs:
+                key = job.results.get("key", {})
+                writer.writerow([job.name, job.status,
+                                 "" if job.elapsed is None else "{:.3f}".format(job.elapsed)] +
+                                ["{:.3f}".format(job.timings[k]) if k in job.timings else ""
+                                 for k in stage_keys] +
+                                [key.get(k, "") for k in result_keys] + [job.error or ""])
+        print("-> 批次報告：{}".format(path))
+        return path
+
+
+def runBatch(manifest_path, backend=None, workers=2, work_dir=None, report_path=None,
+             store=None, reuse=True):
+    """便利函式：讀取批次清單 -> 執行 -> 輸出報告，回傳 BatchRunner"""
+    runner = BatchRunner(backend=backend, workers=workers, work_dir=work_dir,
+                         store=store, reuse=reuse)
+    runner.run(load_batch_manifest(manifest_path))
+    runner.write_report(report_path)
+    return runner
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sky CAE Tool 多專案批次執行")
+    parser.add_argument("manifest", help="批次清單 (JSON)")
+    parser.add_argument("--workers", type=int, default=2, help="同時執行的 Mechanical 行程數")
+    parser.add_argument("--work-dir", default=None, help="工作與報告輸出資料夾")
+    parser.add_argument("--timeout", type=float, default=None, help="單一專案時間限制 (秒)")
+    parser.add_argument("--fake", action="store_true", help="使用 FakeBackend (不啟動 Mechanical)")
+    parser.add_argument("--db", default=None, help="執行紀錄資料庫 (SQLite) 路徑")
+    parser.add_argument("--no-reuse", action="store_true", help="不沿用執行紀錄中相同請求的結果")
+    args = parser.parse_args()
+
+    store = None
+    if args.db:
+        from RunStore_V1 import RunStore
+        store = RunStore(args.db)
+
+    backend = FakeBackend() if args.fake else SubprocessBackend(timeout=args.timeout)
+    runner = runBatch(args.manifest, backend=backend, workers=args.workers, work_dir=args.work_dir,
+                      store=store, reuse=not args.no_reuse)
+    sys.exit(0 if all(job.status in ("ok", "cached") for job in runner.jobs) else 1)
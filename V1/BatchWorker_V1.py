@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 批次模式的 Mechanical 端腳本 (由 BatchRunner_V1 的 SubprocessBackend 啟動)
+# Mechanical 以 -script 執行時無法傳遞參數，因此工作內容由環境變數 SKY_CAE_JOB
+# 指向的 job.json 提供；結果寫入 job.json 中指定的 result 路徑
+# ==========================================
+import json
+import os
+import sys
+import time
+import traceback
+
+JOB_ENV = "SKY_CAE_JOB"
+
+
+def _write_result(path, result):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(result, f, indent=1, sort_keys=True)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(tmp_path, path)
+
+
+def run_job(g, job):
+    """在 Mechanical 中執行單一工作：開啟專案 -> 執行流程 -> 存檔"""
+    if job["tool_dir"] not in sys.path:
+        sys.path.insert(0, job["tool_dir"])
+    from Manifest_V1 import ObjectManifest
+    from Pipeline_V1 import STAGES, env_from_globals, run_pipeline
+
+    ext_api = g["ExtAPI"]
+    start = time.time()
+    ext_api.DataModel.Project.Open(job["project"])
+    open_time = time.time() - start
+
+    env = env_from_globals(g)
+    env["model"] = ext_api.DataModel.Project.Model  # 開啟專案後要重新取得 Model
+    # 物件清單存放於專案資料夾 (開啟專案後才建立)，再次執行同一專案時沿用
+    manifest = ObjectManifest(ext_api)
+    if job.get("family"):
+        # 變體族群：同一個工作階段中由重啟點接續求解
+        from VariantFamily_V1 import combine_reports, runVariantFamilies
+        report = combine_reports(runVariantFamilies(
+            env, [(v["name"], v["params"]) for v in job["family"]],
+            stages=job.get("stages") or STAGES, manifest=manifest))
+    else:
+        report = run_pipeline(env, job.get("params"), stages=job.get("stages") or STAGES,
+                              solve=job.get("solve", False), run_name=job.get("name"),
+                              manifest=manifest, property_cache=job.get("property_cache", False))
+    report["timings"]["open"] = open_time
+
+    if job.get("save", True) and report["status"] == "ok":
+        start = time.time()
+        ext_api.DataModel.Project.Save()
+        report["timings"]["save"] = time.time() - start
+    return report
+
+
+def main(g):
+    job_path = os.environ.get(JOB_ENV)
+    if not job_path:
+        print("錯誤：未設定環境變數 {}".format(JOB_ENV))
+        return
+    with open(job_path, "r") as f:
+        job = json.load(f)
+
+    try:
+        report = run_job(g, job)
+    except Exception as e:
+        report = {"status": "failed", "error": str(e), "traceback": traceback.format_exc(),
+                  "timings": {}, "results": {}}
+    _write_result(job["result_path"], report)
+
+
+main(globals())
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 欄位式 (columnar) 二進位檔讀寫：每個欄位一個 .npy 檔
+# - 寫入只依賴標準函式庫 (array / struct)，可在 Mechanical 的 IronPython 中執行
+# - 讀取時若有 NumPy 則以 np.load(mmap_mode="r") 記憶體映射；
+#   CPython 無 NumPy 時以 mmap + memoryview 零複製讀取；其餘環境退回 array.fromfile
+# - append_column 建立的檔案預留較大的檔頭，之後追加資料只需改寫檔頭中的 shape
+# ==========================================
+import ast
+import struct
+import sys
+from array import array
+
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NPY_MAGIC = b"\x93NUMPY"
+
+# 可追加欄位的檔頭長度 (足夠容納任何列數的 shape 字串)
+APPEND_HEADER_SIZE = 256
+
+# array 型別碼 <-> NumPy descr (固定 little-endian)
+TYPECODE_TO_DESCR = {"d": "<f8", "f": "<f4", "i": "<i4", "b": "|i1", "B": "|u1"}
+DESCR_TO_TYPECODE = dict((v, k) for k, v in TYPECODE_TO_DESCR.items())
+
+
+def _npy_header(descr, shape, total_size=None):
+    """
+    [內部] 產生 NPY 1.0 檔頭 (總長度對齊 64 bytes)
+    total_size 指定時補空白到剛好該長度 (追加資料時原地改寫檔頭用)；放不下時回傳 None
+    """
+    if len(shape) == 1:
+        shape_str = "({},)".format(shape[0])
+    else:
+        shape_str = "(" + ", ".join(str(int(n)) for n in shape) + ")"
+    header = "{{'descr': '{}', 'fortran_order': False, 'shape': {}, }}".format(descr, shape_str)
+    total = len(NPY_MAGIC) + 2 + 2 + len(header) + 1
+    if total_size is None:
+        padding = (64 - total % 64) % 64
+    elif total > total_size:
+        return None
+    else:
+        padding = total_size - total
+    header += " " * padding + "\n"
+    return NPY_MAGIC + b"\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+def _as_little_endian(typecode, values):
+    """[內部] 轉成 array 並確保為 little-endian"""
+    if not isinstance(values, array) or values.typecode != typecode:
+        values = array(typecode, values)
+    if sys.byteorder != "little" and values.itemsize > 1:
+        values = array(typecode, values)
+        values.byteswap()
+    return values
+
+
+def write_column(path, typecode, values, shape=None, header_size=None):
+    """
+    寫入單一欄位
+    values : array / list / 任何可迭代的數值 (多維欄位請先攤平，並以 shape 指定)
+    header_size : 指定檔頭長度 (append_column 使用)
+    """
+    values = _as_little_endian(typecode, values)
+    if shape is None:
+        shape = (len(values),)
+
+    with open(path, "wb") as f:
+        f.write(_npy_header(TYPECODE_TO_DESCR[typecode], shape, header_size))
+        values.tofile(f)
+    return path
+
+
+def append_column(path, typecode, values, width=1):
+    """
+    追加資料到欄位檔 (不存在時建立)，回傳追加後的列數
+    先寫入資料再改寫檔頭：中途中斷時檔頭仍是舊的列數，多出的資料會被忽略
+    """
+    values = _as_little_endian(typecode, values)
+    if len(values) % width:
+        raise ValueError("資料長度 {} 不是欄寬 {} 的倍數".format(len(values), width))
+    rows = len(values) // width
+
+    def _shape(n):
+        return (n,) if width == 1 else (n, width)
+
+    try:
+        f = open(path, "r+b")
+    except IOError:
+        write_column(path, typecode, values, _shape(rows), header_size=APPEND_HEADER_SIZE)
+        return rows
+
+    with f:
+        descr, shape, offset = read_header(f)
+        if descr != TYPECODE_TO_DESCR[typecode] or tuple(shape[1:]) != _shape(0)[1:]:
+            raise ValueError("欄位格式不符: {} {} (追加 {} x {})".format(descr, shape, typecode, width))
+        total_rows = shape[0] + rows
+        header = _npy_header(descr, _shape(total_rows), offset)
+        if header is not None:
+            item_count = shape[0] * width
+            f.seek(offset + item_count * values.itemsize)
+            values.tofile(f)  # 不 truncate：Windows 上檔案被 mmap 時無法縮短
+            f.seek(0)
+            f.write(header)
+            return total_rows
+
+    # 舊格式 (檔頭沒有預留空間)：讀出後以可追加的格式重寫
+    old, _ = read_column(path, use_mmap=False)
+    merged = array(typecode, old.ravel().tolist() if hasattr(old, "ravel") else old)
+    merged.extend(values)
+    write_column(path, typecode, merged, _shape(total_rows), header_size=APPEND_HEADER_SIZE)
+    return total_rows
+
+
+def truncate_column(path, rows):
+    """
+    把欄位的列數縮減為 rows (只改寫檔頭；多出的資料之後會被追加覆蓋)
+    用於回復中斷的追加：讓各欄位與索引的列數一致
+    """
+    with open(path, "r+b") as f:
+        descr, shape, offset = read_header(f)
+        if shape[0] <= rows:
+            return shape[0]
+        header = _npy_header(descr, (rows,) + tuple(shape[1:]), offset)
+        f.seek(0)
+        f.write(header)
+    return rows
+
+
+def read_header(f):
+    """讀取 .npy 檔頭，回傳 (descr, shape, data_offset)"""
+    magic = f.read(6)
+    if magic != NPY_MAGIC:
+        raise ValueError("不是 .npy 檔案")
+    major = bytearray(f.read(2))[0]
+    if major == 1:
+        header_len = struct.unpack("<H", f.read(2))[0]
+        offset = 10 + header_len
+    else:
+        header_len = struct.unpack("<I", f.read(4))[0]
+        offset = 12 + header_len
+    header = ast.literal_eval(f.read(header_len).decode("latin1"))
+    if header.get("fortran_order"):
+        raise ValueError("不支援 Fortran order 的 .npy")
+    return header["descr"], tuple(header["shape"]), offset
+
+
+def read_column(path, use_mmap=True):
+    """
+    讀取單一欄位，回傳 (data, shape)
+    data：NumPy 可用時為 memmap (已 reshape)；否則為一維、可索引的 memoryview 或 array
+    """
+    if numpy is not None:
+        data = numpy.load(path, mmap_mode="r" if use_mmap else None)
+        return data, tuple(data.shape)
+
+    with open(path, "rb") as f:
+        descr, shape, offset = read_header(f)
+        typecode = DESCR_TO_TYPECODE[descr]
+        count = 1
+        for n in shape:
+            count *= n
+
+        if use_mmap and mmap is not None and count and hasattr(memoryview, "cast") \
+                and sys.byteorder == "little":
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mm)[offset:offset + count * array(typecode).itemsize]
+            return view.cast(typecode), shape
+
+        f.seek(offset)
+        data = array(typecode)
+        data.fromfile(f, count)
+        if sys.byteorder != "little" and data.itemsize > 1:
+            data.byteswap()
+        return data, shape
+
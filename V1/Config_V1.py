@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 執行參數設定檔 (JSON / YAML)
+# - 依 SCHEMA 驗證型別與範圍，在網格 / 求解之前就擋下錯誤的數值
+# - "extends" 繼承上層設定檔，"variants" 定義同一族群的變體
+# - 解析 + 驗證後的結果依檔案內容的 SHA-1 快取，大量變體重複讀取時不再解析
+#
+# 檔案格式：
+#   {"extends": "base.json",
+#    "stages": ["zface", "symmetry", "contact", "mesh", "bc", "solver", "post"],
+#    "solve": false,
+#    "params": {"mesh": {"element_size": 0.8}, ...},
+#    "variants": {"soft": {"params": {"contact": {"friction_coeff": 0.1}}}, ...}}
+# ==========================================
+import hashlib
+import json
+import os
+
+try:
+    import yaml  # CPython 環境選用；Mechanical 的 IronPython 通常沒有，只能讀 JSON
+except ImportError:
+    yaml = None
+
+try:
+    _STRING_TYPES = (str, unicode)  # IronPython 2.7
+except NameError:
+    _STRING_TYPES = (str,)
+
+from Pipeline_V1 import DEFAULT_PARAMS, STAGES, merge_params
+
+TOP_LEVEL_KEYS = ("extends", "stages", "solve", "params", "variants")
+
+
+class ConfigError(ValueError):
+    """設定檔格式或數值錯誤；errors 為所有錯誤訊息 (一次列出，不必逐一修正再重跑)"""
+
+    def __init__(self, source, errors):
+        self.source = source
+        self.errors = list(errors)
+        ValueError.__init__(self, "設定檔錯誤 ({}):\n  ".format(source) + "\n  ".join(self.errors))
+
+
+class Field(object):
+    """單一參數的型別與範圍限制"""
+
+    def __init__(self, kind, minimum=None, maximum=None, choices=None, item_kind=None):
+        self.kind = kind            # "float" / "int" / "bool" / "str" / "list" / "dict"
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = choices
+        self.item_kind = item_kind  # list 元素的型別 (None 表示不檢查)
+
+    def _check_scalar(self, kind, value):
+        if kind == "bool":
+            return isinstance(value, bool)
+        if kind == "int":
+            return isinstance(value, int) and not isinstance(value, bool)
+        if kind == "float":
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+        if kind == "str":
+            return isinstance(value, _STRING_TYPES)
+        if kind == "dict":
+            return isinstance(value, dict)
+        return True
+
+    def _check_range(self, name, value, errors):
+        if self.minimum is not None and value < self.minimum:
+            errors.append("{} = {} 小於下限 {}".format(name, value, self.minimum))
+        if self.maximum is not None and value > self.maximum:
+            errors.append("{} = {} 超過上限 {}".format(name, value, self.maximum))
+
+    def validate(self, name, value, errors):
+        if self.kind == "list":
+            if not isinstance(value, list):
+                errors.append("{} 應為 list，得到 {!r}".format(name, value))
+                return
+            if self.item_kind is not None:
+                for i, item in enumerate(value):
+                    if not self._check_scalar(self.item_kind, item):
+                        errors.append("{}[{}] 應為 {}，得到 {!r}".format(name, i, self.item_kind, item))
+                    elif self.item_kind in ("int", "float"):
+                        self._check_range("{}[{}]".format(name, i), item, errors)
+            return
+
+        if not self._check_scalar(self.kind, value):
+            errors.append("{} 應為 {}，得到 {!r}".format(name, self.kind, value))
+            return
+        if self.choices is not None and value not in self.choices:
+            errors.append("{} = {!r} 不在允許值 {} 之中".format(name, value, list(self.choices)))
+        if self.kind in ("int", "float"):
+            self._check_range(name, value, errors)
+
+
+# 各階段可設定的參數 (對應各工具 run* 函式的參數)；未列出的 key 視為錯字
+SCHEMA = {
+    "zface": {
+        "tolerance": Field("float", minimum=0.0),
+        "top_name": Field("str"),
+        "bottom_name": Field("str"),
+        "parallel": Field("bool"),
+        "workers": Field("int", minimum=1),
+    },
+    "symmetry": {
+        "axes": Field("list", item_kind="str"),
+        "tolerance": Field("float", minimum=0.0),
+        "area_tolerance": Field("float", minimum=0.0),
+        "apply": Field("bool"),
+        "keep": Field("str", choices=("positive", "negative")),
+        "parallel": Field("bool"),
+        "workers": Field("int", minimum=1),
+    },
+    "contact": {
+        "friction_coeff": Field("float", minimum=0.0, maximum=10.0),
+        "delete_existing_groups": Field("bool"),
+        "contact_name_typo_is_conatct": Field("bool"),
+        "chunk_size": Field("int", minimum=1),
+        "checkpoint_path": Field("str"),
+        "auto_tune": Field("bool"),
+        "tuning_rules": Field("str"),
+        "tuning_presets": Field("dict"),
+        "length_unit": Field("str", choices=("m", "mm", "cm", "in")),
+    },
+    "mesh": {
+        "element_size": Field("float", minimum=1e-6),
+        "is_quadratic": Field("bool"),
+        "do_contact_refine": Field("bool"),
+    },
+    "bc": {
+        "z_magnitude": Field("float"),
+        "direction_sign": Field("float", choices=(-1, 1, -1.0, 1.0)),
+        "rules": Field("list"),
+        "z_steps": Field("list", item_kind="float"),
+        "update_in_place": Field("bool"),
+    },
+    "solver": {
+        "num_steps": Field("int", minimum=1),
+        "end_time_list": Field("list", item_kind="float", minimum=0.0),
+        "auto_time_stepping": Field("bool"),
+        "initial_time_step": Field("float", minimum=0.0),
+        "min_time_step": Field("float", minimum=0.0),
+        "max_time_step": Field("float", minimum=0.0),
+        "large_deflection": Field("bool"),
+        "cores": Field("int", minimum=1, maximum=256),
+        "step_table": Field("list"),
+    },
+    "post": {
+        "add_basic": Field("bool"),
+        "add_contact": Field("bool"),
+        "add_force_probe": Field("bool"),
+        "add_bc_probes": Field("bool"),
+        "curve_dir": Field("str"),
+        "contact_stats_dir": Field("str"),
+        "result_cache_dir": Field("str"),
+        "evaluate": Field("bool"),
+    },
+    "analyses": {
+        "all": Field("bool"),
+        "select": Field("list"),
+        "max_concurrent_solves": Field("int", minimum=0),
+        "solve_timeout": Field("float", minimum=0.0),
+        "overrides": Field("dict"),
+    },
+    "recovery": {
+        "enabled": Field("bool"),
+        "max_attempts": Field("int", minimum=1, maximum=20),
+        "restart_points": Field("bool"),
+        "log_path": Field("str"),
+    },
+    "mesh_quality": {
+        "enabled": Field("bool"),
+        "thresholds": Field("dict"),
+        "max_bad_fraction": Field("float", minimum=0.0, maximum=1.0),
+        "worst": Field("int", minimum=0),
+        "export_dir": Field("str"),
+        "orientation": Field("float", choices=(1.0, -1.0)),
+    },
+}
+
+# mesh_quality.thresholds 可覆寫的門檻 (對應 MeshQuality_V1.DEFAULT_THRESHOLDS)
+MESH_QUALITY_THRESHOLDS = ("max_aspect", "min_jacobian", "max_skewness")
+
+
+def _check_solver(p, errors):
+    """[內部] Solver 參數之間的一致性"""
+    end_times = p.get("end_time_list")
+    if end_times is not None and isinstance(end_times, list):
+        if "num_steps" in p and len(end_times) != p["num_steps"]:
+            errors.append("solver.end_time_list 有 {} 個值，但 num_steps = {}".format(
+                len(end_times), p["num_steps"]))
+        for a, b in zip(end_times, end_times[1:]):
+            if b <= a:
+                errors.append("solver.end_time_list 必須遞增 ({} -> {})".format(a, b))
+                break
+    lo, mid, hi = p.get("min_time_step"), p.get("initial_time_step"), p.get("max_time_step")
+    if lo is not None and hi is not None and lo > hi:
+        errors.append("solver.min_time_step ({}) 大於 max_time_step ({})".format(lo, hi))
+    if mid is not None and lo is not None and hi is not None and not lo <= mid <= hi:
+        errors.append("solver.initial_time_step ({}) 不在 [{}, {}] 之間".format(mid, lo, hi))
+
+
+def validate_params(params, source="params"):
+    """驗證 {stage: {key: value}}；有錯誤時丟出 ConfigError (列出全部錯誤)"""
+    errors = []
+    for stage, values in (params or {}).items():
+        fields = SCHEMA.get(stage)
+        if fields is None:
+            errors.append("未知的階段 '{}' (可用: {})".format(stage, ", ".join(STAGES)))
+            continue
+        if not isinstance(values, dict):
+            errors.append("{} 應為 dict".format(stage))
+            continue
+        for key, value in values.items():
+            field = fields.get(key)
+            if field is None:
+                errors.append("{}.{} 不是可設定的參數".format(stage, key))
+            else:
+                field.validate("{}.{}".format(stage, key), value, errors)
+    # 各分析的覆寫同樣逐項驗證 (不可再巢狀 analyses)
+    overrides = (params or {}).get("analyses", {}).get("overrides")
+    if isinstance(overrides, dict) and not errors:
+        shared = dict((k, v) for k, v in params.items() if k != "analyses")
+        for name, layer in sorted(overrides.items()):
+            if not isinstance(layer, dict) or "analyses" in layer:
+                errors.append("analyses.overrides.{} 應為 {{stage: {{...}}}}".format(name))
+                continue
+            try:
+                validate_params(merge_params(shared, layer), source)
+            except ConfigError as e:
+                errors.extend("[{}] {}".format(name, msg) for msg in e.errors)
+    # 一致性檢查以實際執行的值 (預設值 + 設定) 為準
+    effective = merge_params(DEFAULT_PARAMS, params)
+    _check_solver(effective.get("solver") or {}, errors)
+    z_steps, end_times = effective["bc"].get("z_steps"), effective["solver"].get("end_time_list")
+    if isinstance(z_steps, list) and isinstance(end_times, list) and len(z_steps) != len(end_times):
+        errors.append("bc.z_steps 有 {} 個值，但 solver.end_time_list 有 {} 個".format(
+            len(z_steps), len(end_times)))
+    thresholds = effective["mesh_quality"].get("thresholds")
+    for key in sorted(thresholds if isinstance(thresholds, dict) else {}):
+        if key not in MESH_QUALITY_THRESHOLDS:
+            errors.append("mesh_quality.thresholds.{} 不是可設定的門檻 (可用: {})".format(
+                key, ", ".join(MESH_QUALITY_THRESHOLDS)))
+    if errors:
+        raise ConfigError(source, errors)
+    return params
+
+
+class RunConfig(object):
+    """驗證後的一組執行設定 (一個專案或一個變體)"""
+
+    def __init__(self, name, params, stages=STAGES, solve=False, source=None, digest=None):
+        self.name = name
+        self.params = params
+        self.stages = tuple(stages)
+        self.solve = solve
+        self.source = source
+        self.digest = digest  # 設定檔鏈 (含 extends) 的內容雜湊
+
+    def with_overrides(self, overrides):
+        """
+        回傳套用 overrides 後的新設定 (重新驗證)
+        overrides : {stage: {key: value}} 或 ["mesh.element_size=0.8", ...]
+        """
+        params = merge_params(self.params, parse_overrides(overrides))
+        validate_params(params, self.source or self.name)
+        return RunConfig(self.name, params, self.stages, self.solve, self.source, self.digest)
+
+    def to_dict(self):
+        return {"name": self.name, "params": self.params, "stages": list(self.stages),
+                "solve": self.solve, "source": self.source}
+
+
+def parse_overrides(overrides):
+    """把 "stage.key=value" 字串清單轉成 {stage: {key: value}} (value 以 JSON 解析，失敗則視為字串)"""
+    if not overrides:
+        return {}
+    if isinstance(overrides, dict):
+        return overrides
+    parsed = {}
+    for item in overrides:
+        path, eq, text = item.partition("=")
+        stage, dot, key = path.strip().partition(".")
+        if not eq or not dot or not key:
+            raise ConfigError(item, ["覆寫格式應為 stage.key=value"])
+        try:
+            value = json.loads(text)
+        except ValueError:
+            value = text.strip()
+        parsed.setdefault(stage, {})[key] = value
+    return parsed
+
+
+# ==========================================================
+# 讀檔 / 繼承 / 快取
+# ==========================================================
+# abs path -> (chain [(path, digest), ...], merged doc)
+_CACHE = {}
+CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _parse(path, raw):
+    """[內部] 依副檔名解析 JSON / YAML"""
+    text = raw.decode("utf-8")
+    if path.lower().endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise ConfigError(path, ["讀取 YAML 需要 PyYAML (Mechanical 中請改用 JSON)"])
+        doc = yaml.safe_load(text)
+    else:
+        try:
+            doc = json.loads(text)
+        except ValueError as e:
+            raise ConfigError(path, ["JSON 格式錯誤: {}".format(e)])
+    if not isinstance(doc, dict):
+        raise ConfigError(path, ["最上層應為 dict"])
+    unknown = [k for k in doc if k not in TOP_LEVEL_KEYS]
+    if unknown:
+        raise ConfigError(path, ["未知的欄位: {}".format(", ".join(sorted(unknown)))])
+    return doc
+
+
+def _merge_docs(parent, child):
+    """[內部] 子設定覆蓋父設定：params 逐階段合併，variants 依名稱取代，其餘欄位直接覆蓋"""
+    merged = dict(parent)
+    for key, value in child.items():
+        if key == "params":
+            merged["params"] = merge_params(parent.get("params"), value)
+        elif key == "variants":
+            variants = dict(parent.get("variants") or {})
+            variants.update(value or {})
+            merged["variants"] = variants
+        elif key != "extends":
+            merged[key] = value
+    return merged
+
+
+def _chain_valid(chain):
+    """[內部] 快取的設定檔鏈是否仍與磁碟上的內容相同"""
+    for path, digest in chain:
+        try:
+            if hashlib.sha1(_read_bytes(path)).hexdigest() != digest:
+                return False
+        except IOError:
+            return False
+    return True
+
+
+def _load_doc(path, seen=()):
+    """[內部] 讀取設定檔並展開 extends；回傳 (chain, merged doc)"""
+    path = os.path.abspath(path)
+    cached = _CACHE.get(path)
+    if cached is not None and _chain_valid(cached[0]):
+        CACHE_STATS["hits"] += 1
+        return cached
+    CACHE_STATS["misses"] += 1
+
+    if path in seen:
+        raise ConfigError(path, ["extends 形成循環: {}".format(" -> ".join(seen + (path,)))])
+    raw = _read_bytes(path)
+    doc = _parse(path, raw)
+    chain = [(path, hashlib.sha1(raw).hexdigest())]
+
+    parent_path = doc.get("extends")
+    if parent_path:
+        if not os.path.isabs(parent_path):
+            parent_path = os.path.join(os.path.dirname(path), parent_path)
+        parent_chain, parent_doc = _load_doc(parent_path, seen + (path,))
+        chain = parent_chain + chain
+        doc = _merge_docs(parent_doc, doc)
+
+    validate_params(doc.get("params"), path)
+    for name, variant in (doc.get("variants") or {}).items():
+        validate_params(merge_params(doc.get("params"), (variant or {}).get("params")),
+                        "{} [{}]".format(path, name))
+
+    result = (chain, doc)
+    _CACHE[path] = result
+    return result
+
+
+def _digest(chain):
+    return hashlib.sha1("|".join(d for _, d in chain).encode("ascii")).hexdigest()
+
+
+def load_config(path, overrides=None, variant=None):
+    """
+    讀取設定檔 (含 extends) 並驗證，回傳 RunConfig
+    variant : str, optional
+        套用 variants 中的某一個變體
+    """
+    chain, doc = _load_doc(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    params = doc.get("params") or {}
+    stages = doc.get("stages") or STAGES
+    solve = bool(doc.get("solve", False))
+
+    if variant is not None:
+        variants = doc.get("variants") or {}
+        if variant not in variants:
+            raise ConfigError(path, ["找不到變體 '{}' (可用: {})".format(
+                variant, ", ".join(sorted(variants)))])
+        spec = variants[variant] or {}
+        params = merge_params(params, spec.get("params"))
+        stages = spec.get("stages") or stages
+        solve = bool(spec.get("solve", solve))
+        name = "{}_{}".format(name, variant)
+
+    config = RunConfig(name, merge_params(params), stages, solve, os.path.abspath(path), _digest(chain))
+    for stage in config.stages:
+        if stage not in STAGES:
+            raise ConfigError(path, ["未知的階段 '{}'".format(stage)])
+    if overrides:
+        config = config.with_overrides(overrides)
+    return config
+
+
+def load_variants(path, overrides=None):
+    """讀取設定檔中所有變體 (沒有 variants 時回傳只含基本設定的 list)"""
+    _, doc = _load_doc(path)
+    names = sorted(doc.get("variants") or {})
+    if not names:
+        return [load_config(path, overrides)]
+    return [load_config(path, overrides, variant=name) for name in names]
+
+
+def clear_cache():
+    _CACHE.clear()
+    CACHE_STATS["hits"] = 0
+    CACHE_STATS["misses"] = 0
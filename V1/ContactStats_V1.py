@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 依接觸群組 ([ContGroup]_[ID]) 分組的接觸結果統計
+# - Contact Tool 對全部接觸只建立一組結果；數百個群組各建立一個結果物件太慢
+# - 改為匯出整體的節點結果表 (Pressure / Status / Penetration)，
+#   以「節點 Id -> 群組」索引掃描一次，同時累計所有群組的統計
+# ==========================================
+import re
+
+# ContactTool_V1 的命名規則：[Cont]_[Contact]_[ID] (或舊的拼字 Conatct) -> [ContGroup]_[ID]
+CONTACT_NS_PATTERN = r"^\[Cont\]_\[(?:Contact|Conatct)\]_\[(.*?)\]$"
+GROUP_NAME = "[ContGroup]_[{}]"
+
+# Contact Status 結果的數值
+STATUS_FAR_OPEN = 0
+STATUS_NEAR_OPEN = 1
+STATUS_SLIDING = 2
+STATUS_STICKING = 3
+
+# 匯出表格的欄位 (標題去掉單位、轉小寫) -> 統計使用的名稱
+COLUMN_ALIASES = {
+    "node number": "node",
+    "node id": "node",
+    "pressure": "pressure",
+    "status": "status",
+    "penetration": "penetration",
+}
+
+STAT_FIELDS = ("group", "nodes", "area", "contact_area", "max_pressure", "mean_pressure",
+               "sticking_fraction", "sliding_fraction", "max_penetration")
+
+
+def _column_name(header):
+    """[內部] "Pressure (MPa)" -> "pressure"；不認得的欄位保留原本的小寫名稱"""
+    name = re.sub(r"\(.*?\)", "", header).strip().lower()
+    return COLUMN_ALIASES.get(name, name)
+
+
+def read_result_table(path, with_headers=False):
+    """
+    讀取 Mechanical 結果的 ExportToTextFile 輸出 (Tab 分隔、第一列為標題)
+    回傳 dict：欄位名稱 -> float list (例如 {"node": [...], "pressure": [...]})
+    with_headers=True 時回傳 (欄位名稱 list (檔案中的順序), dict)
+    """
+    with open(path, "r") as f:
+        headers = [_column_name(h) for h in f.readline().rstrip("\r\n").split("\t")]
+        columns = [[] for _ in headers]
+        for line in f:
+            cells = line.rstrip("\r\n").split("\t")
+            if len(cells) < len(headers):
+                continue
+            for column, cell in zip(columns, cells):
+                column.append(float(cell))
+    table = dict(zip(headers, columns))
+    if with_headers:
+        return headers, table
+    return table
+
+
+class GroupIndex(object):
+    """
+    節點 Id -> 接觸群組的索引 (含每個節點的分攤面積)
+    節點同時屬於多個群組時歸給第一個群組 (相鄰群組共用邊界節點的情況)
+    """
+
+    def __init__(self):
+        self.groups = []   # 群組 ID，依加入順序
+        self.slot = {}     # 節點 Id -> 群組序號
+        self.area = {}     # 節點 Id -> 分攤面積
+
+    def __len__(self):
+        return len(self.groups)
+
+    def add_group(self, grp_id, node_ids, areas=None):
+        """加入一個群組；areas 為對應每個節點的分攤面積 (未提供時每個節點視為 1)"""
+        slot = len(self.groups)
+        self.groups.append(grp_id)
+        areas = areas if areas is not None else [1.0] * len(node_ids)
+        for node_id, area in zip(node_ids, areas):
+            owner = self.slot.setdefault(node_id, slot)
+            if owner == slot:
+                self.area[node_id] = self.area.get(node_id, 0.0) + area
+        return slot
+
+    @classmethod
+    def from_named_selections(cls, ext_api, model=None, mesh_name=None):
+        """
+        由 [Cont]_[Contact]_[ID] 的面建立索引
+        每個面的節點取自網格 (MeshRegionById)，面積平均分攤給該面的節點
+        """
+        model = model if model is not None else ext_api.DataModel.Project.Model
+        data_model = ext_api.DataModel
+        mesh = data_model.MeshDataByName(mesh_name or data_model.MeshNames[0])
+        geo_data = data_model.GeoData
+
+        index = cls()
+        for ns in model.NamedSelections.Children:
+            match = re.match(CONTACT_NS_PATTERN, ns.Name)
+            if not match:
+                continue
+            node_ids, areas = [], []
+            for face_id in ns.Location.Ids:
+                face_nodes = list(mesh.MeshRegionById(face_id).NodeIds)
+                if not face_nodes:
+                    continue
+                share = geo_data.GeoEntityById(face_id).Area / len(face_nodes)
+                node_ids.extend(face_nodes)
+                areas.extend([share] * len(face_nodes))
+            index.add_group(match.group(1), node_ids, areas)
+        return index
+
+
+def contact_group_stats(index, node_ids, pressure, status=None, penetration=None):
+    """
+    掃描一次節點結果，回傳每個群組的統計 (dict list，順序同 index.groups)
+
+    接觸中的節點：有 status 時為 Sliding / Sticking，否則為 pressure > 0
+    mean_pressure 為接觸中節點的面積加權平均；
+    sticking / sliding_fraction 為黏著 / 滑動面積佔接觸面積的比例
+    """
+    n = len(index.groups)
+    count = [0] * n
+    area = [0.0] * n
+    contact_area = [0.0] * n
+    pressure_area = [0.0] * n
+    sticking_area = [0.0] * n
+    sliding_area = [0.0] * n
+    max_pressure = [None] * n
+    max_penetration = [None] * n
+
+    slot_of = index.slot.get
+    area_of = index.area.get
+    has_status = status is not None
+    if status is None:
+        status = [None] * len(node_ids)
+    if penetration is None:
+        penetration = [None] * len(node_ids)
+
+    for node_id, p, st, pen in zip(node_ids, pressure, status, penetration):
+        slot = slot_of(int(node_id))
+        if slot is None:
+            continue
+        a = area_of(int(node_id), 0.0)
+        count[slot] += 1
+        area[slot] += a
+        if max_pressure[slot] is None or p > max_pressure[slot]:
+            max_pressure[slot] = p
+        if pen is not None and (max_penetration[slot] is None or pen > max_penetration[slot]):
+            max_penetration[slot] = pen
+        if st is None:
+            if p <= 0.0:
+                continue
+        elif st < STATUS_SLIDING:
+            continue
+        elif st >= STATUS_STICKING:
+            sticking_area[slot] += a
+        else:
+            sliding_area[slot] += a
+        contact_area[slot] += a
+        pressure_area[slot] += p * a
+
+    stats = []
+    for slot, grp_id in enumerate(index.groups):
+        c_area = contact_area[slot]
+        stats.append({
+            "group": grp_id,
+            "nodes": count[slot],
+            "area": area[slot],
+            "contact_area": c_area,
+            "max_pressure": max_pressure[slot],
+            "mean_pressure": pressure_area[slot] / c_area if c_area else 0.0,
+            "sticking_fraction": sticking_area[slot] / c_area if c_area and has_status else None,
+            "sliding_fraction": sliding_area[slot] / c_area if c_area and has_status else None,
+            "max_penetration": max_penetration[slot],
+        })
+    return stats
+
+
+def write_group_stats_csv(stats, path):
+    """把 contact_group_stats 的結果寫成 CSV (每個群組一列)"""
+    with open(path, "w") as f:
+        f.write(",".join(STAT_FIELDS) + "\n")
+        for row in stats:
+            f.write(",".join("" if row[k] is None else str(row[k]) for k in STAT_FIELDS) + "\n")
+    return path
+
+
+def print_group_stats(stats, top=20):
+    """列出最大接觸壓力最高的前 top 個群組"""
+    rows = sorted(stats, key=lambda r: r["max_pressure"] or 0.0, reverse=True)[:top]
+    print("-> 接觸群組統計 ({} 組，依最大壓力排序)：".format(len(stats)))
+    for r in rows:
+        print("   {:<24} 最大壓力 {:>10.4g}  平均 {:>10.4g}  接觸面積 {:>10.4g}".format(
+            GROUP_NAME.format(r["group"]), r["max_pressure"] or 0.0, r["mean_pressure"],
+            r["contact_area"]))
@@ -1,5 +1,11 @@
 # -*- coding: utf-8 -*-
+import json
+import os
 import re
+import time
+
+from IdSet_V1 import IdSet
+from TransactionBatch_V1 import run_in_transaction
 
 class ContactTool(object):
     """
@@ -10,9 +16,15 @@ class ContactTool(object):
     def __init__(self, ext_api, model=None, transaction_cls=None,
                  selection_type_enum=None,
                  data_model_object_category=None,
-                 contact_type_enum=None):
+                 contact_type_enum=None,
+                 manifest=None,
+                 batcher=None,
+                 tuner=None):
         """
         初始化 Worker，接收所有需要的「工具」與「權限」。
+        manifest : ObjectManifest (可選)，有傳入時只清除本工具建立過的群組
+        batcher : TransactionBatcher (可選)，有傳入時清除與建立會合併進共用的 Transaction
+        tuner : ContactTuner (可選)，有傳入時依實測的初始間隙調整每個 Region 的接觸設定
         """
         self.api = ext_api
         self.model = model if model is not None else ext_api.DataModel.Project.Model
@@ -20,20 +32,31 @@ class ContactTool(object):
         self.selection_type_enum = selection_type_enum
         self.data_model_object_category = data_model_object_category
         self.contact_type_enum = contact_type_enum
+        self.manifest = manifest
+        self.batcher = batcher
+        self.tuner = tuner
         
         # 快捷存取 SelectionManager
         self.sel_mgr = self.api.SelectionManager
 
     def clear_existing_groups(self):
         """[功能] 刪除 Connections 下所有的 Connection Group"""
+        if self.manifest is not None:
+            # 只刪除本工具先前建立的群組 (以 ObjectId 直接取回)
+            def _do_delete_tracked():
+                count = self.manifest.delete_tracked("ContactTool", key="groups")
+                print("已清理 {} 個舊的接觸群組。".format(count))
+                return count
+            return run_in_transaction(_do_delete_tracked, self.transaction_cls, self.batcher,
+                                      tool="ContactTool")
+
         connections = self.model.Connections
-        target_groups = list(connections.Children)
         
         # --- 修正開始 ---
         # 移除 nonlocal，改用 return 回傳刪除數量
         def _do_delete():
             local_count = 0 
-            for group in target_groups:
+            for group in list(connections.Children):
                 if self.data_model_object_category and \
                    group.DataModelObjectCategory == self.data_model_object_category.ConnectionGroup:
                     group.Delete()
@@ -41,16 +64,11 @@ class ContactTool(object):
                 elif self.data_model_object_category is None:
                     group.Delete()
                     local_count += 1
+            print("已清理 {} 個舊的接觸群組。".format(local_count))
             return local_count 
         # --- 修正結束 ---
 
-        if self.transaction_cls:
-            with self.transaction_cls():
-                count = _do_delete() # 接收回傳值
-        else:
-            count = _do_delete() # 接收回傳值
-            
-        print("已清理 {} 個舊的接觸群組。".format(count))
+        return run_in_transaction(_do_delete, self.transaction_cls, self.batcher, tool="ContactTool")
 
     def _scan_target_ids(self, ns_list):
         """[內部] 掃描 NS，找出所有 [Cont]_[Target]_[ID] 的 ID"""
@@ -67,12 +85,212 @@ class ContactTool(object):
         return sorted(list(set(found_ids)))
 
     def _get_ids_from_ns(self, ns_list, ns_name):
-        """[內部] 輔助函式：取得特定 NS 名稱內的幾何 ID"""
+        """[內部] 輔助函式：取得特定 NS 名稱內的幾何 ID (IdSet，已排序去重)"""
         # Python 2.7 iterator syntax
         target_ns = next((x for x in ns_list if x.Name == ns_name), None)
         if target_ns and target_ns.Location.Ids.Count > 0:
-            return list(target_ns.Location.Ids)
-        return []
+            return IdSet.from_selection(target_ns)
+        return IdSet()
+
+    def _add_region(self, group, grp_id, run_no, t_id, c_id, friction_coeff):
+        """[內部] 在群組下建立單一 Contact Region (Target: t_id / Contact: c_id)"""
+        cr = group.AddContactRegion()
+        cr.Name = "Pair_{}_Run_{}".format(grp_id, run_no)
+        
+        # 設定 Target Side
+        if self.selection_type_enum:
+            sel_t = self.sel_mgr.CreateSelectionInfo(self.selection_type_enum.GeometryEntities)
+            sel_t.Ids = [t_id]
+            cr.TargetLocation = sel_t
+            
+            # 設定 Source (Contact) Side
+            sel_c = self.sel_mgr.CreateSelectionInfo(self.selection_type_enum.GeometryEntities)
+            sel_c.Ids = [c_id]
+            cr.SourceLocation = sel_c
+        else:
+             print("錯誤：未提供 SelectionTypeEnum，無法設定幾何位置。")
+
+        # 設定物理屬性
+        if self.contact_type_enum:
+            cr.ContactType = self.contact_type_enum.Frictional
+            cr.FrictionCoefficient = friction_coeff
+
+        # Pinball / 剛性 / Interface Treatment 依實測的初始間隙設定 (見 ContactTuning_V1)
+        if self.tuner is not None:
+            self.tuner.tune(cr, t_id, c_id)
+        return cr
+
+    def plan_contact_pairs(self, contact_name_typo_is_conatct=False):
+        """
+        只讀取 NS，列出所有要建立的接觸對 (不修改資料模型)
+        回傳 [(grp_id, run_no, t_id, c_id), ...]，順序與 create_grouped_contacts 相同
+        """
+        ns_list = self.model.NamedSelections.Children
+        tag = "Conatct" if contact_name_typo_is_conatct else "Contact"
+
+        plan = []
+        for grp_id in self._scan_target_ids(ns_list):
+            t_name = "[Cont]_[Target]_[{}]".format(grp_id)
+            c_name = "[Cont]_[{}]_[{}]".format(tag, grp_id)
+            t_ids = self._get_ids_from_ns(ns_list, t_name)
+            c_ids = self._get_ids_from_ns(ns_list, c_name)
+            if not t_ids or not c_ids:
+                print("群組 [{}] 資料不全 (尋找 {} 失敗)，跳過。".format(grp_id, c_name))
+                continue
+
+            run_no = 1
+            for t_id in t_ids:
+                for c_id in c_ids:
+                    plan.append((grp_id, run_no, t_id, c_id))
+                    run_no += 1
+        return plan
+
+    # ----------------------------------------------------------
+    # 分批 (Chunked) 建立：大量接觸對時分段提交，可中斷續跑
+    # ----------------------------------------------------------
+    def _load_checkpoint(self, checkpoint_path, signature):
+        """[內部] 讀取 checkpoint；內容與本次計畫不符時視為重新開始"""
+        if not checkpoint_path or not os.path.isfile(checkpoint_path):
+            return {"signature": signature, "done": 0, "groups": {}}
+        try:
+            with open(checkpoint_path, "r") as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            data = None
+        if not data or data.get("signature") != signature:
+            print("   Checkpoint 與目前的接觸計畫不符，將從頭開始。")
+            return {"signature": signature, "done": 0, "groups": {}}
+        return data
+
+    def _save_checkpoint(self, checkpoint_path, state):
+        if not checkpoint_path:
+            return
+        tmp_path = checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        os.rename(tmp_path, checkpoint_path)
+
+    def _find_group(self, grp_id, object_id=None):
+        """[內部] 續跑時取回已建立的群組 (優先用 ObjectId，找不到再比對名稱)"""
+        if object_id is not None:
+            try:
+                group = self.api.DataModel.GetObjectById(object_id)
+                if group is not None:
+                    return group
+            except Exception:
+                pass
+        name = "[ContGroup]_[{}]".format(grp_id)
+        return next((g for g in self.model.Connections.Children if g.Name == name), None)
+
+    def create_grouped_contacts_chunked(self, friction_coeff=0.2, contact_name_typo_is_conatct=False,
+                                        chunk_size=500, checkpoint_path=None, progress_cb=None,
+                                        delete_existing_groups=False):
+        """
+        [主要功能] 分批建立接觸：每 chunk_size 個 Contact Region 提交一次 Transaction，
+        每批完成後寫入 checkpoint，中斷後以相同參數重跑會從上次完成的位置繼續。
+
+        Parameters
+        ----------
+        chunk_size : int
+            每個 Transaction 建立的 Contact Region 數量
+        checkpoint_path : str, optional
+            進度檔路徑 (JSON)；全部完成後會自動刪除
+        progress_cb : callable, optional
+            progress_cb(done, total, regions_per_sec)，每批完成後呼叫
+        delete_existing_groups : bool
+            從頭開始時 (沒有可用的 checkpoint) 先清除舊群組；續跑時不清除
+
+        Returns
+        -------
+        dict
+            {"total", "created", "chunks", "seconds", "regions_per_sec"}
+        """
+        plan = self.plan_contact_pairs(contact_name_typo_is_conatct)
+        if not plan:
+            print("警告：未掃描到符合 [Cont]_[Target]_[ID] 格式的 Named Selection。")
+            return {"total": 0, "created": 0, "chunks": 0, "seconds": 0.0, "regions_per_sec": 0.0}
+
+        total = len(plan)
+        signature = "{}|{}|{}|{}".format(total, plan[0], plan[-1], friction_coeff)
+        state = self._load_checkpoint(checkpoint_path, signature)
+        start_index = int(state.get("done", 0))
+        groups = {}
+
+        if start_index:
+            print("--- 續跑：已完成 {} / {} 個 Contact Region ---".format(start_index, total))
+            # 上次中斷的那一批可能已建立一部分 Region，先移除以免重複
+            pending_names = set("Pair_{}_Run_{}".format(g, r)
+                                for g, r, _, _ in plan[start_index:start_index + chunk_size])
+            for grp_id in sorted(set(g for g, _, _, _ in plan[start_index:start_index + chunk_size])):
+                group = self._find_group(grp_id, state["groups"].get(grp_id))
+                if group is None:
+                    continue
+                for child in list(group.Children):
+                    if child.Name in pending_names:
+                        child.Delete()
+        else:
+            # 只有 checkpoint 驗證通過才算續跑；不符或不存在時從頭開始，先清除舊群組以免重複
+            if delete_existing_groups:
+                self.clear_existing_groups()
+            print("--- 開始執行：分批建立 {} 個 Contact Region (每批 {}) ---".format(total, chunk_size))
+
+        connections = self.model.Connections
+        created = 0
+        chunks = 0
+        t_start = time.time()
+
+        def _get_group(grp_id):
+            group = groups.get(grp_id)
+            if group is None:
+                # 續跑時中斷的那一批可能已建立群組，但 ObjectId 尚未寫入 checkpoint：依名稱取回
+                if start_index or grp_id in state["groups"]:
+                    group = self._find_group(grp_id, state["groups"].get(grp_id))
+                if group is None:
+                    group = connections.AddConnectionGroup()
+                    group.Name = "[ContGroup]_[{}]".format(grp_id)
+                    if self.manifest is not None:
+                        self.manifest.record("ContactTool", group, key="groups")
+                    state["groups"][grp_id] = int(group.ObjectId)
+                groups[grp_id] = group
+            return group
+
+        for index in range(start_index, total, chunk_size):
+            chunk = plan[index:index + chunk_size]
+
+            def _do_chunk():
+                for grp_id, run_no, t_id, c_id in chunk:
+                    self._add_region(_get_group(grp_id), grp_id, run_no, t_id, c_id, friction_coeff)
+
+            t_chunk = time.time()
+            run_in_transaction(_do_chunk, self.transaction_cls, tool="ContactTool")
+            created += len(chunk)
+            chunks += 1
+
+            state["done"] = index + len(chunk)
+            self._save_checkpoint(checkpoint_path, state)
+            if self.manifest is not None:
+                self.manifest.save()
+
+            elapsed = time.time() - t_start
+            rate = created / elapsed if elapsed > 0 else 0.0
+            chunk_rate = len(chunk) / max(time.time() - t_chunk, 1e-9)
+            if progress_cb is not None:
+                progress_cb(state["done"], total, rate)
+            else:
+                print("   進度: {} / {} ({:.1f}%)，本批 {:.1f} regions/s，平均 {:.1f} regions/s".format(
+                    state["done"], total, 100.0 * state["done"] / total, chunk_rate, rate))
+
+        if checkpoint_path and os.path.isfile(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        seconds = time.time() - t_start
+        stats = {"total": total, "created": created, "chunks": chunks, "seconds": seconds,
+                 "regions_per_sec": created / seconds if seconds > 0 else 0.0}
+        print("完成：建立 {} 個 Contact Region，{} 批，{:.1f} regions/s".format(
+            created, chunks, stats["regions_per_sec"]))
+        return stats
 
     def create_grouped_contacts(self, friction_coeff=0.2, contact_name_typo_is_conatct=False):
         """
@@ -97,6 +315,8 @@ class ContactTool(object):
                 # A. 建立新群組
                 new_group = connections.AddConnectionGroup()
                 new_group.Name = "[ContGroup]_[{}]".format(grp_id)
+                if self.manifest is not None:
+                    self.manifest.record("ContactTool", new_group, key="groups")
                 
                 # B. 決定 NS 名稱 (處理拼字)
                 tag = "Conatct" if contact_name_typo_is_conatct else "Contact"
@@ -115,36 +335,15 @@ class ContactTool(object):
                 count = 1
                 for t_id in t_ids:
                     for c_id in c_ids:
-                        cr = new_group.AddContactRegion()
-                        cr.Name = "Pair_{}_Run_{}".format(grp_id, count)
-                        
-                        # 設定 Target Side
-                        if self.selection_type_enum:
-                            sel_t = self.sel_mgr.CreateSelectionInfo(self.selection_type_enum.GeometryEntities)
-                            sel_t.Ids = [t_id]
-                            cr.TargetLocation = sel_t
-                            
-                            # 設定 Source (Contact) Side
-                            sel_c = self.sel_mgr.CreateSelectionInfo(self.selection_type_enum.GeometryEntities)
-                            sel_c.Ids = [c_id]
-                            cr.SourceLocation = sel_c
-                        else:
-                             print("錯誤：未提供 SelectionTypeEnum，無法設定幾何位置。")
-
-                        # 設定物理屬性
-                        if self.contact_type_enum:
-                            cr.ContactType = self.contact_type_enum.Frictional
-                            cr.FrictionCoefficient = friction_coeff
-                        
+                        self._add_region(new_group, grp_id, count, t_id, c_id, friction_coeff)
                         count += 1
                 
                 print("建立群組: {} ({} 對)".format(new_group.Name, count-1))
 
-        if self.transaction_cls:
-            with self.transaction_cls():
-                _do_create()
-        else:
-            _do_create()
+            if self.manifest is not None:
+                self.manifest.save()
+
+        return run_in_transaction(_do_create, self.transaction_cls, self.batcher, tool="ContactTool")
 
 def runContact(ext_api, model=None, transaction_cls=None,
                    selection_type_enum=None,
@@ -152,14 +351,43 @@ def runContact(ext_api, model=None, transaction_cls=None,
                    contact_type=None,
                    friction_coeff=0.2,
                    delete_existing_groups=True,
-                   contact_name_typo_is_conatct=False):
+                   contact_name_typo_is_conatct=False,
+                   manifest=None,
+                   batcher=None,
+                   chunk_size=None,
+                   checkpoint_path=None,
+                   tuner=None):
     """
     Caller 呼叫用的便利函式
+    chunk_size : int, optional
+        指定時改用分批建立 (每批一個 Transaction，可搭配 checkpoint_path 中斷續跑)；
+        分批模式會自行管理 Transaction，不會排入 batcher
+    tuner : ContactTuner, optional
+        依實測的初始間隙調整 Pinball / 剛性 / Interface Treatment (見 ContactTuning_V1)
     """
     tool = ContactTool(ext_api, model=model, transaction_cls=transaction_cls,
-                       selection_type_enum=selection_type_enum, data_model_object_category=data_model_object_category, contact_type_enum=contact_type)
+                       selection_type_enum=selection_type_enum, data_model_object_category=data_model_object_category, contact_type_enum=contact_type,
+                       manifest=manifest,
+                       batcher=batcher,
+                       tuner=tuner)
+    if manifest is not None:
+        manifest.begin_run("ContactTool")
+
+    if chunk_size:
+        tool.batcher = None  # 分批模式自行管理 Transaction
+        # 清除舊群組與否由驗證後的 checkpoint 決定 (可續跑時不能先清除，否則會把已完成的群組刪掉)
+        return tool.create_grouped_contacts_chunked(friction_coeff, contact_name_typo_is_conatct,
+                                                    chunk_size=chunk_size,
+                                                    checkpoint_path=checkpoint_path,
+                                                    delete_existing_groups=delete_existing_groups)
 
     if delete_existing_groups:
         tool.clear_existing_groups()
+
+    if batcher is not None:
+        # 整個建立流程 (含掃描 NS) 排入批次，才看得到批次中前面步驟建立的 NS
+        return run_in_transaction(
+            lambda: tool.create_grouped_contacts(friction_coeff, contact_name_typo_is_conatct),
+            None, batcher, tool="ContactTool")
         
     tool.create_grouped_contacts(friction_coeff, contact_name_typo_is_conatct)
\ No newline at end of file
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 接觸設定自動調整 (依實測的初始間隙 / 干涉)
+# - 每個接觸對：把 Contact 面上的取樣點投影到 Target 面，量測帶正負號的距離
+#   (正 = 間隙、負 = 干涉)，依接觸面尺寸分成 interference / touching / near_gap / open_gap
+# - 每一類套用一組預設 (preset)：Pinball 半徑、Normal Stiffness Factor、剛性更新、
+#   Interface Treatment、Detection Method
+# - 類別 -> preset 的規則可由過去的收斂資料學習 (learn_rules：RunStore 中各 preset 的
+#   每子步平衡迭代數)，輸出成 JSON 供 Mechanical 端讀取 (IronPython 沒有 sqlite3)
+# ==========================================
+import json
+import math
+import os
+
+# 各類別的判斷比例 (相對於接觸面尺寸 sqrt(面積))
+TOUCH_RATIO = 1e-4     # |距離| 小於此比例視為剛好接觸
+NEAR_GAP_RATIO = 0.05  # 間隙小於此比例視為小間隙
+
+GAP_CLASSES = ("interference", "touching", "near_gap", "open_gap")
+
+# 預設組合：pinball_factor 為 Pinball 半徑 / 特徵距離；None 表示保留 Mechanical 預設值
+# update_stiffness / interface_treatment / detection_method 為列舉成員名稱
+PRESETS = {
+    "default": {},
+    "tight_fit": {"pinball_factor": 2.0, "stiffness_factor": 1.0,
+                  "update_stiffness": "EachIteration",
+                  "interface_treatment": "AddOffsetRampedEffects",
+                  "detection_method": "NodalProjectedNormalFromContact"},
+    "soft_touch": {"pinball_factor": 2.0, "stiffness_factor": 0.1,
+                   "update_stiffness": "EachIteration",
+                   "interface_treatment": "AdjustToTouch",
+                   "detection_method": "NodalProjectedNormalFromContact"},
+    "near_gap": {"pinball_factor": 1.5, "stiffness_factor": 1.0,
+                 "update_stiffness": "EachIteration",
+                 "detection_method": "NodalProjectedNormalFromContact"},
+    "open_gap": {"pinball_factor": 1.2, "stiffness_factor": 1.0},
+}
+DEFAULT_RULES = {"interference": "tight_fit", "touching": "soft_touch",
+                 "near_gap": "near_gap", "open_gap": "open_gap"}
+
+# preset 欄位 -> (Contact Region 屬性, contact_enums 的 key)
+ENUM_SETTINGS = (
+    ("update_stiffness", "UpdateStiffness", "update_stiffness"),
+    ("interface_treatment", "InterfaceTreatment", "interface_treatment"),
+    ("detection_method", "DetectionMethod", "detection_method"),
+)
+
+# 取樣點：Contact 面的參數座標 (另加重心與頂點)
+SAMPLE_PARAMS = (0.1, 0.5, 0.9)
+
+
+def _xyz(p):
+    return (p[0], p[1], p[2]) if not hasattr(p, "X") else (p.X, p.Y, p.Z)
+
+
+def _sub(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _unit(v):
+    n = math.sqrt(_dot(v, v))
+    return (v[0] / n, v[1] / n, v[2] / n) if n > 0 else (0.0, 0.0, 0.0)
+
+
+def sample_points(face):
+    """Contact 面上的取樣點：重心 + 頂點 + 參數格點 (讀取失敗的部分略過)"""
+    points = [_xyz(face.Centroid)]
+    try:
+        points.extend(_xyz(v) for v in face.Vertices)
+    except Exception:
+        pass
+    for u in SAMPLE_PARAMS:
+        for v in SAMPLE_PARAMS:
+            try:
+                points.append(_xyz(face.PointAtParam(u, v)))
+            except Exception:
+                pass
+    return points
+
+
+def signed_distance(target, point):
+    """
+    點到 Target 面的帶正負號距離 (沿 Target 法向量；正 = 間隙、負 = 干涉)
+    以 ParamAtPoint 投影到曲面上；不支援時以重心處的切平面近似
+    """
+    try:
+        u, v = list(target.ParamAtPoint(list(point)))[:2]
+        foot = _xyz(target.PointAtParam(u, v))
+        normal = _unit(_xyz(target.NormalAtParam(u, v)))
+    except Exception:
+        foot = _xyz(target.Centroid)
+        normal = _unit(_xyz(target.NormalAtParam(0.5, 0.5)))
+    return _dot(_sub(point, foot), normal)
+
+
+def measure_pair(geo_data, target_id, contact_id):
+    """
+    量測一個接觸對的初始間隙
+    回傳 {"min", "max", "mean", "size", "samples"}：距離統計與接觸面尺寸 sqrt(面積)
+    """
+    target = geo_data.GeoEntityById(target_id)
+    contact = geo_data.GeoEntityById(contact_id)
+    distances = [signed_distance(target, p) for p in sample_points(contact)]
+    try:
+        size = math.sqrt(max(float(contact.Area), 0.0))
+    except Exception:
+        size = 0.0
+    return {"min": min(distances), "max": max(distances),
+            "mean": sum(distances) / len(distances), "size": size, "samples": len(distances)}
+
+
+def classify_gap(measure, touch_ratio=TOUCH_RATIO, near_ratio=NEAR_GAP_RATIO):
+    """依最近距離分類：interference / touching / near_gap / open_gap"""
+    tol = touch_ratio * measure["size"]
+    closest = measure["min"]
+    if closest < -tol:
+        return "interference"
+    if closest <= tol:
+        return "touching"
+    if closest <= near_ratio * measure["size"]:
+        return "near_gap"
+    return "open_gap"
+
+
+def pinball_radius(measure, factor, min_ratio=0.01):
+    """Pinball 半徑：factor x max(最近距離的絕對值, min_ratio x 接觸面尺寸)"""
+    return factor * max(abs(measure["min"]), min_ratio * measure["size"])
+
+
+def load_rules(path):
+    """
+    讀取規則檔 {"rules": {類別: preset}, "presets": {名稱: {...}}}
+    檔案中的 presets 會加入 / 覆蓋內建的 PRESETS；沒有檔案時回傳內建規則
+    """
+    rules, presets = dict(DEFAULT_RULES), dict(PRESETS)
+    if path and os.path.isfile(path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        presets.update(data.get("presets") or {})
+        rules.update(data.get("rules") or {})
+    return rules, presets
+
+
+class ContactTuner(object):
+    """
+    接觸設定自動調整
+    負責：量測接觸對的初始間隙、依規則選擇 preset、寫入 Contact Region、彙整各類別的數量
+    由 ContactTool 在建立每個 Contact Region 後呼叫 tune()
+    """
+
+    def __init__(self, geo_data, quantity_cls=None, contact_enums=None, rules_path=None,
+                 length_unit="mm", touch_ratio=TOUCH_RATIO, near_ratio=NEAR_GAP_RATIO,
+                 preset_overrides=None):
+        """
+        geo_data : ExtAPI.DataModel.GeoData
+        contact_enums : dict (可選)，{"pinball_region": ContactPinballType,
+            "normal_stiffness": ContactNormalStiffness, "update_stiffness": UpdateContactStiffness,
+            "interface_treatment": ContactInitialEffect, "detection_method": ContactDetectionPoint}
+            未提供的列舉對應的設定會略過
+        length_unit : GeoData 座標的長度單位 (Pinball 半徑的 Quantity 單位)
+        preset_overrides : dict (可選)，{類別: preset}，本次執行改用的 preset (覆蓋規則檔)；
+            以變體分別指定不同 preset，learn_rules 才有不同 preset 的資料可比較
+        """
+        self.geo_data = geo_data
+        self.Quantity = quantity_cls
+        self.enums = dict(contact_enums or {})
+        self.rules_path = rules_path
+        self.rules, self.presets = load_rules(rules_path)
+        for gap_class, name in sorted((preset_overrides or {}).items()):
+            if gap_class not in GAP_CLASSES:
+                raise ValueError("未知的接觸類別: {} (可用: {})".format(gap_class, ", ".join(GAP_CLASSES)))
+            if name not in self.presets:
+                raise ValueError("未知的 preset: {} (可用: {})".format(name, ", ".join(sorted(self.presets))))
+            self.rules[gap_class] = name
+        self.length_unit = length_unit
+        self.touch_ratio = touch_ratio
+        self.near_ratio = near_ratio
+        self.records = []  # [(region 名稱, 類別, preset, 量測結果)]
+        self.skipped = {}  # 因列舉未注入或屬性寫入失敗而略過的設定 -> 次數
+
+    def choose(self, measure):
+        gap_class = classify_gap(measure, self.touch_ratio, self.near_ratio)
+        name = self.rules.get(gap_class, "default")
+        return gap_class, name, self.presets.get(name, {})
+
+    def _skip(self, key):
+        self.skipped[key] = self.skipped.get(key, 0) + 1
+
+    def apply(self, cr, preset, measure):
+        """把 preset 寫入 Contact Region (需在 Transaction 內呼叫)"""
+        factor = preset.get("pinball_factor")
+        if factor and self.Quantity is not None and self.enums.get("pinball_region") is not None:
+            try:
+                cr.PinballRegion = self.enums["pinball_region"].Radius
+                cr.PinballRadius = self.Quantity("{!r} [{}]".format(
+                    pinball_radius(measure, factor), self.length_unit))
+            except Exception:
+                self._skip("pinball")
+        elif factor:
+            self._skip("pinball")
+
+        stiffness = preset.get("stiffness_factor")
+        if stiffness is not None:
+            try:
+                if self.enums.get("normal_stiffness") is not None:
+                    cr.NormalStiffness = self.enums["normal_stiffness"].Factor
+                cr.NormalStiffnessFactor = float(stiffness)
+            except Exception:
+                self._skip("stiffness_factor")
+
+        for key, prop, enum_key in ENUM_SETTINGS:
+            value = preset.get(key)
+            if value is None:
+                continue
+            enum = self.enums.get(enum_key)
+            try:
+                setattr(cr, prop, getattr(enum, value))
+            except Exception:
+                self._skip(key)
+
+    def tune(self, cr, target_id, contact_id):
+        """量測 -> 分類 -> 套用；回傳 (類別, preset 名稱)"""
+        try:
+            measure = measure_pair(self.geo_data, target_id, contact_id)
+        except Exception as e:
+            print("   警告：無法量測 {} 的初始間隙 ({})".format(cr.Name, e))
+            self._skip("measure")
+            return None, None
+        gap_class, name, preset = self.choose(measure)
+        self.apply(cr, preset, measure)
+        self.records.append((cr.Name, gap_class, name, measure))
+        return gap_class, name
+
+    def summary(self):
+        """各類別的數量與使用的 preset (寫入執行報告，供 learn_rules 學習)"""
+        classes = {}
+        for _, gap_class, _, _ in self.records:
+            classes[gap_class] = classes.get(gap_class, 0) + 1
+        closest = [m["min"] for _, _, _, m in self.records]
+        return {"regions": len(self.records), "classes": classes,
+                "rules": dict((c, self.rules.get(c, "default")) for c in classes),
+                "source": self.rules_path or "default",
+                "max_penetration": max([0.0] + [-d for d in closest]),
+                "min_gap": min([d for d in closest if d > 0] or [0.0]),
+                "skipped": dict(self.skipped)}
+
+    def report(self):
+        s = self.summary()
+        print("-> 接觸自動調整：{} 個 Region ({})".format(s["regions"], ", ".join(
+            "{} x {} -> {}".format(c, n, s["rules"][c]) for c, n in sorted(s["classes"].items()))))
+        if s["skipped"]:
+            print("   略過的設定：" + ", ".join("{} x {}".format(k, v)
+                                         for k, v in sorted(s["skipped"].items())))
+
+
+# ==========================================================
+# 由過去的收斂資料學習規則 (在 Mechanical 之外執行)
+# ==========================================================
+def _run_score(results):
+    """[內部] 一次執行的每子步平衡迭代數 (多分析時取平均)；沒有資料時回傳 None"""
+    convergence = results.get("convergence") or {}
+    if "iterations_per_substep" in convergence:
+        values = [convergence["iterations_per_substep"]]
+    else:
+        values = [v.get("iterations_per_substep") for v in convergence.values()
+                  if isinstance(v, dict)]
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def learn_rules(store, project=None, min_runs=2):
+    """
+    由 RunStore 中有接觸調整與收斂資料的求解紀錄，為每個類別選出表現最好的 preset：
+    失敗率最低者優先，其次為每子步平均迭代數最少者；樣本少於 min_runs 的 preset 不列入
+
+    只能比較實際用過的 preset：每次執行都依同一份規則時，每個類別只有一個 preset，
+    學到的規則就是原本的規則。要比較其他 preset，需以 contact.tuning_presets
+    ({類別: preset}) 在不同變體 / 執行中指定不同的 preset
+
+    Returns
+    -------
+    (rules, table) : rules 為 {類別: preset}；table 為 {類別: {preset: {"runs", "failed", "mean"}}}
+    """
+    table = {}
+    for report in store.reports(project=project, solve=True):
+        results = report.get("results") or {}
+        tuning = results.get("contact_tuning")
+        if not tuning:
+            continue
+        score = _run_score(results) if report.get("status") == "ok" else None
+        for gap_class, preset in (tuning.get("rules") or {}).items():
+            row = table.setdefault(gap_class, {}).setdefault(
+                preset, {"runs": 0, "failed": 0, "total": 0.0, "scored": 0})
+            row["runs"] += 1
+            if score is None:
+                row["failed"] += 1 if report.get("status") != "ok" else 0
+            else:
+                row["total"] += score
+                row["scored"] += 1
+
+    rules = {}
+    for gap_class, presets in table.items():
+        for row in presets.values():
+            row["mean"] = row["total"] / row["scored"] if row["scored"] else None
+        ranked = sorted((float(row["failed"]) / row["runs"],
+                         row["mean"] if row["mean"] is not None else float("inf"), name)
+                        for name, row in presets.items() if row["runs"] >= min_runs)
+        if ranked:
+            rules[gap_class] = ranked[0][2]
+    return rules, table
+
+
+def save_rules(path, rules, presets=None):
+    """寫出規則檔 (load_rules 的格式)；presets 只需包含自訂的組合"""
+    with open(path, "w") as f:
+        json.dump({"rules": rules, "presets": presets or {}}, f, indent=1, sort_keys=True)
+    return path
+
+
+def runLearnContactRules(db_path, rules_path, project=None, min_runs=2):
+    """便利函式：由執行紀錄資料庫學習規則並寫出規則檔 (CPython)，回傳 rules"""
+    from RunStore_V1 import RunStore
+
+    with RunStore(db_path) as store:
+        rules, table = learn_rules(store, project=project, min_runs=min_runs)
+    for gap_class in sorted(table):
+        for name, row in sorted(table[gap_class].items()):
+            print("   {:<13} {:<12} {:>3} 次  失敗 {:>2}  平均 {} 迭代/子步{}".format(
+                gap_class, name, row["runs"], row["failed"],
+                "-" if row["mean"] is None else "{:.2f}".format(row["mean"]),
+                "  <- 採用" if rules.get(gap_class) == name else ""))
+    save_rules(rules_path, rules)
+    print("-> 接觸調整規則：{}".format(rules_path))
+    return rules
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 力-位移曲線的欄位式儲存 (可追加)
+# - 所有曲線的資料點依序追加在同一組欄位檔：curve_id / time / displacement / force
+# - curves.json 為索引：每條曲線的名稱、來源 (run / probe / BC)、參數、起始列與點數
+# - 讀取時整個掃描 (sweep) 只需映射 4 個檔案，單條曲線為切片 (不複製)
+# ==========================================
+import json
+import os
+import threading
+import time
+
+from ColumnIO_V1 import append_column, read_column, truncate_column
+
+INDEX_FILE_NAME = "curves.json"
+LOCK_FILE_NAME = "curves.lock"
+COLUMNS = (("curve_id", "i"), ("time", "d"), ("displacement", "d"), ("force", "d"))
+
+
+class _FileLock(object):
+    """[內部] 跨行程的簡易檔案鎖 (批次中多個 Mechanical 行程可能寫入同一個曲線庫)"""
+
+    def __init__(self, path, timeout=60.0, stale=600.0):
+        self.path = path
+        self.timeout = timeout
+        self.stale = stale
+
+    def __enter__(self):
+        start = time.time()
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except OSError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale:
+                        os.remove(self.path)  # 前一個行程異常結束留下的鎖
+                        continue
+                except OSError:
+                    continue
+                if time.time() - start > self.timeout:
+                    raise RuntimeError("無法取得曲線庫的寫入鎖: {}".format(self.path))
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class Curve(object):
+    """單條曲線 (time / displacement / force 為可索引的序列)"""
+    __slots__ = ("info", "time", "displacement", "force")
+
+    def __init__(self, info, time, displacement, force):
+        self.info = info
+        self.time = time
+        self.displacement = displacement
+        self.force = force
+
+    @property
+    def name(self):
+        return self.info["name"]
+
+    def __len__(self):
+        return self.info["count"]
+
+    def peak_force(self, absolute=True):
+        """最大插拔力 (預設取絕對值最大者，回傳帶正負號的值)"""
+        if not len(self):
+            return None
+        if absolute:
+            return max(self.force, key=abs)
+        return max(self.force)
+
+
+class CurveStore(object):
+    """
+    力-位移曲線庫 (一個資料夾)
+    負責：追加曲線、維護索引、以記憶體映射載入整個掃描的曲線並依條件篩選
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        self._lock = threading.Lock()
+        self._columns = None
+        self.index = self._load_index()
+
+    def _path(self, name):
+        return os.path.join(self.folder, name)
+
+    def _load_index(self):
+        path = self._path(INDEX_FILE_NAME)
+        if not os.path.isfile(path):
+            return {"version": 1, "rows": 0, "curves": []}
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _save_index(self):
+        path = self._path(INDEX_FILE_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(tmp_path, path)
+
+    # ----------------------------------------------------------
+    # 寫入
+    # ----------------------------------------------------------
+    def append_many(self, curves):
+        """
+        一次追加多條曲線，回傳 curve id list
+        curves : [(name, times, displacements, forces, meta dict), ...]
+        先寫資料再更新索引：中途中斷時索引中不會出現不完整的曲線
+        """
+        ids = []
+        with self._lock, _FileLock(self._path(LOCK_FILE_NAME)):
+            self.index = self._load_index()  # 其他行程可能已追加
+            rows = self.index["rows"]
+            for name, _ in COLUMNS:
+                # 上次追加若在更新索引前中斷，欄位列數會多於索引：先回復
+                path = self._path(name + ".npy")
+                if os.path.isfile(path):
+                    truncate_column(path, rows)
+
+            batch = dict((name, []) for name, _ in COLUMNS)
+            next_id = len(self.index["curves"])
+            entries = []
+            for name, times, disps, forces, meta in curves:
+                times, disps, forces = list(times), list(disps), list(forces)
+                if not len(times) == len(disps) == len(forces):
+                    raise ValueError("曲線 {} 的欄位長度不一致".format(name))
+                entry = dict(meta or {})
+                entry.update({"id": next_id, "name": name, "start": rows, "count": len(times)})
+                batch["curve_id"].extend([next_id] * len(times))
+                batch["time"].extend(times)
+                batch["displacement"].extend(disps)
+                batch["force"].extend(forces)
+                entries.append(entry)
+                ids.append(next_id)
+                rows += len(times)
+                next_id += 1
+
+            for name, code in COLUMNS:
+                append_column(self._path(name + ".npy"), code, batch[name])
+            self.index["curves"].extend(entries)
+            self.index["rows"] = rows
+            self._save_index()
+            self._columns = None
+        return ids
+
+    def append(self, name, times, displacements, forces, meta=None):
+        return self.append_many([(name, times, displacements, forces, meta)])[0]
+
+    # ----------------------------------------------------------
+    # 讀取
+    # ----------------------------------------------------------
+    def _load_columns(self):
+        if self._columns is None:
+            self._columns = {}
+            for name, _ in COLUMNS:
+                path = self._path(name + ".npy")
+                self._columns[name] = read_column(path)[0] if os.path.isfile(path) else []
+        return self._columns
+
+    def find(self, **filters):
+        """依索引欄位篩選 (例如 find(run="conn_A", bc="AutoDisp_1"))，回傳索引項目 list"""
+        return [c for c in self.index["curves"]
+                if all(c.get(k) == v for k, v in filters.items())]
+
+    def get(self, curve_id):
+        info = self.index["curves"][curve_id]
+        cols = self._load_columns()
+        start, end = info["start"], info["start"] + info["count"]
+        return Curve(info, cols["time"][start:end], cols["displacement"][start:end],
+                     cols["force"][start:end])
+
+    def curves(self, **filters):
+        """載入符合條件的所有曲線"""
+        return [self.get(c["id"]) for c in self.find(**filters)]
+
+    def __len__(self):
+        return len(self.index["curves"])
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import math
+import os
+import struct
+from array import array
+
+from ColumnIO_V1 import write_column, read_column
+from Parallel_V1 import parallel_map
+from ZFaceSelector_V1 import FaceScan, iter_bodies
+
+SNAPSHOT_VERSION = 1
+META_FILE_NAME = "snapshot.json"
+
+# 網格估算：四面體網格的節點數 / 元素數 (經驗比例，一次 / 二次元素)
+NODES_PER_ELEMENT = {False: 0.18, True: 1.4}
+
+# 欄位定義：(欄位名稱, array 型別碼, 每列寬度)
+FACE_COLUMNS = (
+    ("face_id",       "i", 1),
+    ("face_body",     "i", 1),
+    ("face_centroid", "d", 3),
+    ("face_normal",   "d", 3),
+    ("face_area",     "d", 1),
+    ("face_bbox",     "d", 6),   # xmin, ymin, zmin, xmax, ymax, zmax
+)
+EDGE_COLUMNS = (
+    ("edge_id",       "i", 1),
+    ("edge_body",     "i", 1),
+    ("edge_centroid", "d", 3),
+    ("edge_length",   "d", 1),
+)
+BODY_COLUMNS = (
+    ("body_id",         "i", 1),
+    ("body_volume",     "d", 1),
+    ("body_face_count", "i", 1),
+    ("body_bbox",       "d", 6),
+)
+ALL_COLUMNS = FACE_COLUMNS + EDGE_COLUMNS + BODY_COLUMNS
+
+
+def _new_tables():
+    return dict((name, array(code)) for name, code, _ in ALL_COLUMNS)
+
+
+def _safe(getter, default):
+    """[內部] 讀取可能不存在 / 會丟例外的幾何屬性"""
+    try:
+        value = getter()
+    except Exception:
+        return default
+    return default if value is None else value
+
+
+def _points_bbox(points, fallback):
+    """[內部] 由頂點座標計算 bounding box；沒有頂點 (例如球面) 時以 fallback 點代替"""
+    xs = [p[0] for p in points] or [fallback[0]]
+    ys = [p[1] for p in points] or [fallback[1]]
+    zs = [p[2] for p in points] or [fallback[2]]
+    return (min(xs), min(ys), min(zs), max(xs), max(ys), max(zs))
+
+
+def _snapshot_body(body):
+    """[內部] 讀取單一 Body 的面 / 邊 / 本體資料 (在工作執行緒中執行，只做讀取)"""
+    t = _new_tables()
+    body_id = body.Id
+    body_bbox = None
+
+    for face in body.Faces:
+        c = face.Centroid
+        centroid = (c[0], c[1], c[2])
+        normal = _safe(lambda: face.NormalAtParam(0.5, 0.5), (0.0, 0.0, 0.0))
+        points = _safe(lambda: [(v.X, v.Y, v.Z) for v in face.Vertices], [])
+        bbox = _points_bbox(points, centroid)
+
+        t["face_id"].append(face.Id)
+        t["face_body"].append(body_id)
+        t["face_centroid"].extend(centroid)
+        t["face_normal"].extend((normal[0], normal[1], normal[2]))
+        t["face_area"].append(_safe(lambda: face.Area, 0.0))
+        t["face_bbox"].extend(bbox)
+
+        if body_bbox is None:
+            body_bbox = list(bbox)
+        else:
+            body_bbox = [min(body_bbox[i], bbox[i]) for i in range(3)] + \
+                        [max(body_bbox[i], bbox[i]) for i in range(3, 6)]
+
+    for edge in _safe(lambda: body.Edges, []):
+        c = edge.Centroid
+        t["edge_id"].append(edge.Id)
+        t["edge_body"].append(body_id)
+        t["edge_centroid"].extend((c[0], c[1], c[2]))
+        t["edge_length"].append(_safe(lambda: edge.Length, 0.0))
+
+    t["body_id"].append(body_id)
+    t["body_volume"].append(_safe(lambda: body.Volume, 0.0))
+    t["body_face_count"].append(len(t["face_id"]))
+    t["body_bbox"].extend(body_bbox or (0.0,) * 6)
+    return t
+
+
+def collect_tables(geo_data, parallel=False, workers=None):
+    """依 Body 讀取 GeoData (parallel=True 時平行)，合併成欄位式表格 (dict: 欄位名稱 -> array)"""
+    tables = _new_tables()
+    for part in parallel_map(_snapshot_body, iter_bodies(geo_data), workers=workers, parallel=parallel):
+        for name in tables:
+            tables[name].extend(part[name])
+    return tables
+
+
+def fingerprint_tables(tables, digits=6):
+    """
+    幾何指紋：面 Id、所屬 Body、重心與面積 (四捨五入到 digits 位) 的 SHA-1
+    幾何未變更時，即時讀取與快照得到的指紋相同
+    """
+    h = hashlib.sha1()
+    ids = tables["face_id"]
+    bodies = tables["face_body"]
+    cents = tables["face_centroid"]
+    areas = tables["face_area"]
+    for i in range(len(ids)):
+        h.update(struct.pack("<ii4d", ids[i], bodies[i],
+                             round(cents[3 * i], digits), round(cents[3 * i + 1], digits),
+                             round(cents[3 * i + 2], digits), round(areas[i], digits)))
+    return h.hexdigest()
+
+
+def geometry_fingerprint(geo_data, parallel=False):
+    """直接由即時 GeoData 計算幾何指紋"""
+    return fingerprint_tables(collect_tables(geo_data, parallel=parallel))
+
+
+def export_snapshot(geo_data, folder, parallel=False, workers=None):
+    """
+    將 GeoData 的面 / 邊 / 本體表格匯出到 folder (每個欄位一個 .npy + snapshot.json)
+    回傳 snapshot.json 的路徑
+    """
+    tables = collect_tables(geo_data, parallel=parallel, workers=workers)
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    columns = {}
+    for name, code, width in ALL_COLUMNS:
+        values = tables[name]
+        rows = len(values) // width
+        shape = (rows,) if width == 1 else (rows, width)
+        file_name = name + ".npy"
+        write_column(os.path.join(folder, file_name), code, values, shape)
+        columns[name] = {"file": file_name, "width": width, "rows": rows}
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "faces": len(tables["face_id"]),
+        "edges": len(tables["edge_id"]),
+        "bodies": len(tables["body_id"]),
+        "fingerprint": fingerprint_tables(tables),
+        "columns": columns,
+    }
+    meta_path = os.path.join(folder, META_FILE_NAME)
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=1, sort_keys=True)
+    print("已匯出幾何快照：{} 面 / {} 邊 / {} Body -> {}".format(
+        meta["faces"], meta["edges"], meta["bodies"], folder))
+    return meta_path
+
+
+# ==========================================================
+# 離線讀取
+# ==========================================================
+def _flat(data):
+    """[內部] 多維欄位攤平成一維 (NumPy 陣列為 view)"""
+    return data.ravel() if hasattr(data, "ravel") else data
+
+
+class _SnapFace(object):
+    __slots__ = ("Id", "Centroid", "Normal", "Area", "BodyId")
+
+    def __init__(self, face_id, centroid, normal, area, body_id):
+        self.Id = face_id
+        self.Centroid = centroid
+        self.Normal = normal
+        self.Area = area
+        self.BodyId = body_id
+
+
+class _SnapBody(object):
+    def __init__(self, body_id, faces, volume):
+        self.Id = body_id
+        self.Faces = faces
+        self.Volume = volume
+
+
+class _Container(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class GeoSnapshot(object):
+    """
+    記憶體映射的幾何快照 (離線使用，不需 Mechanical)
+    負責：讀取 export_snapshot 的輸出、提供欄位存取、FaceScan 與 GeoData 替身，
+    讓 ZFaceSelector 查詢、接觸配對與網格估算可以在 Mechanical 之外 / 測試中執行。
+    """
+
+    def __init__(self, folder, use_mmap=True):
+        self.folder = folder
+        with open(os.path.join(folder, META_FILE_NAME), "r") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != SNAPSHOT_VERSION:
+            raise ValueError("不支援的快照版本: {}".format(self.meta.get("version")))
+        self._use_mmap = use_mmap
+        self._columns = {}
+
+    @classmethod
+    def load(cls, folder, use_mmap=True):
+        return cls(folder, use_mmap=use_mmap)
+
+    @property
+    def fingerprint(self):
+        return self.meta["fingerprint"]
+
+    @property
+    def n_faces(self):
+        return self.meta["faces"]
+
+    def column(self, name):
+        """取得欄位資料 (第一次存取時才映射檔案)；多維欄位在無 NumPy 時為攤平的一維資料"""
+        data = self._columns.get(name)
+        if data is None:
+            info = self.meta["columns"][name]
+            data, _ = read_column(os.path.join(self.folder, info["file"]), use_mmap=self._use_mmap)
+            self._columns[name] = data
+        return data
+
+    def face_scan(self):
+        """直接由欄位建立 ZFaceSelector 的 FaceScan (不需建立逐面物件)"""
+        scan = FaceScan()
+        scan.ids = [int(i) for i in self.column("face_id")]
+        scan.body_ids = [int(i) for i in self.column("face_body")]
+        cents = self.column("face_centroid")
+        if hasattr(cents, "ravel"):
+            cents = cents.ravel()
+        scan.centroids = array("d", [float(v) for v in cents])
+        zs = scan.centroids[2::3]
+        if zs:
+            scan.max_z = max(zs)
+            scan.min_z = min(zs)
+        return scan
+
+    def z_extreme_faces(self, tolerance=1e-4):
+        """離線版 ZFaceSelector：回傳 (最大 Z 面 IdSet, 最小 Z 面 IdSet)"""
+        scan = self.face_scan()
+        return scan.ids_near_z(scan.max_z, tolerance), scan.ids_near_z(scan.min_z, tolerance)
+
+    def contact_candidates(self, tolerance=1e-3, min_opposition=0.9):
+        """
+        離線接觸配對偵測：屬於不同 Body、bbox (放大 tolerance) 重疊且法向量相對
+        (單位法向量內積 <= -min_opposition) 的面
+        依 X 方向 bbox 排序後掃描 (sweep)，只比較 X 範圍有重疊的面
+        回傳 [(面 Id, 面 Id)] (每對較小的 Id 在前，依 Id 排序)
+        """
+        ids = self.column("face_id")
+        bodies = self.column("face_body")
+        normals = _flat(self.column("face_normal"))
+        bbox = _flat(self.column("face_bbox"))
+        n = len(ids)
+
+        units = []
+        for i in range(n):
+            v = (float(normals[3 * i]), float(normals[3 * i + 1]), float(normals[3 * i + 2]))
+            length = math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+            units.append((v[0] / length, v[1] / length, v[2] / length) if length > 0 else None)
+
+        pairs = []
+        active = []
+        for i in sorted(range(n), key=lambda k: bbox[6 * k]):
+            active = [j for j in active if bbox[6 * j + 3] + tolerance >= bbox[6 * i]]
+            if units[i] is not None:
+                for j in active:
+                    if bodies[j] == bodies[i] or units[j] is None:
+                        continue
+                    if any(bbox[6 * i + k] > bbox[6 * j + 3 + k] + tolerance or
+                           bbox[6 * j + k] > bbox[6 * i + 3 + k] + tolerance for k in (1, 2)):
+                        continue
+                    a, b = units[i], units[j]
+                    if a[0] * b[0] + a[1] * b[1] + a[2] * b[2] <= -min_opposition:
+                        pairs.append(tuple(sorted((int(ids[i]), int(ids[j])))))
+            active.append(i)
+        return sorted(pairs)
+
+    def estimate_mesh(self, element_size, is_quadratic=True, contact_faces=None,
+                      refinement_factor=0.5):
+        """
+        由 Body 體積估算四面體網格規模 (參數同 MeshTool 的整體尺寸與接觸細化)
+        元素數約為 體積 / 邊長 element_size 的正四面體體積；contact_faces 上
+        一層 element_size 厚的區域改以細化尺寸 (element_size x refinement_factor) 估算
+        只是量級估算 (不含曲率 / 鄰近細化等)，用於求解前比較參數或排程
+        回傳 {"elements", "nodes", "bodies": {Body Id: 元素數}, "refined_area"}
+        """
+        def tets(volume, size):
+            return volume / (size ** 3 / (6.0 * math.sqrt(2.0)))
+
+        refined = dict((int(b), 0.0) for b in self.column("body_id"))
+        if contact_faces:
+            wanted = set(int(f) for f in contact_faces)
+            areas = self.column("face_area")
+            for face_id, body_id, area in zip(self.column("face_id"), self.column("face_body"), areas):
+                if int(face_id) in wanted:
+                    refined[int(body_id)] = refined.get(int(body_id), 0.0) + float(area)
+
+        per_body = {}
+        fine = element_size * refinement_factor
+        for body_id, volume in zip(self.column("body_id"), self.column("body_volume")):
+            volume = float(volume)
+            layer = min(refined.get(int(body_id), 0.0) * element_size, volume)
+            per_body[int(body_id)] = int(round(tets(volume - layer, element_size) + tets(layer, fine)))
+        elements = sum(per_body.values())
+        return {"elements": elements,
+                "nodes": int(round(elements * NODES_PER_ELEMENT[bool(is_quadratic)])),
+                "bodies": per_body, "refined_area": sum(refined.values())}
+
+    def as_geo_data(self):
+        """
+        建立 GeoData 替身 (Assemblies -> Parts -> Bodies -> Faces)
+        可直接交給 scan_bodies / benchmark_scan 等只讀取幾何的函式
+        """
+        ids = self.column("face_id")
+        bodies = self.column("face_body")
+        cents = self.column("face_centroid")
+        normals = self.column("face_normal")
+        areas = self.column("face_area")
+        if hasattr(cents, "ravel"):
+            cents, normals = cents.ravel(), normals.ravel()
+
+        faces_by_body = {}
+        order = []
+        for i in range(len(ids)):
+            body_id = int(bodies[i])
+            if body_id not in faces_by_body:
+                faces_by_body[body_id] = []
+                order.append(body_id)
+            faces_by_body[body_id].append(_SnapFace(
+                int(ids[i]),
+                (float(cents[3 * i]), float(cents[3 * i + 1]), float(cents[3 * i + 2])),
+                (float(normals[3 * i]), float(normals[3 * i + 1]), float(normals[3 * i + 2])),
+                float(areas[i]), body_id))
+
+        volumes = dict((int(b), float(v)) for b, v in zip(self.column("body_id"), self.column("body_volume")))
+        snap_bodies = [_SnapBody(b, faces_by_body[b], volumes.get(b, 0.0)) for b in order]
+        return _Container(Assemblies=[_Container(Parts=[_Container(Bodies=snap_bodies)])])
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+import heapq
+from array import array
+from bisect import bisect_left
+
+# array 型別碼：'l' 在 IronPython (Int32) 與 CPython 皆可容納 Mechanical 的幾何 Id
+ID_TYPECODE = "l"
+
+
+class IdSet(object):
+    """
+    已排序、不重複的幾何 Id 集合 (以 array 儲存，記憶體約為 list 的 1/4~1/8)
+    負責：取代各工具中 list(ns.Location.Ids) / extend / list(set(...)) 的寫法，
+    提供線性時間的 union / intersection / difference，
+    並可直接轉成 SelectionInfo.Ids 接受的 list。
+
+    IdSet 為不可變物件：所有運算都回傳新的 IdSet。
+    """
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids=None):
+        if ids is None:
+            self._ids = array(ID_TYPECODE)
+        elif isinstance(ids, IdSet):
+            self._ids = ids._ids
+        else:
+            self._ids = array(ID_TYPECODE, sorted(set(ids)))
+
+    @classmethod
+    def _from_sorted(cls, arr):
+        """[內部] 由已排序、不重複的 array 直接建立 (不再排序)"""
+        obj = cls.__new__(cls)
+        obj._ids = arr
+        return obj
+
+    @classmethod
+    def union_all(cls, iterables):
+        """
+        一次合併多個 Id 來源 (例如多個 NS 的 Location.Ids)
+        IdSet 直接沿用已排序的 array，其他來源各自排序去重；再以 k-way merge 合併，
+        不建立涵蓋全部 Id 的 set / list
+        """
+        sources = [ids._ids if isinstance(ids, IdSet) else cls(ids)._ids for ids in iterables]
+        if len(sources) == 1:
+            return cls._from_sorted(sources[0])
+        merged = array(ID_TYPECODE)
+        last = None
+        for face_id in heapq.merge(*sources):
+            if face_id != last:
+                merged.append(face_id)
+                last = face_id
+        return cls._from_sorted(merged)
+
+    @classmethod
+    def from_selection(cls, selection):
+        """由 Named Selection / SelectionInfo (具有 Location.Ids 或 Ids) 建立"""
+        location = getattr(selection, "Location", selection)
+        ids = location.Ids
+        if ids is None:
+            return cls()
+        return cls(ids)
+
+    # ----------------------------------------------------------
+    # 基本操作
+    # ----------------------------------------------------------
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __bool__(self):
+        return len(self._ids) > 0
+
+    __nonzero__ = __bool__  # IronPython 2.7
+
+    def __contains__(self, face_id):
+        ids = self._ids
+        i = bisect_left(ids, face_id)
+        return i < len(ids) and ids[i] == face_id
+
+    def __eq__(self, other):
+        if isinstance(other, IdSet):
+            return self._ids == other._ids
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        if len(self._ids) > 8:
+            head = ", ".join(str(i) for i in self._ids[:8])
+            return "IdSet([{}, ...] x {})".format(head, len(self._ids))
+        return "IdSet([{}])".format(", ".join(str(i) for i in self._ids))
+
+    def to_list(self):
+        """轉成 list (可直接指定給 SelectionInfo.Ids)"""
+        return self._ids.tolist()
+
+    def to_array(self):
+        return array(ID_TYPECODE, self._ids)
+
+    # ----------------------------------------------------------
+    # 集合運算 (兩個已排序 array 的線性合併)
+    # ----------------------------------------------------------
+    def union(self, other):
+        a, b = self._ids, IdSet(other)._ids
+        if not a:
+            return IdSet._from_sorted(b)
+        if not b:
+            return IdSet._from_sorted(a)
+        out = array(ID_TYPECODE)
+        append = out.append
+        i = j = 0
+        na, nb = len(a), len(b)
+        while i < na and j < nb:
+            x, y = a[i], b[j]
+            if x < y:
+                append(x)
+                i += 1
+            elif y < x:
+                append(y)
+                j += 1
+            else:
+                append(x)
+                i += 1
+                j += 1
+        out.extend(a[i:])
+        out.extend(b[j:])
+        return IdSet._from_sorted(out)
+
+    def intersection(self, other):
+        a, b = self._ids, IdSet(other)._ids
+        if len(a) > len(b):
+            a, b = b, a
+        out = array(ID_TYPECODE)
+        if not a:
+            return IdSet._from_sorted(out)
+
+        # 大小差距懸殊時改用二分搜尋 (O(m log n))
+        if len(b) > 16 * len(a):
+            nb = len(b)
+            for x in a:
+                k = bisect_left(b, x)
+                if k < nb and b[k] == x:
+                    out.append(x)
+            return IdSet._from_sorted(out)
+
+        append = out.append
+        i = j = 0
+        na, nb = len(a), len(b)
+        while i < na and j < nb:
+            x, y = a[i], b[j]
+            if x < y:
+                i += 1
+            elif y < x:
+                j += 1
+            else:
+                append(x)
+                i += 1
+                j += 1
+        return IdSet._from_sorted(out)
+
+    def difference(self, other):
+        a, b = self._ids, IdSet(other)._ids
+        if not a or not b:
+            return IdSet._from_sorted(a)
+        out = array(ID_TYPECODE)
+        append = out.append
+        i = j = 0
+        na, nb = len(a), len(b)
+        while i < na and j < nb:
+            x, y = a[i], b[j]
+            if x < y:
+                append(x)
+                i += 1
+            elif y < x:
+                j += 1
+            else:
+                i += 1
+                j += 1
+        out.extend(a[i:])
+        return IdSet._from_sorted(out)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
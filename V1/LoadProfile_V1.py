@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+import math
+
+from SolverTool_V1 import make_step
+
+
+def _as_float_list(seq):
+    """[內部] 接受 list / tuple / generator / NumPy 風格陣列 (有 tolist)，轉成 float list"""
+    if seq is None:
+        return []
+    if hasattr(seq, "tolist"):
+        seq = seq.tolist()
+    return [float(v) for v in seq]
+
+
+class LoadProfile(object):
+    """
+    位移-時間曲線 (Tabular Load)
+    負責：保存時間點與數值、串接多段曲線、對齊 SolverTool 的步結束時間、
+    一次轉成 Mechanical 的 DiscreteValues (Quantity list)
+
+    單位：時間 [s]，位移 [mm] (數值為帶正負號的最終位移)
+    """
+
+    def __init__(self, times, values, step_end_times=None):
+        self.times = _as_float_list(times)
+        self.values = _as_float_list(values)
+
+        if len(self.times) != len(self.values):
+            raise ValueError("LoadProfile：times 與 values 長度不一致 ({} != {})".format(
+                len(self.times), len(self.values)))
+        if not self.times:
+            raise ValueError("LoadProfile：至少需要一個時間點")
+        for i in range(1, len(self.times)):
+            if self.times[i] < self.times[i - 1]:
+                raise ValueError("LoadProfile：時間點必須遞增 (index {})".format(i))
+
+        if step_end_times is None:
+            step_end_times = [self.times[-1]]
+        self.step_end_times = _as_float_list(step_end_times)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def end_time(self):
+        return self.times[-1]
+
+    @property
+    def end_value(self):
+        return self.values[-1]
+
+    # ----------------------------------------------------------
+    # 串接 / 取樣
+    # ----------------------------------------------------------
+    def then(self, other):
+        """
+        串接另一段曲線：other 的時間從本段結束時間接續
+        other 的第一點若與本段終點重疊 (t=0) 會被省略
+        """
+        offset = self.end_time - other.times[0]
+        times = list(self.times)
+        values = list(self.values)
+        for t, v in zip(other.times, other.values):
+            t = t + offset
+            if t <= times[-1]:
+                continue
+            times.append(t)
+            values.append(v)
+        steps = list(self.step_end_times) + [t + offset for t in other.step_end_times
+                                             if t + offset > self.end_time]
+        return LoadProfile(times, values, steps)
+
+    def value_at(self, t):
+        """線性內插取得時間 t 的位移值 (超出範圍時取端點值)"""
+        times = self.times
+        if t <= times[0]:
+            return self.values[0]
+        if t >= times[-1]:
+            return self.values[-1]
+
+        # 二分搜尋所在區間
+        lo, hi = 0, len(times) - 1
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if times[mid] <= t:
+                lo = mid
+            else:
+                hi = mid
+        t0, t1 = times[lo], times[hi]
+        if t1 == t0:
+            return self.values[hi]
+        w = (t - t0) / (t1 - t0)
+        return self.values[lo] + w * (self.values[hi] - self.values[lo])
+
+    def resample(self, times):
+        """以指定時間點重新取樣 (保留步結束時間)"""
+        times = _as_float_list(times)
+        return LoadProfile(times, [self.value_at(t) for t in times], self.step_end_times)
+
+    def aligned(self, tol=1e-9):
+        """
+        回傳已對齊的曲線：確保每個步結束時間都是曲線上的時間點
+        (Mechanical 的 Tabular Load 需在步邊界有資料點，否則步間會被內插)
+        """
+        missing = [t for t in self.step_end_times
+                   if not any(abs(t - x) <= tol for x in self.times)]
+        if not missing:
+            return self
+        return self.resample(sorted(self.times + missing))
+
+    # ----------------------------------------------------------
+    # 與 SolverTool / Mechanical 的介面
+    # ----------------------------------------------------------
+    def check_alignment(self, end_time_list, tol=1e-9):
+        """檢查曲線的步結束時間是否與 SolverTool 的 end_time_list 一致"""
+        end_time_list = _as_float_list(end_time_list)
+        if len(end_time_list) != len(self.step_end_times):
+            return False
+        return all(abs(a - b) <= tol for a, b in zip(end_time_list, self.step_end_times))
+
+    def step_table(self, **step_kwargs):
+        """
+        依曲線的步結束時間產生 SolverTool 的 Step Table
+        step_kwargs 會傳給 make_step (例如 initial_time_step=0.05)
+        """
+        return [make_step(t, **step_kwargs) for t in self.step_end_times]
+
+    def to_discrete_values(self, quantity_cls, value_unit="mm", time_unit="s"):
+        """一次轉成 (時間 Quantity list, 數值 Quantity list)"""
+        t_fmt = " [" + time_unit + "]"
+        v_fmt = " [" + value_unit + "]"
+        t_list = [quantity_cls(repr(t) + t_fmt) for t in self.times]
+        v_list = [quantity_cls(repr(v) + v_fmt) for v in self.values]
+        return t_list, v_list
+
+
+def merge_time_grid(profiles, tol=1e-9):
+    """
+    把多個分量 (X/Y/Z) 的曲線重新取樣到同一組時間點
+    None 代表該分量為 0 (固定)
+    """
+    active = [p for p in profiles if p is not None]
+    if not active:
+        return list(profiles)
+
+    grid = sorted(set(t for p in active for t in p.times))
+    steps = sorted(set(t for p in active for t in p.step_end_times))
+    merged = [grid[0]]
+    for t in grid[1:]:
+        if t - merged[-1] > tol:
+            merged.append(t)
+
+    base = LoadProfile(merged, [0.0] * len(merged), steps).aligned(tol)
+    result = []
+    for p in profiles:
+        if p is None:
+            result.append(base)
+        else:
+            result.append(LoadProfile(base.times, [p.value_at(t) for t in base.times], steps))
+    return result
+
+
+# ==========================================================
+# 曲線產生器 (每段預設為一個 Load Step)
+# ==========================================================
+def from_arrays(times, values, step_end_times=None):
+    """由陣列 (list / NumPy array / generator) 建立曲線"""
+    return LoadProfile(times, values, step_end_times)
+
+
+def ramp(to_value, duration=1.0, start_value=0.0, n_points=2):
+    """線性斜坡：start_value -> to_value"""
+    # 轉成 float：IronPython 2.7 中 int / int 為整數除法
+    to_value, duration, start_value = float(to_value), float(duration), float(start_value)
+    n_points = max(int(n_points), 2)
+    times = [duration * i / (n_points - 1) for i in range(n_points)]
+    values = [start_value + (to_value - start_value) * i / (n_points - 1) for i in range(n_points)]
+    return LoadProfile(times, values, [duration])
+
+
+def step_values(values, step_end_times, start_value=0.0):
+    """
+    逐步指定位移：第 i 步結束時到達 values[i] (步內線性變化)
+    例如 step_values([-5.0, -2.0], [1.0, 2.0]) 為插入到 -5 mm 後退回 -2 mm
+    """
+    values = _as_float_list(values)
+    step_end_times = _as_float_list(step_end_times)
+    if len(values) != len(step_end_times):
+        raise ValueError("step_values：values 與 step_end_times 長度不一致 ({} != {})".format(
+            len(values), len(step_end_times)))
+    return LoadProfile([0.0] + step_end_times, [start_value] + values, step_end_times)
+
+
+def hold(value, duration=1.0):
+    """保持固定位移"""
+    return LoadProfile([0.0, duration], [value, value], [duration])
+
+
+def cyclic(amplitude, n_cycles=1, period=2.0, offset=0.0, steps_per_cycle=2):
+    """
+    三角波往復 (插入 -> 拔出)：offset -> offset+amplitude -> offset
+    每個循環預設切成 2 個步 (插入步 / 拔出步)
+    """
+    times = [0.0]
+    values = [offset]
+    for c in range(int(n_cycles)):
+        t0 = c * period
+        times.extend([t0 + period * 0.5, t0 + period])
+        values.extend([offset + amplitude, offset])
+
+    steps_per_cycle = max(int(steps_per_cycle), 1)
+    steps = [c * period + period * (k + 1) / float(steps_per_cycle)
+             for c in range(int(n_cycles)) for k in range(steps_per_cycle)]
+    return LoadProfile(times, values, steps)
+
+
+def sinusoidal(amplitude, period=1.0, n_cycles=1, offset=0.0, points_per_cycle=32,
+               steps_per_cycle=1):
+    """正弦位移：offset + amplitude * sin(2*pi*t/period)"""
+    n = int(points_per_cycle * n_cycles)
+    total = period * n_cycles
+    times = [total * i / float(n) for i in range(n + 1)]
+    values = [offset + amplitude * math.sin(2.0 * math.pi * t / period) for t in times]
+
+    steps_per_cycle = max(int(steps_per_cycle), 1)
+    n_steps = int(n_cycles * steps_per_cycle)
+    steps = [total * (k + 1) / float(n_steps) for k in range(n_steps)]
+    return LoadProfile(times, values, steps).aligned()
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 工具模組的延遲載入 / 變更時才重新載入
+# - 模組第一次使用時才 import
+# - 重新執行時只 reload 原始碼 (mtime -> SHA-1) 有變更的模組，
+#   以及 from-import 了這些模組內容的相依模組
+# - 本模組本身不可 reload：載入狀態要跨次執行保留在同一個 Mechanical session 中
+# ==========================================
+import hashlib
+import os
+import sys
+import time
+
+try:
+    _reload = reload  # IronPython 2.7
+except NameError:
+    from importlib import reload as _reload
+
+
+def _source_path(module):
+    path = getattr(module, "__file__", None)
+    if not path:
+        return None
+    if path.endswith((".pyc", ".pyo")):
+        path = path[:-1]
+    return os.path.abspath(path)
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class _SourceState(object):
+    """[內部] 模組原始碼的狀態 (先比 mtime / size，有變化才計算 SHA-1)"""
+    __slots__ = ("path", "mtime", "size", "digest")
+
+    def __init__(self, path):
+        self.path = path
+        st = os.stat(path)
+        self.mtime = st.st_mtime
+        self.size = st.st_size
+        self.digest = _file_hash(path)
+
+    def changed(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        if st.st_mtime == self.mtime and st.st_size == self.size:
+            return False
+        digest = _file_hash(self.path)
+        self.mtime = st.st_mtime
+        self.size = st.st_size
+        if digest == self.digest:
+            return False  # 只是存檔，內容沒變
+        self.digest = digest
+        return True
+
+
+class ToolLoader(object):
+    """
+    工具模組載入器 (每個 Mechanical session 一份，以 get_loader() 取得)
+    負責：延遲 import、偵測原始碼變更、依相依順序 reload、統計啟動耗時
+    """
+
+    def __init__(self, tool_dir):
+        self.tool_dir = os.path.abspath(tool_dir)
+        if self.tool_dir not in [os.path.abspath(p) for p in sys.path]:
+            sys.path.append(self.tool_dir)
+        self._states = {}  # 模組名稱 -> _SourceState
+        self._reset_stats()
+        # 舊版 main.py (或其他腳本) 已 import 的工具模組：狀態未知，接管時重新載入一次
+        self._adopt(reload_existing=True)
+
+    def _reset_stats(self):
+        self.events = []  # (動作, 模組, 秒)
+
+    def _owns(self, module):
+        path = _source_path(module)
+        return path is not None and os.path.dirname(path) == self.tool_dir
+
+    def _adopt(self, reload_existing=False):
+        """[內部] 記錄 tool_dir 中已在 sys.modules、但尚未追蹤的模組"""
+        adopted = []
+        for name, module in list(sys.modules.items()):
+            if module is None or name in self._states or name == __name__ or not self._owns(module):
+                continue
+            self._states[name] = _SourceState(_source_path(module))
+            adopted.append(name)
+        if reload_existing and adopted:
+            for name in self._reload_order(adopted):
+                self._timed("reload", name, lambda: _reload(sys.modules[name]))
+
+    def _timed(self, action, name, fn):
+        start = time.time()
+        result = fn()
+        self.events.append((action, name, time.time() - start))
+        return result
+
+    # ----------------------------------------------------------
+    # 相依關係
+    # ----------------------------------------------------------
+    def _imports_of(self, name):
+        """[內部] 模組 name 直接引用 (import 或 from-import) 的已追蹤模組"""
+        deps = set()
+        for value in vars(sys.modules[name]).values():
+            dep = value.__name__ if type(value) is type(sys) else getattr(value, "__module__", None)
+            if dep in self._states and dep != name:
+                deps.add(dep)
+        return deps
+
+    def _reload_order(self, changed):
+        """[內部] 變更的模組 + 所有 (遞移) 相依它們的模組，依相依順序排列"""
+        graph = dict((name, self._imports_of(name)) for name in self._states if name in sys.modules)
+        targets = set(changed)
+        grew = True
+        while grew:
+            grew = False
+            for name, deps in graph.items():
+                if name not in targets and deps & targets:
+                    targets.add(name)
+                    grew = True
+
+        order = []
+        visiting = set()
+
+        def _visit(name):
+            if name in order or name in visiting:
+                return
+            visiting.add(name)
+            for dep in sorted(graph.get(name, ())):
+                if dep in targets:
+                    _visit(dep)
+            order.append(name)
+
+        for name in sorted(targets):
+            _visit(name)
+        return order
+
+    # ----------------------------------------------------------
+    # 公開介面
+    # ----------------------------------------------------------
+    def refresh(self):
+        """檢查所有已載入的工具模組，只 reload 有變更者 (與其相依模組)；回傳 reload 的模組名稱"""
+        self._reset_stats()
+        changed = [name for name, state in self._states.items()
+                   if name in sys.modules and state.changed()]
+        if not changed:
+            return []
+        order = self._reload_order(changed)
+        for name in order:
+            self._timed("reload", name, lambda: _reload(sys.modules[name]))
+        return order
+
+    def get(self, name):
+        """取得模組 (第一次使用時才 import)"""
+        module = sys.modules.get(name)
+        if module is not None and name in self._states:
+            return module
+        module = self._timed("import", name, lambda: __import__(name))
+        self._adopt()  # 一併記錄被連帶 import 的工具模組
+        return module
+
+    def attr(self, module_name, attr_name):
+        return getattr(self.get(module_name), attr_name)
+
+    def lazy(self, module_name, attr_name):
+        """回傳呼叫時才載入模組的函式 (例如 loader.lazy("MeshTool_V1", "runMesh"))"""
+        def _call(*args, **kwargs):
+            return self.attr(module_name, attr_name)(*args, **kwargs)
+        _call.__name__ = attr_name
+        return _call
+
+    def report(self):
+        imports = [e for e in self.events if e[0] == "import"]
+        reloads = [e for e in self.events if e[0] == "reload"]
+        cost = sum(e[2] for e in self.events)
+        print("-> 模組載入：import {} / reload {} (共追蹤 {} 個模組)，耗時 {:.3f} s".format(
+            len(imports), len(reloads), len(self._states), cost))
+        for action, name, seconds in self.events:
+            print("   {:<7} {:<24} {:8.3f} s".format(action, name, seconds))
+
+
+# 跨次執行共用的 loader (依 tool_dir 區分)
+_LOADERS = {}
+
+
+def get_loader(tool_dir):
+    """取得 (必要時建立) tool_dir 對應的 ToolLoader"""
+    key = os.path.abspath(tool_dir)
+    loader = _LOADERS.get(key)
+    if loader is None:
+        loader = _LOADERS[key] = ToolLoader(key)
+    return loader
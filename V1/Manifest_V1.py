@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+
+MANIFEST_FILE_NAME = "SkyCAETool_manifest.json"
+
+
+class ObjectManifest(object):
+    """
+    自動化物件清單 (Manifest)
+    負責：記錄各工具每次執行所建立物件的 ObjectId，清除/更新時直接以 Id 取回物件，
+    不必掃描整棵樹，也不會誤刪使用者手動建立、但名稱剛好符合前綴的物件。
+
+    檔案格式 (JSON)：
+        {"version": 1, "tools": {"BCTool": {"run": 3, "keys": {"default": [101, 102]}}}}
+    """
+
+    def __init__(self, ext_api, path=None):
+        """
+        Parameters
+        ----------
+        ext_api : ExtAPI
+            用來以 ObjectId 取回 Mechanical 物件 (DataModel.GetObjectById)
+        path : str, optional
+            Manifest 檔案路徑；未指定時存放在專案資料夾 (取不到時改用暫存資料夾)
+        """
+        self.api = ext_api
+        self.path = path if path else self._default_path()
+        self.data = {"version": 1, "tools": {}}
+        self.load()
+
+    def _default_path(self):
+        """[內部] 預設存放於專案資料夾，讓清單跟著 .mechdb / .wbpj 走"""
+        folder = None
+        try:
+            folder = self.api.DataModel.Project.ProjectDirectory
+        except Exception:
+            folder = None
+        if not folder or not os.path.isdir(folder):
+            folder = tempfile.gettempdir()
+        return os.path.join(folder, MANIFEST_FILE_NAME)
+
+    # ----------------------------------------------------------
+    # 檔案讀寫
+    # ----------------------------------------------------------
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and "tools" in data:
+                self.data = data
+        except (IOError, ValueError) as e:
+            print("警告：Manifest 讀取失敗，將重新建立 ({}): {}".format(self.path, e))
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(tmp_path, self.path)
+
+    # ----------------------------------------------------------
+    # 記錄 / 查詢
+    # ----------------------------------------------------------
+    def _tool_entry(self, tool):
+        return self.data["tools"].setdefault(tool, {"run": 0, "keys": {}})
+
+    def begin_run(self, tool):
+        """開始新的一次執行，回傳執行序號"""
+        entry = self._tool_entry(tool)
+        entry["run"] = entry.get("run", 0) + 1
+        return entry["run"]
+
+    def record(self, tool, obj, key="default"):
+        """記錄工具建立的物件 (obj 或 ObjectId 皆可)"""
+        obj_id = obj if isinstance(obj, int) else int(obj.ObjectId)
+        ids = self._tool_entry(tool)["keys"].setdefault(key, [])
+        if obj_id not in ids:
+            ids.append(obj_id)
+        return obj_id
+
+    def tracked_ids(self, tool, key=None):
+        """取得已記錄的 ObjectId；key=None 代表該工具的全部物件"""
+        keys = self._tool_entry(tool)["keys"]
+        if key is not None:
+            return list(keys.get(key, []))
+        ids = []
+        for k in sorted(keys):
+            ids.extend(keys[k])
+        return ids
+
+    def get_objects(self, tool, key=None):
+        """以 ObjectId 直接取回仍存在的物件 (已被手動刪除的會自動略過)"""
+        objects = []
+        for obj_id in self.tracked_ids(tool, key):
+            try:
+                obj = self.api.DataModel.GetObjectById(obj_id)
+            except Exception:
+                obj = None
+            if obj is not None:
+                objects.append(obj)
+        return objects
+
+    def get_meta(self, tool, name, default=None):
+        """取得工具自訂的附加資料 (例如結果物件上次計算時的求解雜湊)"""
+        return self._tool_entry(tool).get("meta", {}).get(name, default)
+
+    def set_meta(self, tool, name, value):
+        """設定工具自訂的附加資料 (需可寫入 JSON；呼叫 save() 後才寫入檔案)"""
+        self._tool_entry(tool).setdefault("meta", {})[name] = value
+
+    def forget(self, tool, key=None):
+        """移除記錄 (不刪除物件)"""
+        entry = self._tool_entry(tool)
+        if key is None:
+            entry["keys"] = {}
+        else:
+            entry["keys"].pop(key, None)
+
+    def delete_tracked(self, tool, key=None, transaction_cls=None):
+        """
+        刪除工具先前建立的物件 (全部包在單一 Transaction 中)，並清除記錄
+        回傳實際刪除的數量
+        """
+        objects = self.get_objects(tool, key)
+
+        def _do_delete():
+            for obj in objects:
+                obj.Delete()
+            return len(objects)
+
+        if transaction_cls and objects:
+            with transaction_cls():
+                count = _do_delete()
+        else:
+            count = _do_delete()
+
+        self.forget(tool, key)
+        self.save()
+        return count
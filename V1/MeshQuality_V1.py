@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 網格品質檢查 (網格生成後、求解前)
+# - 一次讀出節點座標與四面體元素的角點連接 (欄位式 array)，可匯出成 .npy 供離線分析
+# - 每個四面體計算：長寬比 (aspect)、Scaled Jacobian、等體積偏斜度 (skewness)、平均邊長
+#   有 NumPy 時以陣列運算一次算完；Mechanical 的 IronPython 沒有 NumPy 時逐元素計算
+# - 統計與直方圖、最差元素 (所屬 Body / 接觸群組)；品質不合格時在求解前停止流程
+# 指標皆正規化為正四面體 = 1 (aspect / jacobian) 或 0 (skewness)；只使用角點，二次元素同樣適用
+# - 耗時：純 Python 指標計算在 CPython 3 約 0.8 s / 10 萬個四面體 (本機量測)；IronPython 較慢，
+#   且 from_mesh 逐節點 / 元素經過 interop，大網格可能要數十秒，因此流程中預設不開啟
+# ==========================================
+import math
+import os
+from array import array
+
+from ColumnIO_V1 import read_column, write_column
+from ZFaceSelector_V1 import iter_bodies
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# 預設門檻：超過任一項即為不良元素
+DEFAULT_THRESHOLDS = {"max_aspect": 20.0, "min_jacobian": 0.05, "max_skewness": 0.95}
+# 不良元素比例超過此值 (或有任何反轉元素) 即判定不合格
+DEFAULT_MAX_BAD_FRACTION = 0.001
+# Ansys 四面體的節點順序 (I, J, K 由 L 看為逆時針) 下，(J-I) x (K-I) . (L-I) 為正
+DEFAULT_ORIENTATION = 1.0
+
+# 直方圖分界
+ASPECT_EDGES = (1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 20.0, 50.0)
+SKEWNESS_EDGES = (0.0, 0.25, 0.5, 0.75, 0.9, 0.95, 0.98)
+SIZE_BINS = 10
+
+MESH_COLUMNS = (
+    ("node_ids",  "i", 1),
+    ("node_xyz",  "d", 3),
+    ("elem_ids",  "i", 1),
+    ("elem_conn", "i", 4),   # 角點在 node_ids 中的序號
+)
+
+_SQRT2 = math.sqrt(2.0)
+_SQRT6 = math.sqrt(6.0)
+
+
+class MeshQualityError(Exception):
+    """網格品質不合格；report 為 MeshQualityTool.check() 的結果"""
+
+    def __init__(self, report):
+        self.report = report
+        Exception.__init__(self, "網格品質不合格：" + "；".join(report["failures"]))
+
+
+class MeshArrays(object):
+    """節點座標與四面體連接 (扁平 array：node_xyz 每 3 個一組、elem_conn 每 4 個一組)"""
+
+    def __init__(self, node_ids, node_xyz, elem_ids, elem_conn, skipped=None):
+        self.node_ids = node_ids
+        self.node_xyz = node_xyz
+        self.elem_ids = elem_ids
+        self.elem_conn = elem_conn
+        self.skipped = skipped or {}  # 非四面體的元素類型 -> 數量
+
+    def __len__(self):
+        return len(self.elem_ids)
+
+    @classmethod
+    def from_mesh(cls, mesh):
+        """由 MeshData 讀出 (每個節點 / 元素只經過一次 interop)"""
+        node_ids, node_xyz = array("i"), array("d")
+        index = {}
+        for node in mesh.Nodes:
+            index[node.Id] = len(node_ids)
+            node_ids.append(node.Id)
+            node_xyz.extend((node.X, node.Y, node.Z))
+
+        elem_ids, elem_conn = array("i"), array("i")
+        skipped = {}
+        for element in mesh.Elements:
+            kind = str(element.Type)
+            corners = list(element.CornerNodeIds)
+            if "Tet" not in kind or len(corners) != 4:
+                skipped[kind] = skipped.get(kind, 0) + 1
+                continue
+            elem_ids.append(element.Id)
+            elem_conn.extend(index[n] for n in corners)
+        return cls(node_ids, node_xyz, elem_ids, elem_conn, skipped)
+
+    def save(self, folder):
+        """匯出成每欄一個 .npy (見 ColumnIO_V1)"""
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        for name, code, width in MESH_COLUMNS:
+            values = getattr(self, name)
+            rows = len(values) // width
+            write_column(os.path.join(folder, name + ".npy"), code, values,
+                         (rows,) if width == 1 else (rows, width))
+        return folder
+
+    @classmethod
+    def load(cls, folder, use_mmap=True):
+        """讀回 save() 的輸出 (有 NumPy 時為記憶體映射陣列)"""
+        columns = [read_column(os.path.join(folder, name + ".npy"), use_mmap)[0]
+                   for name, _, _ in MESH_COLUMNS]
+        return cls(*columns)
+
+
+# ==========================================================
+# 品質指標
+# ==========================================================
+def _tet_metrics_numpy(node_xyz, elem_conn):
+    """[內部] NumPy 版：所有元素一次計算"""
+    p = numpy.asarray(node_xyz, dtype=float).reshape(-1, 3)
+    t = numpy.asarray(elem_conn).reshape(-1, 4)
+    v0, v1, v2, v3 = p[t[:, 0]], p[t[:, 1]], p[t[:, 2]], p[t[:, 3]]
+    e0, e1, e2 = v1 - v0, v2 - v1, v0 - v2
+    e3, e4, e5 = v3 - v0, v3 - v1, v3 - v2
+    a, b, c = e0, v2 - v0, e3
+
+    vol6 = numpy.einsum("ij,ij->i", a, numpy.cross(b, c))  # 6 x 帶正負號的體積
+    lengths = numpy.sqrt(numpy.stack([numpy.einsum("ij,ij->i", e, e)
+                                      for e in (e0, e1, e2, e3, e4, e5)], axis=1))
+    l0, l1, l2, l3, l4, l5 = lengths.T
+
+    faces = (numpy.linalg.norm(numpy.cross(a, b), axis=1) + numpy.linalg.norm(numpy.cross(a, c), axis=1) +
+             numpy.linalg.norm(numpy.cross(b, c), axis=1) + numpy.linalg.norm(numpy.cross(e1, e4), axis=1)) * 0.5
+    abs_vol6 = numpy.abs(vol6)
+    safe_vol6 = numpy.where(abs_vol6 > 0, abs_vol6, numpy.inf)
+
+    # 內切圓半徑 r = 3V / 表面積；長寬比 = 最長邊 / (2 sqrt(6) r)
+    inradius = 0.5 * abs_vol6 / numpy.where(faces > 0, faces, numpy.inf)
+    aspect = lengths.max(axis=1) / numpy.where(inradius > 0, 2.0 * _SQRT6 * inradius, 0.0)
+
+    corner = numpy.max(numpy.stack([l0 * l2 * l3, l0 * l1 * l4, l1 * l2 * l5, l3 * l4 * l5]), axis=0)
+    jacobian = _SQRT2 * vol6 / numpy.where(corner > 0, corner, numpy.inf)
+
+    # 外接球半徑 -> 同外接球正四面體的體積
+    num = ((a * a).sum(1)[:, None] * numpy.cross(b, c) + (b * b).sum(1)[:, None] * numpy.cross(c, a) +
+           (c * c).sum(1)[:, None] * numpy.cross(a, b))
+    radius = numpy.linalg.norm(num, axis=1) / (2.0 * safe_vol6)
+    ideal = (4.0 * radius / _SQRT6) ** 3 / (6.0 * _SQRT2)
+    volume = abs_vol6 / 6.0
+    skewness = numpy.clip(1.0 - volume / numpy.where(ideal > 0, ideal, numpy.inf), 0.0, 1.0)
+    skewness = numpy.where(abs_vol6 > 0, skewness, 1.0)
+
+    return {"aspect": aspect, "jacobian": jacobian, "skewness": skewness,
+            "size": lengths.mean(axis=1), "volume": vol6 / 6.0}
+
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _norm(a):
+    return math.sqrt(_dot(a, a))
+
+
+def _tet_metrics_python(node_xyz, elem_conn):
+    """[內部] 純 Python 版 (IronPython)：公式同 _tet_metrics_numpy"""
+    out = dict((key, array("d")) for key in ("aspect", "jacobian", "skewness", "size", "volume"))
+    xyz = node_xyz
+    inf = float("inf")
+    for k in range(len(elem_conn) // 4):
+        v = [(xyz[3 * i], xyz[3 * i + 1], xyz[3 * i + 2]) for i in elem_conn[4 * k:4 * k + 4]]
+        sub = lambda p, q: (p[0] - q[0], p[1] - q[1], p[2] - q[2])
+        a, b, c = sub(v[1], v[0]), sub(v[2], v[0]), sub(v[3], v[0])
+        e1, e4 = sub(v[2], v[1]), sub(v[3], v[1])
+        l0, l1, l2 = _norm(a), _norm(e1), _norm(b)
+        l3, l4, l5 = _norm(c), _norm(e4), _norm(sub(v[3], v[2]))
+
+        vol6 = _dot(a, _cross(b, c))
+        abs_vol6 = abs(vol6)
+        faces = 0.5 * (_norm(_cross(a, b)) + _norm(_cross(a, c)) + _norm(_cross(b, c)) +
+                       _norm(_cross(e1, e4)))
+        inradius = 0.5 * abs_vol6 / faces if faces > 0 else 0.0
+        aspect = max(l0, l1, l2, l3, l4, l5) / (2.0 * _SQRT6 * inradius) if inradius > 0 else inf
+        corner = max(l0 * l2 * l3, l0 * l1 * l4, l1 * l2 * l5, l3 * l4 * l5)
+        jacobian = _SQRT2 * vol6 / corner if corner > 0 else 0.0
+
+        if abs_vol6 > 0:
+            bc, ca, ab = _cross(b, c), _cross(c, a), _cross(a, b)
+            aa, bb, cc = _dot(a, a), _dot(b, b), _dot(c, c)
+            num = (aa * bc[0] + bb * ca[0] + cc * ab[0], aa * bc[1] + bb * ca[1] + cc * ab[1],
+                   aa * bc[2] + bb * ca[2] + cc * ab[2])
+            radius = _norm(num) / (2.0 * abs_vol6)
+            ideal = (4.0 * radius / _SQRT6) ** 3 / (6.0 * _SQRT2)
+            skewness = min(max(1.0 - (abs_vol6 / 6.0) / ideal, 0.0), 1.0) if ideal > 0 else 1.0
+        else:
+            skewness = 1.0
+
+        out["aspect"].append(aspect)
+        out["jacobian"].append(jacobian)
+        out["skewness"].append(skewness)
+        out["size"].append((l0 + l1 + l2 + l3 + l4 + l5) / 6.0)
+        out["volume"].append(vol6 / 6.0)
+    return out
+
+
+def tet_metrics(node_xyz, elem_conn, use_numpy=True):
+    """
+    四面體品質指標 (每個元素一個值)：aspect / jacobian / skewness / size / volume
+    jacobian 為 Scaled Jacobian (帶正負號：元素節點順序反向時為負)
+    """
+    if use_numpy and numpy is not None:
+        return _tet_metrics_numpy(node_xyz, elem_conn)
+    return _tet_metrics_python(node_xyz, elem_conn)
+
+
+def orient(jacobian, orientation=DEFAULT_ORIENTATION):
+    """
+    依節點順序慣例 (orientation = 1 / -1) 統一 Scaled Jacobian 的正負號：正常元素為正
+    固定慣例而不依多數決翻轉，多數元素反轉的網格才不會被當成正常
+    """
+    sign = -1.0 if orientation < 0 else 1.0
+    return [sign * j for j in jacobian]
+
+
+def histogram(values, edges):
+    """依分界 edges 計數：[(下界, 上界, 數量)]，最後一格為 >= edges[-1]"""
+    bounds = list(edges) + [float("inf")]
+    counts = [0] * len(edges)
+    below = 0
+    for value in values:
+        if value < bounds[0]:
+            below += 1
+            continue
+        lo, hi = 0, len(bounds) - 1
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if bounds[mid] <= value:
+                lo = mid
+            else:
+                hi = mid
+        counts[lo] += 1
+    rows = [(bounds[i], bounds[i + 1], counts[i]) for i in range(len(edges))]
+    if below:
+        rows.insert(0, (float("-inf"), bounds[0], below))
+    return rows
+
+
+def _summary(values):
+    """[內部] 最小 / 平均 / 最大 / 99 百分位"""
+    ordered = sorted(v for v in values if v == v)  # 略過 NaN
+    if not ordered:
+        return {"min": None, "mean": None, "max": None, "p99": None}
+    finite = [v for v in ordered if abs(v) != float("inf")]
+    return {"min": ordered[0], "max": ordered[-1], "p99": ordered[int(0.99 * (len(ordered) - 1))],
+            "mean": sum(finite) / len(finite) if finite else None}
+
+
+def evaluate(arrays, thresholds=None, max_bad_fraction=DEFAULT_MAX_BAD_FRACTION, worst=20,
+             use_numpy=True, orientation=DEFAULT_ORIENTATION):
+    """
+    計算指標並判定是否合格 (不需要 Mechanical，可用於 MeshArrays.load 的離線資料)
+    orientation : 節點順序慣例 (見 orient)；多數元素反轉時另外註明，方便確認慣例是否正確
+
+    Returns
+    -------
+    dict : {"elements", "skipped", "metrics": {指標: 統計}, "histograms", "bad", "inverted",
+            "bad_fraction", "worst": [{"element", "aspect", "jacobian", "skewness", "size"}],
+            "failures": [不合格原因], "ok"}
+    """
+    limits = dict(DEFAULT_THRESHOLDS)
+    limits.update(thresholds or {})
+    metrics = tet_metrics(arrays.node_xyz, arrays.elem_conn, use_numpy=use_numpy)
+    aspect = list(metrics["aspect"])
+    jacobian = orient(metrics["jacobian"], orientation)
+    skewness = list(metrics["skewness"])
+    size = list(metrics["size"])
+    n = len(jacobian)
+
+    bad = []
+    inverted = 0
+    for i in range(n):
+        if jacobian[i] <= 0:
+            inverted += 1
+        if (aspect[i] > limits["max_aspect"] or jacobian[i] < limits["min_jacobian"] or
+                skewness[i] > limits["max_skewness"]):
+            bad.append(i)
+
+    # 最差元素：Scaled Jacobian 由小到大，其次為長寬比由大到小
+    ranked = sorted(bad or range(n), key=lambda i: (jacobian[i], -aspect[i]))[:worst]
+    elem_ids = arrays.elem_ids
+    size_stats = _summary(size)
+    size_edges = []
+    if size_stats["min"] is not None:
+        lo, hi = size_stats["min"], size_stats["max"]
+        step = (hi - lo) / SIZE_BINS if hi > lo else 1.0
+        size_edges = [lo + step * k for k in range(SIZE_BINS)]
+
+    report = {
+        "elements": n,
+        "skipped": dict(arrays.skipped),
+        "thresholds": limits,
+        "metrics": {"aspect": _summary(aspect), "jacobian": _summary(jacobian),
+                    "skewness": _summary(skewness), "size": size_stats},
+        "histograms": {"aspect": histogram(aspect, ASPECT_EDGES),
+                       "skewness": histogram(skewness, SKEWNESS_EDGES),
+                       "size": histogram(size, size_edges) if size_edges else []},
+        "bad": len(bad),
+        "inverted": inverted,
+        "bad_fraction": float(len(bad)) / n if n else 0.0,
+        "worst": [{"element": int(elem_ids[i]), "index": i, "aspect": aspect[i],
+                   "jacobian": jacobian[i], "skewness": skewness[i], "size": size[i]}
+                  for i in ranked],
+        "failures": [],
+    }
+    if inverted:
+        report["failures"].append("{} 個反轉元素 (Scaled Jacobian <= 0){}".format(
+            inverted, "，超過半數：網格大多反轉或節點順序慣例 (orientation) 不符"
+            if inverted * 2 > n else ""))
+    if n and report["bad_fraction"] > max_bad_fraction:
+        report["failures"].append("不良元素 {} 個 ({:.3%}) 超過上限 {:.3%}".format(
+            len(bad), report["bad_fraction"], max_bad_fraction))
+    report["ok"] = not report["failures"]
+    return report
+
+
+class MeshQualityTool(object):
+    """
+    網格品質檢查工具
+    負責：讀出網格陣列、計算指標、標記最差元素所屬的 Body 與接觸群組、輸出報告
+    """
+
+    def __init__(self, ext_api, model=None, mesh_name=None):
+        self.api = ext_api
+        self.model = model if model is not None else ext_api.DataModel.Project.Model
+        self.mesh_name = mesh_name
+
+    def mesh_data(self):
+        data_model = self.api.DataModel
+        return data_model.MeshDataByName(self.mesh_name or data_model.MeshNames[0])
+
+    def _locate(self, mesh, arrays, worst):
+        """[內部] 最差元素所屬的 Body 與接觸群組 (只查這幾個元素)"""
+        wanted = set(entry["element"] for entry in worst)
+        body_of = {}
+        for body in iter_bodies(self.api.DataModel.GeoData):
+            try:
+                ids = mesh.MeshRegionById(body.Id).ElementIds
+            except Exception:
+                continue
+            for elem_id in ids:
+                if elem_id in wanted:
+                    body_of[elem_id] = body.Id
+
+        try:
+            from ContactStats_V1 import GroupIndex
+            groups = GroupIndex.from_named_selections(self.api, self.model, self.mesh_name)
+        except Exception:
+            groups = None
+
+        node_ids = arrays.node_ids
+        conn = arrays.elem_conn
+        for entry in worst:
+            entry["body"] = body_of.get(entry["element"])
+            entry["contact_group"] = None
+            if groups is not None:
+                k = entry["index"]
+                for i in conn[4 * k:4 * k + 4]:
+                    slot = groups.slot.get(node_ids[i])
+                    if slot is not None:
+                        entry["contact_group"] = groups.groups[slot]
+                        break
+
+    def check(self, thresholds=None, max_bad_fraction=DEFAULT_MAX_BAD_FRACTION, worst=20,
+              export_dir=None, orientation=DEFAULT_ORIENTATION):
+        """讀出網格並評估品質；沒有網格資料時回傳 None"""
+        print("-> 網格品質檢查...")
+        try:
+            mesh = self.mesh_data()
+            arrays = MeshArrays.from_mesh(mesh)
+        except Exception as e:
+            print("   警告：無法讀取網格資料，略過品質檢查 ({})".format(e))
+            return None
+        if export_dir:
+            arrays.save(export_dir)
+
+        report = evaluate(arrays, thresholds, max_bad_fraction, worst, orientation=orientation)
+        self._locate(mesh, arrays, report["worst"])
+        by_body = {}
+        for entry in report["worst"]:
+            key = str(entry["body"])
+            by_body[key] = by_body.get(key, 0) + 1
+        report["worst_by_body"] = by_body
+        print_quality(report)
+        return report
+
+
+def print_quality(report):
+    m = report["metrics"]
+    print("   四面體 {} 個 (略過 {})".format(report["elements"], ", ".join(
+        "{} x {}".format(k, v) for k, v in sorted(report["skipped"].items())) or "無"))
+    for name in ("aspect", "jacobian", "skewness", "size"):
+        s = m[name]
+        if s["min"] is None:
+            continue
+        print("   {:<9} min {:10.4g}  mean {:10.4g}  p99 {:10.4g}  max {:10.4g}".format(
+            name, s["min"], s["mean"] if s["mean"] is not None else float("nan"), s["p99"], s["max"]))
+    print("   不良元素 {} 個 ({:.3%})，反轉 {} 個".format(
+        report["bad"], report["bad_fraction"], report["inverted"]))
+    for entry in report["worst"][:5]:
+        print("   最差 #{}: Body {}  群組 {}  aspect {:.3g}  jacobian {:.3g}  skew {:.3g}".format(
+            entry["element"], entry.get("body"), entry.get("contact_group"),
+            entry["aspect"], entry["jacobian"], entry["skewness"]))
+    print("   {}".format("品質合格" if report["ok"] else "品質不合格：" + "；".join(report["failures"])))
+
+
+def runMeshQuality(ext_api, model=None, mesh_name=None, max_aspect=None, min_jacobian=None,
+                   max_skewness=None, max_bad_fraction=DEFAULT_MAX_BAD_FRACTION, worst=20,
+                   export_dir=None, stop_on_fail=True, orientation=DEFAULT_ORIENTATION):
+    """
+    Caller 呼叫用的便利函式
+    stop_on_fail=True 時品質不合格會丟出 MeshQualityError (流程在求解前停止)
+    orientation : 四面體節點順序慣例 (見 orient)
+    """
+    thresholds = dict((k, v) for k, v in (("max_aspect", max_aspect), ("min_jacobian", min_jacobian),
+                                          ("max_skewness", max_skewness)) if v is not None)
+    tool = MeshQualityTool(ext_api, model=model, mesh_name=mesh_name)
+    report = tool.check(thresholds, max_bad_fraction, worst, export_dir, orientation=orientation)
+    if report is not None and not report["ok"] and stop_on_fail:
+        raise MeshQualityError(report)
+    return report
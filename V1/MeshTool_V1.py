@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 import re
 
+from IdSet_V1 import IdSet
+from TransactionBatch_V1 import run_in_transaction, run_after_commit
+
 class MeshTool(object):
     """
     網格劃分自動化工具 (Logic Only)
@@ -11,9 +14,11 @@ class MeshTool(object):
                  data_model_object_category_enum=None,
                  quantity_cls=None,
                  element_order_enum=None,
-                 method_type_enum=None):
+                 method_type_enum=None,
+                 manifest=None):
         
         self.api = ext_api
+        self.manifest = manifest  # ObjectManifest (可選)：有傳入時以 ObjectId 追蹤/清除
         self.model = model if model is not None else ext_api.DataModel.Project.Model
         self.mesh = self.model.Mesh
         self.transaction_cls = transaction_cls
@@ -42,6 +47,19 @@ class MeshTool(object):
             else:
                 self.mesh.ElementOrder = self.ElementOrder.Linear
 
+    def _delete_previous(self, key, name_match):
+        """
+        [內部] 刪除先前建立的網格控制
+        有 Manifest 時直接以 ObjectId 刪除；否則沿用名稱掃描
+        """
+        if self.manifest is not None:
+            self.manifest.delete_tracked("MeshTool", key=key)
+            return
+
+        for child in self.mesh.Children:
+            if name_match(child.Name):
+                child.Delete()
+
     def apply_body_method(self):
         """套用 Tetrahedrons Method 到所有 Body"""
         print("-> 正在套用 Tetrahedrons Method...")
@@ -66,12 +84,12 @@ class MeshTool(object):
             return
 
         # 刪除舊的 Method
-        for child in self.mesh.Children:
-            if child.Name == "Global_Tetrahedrons":
-                child.Delete()
+        self._delete_previous("Global_Tetrahedrons", lambda name: name == "Global_Tetrahedrons")
 
         method = self.mesh.AddAutomaticMethod()
         method.Name = "Global_Tetrahedrons"
+        if self.manifest is not None:
+            self.manifest.record("MeshTool", method, key="Global_Tetrahedrons")
         
         if self.SelectionTypeEnum:
             sel = self.sel_mgr.CreateSelectionInfo(self.SelectionTypeEnum.GeometryEntities)
@@ -88,33 +106,29 @@ class MeshTool(object):
         target_size = global_size * refinement_factor
         print("-> 正在搜尋接觸區域進行加密 (尺寸: {} mm)...".format(target_size))
         
-        target_ids = []
         ns_list = self.model.NamedSelections.Children
         # 保留您原本的 Regex 邏輯
-        pattern = r"^\[Cont\]_\[(Target|Contact|Conyacy|Conatct)\]_\[(.*?)\]$"
+        pattern = re.compile(r"^\[Cont\]_\[(Target|Contact|Conyacy|Conatct)\]_\[(.*?)\]$")
         
-        for ns in ns_list:
-            if re.match(pattern, ns.Name):
-                if ns.Location.Ids.Count > 0:
-                    target_ids.extend(list(ns.Location.Ids))
+        # 一次合併所有符合的 NS (只排序去重一次，不產生中間 list)
+        target_ids = IdSet.union_all(ns.Location.Ids for ns in ns_list
+                                     if pattern.match(ns.Name) and ns.Location.Ids.Count > 0)
         
         if not target_ids:
             print("   警告：未發現任何符合規則的 Named Selection。")
             return
-
-        target_ids = list(set(target_ids))
         
         sizing_name = "Contact_Refinement_x{}".format(refinement_factor)
-        for child in self.mesh.Children:
-            if child.Name == sizing_name:
-                child.Delete()
+        self._delete_previous("Contact_Refinement", lambda name: name == sizing_name)
 
         sizing = self.mesh.AddSizing()
         sizing.Name = sizing_name
+        if self.manifest is not None:
+            self.manifest.record("MeshTool", sizing, key="Contact_Refinement")
         
         if self.SelectionTypeEnum:
             sel = self.sel_mgr.CreateSelectionInfo(self.SelectionTypeEnum.GeometryEntities)
-            sel.Ids = target_ids
+            sel.Ids = target_ids.to_list()
             sizing.Location = sel
             
         if self.Quantity:
@@ -133,7 +147,9 @@ def runMesh(ext_api, element_size=5.0, is_quadratic=True, do_contact_refine=True
             data_model_object_category_enum=None,
             quantity_cls=None,
             element_order_enum=None,
-            method_type_enum=None):
+            method_type_enum=None,
+            manifest=None,
+            batcher=None):
     """
     Caller 呼叫用的便利函式
     """
@@ -142,20 +158,22 @@ def runMesh(ext_api, element_size=5.0, is_quadratic=True, do_contact_refine=True
                     data_model_object_category_enum=data_model_object_category_enum,
                     quantity_cls=quantity_cls,
                     element_order_enum=element_order_enum,
-                    method_type_enum=method_type_enum)
+                    method_type_enum=method_type_enum,
+                    manifest=manifest)
+    if manifest is not None:
+        manifest.begin_run("MeshTool")
 
     # 設定參數 (包在 Transaction 中以提升效能)
-    if transaction_cls:
-        with transaction_cls():
-            tool.set_global_mesh(element_size, is_quadratic)
-            tool.apply_body_method()
-            if do_contact_refine:
-                tool.apply_contact_sizing(element_size, 0.5)
-    else:
+    def _do_setup():
         tool.set_global_mesh(element_size, is_quadratic)
         tool.apply_body_method()
         if do_contact_refine:
             tool.apply_contact_sizing(element_size, 0.5)
+        if manifest is not None:
+            manifest.save()
+
+    run_in_transaction(_do_setup, transaction_cls, batcher, tool="MeshTool")
 
     # 生成網格通常比較耗時，且需要即時更新進度，建議放在 Transaction 之外
-    tool.generate_mesh()
\ No newline at end of file
+    # (有 batcher 時延後到批次 Transaction 提交之後)
+    run_after_commit(tool.generate_mesh, batcher, tool="MeshTool")
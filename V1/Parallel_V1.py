@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import time
+
+try:
+    import Queue as queue  # IronPython 2.7
+except ImportError:
+    import queue
+
+# 安全開關：設定環境變數 SKY_CAE_FORCE_SERIAL=1 可強制所有 parallel_map 以單執行緒執行
+# (適用於 Mechanical API 在該版本不是 thread-safe 的環境)
+FORCE_SERIAL_ENV = "SKY_CAE_FORCE_SERIAL"
+DEFAULT_WORKERS = 4
+
+
+def force_serial():
+    """是否被環境變數強制為單執行緒"""
+    return os.environ.get(FORCE_SERIAL_ENV, "").strip() not in ("", "0", "false", "False")
+
+
+def parallel_map(fn, items, workers=None, parallel=False, fallback_serial=True):
+    """
+    以 thread pool 對 items 逐一執行 fn，回傳結果 (順序與 items 相同)
+    Mechanical Scripting 為 IronPython (沒有 GIL)，讀取型的 API 呼叫可以真正平行。
+
+    Parameters
+    ----------
+    workers : int, optional
+        執行緒數量 (預設 DEFAULT_WORKERS)
+    parallel : bool
+        預設 False (單執行緒)；True 才以 thread pool 執行。
+        GeoData 等 COM / interop 物件不保證可由背景執行緒存取，平行讀取須由使用者明確開啟
+    fallback_serial : bool
+        平行執行發生例外時，改以單執行緒重跑一次 (僅適用於唯讀操作)
+    """
+    items = list(items)
+    workers = int(workers or DEFAULT_WORKERS)
+    if not parallel or force_serial() or workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+
+    results = [None] * len(items)
+    errors = []
+    tasks = queue.Queue()
+    for index, item in enumerate(items):
+        tasks.put((index, item))
+
+    def _worker():
+        while not errors:
+            try:
+                index, item = tasks.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[index] = fn(item)
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=_worker) for _ in range(min(workers, len(items)))]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+
+    if errors:
+        if not fallback_serial:
+            raise errors[0]
+        print("警告：平行執行失敗，改以單執行緒重跑 ({})".format(errors[0]))
+        return [fn(item) for item in items]
+    return results
+
+
+def time_call(fn, repeat=3):
+    """執行 fn repeat 次，回傳最短耗時 (秒) 與最後一次的結果"""
+    best = None
+    result = None
+    for _ in range(max(int(repeat), 1)):
+        start = time.time()
+        result = fn()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
@@ -0,0 +1,523 @@
+# -*- coding: utf-8 -*-
+import time
+import traceback
+
+from TransactionBatch_V1 import TransactionBatcher, resolve_deferred
+
+# 流程階段 (執行順序固定)
+STAGES = ("zface", "symmetry", "contact", "mesh", "bc", "solver", "post")
+
+# 各階段預設參數 (與原本 main.py 的設定相同)；批次執行時以專案參數覆蓋
+DEFAULT_PARAMS = {
+    "zface": {"tolerance": 0.001},
+    # 對稱縮減預設只偵測並提出建議 (apply=True 才抑制 Body / 縮減 NS)
+    "symmetry": {"axes": ["X", "Y"], "tolerance": 0.001, "apply": False},
+    "contact": {"friction_coeff": 0.2, "delete_existing_groups": True,
+                "contact_name_typo_is_conatct": False,
+                # auto_tune=True 時依實測的初始間隙設定 Pinball / 剛性 (見 ContactTuning_V1)
+                "auto_tune": False},
+    "mesh": {"element_size": 1.0, "is_quadratic": True, "do_contact_refine": True},
+    "bc": {"z_magnitude": 5.0, "direction_sign": -1.0},
+    "solver": {"num_steps": 1, "end_time_list": [1.0], "cores": 6,
+               "large_deflection": True, "auto_time_stepping": True,
+               "initial_time_step": 0.1, "min_time_step": 0.001, "max_time_step": 0.2},
+    "post": {"add_basic": True, "add_contact": True, "add_force_probe": True},
+    # 多分析：all=True 處理全部分析，或以 select 指定名稱 / 序號 (都未指定時只處理第一個分析)
+    # overrides 為各分析的參數覆寫 {分析名稱: {stage: {...}}}
+    # solve_timeout：同時求解時每個分析的逾時 [s] (逾時記為 timeout，不會無限等待)
+    "analyses": {"all": False, "select": [], "max_concurrent_solves": 0,
+                 "solve_timeout": 12 * 3600.0, "overrides": {}},
+    # 求解失敗時依失敗型態補救並重試 (見 SolveRecovery_V1)；max_attempts 含第一次求解
+    # 預設關閉 (補救會暫時修改 Step Table / 接觸剛性)；enabled=True 開啟
+    # restart_points=True 時保留重啟點，補救可由最後收斂的重啟點接續
+    "recovery": {"enabled": False, "max_attempts": 4, "restart_points": False, "log_path": None},
+    # 網格生成後檢查元素品質 (見 MeshQuality_V1)；不合格時在求解前停止
+    # 預設關閉：Mechanical 中沒有 NumPy，逐元素計算加上讀取網格的 interop 在大網格上很耗時
+    # thresholds 可覆寫 max_aspect / min_jacobian / max_skewness；export_dir 匯出節點 / 元素陣列
+    # orientation：四面體節點順序慣例 (1 / -1)，正常元素的 Scaled Jacobian 為正
+    "mesh_quality": {"enabled": False, "thresholds": {}, "max_bad_fraction": 0.001, "worst": 20,
+                     "export_dir": None, "orientation": 1.0},
+}
+
+# 每個分析各執行一次的階段 (其餘階段的網格與接觸由所有分析共用)
+PER_ANALYSIS_STAGES = ("bc", "solver", "post")
+
+# Mechanical 主環境中的全域名稱 -> 依賴注入時使用的 key
+ENV_GLOBALS = {
+    "ExtAPI": "ext_api",
+    "Model": "model",
+    "Transaction": "transaction_cls",
+    "SelectionTypeEnum": "selection_type_enum",
+    "ContactType": "contact_type",
+    "DataModelObjectCategory": "data_model_object_category_enum",
+    "Quantity": "quantity_cls",
+    "ElementOrder": "element_order_enum",
+    "MethodType": "method_type_enum",
+    "LoadDefineBy": "load_define_by_enum",
+    "NormalOrientationType": "normal_orientation_enum",
+    "LocationDefinitionMethod": "location_definition_method_enum",
+    "ProbeDisplayFilter": "probe_display_filter_enum",
+}
+
+
+# 各階段使用的工具模組與進入函式 (第一次執行該階段時才 import)
+STAGE_RUNNERS = {
+    "zface":   ("ZFaceSelector_V1", "runZFaceSelector"),
+    "symmetry": ("SymmetryTool_V1", "runSymmetry"),
+    "contact": ("ContactTool_V1", "runContact"),
+    "mesh":    ("MeshTool_V1", "runMesh"),
+    "bc":      ("BCTool_V1", "runBC"),
+    "solver":  ("SolverTool_V1", "runSolver"),
+    "post":    ("PostTool_V1", "runPost"),
+}
+
+# 批次中排入操作的工具名稱 -> 階段 (flush 中的執行時間記回該階段)
+TOOL_STAGES = {
+    "ZFaceSelector": "zface",
+    "SymmetryTool": "symmetry",
+    "ContactTool": "contact",
+    "MeshTool": "mesh",
+    "BCTool": "bc",
+    "SolverTool": "solver",
+    "PostTool": "post",
+}
+
+
+def env_from_globals(g):
+    """由 Mechanical 腳本的 globals() 收集依賴注入所需的物件"""
+    return dict((key, g.get(name)) for name, key in ENV_GLOBALS.items())
+
+
+def _enum(env, key, name):
+    """
+    [內部] 只有求解相關步驟需要的列舉 (例如 AutomaticTimeStepping)
+    用到時才載入 Ansys.Mechanical.DataModel.Enums，載入後存入 env
+    """
+    if key not in env:
+        try:
+            import Ansys.Mechanical.DataModel.Enums as Enums
+            env[key] = getattr(Enums, name, None)
+        except ImportError:
+            env[key] = None
+    return env[key]
+
+
+def _solver_enums(env):
+    """[內部] AutomaticTimeStepping / TimeStepDefineByType"""
+    return (_enum(env, "auto_time_stepping_enum", "AutomaticTimeStepping"),
+            _enum(env, "time_step_define_by_type_enum", "TimeStepDefineByType"))
+
+
+# ContactTuner 使用的列舉：contact_enums 的 key -> Ansys.Mechanical.DataModel.Enums 名稱
+CONTACT_TUNING_ENUMS = {
+    "pinball_region": "ContactPinballType",
+    "normal_stiffness": "ContactNormalStiffness",
+    "update_stiffness": "UpdateContactStiffness",
+    "interface_treatment": "ContactInitialEffect",
+    "detection_method": "ContactDetectionPoint",
+}
+# contact 階段中給 ContactTuner 的參數 (不傳給 runContact)
+CONTACT_TUNING_KEYS = ("auto_tune", "tuning_rules", "tuning_presets", "length_unit")
+
+
+def _import_attr(module_name, attr_name):
+    """[內部] 沒有 loader 時的一般 import"""
+    return getattr(__import__(module_name), attr_name)
+
+
+def merge_params(*layers):
+    """依序合併多層參數 ({stage: {key: value}})，後面的覆蓋前面的"""
+    merged = {}
+    for layer in layers:
+        for stage, values in (layer or {}).items():
+            merged.setdefault(stage, {}).update(values or {})
+    return merged
+
+
+def analysis_params(params, analysis_name):
+    """某個分析實際使用的參數：共用參數 + analyses.overrides 中該分析的覆寫"""
+    overrides = (params.get("analyses") or {}).get("overrides") or {}
+    return merge_params(params, overrides.get(analysis_name))
+
+
+def _to_plain(value):
+    """[內部] 把結果轉成可寫入 JSON 的型別 (Mechanical 物件以字串表示)"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return dict((str(k), _to_plain(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_to_plain(v) for v in value]
+    return str(value)
+
+
+def collect_key_results(env):
+    """讀取幾何指紋、網格規模與求解狀態 (讀取失敗的項目略過)"""
+    model = env.get("model") or env["ext_api"].DataModel.Project.Model
+    results = {}
+    try:
+        geometry_fingerprint = _import_attr("GeoSnapshot_V1", "geometry_fingerprint")
+        results["geometry"] = geometry_fingerprint(env["ext_api"].DataModel.GeoData)
+    except Exception:
+        pass
+    try:
+        results["nodes"] = int(model.Mesh.Nodes)
+        results["elements"] = int(model.Mesh.Elements)
+    except Exception:
+        pass
+    try:
+        results["solution_status"] = str(model.Analyses[0].Solution.Status)
+        if model.Analyses.Count > 1:
+            results["solution_statuses"] = dict(
+                (model.Analyses[i].Name, str(model.Analyses[i].Solution.Status))
+                for i in range(model.Analyses.Count))
+    except Exception:
+        pass
+    return results
+
+
+def run_pipeline(env, params=None, stages=STAGES, solve=False, manifest=None, batcher=None,
+                 loader=None, run_name=None, restart_from=None, property_cache=False):
+    """
+    依序執行 V1 流程 (ZFaceSelector -> Symmetry -> Contact -> Mesh -> BC -> Solver -> Post)
+
+    Parameters
+    ----------
+    env : dict
+        依賴注入物件 (見 env_from_globals)
+    params : dict, optional
+        {stage: {參數: 值}}，覆蓋 DEFAULT_PARAMS
+    stages : sequence
+        只執行其中幾個階段 (例如只重跑 ("mesh",))
+    solve : bool
+        設定完成後是否求解
+    loader : ToolLoader, optional
+        由 loader 載入工具模組 (見 Loader_V1)；未指定時以一般 import 載入
+    run_name : str, optional
+        寫入力-位移曲線庫時的執行名稱 (post.curve_dir 有設定時)
+    restart_from : int, optional
+        求解前開啟重啟點並由第 n 個重啟點接續 (0 = 從頭求解)；見 VariantFamily_V1
+    property_cache : bool
+        True 時 ExtAPI / Model 包成 PropertyCache 的 proxy，重複讀取的屬性只經過一次 interop
+        (見 PropertyCache_V1)；命中統計寫入 results["property_cache"]，結束時釋放
+
+    多分析 (params["analyses"])：zface / contact / mesh 只執行一次，
+    bc / solver / post 對每個選定的分析各執行一次，結果以分析名稱分開；
+    solve 時依核心數同時送出多個分析的求解 (見 Analyses_V1.SolveQueue)
+    params["recovery"]["enabled"] 時求解失敗依失敗型態補救重試 (見 SolveRecovery_V1)；補救後仍失敗時 status 為 failed
+    補救改過的 Step Table / 接觸剛性 / 重啟點在後處理讀完結果後還原；restart_from 未指定時由頭求解
+
+    timings[stage] 為該階段排入操作的時間加上這些操作在 flush 中實際執行的時間；
+    timings["flush"] 只剩無法歸屬到工具的部分 (Transaction 提交、樹狀結構刷新)
+
+    Returns
+    -------
+    dict : {"status", "error", "traceback", "timings", "results", "transactions"}
+    """
+    p = merge_params(DEFAULT_PARAMS, params)
+    if batcher is None:
+        batcher = TransactionBatcher(env.get("transaction_cls"))
+
+    tool = loader.attr if loader is not None else _import_attr
+
+    cache = None
+    if property_cache:
+        cache = tool("PropertyCache_V1", "PropertyCache")()
+        model = env.get("model")
+        env = dict(env, ext_api=cache.wrap(env["ext_api"]),
+                   model=cache.wrap(model) if model is not None else None)
+    ext_api = env["ext_api"]
+
+    def _run(stage):
+        return tool(*STAGE_RUNNERS[stage])
+
+    common = {"model": env.get("model"), "transaction_cls": env.get("transaction_cls"),
+              "batcher": batcher}
+    tuners = []  # contact 階段建立的 ContactTuner (flush 後彙整)
+
+    def _contact(sp):
+        """[內部] contact 階段：auto_tune 時建立 ContactTuner 交給 runContact"""
+        tuner = None
+        if sp.get("auto_tune"):
+            tuner = tool("ContactTuning_V1", "ContactTuner")(
+                ext_api.DataModel.GeoData, quantity_cls=env.get("quantity_cls"),
+                contact_enums=dict((key, _enum(env, key + "_enum", name))
+                                   for key, name in CONTACT_TUNING_ENUMS.items()),
+                rules_path=sp.get("tuning_rules"), length_unit=sp.get("length_unit", "mm"),
+                preset_overrides=sp.get("tuning_presets"))
+            tuners.append(tuner)
+        options = dict((k, v) for k, v in sp.items() if k not in CONTACT_TUNING_KEYS)
+        return _run("contact")(
+            ext_api, selection_type_enum=env.get("selection_type_enum"),
+            contact_type=env.get("contact_type"), manifest=manifest,
+            tuner=tuner, **dict(common, **options))
+
+    # 每個 runner 接收 (該階段參數, 分析系統)；zface / contact / mesh 為全模型共用，不使用分析
+    runners = {
+        "zface": lambda sp, analysis: _run("zface")(
+            ext_api, selection_type_enum=env.get("selection_type_enum"),
+            manifest=manifest, **dict(common, **sp)),
+        "symmetry": lambda sp, analysis: _run("symmetry")(
+            ext_api, selection_type_enum=env.get("selection_type_enum"),
+            data_model_object_category_enum=env.get("data_model_object_category_enum"),
+            manifest=manifest, **dict(common, **sp)),
+        "contact": lambda sp, analysis: _contact(sp),
+        "mesh": lambda sp, analysis: _run("mesh")(
+            ext_api, selection_type_enum=env.get("selection_type_enum"),
+            data_model_object_category_enum=env.get("data_model_object_category_enum"),
+            quantity_cls=env.get("quantity_cls"),
+            element_order_enum=env.get("element_order_enum"),
+            method_type_enum=env.get("method_type_enum"),
+            manifest=manifest, **dict(common, **sp)),
+        "bc": lambda sp, analysis: _run("bc")(
+            ext_api, quantity_cls=env.get("quantity_cls"),
+            load_define_by_enum=env.get("load_define_by_enum"),
+            manifest=manifest, analysis=analysis, **dict(common, **sp)),
+        "solver": lambda sp, analysis: _run("solver")(
+            ext_api, quantity_cls=env.get("quantity_cls"),
+            auto_time_stepping_enum=_solver_enums(env)[0],
+            time_step_define_by_type_enum=_solver_enums(env)[1],
+            analysis=analysis, **dict(common, **sp)),
+        "post": lambda sp, analysis: _run("post")(
+            ext_api,
+            normal_orientation_enum=env.get("normal_orientation_enum"),
+            location_definition_method_enum=env.get("location_definition_method_enum"),
+            probe_display_filter_enum=env.get("probe_display_filter_enum"),
+            manifest=manifest, analysis=analysis, **dict(common, **sp)),
+    }
+
+    recoveries = []  # 補救過的 SolveRecovery (讀完結果後還原補救前的設定)
+
+    def _recover(analysis, ap, already_failed=False):
+        """[內部] 以補救重試的方式求解單一分析 (見 SolveRecovery_V1)"""
+        options = ap["recovery"]
+        recovery = tool("SolveRecovery_V1", "build_recovery")(
+            ext_api, model=env.get("model"), transaction_cls=env.get("transaction_cls"),
+            quantity_cls=env.get("quantity_cls"),
+            auto_time_stepping_enum=_solver_enums(env)[0],
+            time_step_define_by_type_enum=_solver_enums(env)[1],
+            restart_controls_enum=_enum(env, "restart_controls_enum", "RestartControlsType"),
+            normal_stiffness_enum=_enum(env, "normal_stiffness_enum", "ContactNormalStiffness"),
+            analysis=analysis, max_attempts=options.get("max_attempts", 4),
+            log_path=options.get("log_path"), restart_points=options.get("restart_points", False))
+        recoveries.append(recovery)
+        # 補救的設定保留到後處理讀完結果 (還原會讓求解過期)，之後由 _restore_recoveries 還原
+        return recovery.run(already_failed=already_failed, keep_changes=True)
+
+    def _restore_recoveries():
+        """[內部] 還原補救改過的 Step Table / 接觸剛性 / 重啟點，避免在下一次執行中累積"""
+        restored = {}
+        while recoveries:
+            recovery = recoveries.pop(0)
+            changed = recovery.restore()
+            if changed:
+                restored[recovery.tool.analysis.Name] = changed
+        return restored
+
+    def _post_results(post_tool, ap, name):
+        """[內部] 讀取單一分析的後處理結果 (含選用的曲線 / 接觸統計 / 結果快取)"""
+        results = post_tool.key_results()
+        if post_tool.curve_dir:
+            CurveStore = tool("CurveStore_V1", "CurveStore")
+            post_tool.extract_force_curves(CurveStore(post_tool.curve_dir), run=name,
+                                           meta={"params": ap})
+        if post_tool.contact_stats_dir:
+            stats = post_tool.contact_group_stats(post_tool.contact_stats_dir)
+            if stats:
+                results["contact_groups"] = dict((str(row["group"]), row) for row in stats)
+        if post_tool.result_cache_dir:
+            ResultCache = tool("ResultCache_V1", "ResultCache")
+            cached = post_tool.cached_results(ResultCache(post_tool.result_cache_dir),
+                                              ap["solver"]["end_time_list"],
+                                              quantity_cls=env.get("quantity_cls"))
+            if cached is not None:
+                results["result_cache"] = cached.folder
+        return results
+
+    report = {"status": "ok", "error": None, "traceback": None, "timings": {}, "results": {},
+              "transactions": None}
+    current = None
+    post_tools = {}  # 分析名稱 -> (PostTool, 該分析的參數)
+    try:
+        analyses = []
+        if solve or set(stages) & set(PER_ANALYSIS_STAGES):
+            current = "analyses"
+            options = p["analyses"]
+            analyses = tool("Analyses_V1", "select_analyses")(
+                env.get("model") or ext_api.DataModel.Project.Model,
+                options.get("select"), options.get("all", False))
+        multi = len(analyses) > 1
+
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            current = stage
+            start = time.time()
+            if stage not in PER_ANALYSIS_STAGES:
+                # 有 batcher 時回傳值可能是 Deferred，flush 之後才轉成報表的值
+                report["results"][stage] = runners[stage](p[stage], None)
+                report["timings"][stage] = time.time() - start
+                continue
+
+            # BC / Solver / Post：每個選定的分析各執行一次 (網格與接觸共用)
+            outputs = {}
+            for analysis in analyses:
+                current = "{}:{}".format(stage, analysis.Name) if multi else stage
+                ap = analysis_params(p, analysis.Name)
+                sp = ap[stage]
+                if stage == "bc" and sp.get("z_steps") is not None:
+                    # 逐步位移需要與 Solver 的步結束時間對齊
+                    sp = dict(sp, step_end_times=ap["solver"]["end_time_list"])
+                result = runners[stage](sp, analysis)
+                if stage == "post":
+                    # 結果物件在 flush 後才建立，數值於最後延遲讀取
+                    post_tools[analysis.Name] = (result, ap)
+                else:
+                    outputs[analysis.Name] = result
+            if stage != "post":
+                report["results"][stage] = outputs if multi else outputs[analyses[0].Name]
+            report["timings"][stage] = time.time() - start
+
+        # 有 batcher 時上面只是排入佇列，實際變更在 flush 時執行
+        current = "flush"
+        start = time.time()
+        charged_before = dict(batcher.tool_seconds)
+        batcher.flush()
+        flush_seconds = time.time() - start
+        for tool_name, seconds in batcher.tool_seconds.items():
+            stage = TOOL_STAGES.get(tool_name)
+            if stage in report["timings"]:
+                spent = seconds - charged_before.get(tool_name, 0.0)
+                report["timings"][stage] += spent
+                flush_seconds -= spent
+        report["timings"]["flush"] = max(flush_seconds, 0.0)
+        for stage in list(report["results"]):
+            report["results"][stage] = _to_plain(resolve_deferred(report["results"][stage]))
+        report["transactions"] = batcher.stats.summary()
+        for tuner in tuners:
+            tuner.report()
+            report["results"]["contact_tuning"] = tuner.summary()
+
+        quality = p["mesh_quality"]
+        if quality.get("enabled") and "mesh" in stages:
+            # 網格在 flush 時才生成；品質不合格時丟出 MeshQualityError，不進入求解
+            # (沒有重新生成網格的執行，例如變體族群的後續變體，沿用先前的檢查)
+            current = "mesh_quality"
+            start = time.time()
+            MeshQualityTool = tool("MeshQuality_V1", "MeshQualityTool")
+            checked = MeshQualityTool(ext_api, model=env.get("model")).check(
+                quality.get("thresholds"), quality.get("max_bad_fraction", 0.001),
+                quality.get("worst", 20), quality.get("export_dir"),
+                orientation=quality.get("orientation", 1.0))
+            report["timings"]["mesh_quality"] = time.time() - start
+            if checked is not None:
+                report["results"]["mesh_quality"] = _to_plain(checked)
+                if not checked["ok"]:
+                    raise tool("MeshQuality_V1", "MeshQualityError")(checked)
+
+        failed = []  # 補救後仍未求解成功的分析
+        if solve:
+            current = "solve"
+            start = time.time()
+            for analysis in analyses:
+                solver_tool = tool("SolverTool_V1", "SolverTool")(
+                    ext_api, model=env.get("model"), analysis=analysis,
+                    restart_controls_enum=_enum(env, "restart_controls_enum",
+                                                "RestartControlsType"))
+                if restart_from is None:
+                    # 從頭求解：上一次執行 (補救或變體接續) 留下的重啟點不可沿用
+                    if solver_tool.restart_points():
+                        solver_tool.use_restart_point(0)
+                else:
+                    solver_tool.enable_restart_points()
+                    # 前一次求解沒有走到該步時 (重啟檔不足)，改由最後一個重啟點接續並記錄在 report
+                    points = solver_tool.restart_points()
+                    point = min(int(restart_from), len(points))
+                    if points and not solver_tool.use_restart_point(point):
+                        point = 0
+                    if point < int(restart_from):
+                        print("   警告：[{}] 重啟檔不足 ({} 個)，改由重啟點 {} 接續 (要求 {})".format(
+                            analysis.Name, len(points), point, restart_from))
+                        report["results"].setdefault("restart_fallback", {})[analysis.Name] = {
+                            "requested": int(restart_from), "used": point, "available": len(points)}
+                    report["results"].setdefault("restart_from", {})[analysis.Name] = point
+                    if not multi:
+                        report["results"]["restart_from"] = point
+            if multi:
+                slots = tool("Analyses_V1", "solve_slots")(
+                    p["solver"].get("cores"), p["analyses"].get("max_concurrent_solves", 0))
+                outcome = tool("Analyses_V1", "SolveQueue")(
+                    analyses, max_concurrent=slots, timeout=p["analyses"].get("solve_timeout")).run()
+                # 同時求解中失敗的分析，逐一補救重試
+                for analysis in analyses:
+                    entry = outcome[analysis.Name]
+                    ap = analysis_params(p, analysis.Name)
+                    if entry["status"] != "Done" and ap["recovery"].get("enabled"):
+                        current = "solve:{}".format(analysis.Name)
+                        entry["recovery"] = _to_plain(_recover(analysis, ap, already_failed=True))
+                        entry["status"] = "Done" if entry["recovery"]["ok"] else entry["status"]
+                    if entry["status"] != "Done":
+                        failed.append(analysis.Name)
+                report["results"]["solve"] = outcome
+            elif analysis_params(p, analyses[0].Name)["recovery"].get("enabled"):
+                outcome = _to_plain(_recover(analyses[0], analysis_params(p, analyses[0].Name)))
+                report["results"]["solve_recovery"] = outcome
+                if not outcome["ok"]:
+                    failed.append(analyses[0].Name)
+            elif not tool("SolverTool_V1", "SolverTool")(ext_api, model=env.get("model"),
+                                                         analysis=analyses[0]).solve_analysis():
+                failed.append(analyses[0].Name)
+            report["timings"]["solve"] = time.time() - start
+
+            # 每子步平衡迭代數等收斂統計 (ContactTuning_V1.learn_rules 以此比較接觸設定)
+            convergence = {}
+            for analysis in analyses:
+                output = tool("SolverTool_V1", "SolverTool")(
+                    ext_api, model=env.get("model"), analysis=analysis).read_solve_output()
+                convergence[analysis.Name] = tool("SolveRecovery_V1", "convergence_stats")(output)
+            report["results"]["convergence"] = convergence if multi else convergence[analyses[0].Name]
+
+        symmetry = report["results"].get("symmetry")
+        if symmetry and symmetry.get("applied"):
+            # 對稱縮減模型的反力只有全模型的 1/factor (方案在 flush 後才知道是否套用成功)
+            for post_tool, _ in post_tools.values():
+                post_tool.reduction_factor = symmetry["applied_factor"]
+
+        start = time.time()
+        for name, (post_tool, ap) in sorted(post_tools.items()):
+            if not post_tool.is_solved():
+                continue
+            # 只計算 PostTool 建立、且求解結果有變更的結果物件
+            current = "post:{}".format(name) if multi else "post"
+            if multi:
+                run = "{}/{}".format(run_name, name) if run_name else name
+                report["results"].setdefault("post", {})[name] = _post_results(post_tool, ap, run)
+            else:
+                report["results"]["post"] = _post_results(post_tool, ap, run_name)
+        if post_tools:
+            report["timings"]["post_eval"] = time.time() - start
+        restored = _restore_recoveries()
+        if restored:
+            report["results"]["recovery_restored"] = restored
+
+        report["results"]["key"] = collect_key_results(env)
+        if failed:
+            # 其他分析的結果照常讀取，但整次執行不算成功 (RunStore 不會重用這份結果)
+            current = "solve"
+            raise Exception("求解失敗：{}".format(", ".join(failed)))
+    except Exception as e:
+        report["status"] = "failed"
+        report["error"] = "{}: {}".format(current, e)
+        report["traceback"] = traceback.format_exc()
+        report["results"] = _to_plain(resolve_deferred(report["results"]))
+        print("流程失敗於 [{}]：{}".format(current, e))
+        print(report["traceback"])
+        try:
+            _restore_recoveries()
+        except Exception as restore_error:
+            print("   警告：無法還原補救前的設定 ({})".format(restore_error))
+    if cache is not None:
+        report["results"]["property_cache"] = cache.stats()
+        cache.report()
+        cache.clear()
+    return report
@@ -0,0 +1,610 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import re
+import shutil
+
+from Analyses_V1 import analysis_scope, resolve_analysis
+from BCTool_V1 import BC_TYPES
+from ContactStats_V1 import (GroupIndex, contact_group_stats, print_group_stats,
+                             read_result_table, write_group_stats_csv)
+from LoadProfile_V1 import LoadProfile, hold, ramp
+from TransactionBatch_V1 import run_in_transaction, run_after_commit
+
+TOOL_NAME = "PostTool"
+
+# 結果種類 -> 預設名稱 (與 V0/Post.py 相同，使用者看到的樹狀結構不變)
+RESULT_NAMES = {
+    "deformation": "Total Deformation",
+    "deformation_z": "Directional Deformation (Z)",
+    "stress": "Equivalent Stress (Von-Mises)",
+    "contact_tool": "Connector Contact Status",
+    "force_probe": "Insertion Force Probe",
+}
+
+# 關鍵結果：(名稱, 結果種類, 讀取的屬性)
+KEY_RESULTS = (
+    ("max_deformation", "deformation", "Maximum"),
+    ("max_deformation_z", "deformation_z", "Maximum"),
+    ("max_stress", "stress", "Maximum"),
+    ("insertion_force", "force_probe", "ZAxis"),
+)
+
+# 反力探針 PlotData 的欄位名稱 (不同版本的標題略有差異，依序嘗試)
+PLOT_TIME_KEYS = ("Time",)
+PLOT_FORCE_KEYS = {
+    "X": ("X Axis", "XAxis", "X"),
+    "Y": ("Y Axis", "YAxis", "Y"),
+    "Z": ("Z Axis", "ZAxis", "Z"),
+}
+
+# Contact Tool 子結果 (依類別名稱或預設名稱辨識) -> 分組統計使用的欄位
+CONTACT_RESULT_KINDS = (("Pressure", "pressure"), ("Status", "status"),
+                        ("Penetration", "penetration"))
+
+# 施加位移的 BC (位移曲線與探針反力配對用)
+DISPLACEMENT_PREFIXES = (BC_TYPES["Displacement"][1], BC_TYPES["RemoteDisplacement"][1])
+
+
+def _to_float(value):
+    """[內部] Quantity / 數值 -> float (讀不到時回傳 None)"""
+    if value is None:
+        return None
+    value = getattr(value, "Value", value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _plot_column(plot_data, keys):
+    """[內部] 依序嘗試欄位名稱，取出 PlotData 的一欄 (float list)；都沒有時回傳 None"""
+    for key in keys:
+        try:
+            column = plot_data[key]
+        except Exception:
+            continue
+        if column is not None:
+            return [_to_float(v) for v in column]
+    return None
+
+
+class LazyResult(object):
+    """
+    結果物件的延遲讀取代理
+    只有在真正讀值 (value / values) 時才計算該結果 (見 PostTool.ensure_evaluated)
+    """
+
+    def __init__(self, tool, kind, obj):
+        self.tool = tool
+        self.kind = kind
+        self.obj = obj
+
+    @property
+    def name(self):
+        return self.obj.Name
+
+    def value(self, prop="Maximum"):
+        if not self.tool.ensure_evaluated(self.obj):
+            return None
+        return _to_float(getattr(self.obj, prop, None))
+
+    def values(self, *props):
+        if not self.tool.ensure_evaluated(self.obj):
+            return dict((p, None) for p in props)
+        return dict((p, _to_float(getattr(self.obj, p, None))) for p in props)
+
+
+class PostTool(object):
+    """
+    後處理自動化工具 (Logic Only，移植自 V0/Post.py)
+    負責：建立結果物件並記錄其 ObjectId、只計算自己建立的結果 (API 支援單一物件計算時)、
+    延遲到實際讀值時才計算、求解結果未變更時略過重算
+    只沿用本次建立或 Manifest 以 ObjectId 記錄的結果，不會接手使用者同名的結果物件
+    """
+
+    def __init__(self, ext_api, model=None, transaction_cls=None,
+                 normal_orientation_enum=None,
+                 location_definition_method_enum=None,
+                 probe_display_filter_enum=None,
+                 manifest=None,
+                 batcher=None,
+                 analysis=None,
+                 symmetry_factor=None):
+
+        self.api = ext_api
+        self.manifest = manifest  # ObjectManifest (可選)：跨次執行追蹤結果物件與計算紀錄
+        self.batcher = batcher
+        self.model = model if model is not None else ext_api.DataModel.Project.Model
+        self.transaction_cls = transaction_cls
+
+        # 注入的 Enum
+        self.NormalOrientationType = normal_orientation_enum
+        self.LocationDefinitionMethod = location_definition_method_enum
+        self.ProbeDisplayFilter = probe_display_filter_enum
+
+        # 要處理的分析系統 (未指定時為第一個分析系統)；Manifest 依分析分開記錄
+        self.analysis = resolve_analysis(self.model, analysis)
+        self.solution = self.analysis.Solution
+        self.tool_name = analysis_scope(TOOL_NAME, self.analysis, self.model)
+
+        # 對稱縮減倍數 (SymmetryTool 方案的 applied_factor)；未指定時讀取 Manifest
+        self.reduction_factor = symmetry_factor
+        self.results = {}  # kind -> LazyResult
+        self.curve_dir = None
+        self.contact_stats_dir = None
+        self.result_cache_dir = None
+        self.evaluations = 0
+        self.skipped = 0
+        # ObjectId -> 上次計算時的求解雜湊 (有 Manifest 時跨次執行保留)
+        self._evaluated = {}
+        if manifest is not None:
+            self._evaluated = dict(manifest.get_meta(self.tool_name, "evaluated", {}))
+
+    # ----------------------------------------------------------
+    # 求解雜湊
+    # ----------------------------------------------------------
+    def _result_file(self):
+        """[內部] 結果檔 (file.rst) 路徑；取不到時回傳 None"""
+        try:
+            path = self.analysis.ResultFileName
+        except Exception:
+            path = None
+        if not path:
+            try:
+                path = os.path.join(self.analysis.WorkingDir, "file.rst")
+            except Exception:
+                path = None
+        return path if path and os.path.isfile(path) else None
+
+    def solution_hash(self):
+        """
+        目前求解結果的雜湊 (結果檔路徑 + 修改時間 + 大小)
+        沒有結果檔 (尚未求解) 時回傳 None
+        """
+        path = self._result_file()
+        if path is None:
+            return None
+        st = os.stat(path)
+        stamp = "{}|{}|{}".format(os.path.abspath(path), st.st_mtime, st.st_size)
+        return hashlib.sha1(stamp.encode("utf-8")).hexdigest()
+
+    def is_solved(self):
+        try:
+            return str(self.solution.Status) == "Done"
+        except Exception:
+            return self._result_file() is not None
+
+    # ----------------------------------------------------------
+    # 建立結果物件
+    # ----------------------------------------------------------
+    def _find_tracked(self, kind, name):
+        """
+        [內部] 先前建立且仍存在的同種結果：本次已建立的，或 Manifest 以 ObjectId 記錄的
+        不依名稱比對 (使用者自己的 "Total Deformation" 等不會被當成本工具的結果)
+        """
+        handle = self.results.get(kind)
+        if handle is not None:
+            return handle.obj
+        if self.manifest is not None:
+            objects = self.manifest.get_objects(self.tool_name, key=kind)
+            return objects[0] if objects else None
+        return None
+
+    def _ensure(self, kind, factory, name=None):
+        """[內部] 取得 (必要時建立) 某種結果物件，並登記為本工具追蹤的結果"""
+        name = name or RESULT_NAMES[kind]
+        obj = self._find_tracked(kind, name)
+        if obj is None:
+            obj = factory()
+            obj.Name = name
+            if self.manifest is not None:
+                self.manifest.record(self.tool_name, obj, key=kind)
+        else:
+            print("   沿用既有結果: " + obj.Name)
+        handle = self.results[kind] = LazyResult(self, kind, obj)
+        return handle
+
+    def add_basic_results(self):
+        """加入基本結果: 總變形、Z 向變形、等效應力"""
+        print("-> 加入基本結果 (Deformation & Stress)...")
+        self._ensure("deformation", self.solution.AddTotalDeformation)
+
+        def _directional():
+            dir_deform = self.solution.AddDirectionalDeformation()
+            if self.NormalOrientationType:
+                dir_deform.NormalOrientation = self.NormalOrientationType.ZAxis
+            return dir_deform
+
+        self._ensure("deformation_z", _directional)
+        self._ensure("stress", self.solution.AddEquivalentStress)
+
+    def add_contact_tool(self):
+        """加入接觸工具 (Contact Tool) 以檢視接觸壓力與滑移"""
+        print("-> 加入接觸工具 (Contact Tool)...")
+
+        def _contact_tool():
+            c_tool = self.solution.AddContactTool()
+            c_tool.AddPressure()
+            c_tool.AddSlidingDistance()
+            c_tool.AddStatus()
+            c_tool.AddPenetration()
+            return c_tool
+
+        self._ensure("contact_tool", _contact_tool)
+
+    def _find_bc_by_name_pattern(self, pattern):
+        for child in self.analysis.Children:
+            if re.search(pattern, child.Name, re.IGNORECASE):
+                return child
+        return None
+
+    def add_insertion_force_probe(self):
+        """加入反力探針 (Force Reaction) 測量插拔力：優先綁定 AutoFixed，找不到改用 AutoDisp"""
+        print("-> 正在設定插拔力探針 (Force Reaction)...")
+        target_bc = self._find_bc_by_name_pattern(r"AutoFixed") or \
+            self._find_bc_by_name_pattern(r"AutoDisp")
+        if not target_bc:
+            print("   警告：找不到 'AutoFixed' 或 'AutoDisp'，無法自動建立反力探針。")
+            return None
+
+        handle = self._ensure("force_probe", lambda: self._new_probe(target_bc))
+        print("   已將探針綁定至: " + target_bc.Name)
+        return handle
+
+    def _new_probe(self, bc):
+        """[內部] 建立綁定到 BC 的反力探針"""
+        probe = self.solution.AddForceReaction()
+        if self.LocationDefinitionMethod:
+            probe.LocationMethod = self.LocationDefinitionMethod.BoundaryCondition
+        probe.BoundaryConditionSelection = bc
+        if self.ProbeDisplayFilter:
+            probe.ResultSelection = self.ProbeDisplayFilter.ZAxis
+        return probe
+
+    def _tool_bcs(self):
+        """[內部] BCTool 建立的 BC (有 Manifest 時以 ObjectId 取回，否則依自動命名前綴)"""
+        if self.manifest is not None:
+            objects = self.manifest.get_objects(analysis_scope("BCTool", self.analysis, self.model))
+            if objects:
+                return objects
+        prefixes = tuple(prefix for _, prefix in BC_TYPES.values())
+        return [c for c in self.analysis.Children if c.Name.startswith(prefixes)]
+
+    def add_bc_probes(self, bcs=None):
+        """每個 BC (預設為 BCTool 建立的全部 BC) 各一個反力探針，回傳 LazyResult list"""
+        bcs = list(bcs) if bcs is not None else self._tool_bcs()
+        print("-> 建立 BC 反力探針 x {}...".format(len(bcs)))
+        return [self._ensure("probe:" + bc.Name, lambda bc=bc: self._new_probe(bc),
+                             name="Reaction - " + bc.Name)
+                for bc in bcs]
+
+    # ----------------------------------------------------------
+    # 接觸群組統計
+    # ----------------------------------------------------------
+    def _contact_results(self, c_tool):
+        """[內部] Contact Tool 下的子結果：欄位名稱 -> 結果物件"""
+        found = {}
+        for child in c_tool.Children:
+            try:
+                type_name = child.GetType().Name
+            except AttributeError:
+                type_name = type(child).__name__
+            for token, column in CONTACT_RESULT_KINDS:
+                if column not in found and (token in type_name or token in child.Name):
+                    found[column] = child
+        return found
+
+    def contact_group_stats(self, folder, index=None):
+        """
+        各接觸群組 ([ContGroup]_[ID]) 的壓力 / 面積 / 黏著滑動比例 / 穿透量
+        匯出 Contact Tool 的整體節點結果後掃描一次 (不為每個群組建立結果物件)
+        index : GroupIndex (可選)，未提供時由 [Cont]_[Contact]_[ID] 的面與網格建立
+        回傳 dict list，並寫入 folder/contact_groups.csv
+        """
+        handle = self.results.get("contact_tool")
+        if handle is None or not self.ensure_evaluated(handle.obj):
+            print("   警告：沒有已計算的 Contact Tool，略過接觸群組統計。")
+            return None
+        results = self._contact_results(handle.obj)
+        if "pressure" not in results:
+            print("   警告：Contact Tool 下沒有 Pressure 結果，略過接觸群組統計。")
+            return None
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        tables = {}
+        for column, obj in results.items():
+            path = os.path.join(folder, "contact_{}.txt".format(column))
+            obj.ExportToTextFile(path)
+            tables[column] = read_result_table(path)
+
+        nodes = tables["pressure"]["node"]
+        columns = {}
+        for column, table in tables.items():
+            values = table.get(column)
+            if values is None:
+                continue
+            if table["node"] != nodes:
+                # 各結果的節點順序不同時才以節點 Id 對齊
+                by_node = dict(zip(table["node"], values))
+                values = [by_node.get(n) for n in nodes]
+            columns[column] = values
+
+        if index is None:
+            index = GroupIndex.from_named_selections(self.api, self.model)
+        stats = contact_group_stats(index, nodes, columns["pressure"],
+                                    status=columns.get("status"),
+                                    penetration=columns.get("penetration"))
+        write_group_stats_csv(stats, os.path.join(folder, "contact_groups.csv"))
+        print_group_stats(stats)
+        return stats
+
+    # ----------------------------------------------------------
+    # 結果快取
+    # ----------------------------------------------------------
+    def cached_results(self, cache, times, quantity_cls=None):
+        """
+        以求解雜湊取得結果快取 (CachedSolution)；同一個求解結果只經由 Mechanical 讀取一次
+        cache : ResultCache；times : 要快取的時間點 (例如各 Step 的結束時間)
+        """
+        from ResultCache_V1 import MechanicalResultReader
+        solution_hash = self.solution_hash()
+        if solution_hash is None:
+            print("   警告：找不到求解結果檔，無法建立結果快取。")
+            return None
+        export_dir = os.path.join(cache.root, solution_hash + ".export")
+
+        def _reader():
+            return MechanicalResultReader(self, times, export_dir, quantity_cls)
+
+        solution = cache.get_or_build(solution_hash, _reader,
+                                      meta={"result_file": self._result_file(), "times": list(times)})
+        if os.path.isdir(export_dir):
+            shutil.rmtree(export_dir)
+        return solution
+
+    # ----------------------------------------------------------
+    # 力-位移曲線
+    # ----------------------------------------------------------
+    def probe_history(self, probe, axis="Z"):
+        """探針的時間歷程 (times, forces)；PlotData 讀不到時回傳 (None, None)"""
+        try:
+            plot_data = probe.PlotData
+        except Exception:
+            return None, None
+        times = _plot_column(plot_data, PLOT_TIME_KEYS)
+        forces = _plot_column(plot_data, PLOT_FORCE_KEYS[axis])
+        if times is None or forces is None or len(times) != len(forces):
+            return None, None
+        return times, forces
+
+    def first_step_end_time(self):
+        """分析設定第一步的結束時間 [s]；讀不到時回傳 None"""
+        settings = getattr(self.analysis, "AnalysisSettings", None)
+        if settings is None:
+            return None
+        try:
+            return _to_float(settings.GetStepEndTime(1))
+        except Exception:
+            pass
+        # 舊版 API 沒有 GetStepEndTime：切到第一步讀取後還原
+        try:
+            current = settings.CurrentStepNumber
+            settings.CurrentStepNumber = 1
+            try:
+                return _to_float(settings.StepEndTime)
+            finally:
+                settings.CurrentStepNumber = current
+        except Exception:
+            return None
+
+    def imposed_displacement(self, bc, axis="Z", end_time=1.0):
+        """
+        BC 施加的位移曲線 (LoadProfile)
+        Tabular 直接取用時間/數值欄；單一數值時 Mechanical 會在第一步內由 0 線性增加，之後保持定值
+        """
+        comp = getattr(bc, axis + "Component", None)
+        if comp is None:
+            return None
+        values = [_to_float(v) for v in (comp.Output.DiscreteValues or [])]
+        if not values:
+            return None
+        try:
+            times = [_to_float(v) for v in comp.Inputs[0].DiscreteValues]
+        except Exception:
+            times = []
+        if len(values) > 1 and len(times) == len(values):
+            return LoadProfile(times, values)
+        step_end = self.first_step_end_time() or end_time
+        profile = ramp(values[-1], duration=step_end)
+        if end_time > step_end:
+            profile = profile.then(hold(values[-1], duration=end_time - step_end))
+        return profile
+
+    def extract_force_curves(self, store, run=None, meta=None, axis="Z"):
+        """
+        一次取出所有追蹤中探針的反力時間歷程，配對施加位移後寫入 CurveStore
+        回傳寫入的 curve id list
+        """
+        probes = [(kind, h) for kind, h in sorted(self.results.items())
+                  if kind == "force_probe" or kind.startswith("probe:")]
+        disp_bcs = [bc for bc in self._tool_bcs() if bc.Name.startswith(DISPLACEMENT_PREFIXES)]
+        disp_by_id = dict((bc.ObjectId, bc) for bc in disp_bcs)
+
+        curves = []
+        for kind, handle in probes:
+            probe = handle.obj
+            if not self.ensure_evaluated(probe):
+                continue
+            times, forces = self.probe_history(probe, axis)
+            if times is None:
+                print("   警告：無法讀取 {} 的時間歷程 (PlotData)".format(probe.Name))
+                continue
+
+            # 探針本身綁在位移 BC 上時用該 BC，否則 (例如 Fixed 端) 用第一個位移 BC
+            bc = getattr(probe, "BoundaryConditionSelection", None)
+            disp_bc = disp_by_id.get(getattr(bc, "ObjectId", None)) or \
+                (disp_bcs[0] if disp_bcs else None)
+            profile = self.imposed_displacement(disp_bc, axis, end_time=times[-1]) \
+                if disp_bc is not None else None
+            disps = [profile.value_at(t) for t in times] if profile else [0.0] * len(times)
+
+            entry = dict(meta or {})
+            entry.update({"run": run, "probe": probe.Name, "kind": kind, "axis": axis,
+                          "bc": getattr(bc, "Name", None),
+                          "disp_bc": disp_bc.Name if disp_bc is not None else None,
+                          "solution": self.solution_hash()})
+            curves.append((probe.Name if run is None else "{}/{}".format(run, probe.Name),
+                           times, disps, forces, entry))
+
+        ids = store.append_many(curves) if curves else []
+        if self.manifest is not None:
+            self.manifest.save()
+        print("-> 已寫入力-位移曲線 x {} -> {}".format(len(ids), store.folder))
+        return ids
+
+    # ----------------------------------------------------------
+    # 計算 (只計算追蹤中的結果)
+    # ----------------------------------------------------------
+    def _needs_evaluation(self, obj, solution_hash):
+        if solution_hash is None:
+            return True
+        if self._evaluated.get(str(obj.ObjectId)) != solution_hash:
+            return True
+        try:
+            return str(obj.ObjectState) != "Solved"
+        except Exception:
+            return False
+
+    def _mark_evaluated(self, objects, solution_hash):
+        if solution_hash is None:
+            return
+        for obj in objects:
+            self._evaluated[str(obj.ObjectId)] = solution_hash
+        if self.manifest is not None:
+            self.manifest.set_meta(self.tool_name, "evaluated", self._evaluated)
+
+    def ensure_evaluated(self, obj, force=False):
+        """
+        確保單一結果物件已計算 (求解雜湊未變且已計算過時略過)
+        尚未求解時不計算 (避免觸發求解)，回傳 False
+        結果物件有 Evaluate() 時只計算這一個物件；沒有時只能用 EvaluateAllResults()
+        (不論由哪個物件呼叫都是整個 Solution 的指令)：每個求解雜湊只呼叫一次，
+        並把所有追蹤中的結果記為已計算
+        """
+        if not self.is_solved():
+            print("   警告：尚未求解，略過計算 " + obj.Name)
+            return False
+
+        solution_hash = self.solution_hash()
+        if not force and not self._needs_evaluation(obj, solution_hash):
+            self.skipped += 1
+            return True
+
+        evaluate = getattr(obj, "Evaluate", None)
+        if evaluate is not None:
+            evaluate()
+            self._mark_evaluated([obj], solution_hash)
+        else:
+            self.solution.EvaluateAllResults()
+            self._mark_evaluated([obj] + [h.obj for h in self.results.values()], solution_hash)
+        self.evaluations += 1
+        return True
+
+    def evaluate_results(self, kinds=None, force=False):
+        """計算追蹤中的結果 (kinds 可指定種類)；回傳實際計算的數量"""
+        before, skipped_before = self.evaluations, self.skipped
+        for kind, handle in sorted(self.results.items()):
+            if kinds is None or kind in kinds:
+                self.ensure_evaluated(handle.obj, force=force)
+        if self.manifest is not None:
+            self.manifest.save()
+        count = self.evaluations - before
+        print("-> 計算結果：{} 個 (略過未變更 {} 個)".format(count, self.skipped - skipped_before))
+        return count
+
+    def key_results(self):
+        """讀取關鍵結果 (最大變形 / 最大應力 / 插拔力)；只會計算被讀到的結果物件"""
+        values = {}
+        for name, kind, prop in KEY_RESULTS:
+            handle = self.results.get(kind)
+            if handle is not None:
+                values[name] = handle.value(prop)
+        # 對稱縮減模型 (SymmetryTool) 的反力只有全模型的 1/factor
+        factor = self.symmetry_factor()
+        if factor != 1:
+            values["symmetry_factor"] = factor
+            if values.get("insertion_force") is not None:
+                values["insertion_force_full"] = values["insertion_force"] * factor
+        if self.manifest is not None:
+            self.manifest.save()
+        return values
+
+    def symmetry_factor(self):
+        """
+        目前模型的對稱縮減倍數：優先使用傳入的倍數 (SymmetryTool 方案的 applied_factor)，
+        否則讀取 SymmetryTool 記錄於 Manifest 的倍數；沒有縮減時為 1
+        """
+        if self.reduction_factor is not None:
+            return self.reduction_factor
+        if self.manifest is None:
+            return 1
+        return self.manifest.get_meta("SymmetryTool", "factor", 1) or 1
+
+
+def runPost(ext_api, add_basic=True, add_contact=True, add_force_probe=True,
+            add_bc_probes=False, curve_dir=None, contact_stats_dir=None, result_cache_dir=None,
+            evaluate=False, analysis=None,
+            model=None, transaction_cls=None,
+            normal_orientation_enum=None,
+            location_definition_method_enum=None,
+            probe_display_filter_enum=None,
+            manifest=None, batcher=None, symmetry_factor=None):
+    """
+    Caller 呼叫用的便利函式，回傳 PostTool (可再呼叫 key_results() 延遲讀值)
+    add_bc_probes : bool
+        為 BCTool 建立的每個 BC 各建立一個反力探針
+    curve_dir : str, optional
+        力-位移曲線庫 (CurveStore) 資料夾；求解後以 tool.extract_force_curves() 寫入
+    contact_stats_dir : str, optional
+        接觸群組統計的輸出資料夾；求解後以 tool.contact_group_stats() 寫入
+    result_cache_dir : str, optional
+        結果快取 (ResultCache) 資料夾；求解後以 tool.cached_results() 建立
+    evaluate : bool
+        True 時立即計算追蹤中的結果；預設 False，等到實際讀值時才計算
+    analysis : optional
+        要處理的分析系統 (物件 / 序號 / 名稱)；未指定時為第一個分析系統
+    symmetry_factor : int, optional
+        對稱縮減倍數 (runSymmetry 回傳方案的 applied_factor)；未指定時讀取 Manifest
+    """
+    tool = PostTool(ext_api, model=model, transaction_cls=transaction_cls,
+                    normal_orientation_enum=normal_orientation_enum,
+                    location_definition_method_enum=location_definition_method_enum,
+                    probe_display_filter_enum=probe_display_filter_enum,
+                    manifest=manifest, batcher=batcher, analysis=analysis,
+                    symmetry_factor=symmetry_factor)
+    tool.curve_dir = curve_dir
+    tool.contact_stats_dir = contact_stats_dir
+    tool.result_cache_dir = result_cache_dir
+    if manifest is not None:
+        manifest.begin_run(tool.tool_name)
+
+    def _do_create():
+        if add_basic:
+            tool.add_basic_results()
+        if add_contact:
+            tool.add_contact_tool()
+        if add_force_probe:
+            tool.add_insertion_force_probe()
+        if add_bc_probes:
+            tool.add_bc_probes()
+        if manifest is not None:
+            manifest.save()
+
+    run_in_transaction(_do_create, transaction_cls, batcher, tool=TOOL_NAME)
+
+    # 計算必須在 Transaction 之外 (有 batcher 時延後到批次提交之後)
+    if evaluate:
+        run_after_commit(tool.evaluate_results, batcher, tool=TOOL_NAME)
+    return tool
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+try:
+    _SCALAR_TYPES = (str, unicode, int, long, float, bool, type(None))  # IronPython 2.7
+except NameError:
+    _SCALAR_TYPES = (str, int, float, bool, type(None))
+
+# 唯讀方法：呼叫結果可依參數快取，且不會使快取失效
+DEFAULT_READ_METHODS = frozenset([
+    "GetGeoBody", "GetObjectsByType", "GetObjectsByName", "GetObjectById",
+])
+
+# 工廠方法：回傳新物件但不修改資料模型，呼叫時不需使快取失效
+DEFAULT_FACTORY_METHODS = frozenset([
+    "CreateSelectionInfo",
+])
+
+# 結構性屬性：任何新增/刪除物件後，這些快取在所有物件上都要失效
+STRUCTURAL_NAMES = frozenset(["Children", "Count", "__iter__", "__getitem__", "__len__"])
+# 結果取決於樹狀結構的唯讀方法 (新增/刪除物件後同樣失效；GetGeoBody 的幾何不受影響)
+STRUCTURAL_METHODS = frozenset(["call:GetObjectsByType", "call:GetObjectsByName", "call:GetObjectById"])
+
+
+def _unwrap(value):
+    """[內部] 寫回 Mechanical 前把 proxy 還原成原始物件 (list / tuple 會逐一還原)"""
+    if isinstance(value, CachedProxy):
+        return object.__getattribute__(value, "_target")
+    if isinstance(value, list):
+        return [_unwrap(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_unwrap(v) for v in value)
+    return value
+
+
+class PropertyCache(object):
+    """
+    Mechanical 物件屬性的讀取快取 (每次執行一份)
+    負責：把注入的 ExtAPI / Model 包成 CachedProxy，重複讀取的屬性 (ns.Name、
+    ns.Location.Ids、body.Suppressed、face.Centroid ...) 只會呼叫一次 interop；
+    工具對物件寫入屬性或呼叫 Add*/Delete 等方法時，相關快取自動失效。
+
+    用法 (工具程式碼不需修改)：
+        with PropertyCache() as cache:
+            api = cache.wrap(ExtAPI)
+            runContact(api, model=cache.wrap(Model), ...)
+            cache.report()
+
+    快取持有被包裝物件的參照；離開 with 區塊 (或呼叫 clear()) 時全部釋放，
+    失效的物件也會一併釋放，不會在整個 session 中累積
+    """
+
+    def __init__(self, read_methods=DEFAULT_READ_METHODS, factory_methods=DEFAULT_FACTORY_METHODS):
+        self.read_methods = frozenset(read_methods)
+        self.factory_methods = frozenset(factory_methods)
+        self.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.clear()
+        return False
+
+    def clear(self):
+        """清空快取、釋放持有的物件並重設統計 (每次執行開始 / 結束時呼叫)"""
+        self._entries = {}     # (id(target), name) -> value
+        self._keys = {}        # id(target) -> set(name)
+        self._targets = {}     # id(target) -> target (持有參照，避免 id 被回收重用)
+        self._structural = set()  # 結構性快取的 key，失效時不必掃描全部快取
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._name_stats = {}  # name -> [hits, misses]
+
+    # ----------------------------------------------------------
+    # 包裝 / 快取操作
+    # ----------------------------------------------------------
+    def wrap(self, obj):
+        if isinstance(obj, _SCALAR_TYPES) or isinstance(obj, CachedProxy):
+            return obj
+        return CachedProxy(obj, self)
+
+    def _count(self, name, hit):
+        stat = self._name_stats.get(name)
+        if stat is None:
+            stat = self._name_stats[name] = [0, 0]
+        if hit:
+            self.hits += 1
+            stat[0] += 1
+        else:
+            self.misses += 1
+            stat[1] += 1
+
+    def lookup(self, target, name, loader):
+        """取得 (target, name) 的快取值；沒有時呼叫 loader() 讀取並存入"""
+        key = (id(target), name)
+        try:
+            value = self._entries[key]
+        except KeyError:
+            value = loader()
+            self._entries[key] = value
+            self._keys.setdefault(key[0], set()).add(name)
+            self._targets[key[0]] = target
+            base = name if isinstance(name, str) else name[0]
+            if base in STRUCTURAL_NAMES or base in STRUCTURAL_METHODS:
+                self._structural.add(key)
+            self._count(base, False)
+            return value
+        self._count(name if isinstance(name, str) else name[0], True)
+        return value
+
+    def _release(self, target_id):
+        """[內部] 物件已沒有任何快取時，釋放對它的參照"""
+        if not self._keys.get(target_id):
+            self._keys.pop(target_id, None)
+            self._targets.pop(target_id, None)
+
+    def invalidate(self, target, structural=False):
+        """使 target 的所有快取失效；structural=True 時另外清除所有物件的結構性快取"""
+        names = self._keys.pop(id(target), None)
+        if names:
+            for name in names:
+                key = (id(target), name)
+                self._entries.pop(key, None)
+                self._structural.discard(key)
+            self.invalidations += len(names)
+        self._targets.pop(id(target), None)
+
+        if structural and self._structural:
+            for key in self._structural:
+                if self._entries.pop(key, None) is not None:
+                    self._keys.get(key[0], set()).discard(key[1])
+                    self._release(key[0])
+                    self.invalidations += 1
+            self._structural = set()
+
+    # ----------------------------------------------------------
+    # 統計
+    # ----------------------------------------------------------
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate,
+                "invalidations": self.invalidations, "entries": len(self._entries)}
+
+    def report(self, top=10):
+        print("-> 屬性快取：命中 {} / 讀取 {} (命中率 {:.1%})，失效 {} 筆".format(
+            self.hits, self.misses, self.hit_rate, self.invalidations))
+        ranked = sorted(self._name_stats.items(), key=lambda kv: -(kv[1][0] + kv[1][1]))
+        for name, (hits, misses) in ranked[:top]:
+            total = hits + misses
+            print("   {:<28} {:>8} 次  命中率 {:.1%}".format(name, total, float(hits) / total))
+
+
+class _MethodProxy(object):
+    """[內部] 物件方法的包裝：唯讀方法依參數快取，其他方法呼叫後使快取失效"""
+    __slots__ = ("_owner", "_name", "_method", "_cache")
+
+    def __init__(self, owner, name, method, cache):
+        self._owner = owner
+        self._name = name
+        self._method = method
+        self._cache = cache
+
+    def __call__(self, *args, **kwargs):
+        cache = self._cache
+        raw_args = tuple(_unwrap(a) for a in args)
+        raw_kwargs = dict((k, _unwrap(v)) for k, v in kwargs.items())
+
+        if self._name in cache.read_methods and not raw_kwargs:
+            try:
+                hash(raw_args)
+            except TypeError:
+                pass
+            else:
+                return cache.lookup(self._owner, ("call:" + self._name, raw_args),
+                                    lambda: cache.wrap(self._method(*raw_args)))
+
+        result = self._method(*raw_args, **raw_kwargs)
+        if self._name not in cache.factory_methods:
+            # Add* / Delete / GenerateMesh ...：物件本身與樹狀結構都可能改變
+            cache.invalidate(self._owner, structural=True)
+        return cache.wrap(result)
+
+
+class CachedProxy(object):
+    """
+    Mechanical 物件的 read-through proxy
+    屬性讀取經由 PropertyCache 快取；屬性寫入直接寫回原物件並使該物件的快取失效
+    """
+    __slots__ = ("_target", "_cache")
+
+    def __init__(self, target, cache):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_cache", cache)
+
+    def __getattr__(self, name):
+        target = object.__getattribute__(self, "_target")
+        cache = object.__getattribute__(self, "_cache")
+
+        def _load():
+            value = getattr(target, name)
+            if callable(value) and not isinstance(value, _SCALAR_TYPES) and \
+                    not hasattr(value, "__iter__"):
+                return _MethodProxy(target, name, value, cache)
+            return cache.wrap(value)
+
+        return cache.lookup(target, name, _load)
+
+    def __setattr__(self, name, value):
+        target = object.__getattribute__(self, "_target")
+        setattr(target, name, _unwrap(value))
+        object.__getattribute__(self, "_cache").invalidate(target)
+
+    def __iter__(self):
+        target = object.__getattribute__(self, "_target")
+        cache = object.__getattribute__(self, "_cache")
+        items = cache.lookup(target, "__iter__", lambda: [cache.wrap(v) for v in target])
+        return iter(items)
+
+    def __getitem__(self, key):
+        target = object.__getattribute__(self, "_target")
+        cache = object.__getattribute__(self, "_cache")
+        raw_key = _unwrap(key)
+        try:
+            hash(raw_key)
+        except TypeError:
+            return cache.wrap(target[raw_key])
+        return cache.lookup(target, ("__getitem__", raw_key), lambda: cache.wrap(target[raw_key]))
+
+    def __setitem__(self, key, value):
+        target = object.__getattribute__(self, "_target")
+        target[_unwrap(key)] = _unwrap(value)
+        object.__getattribute__(self, "_cache").invalidate(target)
+
+    def __len__(self):
+        target = object.__getattribute__(self, "_target")
+        return object.__getattribute__(self, "_cache").lookup(target, "__len__", lambda: len(target))
+
+    def __call__(self, *args, **kwargs):
+        target = object.__getattribute__(self, "_target")
+        args = tuple(_unwrap(a) for a in args)
+        kwargs = dict((k, _unwrap(v)) for k, v in kwargs.items())
+        return object.__getattribute__(self, "_cache").wrap(target(*args, **kwargs))
+
+    def __enter__(self):
+        return object.__getattribute__(self, "_target").__enter__()
+
+    def __exit__(self, *exc):
+        return object.__getattribute__(self, "_target").__exit__(*exc)
+
+    def __eq__(self, other):
+        return object.__getattribute__(self, "_target") == _unwrap(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(object.__getattribute__(self, "_target"))
+
+    def __bool__(self):
+        return bool(object.__getattribute__(self, "_target"))
+
+    __nonzero__ = __bool__  # IronPython 2.7
+
+    def __str__(self):
+        return str(object.__getattribute__(self, "_target"))
+
+    def __repr__(self):
+        return "CachedProxy({!r})".format(object.__getattribute__(self, "_target"))
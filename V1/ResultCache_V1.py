@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 求解結果的磁碟快取 (以求解雜湊為 key)
+# - 每個時間點的節點位移 / 應力 / 接觸壓力只經由 Mechanical 讀取一次，
+#   依 (欄位, 時間步, 列區段) 切成 .npy 區塊寫入 <root>/<solution_hash>/
+# - 之後重新開啟同一個求解結果時直接記憶體映射區塊，可依時間步、節點 / 元素 Id 範圍隨機存取
+# - 已載入的區塊以 LRU 管理，常駐記憶體不超過 max_resident_bytes
+# - 結果來源為「reader」：MechanicalResultReader (實際求解) 或 SyntheticResultReader (測試用)
+# ==========================================
+import json
+import math
+import os
+import shutil
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from ColumnIO_V1 import read_column, write_column
+
+MANIFEST_NAME = "manifest.json"
+CACHE_VERSION = 1
+DEFAULT_CHUNK_ROWS = 65536
+DEFAULT_MAX_RESIDENT_BYTES = 64 * 1024 * 1024
+
+# Mechanical 結果種類 (PostTool 的 kind) -> 快取欄位
+MECHANICAL_FIELDS = (
+    ("displacement", "deformation"),
+    ("stress", "stress"),
+    ("contact_pressure", "contact_pressure"),
+)
+
+# 匯出表格中不是結果數值的欄位 (節點 Id 與 "Include Node Location" 時的座標)
+KEY_COLUMNS = ("node", "x location", "y location", "z location")
+
+
+def _flat(data):
+    """[內部] read_column 的結果攤平成一維 (NumPy memmap 為 view，不複製)"""
+    return data.ravel() if hasattr(data, "ravel") else data
+
+
+# ==========================================
+# 結果來源 (reader)
+# 介面：times (list)、fields() -> {名稱: {"entity", "width"}}、
+#       ids(field) -> 已排序的 Id list、read(field, step) -> 依 ids 順序攤平的數值
+# ==========================================
+class SyntheticResultReader(object):
+    """
+    合成的結果來源 (不需要 Mechanical)：數值由公式產生，可用來驗證快取的讀寫與隨機存取
+    value(field, step, row, comp) 提供與 read() 相同的數值，方便比對
+    """
+
+    def __init__(self, n_nodes=1000, n_elements=500, times=(0.25, 0.5, 0.75, 1.0),
+                 contact_every=4):
+        self.times = list(times)
+        self.n_nodes = n_nodes
+        self.n_elements = n_elements
+        self.reads = 0
+        self._ids = {
+            "displacement": list(range(1, n_nodes + 1)),
+            "stress": list(range(1, n_elements + 1)),
+            "contact_pressure": list(range(1, n_nodes + 1, contact_every)),
+        }
+
+    def fields(self):
+        return {
+            "displacement": {"entity": "node", "width": 3},
+            "stress": {"entity": "element", "width": 1},
+            "contact_pressure": {"entity": "node", "width": 1},
+        }
+
+    def ids(self, field):
+        return self._ids[field]
+
+    def value(self, field, step, row, comp=0):
+        t = self.times[step]
+        entity_id = self._ids[field][row]
+        if field == "displacement":
+            return -t * (entity_id * 1e-3 + comp)
+        if field == "stress":
+            return t * 100.0 + math.sin(entity_id)
+        return max(0.0, t * 50.0 * math.cos(entity_id * 0.01))
+
+    def read(self, field, step):
+        self.reads += 1
+        width = self.fields()[field]["width"]
+        return array("d", [self.value(field, step, row, comp)
+                           for row in range(len(self._ids[field])) for comp in range(width)])
+
+
+def _value_column(headers, path=""):
+    """[內部] 匯出表格的結果欄位：除了 KEY_COLUMNS 之外必須剛好一欄"""
+    values = [h for h in headers if h not in KEY_COLUMNS]
+    if "node" not in headers or len(values) != 1:
+        raise ValueError("無法判斷結果欄位 {}: {}".format(path, headers))
+    return values[0]
+
+
+class MechanicalResultReader(object):
+    """
+    由 Mechanical 讀取結果：對 PostTool 追蹤的結果物件逐一切換 DisplayTime、
+    計算後以 ExportToTextFile 匯出節點結果 (只在建立快取時使用)
+    close() 將 DisplayTime 還原成讀取前的設定 (ResultCache.build 結束時呼叫)
+    """
+
+    def __init__(self, post_tool, times, export_dir, quantity_cls=None):
+        from ContactStats_V1 import read_result_table
+        self._read_table = read_result_table
+        self.tool = post_tool
+        self.times = list(times)
+        self.export_dir = export_dir
+        self.quantity_cls = quantity_cls
+        self._objects = {}
+        self._ids = {}
+        self._display_times = {}  # field -> 讀取前的 DisplayTime
+        for field, kind in MECHANICAL_FIELDS:
+            obj = self._result_object(kind)
+            if obj is not None:
+                self._objects[field] = obj
+        if not os.path.isdir(export_dir):
+            os.makedirs(export_dir)
+
+    def _result_object(self, kind):
+        if kind == "contact_pressure":
+            handle = self.tool.results.get("contact_tool")
+            return self.tool._contact_results(handle.obj).get("pressure") if handle else None
+        handle = self.tool.results.get(kind)
+        return handle.obj if handle else None
+
+    def fields(self):
+        return dict((field, {"entity": "node", "width": 1}) for field in self._objects)
+
+    def _export(self, field, step):
+        obj = self._objects[field]
+        t = self.times[step]
+        if field not in self._display_times:
+            self._display_times[field] = obj.DisplayTime
+        obj.DisplayTime = self.quantity_cls(t, "s") if self.quantity_cls else t
+        self.tool.ensure_evaluated(obj, force=True)
+        path = os.path.join(self.export_dir, "{}_{}.txt".format(field, step))
+        obj.ExportToTextFile(path)
+        headers, table = self._read_table(path, with_headers=True)
+        column = _value_column(headers, path)
+        return dict(zip((int(n) for n in table["node"]), table[column]))
+
+    def close(self):
+        """還原結果物件的 DisplayTime 並重新計算，讓樹狀結構維持讀取前的狀態"""
+        for field, display_time in self._display_times.items():
+            obj = self._objects[field]
+            obj.DisplayTime = display_time
+            self.tool.ensure_evaluated(obj, force=True)
+        self._display_times = {}
+
+    def ids(self, field):
+        if field not in self._ids:
+            self._ids[field] = sorted(self._export(field, len(self.times) - 1))
+        return self._ids[field]
+
+    def read(self, field, step):
+        by_node = self._export(field, step)
+        return array("d", [by_node.get(n, 0.0) for n in self.ids(field)])
+
+
+# ==========================================
+# 快取
+# ==========================================
+class _ChunkLRU(object):
+    """[內部] 已載入區塊的 LRU (依 bytes 計算容量)"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.resident = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()  # key -> (data, nbytes)
+
+    def get(self, key, loader):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            item = loader()
+            self.resident += item[1]
+            while self._items and self.resident > self.max_bytes:
+                _, (_, nbytes) = self._items.popitem(last=False)
+                self.resident -= nbytes
+                self.evictions += 1
+        self._items[key] = item
+        return item[0]
+
+    def drop(self, prefix):
+        for key in [k for k in self._items if k[0] == prefix]:
+            self.resident -= self._items.pop(key)[1]
+
+    def summary(self):
+        return {"resident_bytes": self.resident, "chunks": len(self._items), "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+class CachedSolution(object):
+    """
+    單一求解結果的快取 (唯讀)
+    列 (row) 為 ids(field) 中的位置；多分量欄位 (例如位移 x/y/z) 每列 width 個數值
+    """
+
+    def __init__(self, folder, manifest, lru):
+        self.folder = folder
+        self.manifest = manifest
+        self.solution_hash = manifest["solution"]
+        self.times = manifest["times"]
+        self.fields = manifest["fields"]
+        self._lru = lru
+        self._ids = {}
+
+    def __repr__(self):
+        return "CachedSolution({}, {} 個時間步, 欄位 {})".format(
+            self.solution_hash[:12], len(self.times), ", ".join(sorted(self.fields)))
+
+    def _chunk_path(self, field, step, chunk):
+        return os.path.join(self.folder, field, "s{:05d}_c{:04d}.npy".format(step, chunk))
+
+    def ids(self, field):
+        if field not in self._ids:
+            data, _ = read_column(os.path.join(self.folder, field, "ids.npy"))
+            self._ids[field] = _flat(data)
+        return self._ids[field]
+
+    def rows(self, field):
+        return self.fields[field]["rows"]
+
+    def step_of(self, time):
+        """最接近 time 的時間步序號"""
+        return min(range(len(self.times)), key=lambda i: abs(self.times[i] - time))
+
+    def row_range(self, field, id_lo, id_hi):
+        """Id 介於 [id_lo, id_hi] 的列範圍 (start, stop)"""
+        ids = self.ids(field)
+        return bisect_left(ids, id_lo), bisect_right(ids, id_hi)
+
+    def row_of(self, field, entity_id):
+        """單一節點 / 元素 Id 的列序號 (不存在時回傳 None)"""
+        start, stop = self.row_range(field, entity_id, entity_id)
+        return start if stop > start else None
+
+    def _chunk(self, field, step, chunk):
+        def _load():
+            data, _ = read_column(self._chunk_path(field, step, chunk))
+            data = _flat(data)
+            return data, len(data) * 8
+
+        return self._lru.get((self.solution_hash, field, step, chunk), _load)
+
+    def get(self, field, step, start=0, stop=None):
+        """時間步 step、列 [start, stop) 的數值 (攤平的 float list，只載入涵蓋的區塊)"""
+        info = self.fields[field]
+        width, chunk_rows = info["width"], info["chunk_rows"]
+        stop = info["rows"] if stop is None else min(stop, info["rows"])
+        values = []
+        row = max(0, start)
+        while row < stop:
+            chunk = row // chunk_rows
+            base = chunk * chunk_rows
+            end = min(stop, base + chunk_rows)
+            data = self._chunk(field, step, chunk)
+            values.extend(data[(row - base) * width:(end - base) * width])
+            row = end
+        return values
+
+    def get_by_ids(self, field, step, id_lo, id_hi):
+        """Id 範圍內的 (ids, 攤平的數值)"""
+        start, stop = self.row_range(field, id_lo, id_hi)
+        return list(self.ids(field)[start:stop]), self.get(field, step, start, stop)
+
+    def value(self, field, step, entity_id):
+        """單一節點 / 元素在某時間步的數值 (width > 1 時為 tuple)"""
+        row = self.row_of(field, entity_id)
+        if row is None:
+            return None
+        values = self.get(field, step, row, row + 1)
+        return values[0] if len(values) == 1 else tuple(values)
+
+    def history(self, field, entity_id):
+        """單一節點 / 元素在所有時間步的數值 list"""
+        return [self.value(field, step, entity_id) for step in range(len(self.times))]
+
+
+class ResultCache(object):
+    """
+    求解結果快取 (一個根資料夾，底下每個求解雜湊一個子資料夾)
+    負責：由 reader 建立快取、以雜湊開啟既有快取、共用 LRU 限制常駐記憶體
+    """
+
+    def __init__(self, root, max_resident_bytes=DEFAULT_MAX_RESIDENT_BYTES,
+                 chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.lru = _ChunkLRU(max_resident_bytes)
+        if not os.path.isdir(root):
+            os.makedirs(root)
+
+    def _folder(self, solution_hash):
+        return os.path.join(self.root, solution_hash)
+
+    def has(self, solution_hash):
+        return os.path.isfile(os.path.join(self._folder(solution_hash), MANIFEST_NAME))
+
+    def open(self, solution_hash):
+        folder = self._folder(solution_hash)
+        with open(os.path.join(folder, MANIFEST_NAME), "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != CACHE_VERSION:
+            raise ValueError("結果快取版本不符: {}".format(folder))
+        return CachedSolution(folder, manifest, self.lru)
+
+    def build(self, solution_hash, reader, meta=None):
+        """
+        由 reader 讀取所有欄位 / 時間步並寫入快取 (先寫到暫存資料夾，完成後才改名)
+        reader 有 close() 時在讀取結束後呼叫 (例如還原 DisplayTime)
+        """
+        folder = self._folder(solution_hash)
+        tmp_folder = folder + ".tmp"
+        if os.path.isdir(tmp_folder):
+            shutil.rmtree(tmp_folder)
+        os.makedirs(tmp_folder)
+
+        try:
+            fields = self._write_fields(tmp_folder, reader)
+        finally:
+            close = getattr(reader, "close", None)
+            if close is not None:
+                close()
+
+        manifest = {"version": CACHE_VERSION, "solution": solution_hash,
+                    "times": list(reader.times), "fields": fields, "meta": meta or {}}
+        with open(os.path.join(tmp_folder, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+        self.remove(solution_hash)
+        os.rename(tmp_folder, folder)
+        print("-> 已建立結果快取: {} ({} 欄位 x {} 時間步)".format(
+            folder, len(fields), len(reader.times)))
+        return self.open(solution_hash)
+
+    def _write_fields(self, tmp_folder, reader):
+        """[內部] 將 reader 的每個欄位 / 時間步切成區塊寫入 tmp_folder，回傳 manifest 的 fields"""
+        fields = {}
+        for field, info in sorted(reader.fields().items()):
+            os.makedirs(os.path.join(tmp_folder, field))
+            ids = reader.ids(field)
+            write_column(os.path.join(tmp_folder, field, "ids.npy"), "i", ids)
+            width = info.get("width", 1)
+            for step in range(len(reader.times)):
+                values = reader.read(field, step)
+                if len(values) != len(ids) * width:
+                    raise ValueError("欄位 {} 第 {} 步的資料長度不符".format(field, step))
+                for chunk, start in enumerate(range(0, len(ids), self.chunk_rows)):
+                    stop = min(len(ids), start + self.chunk_rows)
+                    write_column(
+                        os.path.join(tmp_folder, field, "s{:05d}_c{:04d}.npy".format(step, chunk)),
+                        "d", values[start * width:stop * width],
+                        (stop - start,) if width == 1 else (stop - start, width))
+            fields[field] = {"entity": info.get("entity", "node"), "width": width,
+                             "rows": len(ids), "chunk_rows": self.chunk_rows}
+        return fields
+
+    def get_or_build(self, solution_hash, reader_factory, meta=None):
+        """已有快取時直接開啟 (不呼叫 reader_factory，也就不經過 Mechanical)，否則建立"""
+        if self.has(solution_hash):
+            return self.open(solution_hash)
+        return self.build(solution_hash, reader_factory(), meta)
+
+    def remove(self, solution_hash):
+        self.lru.drop(solution_hash)
+        folder = self._folder(solution_hash)
+        if os.path.isdir(folder):
+            shutil.rmtree(folder)
+
+    def solutions(self):
+        """所有已快取的求解：[(solution_hash, meta)]"""
+        found = []
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name, MANIFEST_NAME)
+            if os.path.isfile(path):
+                with open(path, "r") as f:
+                    found.append((name, json.load(f).get("meta", {})))
+        return found
+
+    def report(self):
+        s = self.lru.summary()
+        print("-> 結果快取 {}：常駐 {:.1f} MB / 上限 {:.1f} MB，區塊 {} (命中 {} / 載入 {} / 釋放 {})".format(
+            self.root, s["resident_bytes"] / 1048576.0, self.lru.max_bytes / 1048576.0,
+            s["chunks"], s["hits"], s["misses"], s["evictions"]))
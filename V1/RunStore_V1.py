@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 執行紀錄資料庫 (SQLite)
+# - 每次執行 V1 流程的參數、幾何指紋、網格規模、各階段耗時與關鍵結果
+# - 相同請求 (專案內容 + 參數 + 階段 + 是否求解) 可直接取回先前的結果，不必重新求解
+#   執行後存檔的專案內容會改變：存檔後的請求雜湊記為執行前請求的別名，下次相同請求仍可命中
+# - 查詢輔助：各階段耗時統計、結果趨勢、參數掃描
+# sqlite3 為 CPython 標準函式庫；Mechanical 的 IronPython 通常沒有，
+# 因此紀錄由 Mechanical 之外的 BatchRunner 寫入
+# ==========================================
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+DEFAULT_DB_NAME = "SkyCAETool_runs.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_key TEXT NOT NULL,
+    name        TEXT,
+    project     TEXT,
+    started     REAL,
+    elapsed     REAL,
+    status      TEXT,
+    error       TEXT,
+    geometry    TEXT,
+    solve       INTEGER,
+    nodes       INTEGER,
+    elements    INTEGER,
+    params      TEXT,
+    report      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_key ON runs (request_key, status);
+CREATE INDEX IF NOT EXISTS idx_runs_project ON runs (project);
+CREATE TABLE IF NOT EXISTS timings (
+    run_id  INTEGER NOT NULL,
+    stage   TEXT NOT NULL,
+    seconds REAL
+);
+CREATE INDEX IF NOT EXISTS idx_timings_stage ON timings (stage);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL,
+    name   TEXT NOT NULL,
+    value  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_results_name ON results (name);
+CREATE TABLE IF NOT EXISTS request_aliases (
+    alias       TEXT PRIMARY KEY,
+    request_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_digests (
+    path   TEXT PRIMARY KEY,
+    mtime  REAL,
+    size   INTEGER,
+    digest TEXT
+);
+"""
+
+
+def _canonical(value):
+    """[內部] 參數的標準化 JSON (key 排序)，相同內容得到相同字串"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _flatten(prefix, value, out):
+    """[內部] 取出巢狀結果中的數值，名稱以 . 連接 (例如 key.nodes、post.max_stress)"""
+    if isinstance(value, bool):
+        out[prefix] = float(value)
+    elif isinstance(value, (int, float)):
+        out[prefix] = float(value)
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            _flatten("{}.{}".format(prefix, k) if prefix else str(k), v, out)
+    return out
+
+
+class RunStore(object):
+    """
+    執行紀錄資料庫
+    負責：記錄每次執行、以請求雜湊查詢可重用的結果、提供跨執行的統計查詢
+    可在多個執行緒中共用 (所有操作以同一把鎖序列化)
+    """
+
+    def __init__(self, path=None):
+        if sqlite3 is None:
+            raise RuntimeError("此環境沒有 sqlite3 (IronPython)，請在 CPython 中使用 RunStore")
+        self.path = path or os.path.join(os.path.expanduser("~"), DEFAULT_DB_NAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, args).fetchall()]
+
+    # ----------------------------------------------------------
+    # 請求雜湊
+    # ----------------------------------------------------------
+    def file_digest(self, path):
+        """專案檔內容的 SHA-1 (mtime / size 未變時直接使用資料庫中的值，不重新讀取大檔)"""
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return "missing:" + path
+        rows = self._query("SELECT mtime, size, digest FROM file_digests WHERE path = ?", (path,))
+        if rows and rows[0]["mtime"] == st.st_mtime and rows[0]["size"] == st.st_size:
+            return rows[0]["digest"]
+
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO file_digests VALUES (?, ?, ?, ?)",
+                               (path, st.st_mtime, st.st_size, digest))
+            self._conn.commit()
+        return digest
+
+    def request_key(self, project, params, stages=None, solve=False):
+        """相同專案內容 + 參數 + 階段 + 是否求解 -> 相同的請求雜湊"""
+        payload = {"project": self.file_digest(project), "params": params or {},
+                   "stages": list(stages) if stages else None, "solve": bool(solve)}
+        return hashlib.sha1(_canonical(payload).encode("utf-8")).hexdigest()
+
+    # ----------------------------------------------------------
+    # 寫入 / 查詢快取
+    # ----------------------------------------------------------
+    def record(self, request_key, name, project, params, report, elapsed=None, solve=False,
+               started=None):
+        """記錄一次執行 (report 為 run_pipeline 的回傳格式)，回傳 run id"""
+        results = report.get("results") or {}
+        key_results = results.get("key") or {}
+        values = _flatten("", results, {})
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO runs (request_key, name, project, started, elapsed, status, error, "
+                "geometry, solve, nodes, elements, params, report) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (request_key, name, project, started or time.time(), elapsed,
+                 report.get("status"), report.get("error"), key_results.get("geometry"),
+                 1 if solve else 0, key_results.get("nodes"), key_results.get("elements"),
+                 _canonical(params or {}), _canonical(report)))
+            run_id = cur.lastrowid
+            self._conn.executemany("INSERT INTO timings VALUES (?, ?, ?)",
+                                   [(run_id, stage, seconds)
+                                    for stage, seconds in (report.get("timings") or {}).items()])
+            self._conn.executemany("INSERT INTO results VALUES (?, ?, ?)",
+                                   [(run_id, k, v) for k, v in sorted(values.items())])
+            self._conn.commit()
+        return run_id
+
+    def add_alias(self, alias, request_key):
+        """
+        把 alias 記為 request_key 的別名 (lookup(alias) 取回 request_key 的結果)
+        用於執行後存檔的專案：存檔後內容的請求雜湊 -> 執行前的請求雜湊
+        """
+        if alias == request_key:
+            return
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO request_aliases VALUES (?, ?)",
+                               (alias, request_key))
+            self._conn.commit()
+
+    def lookup(self, request_key):
+        """相同請求 (或其別名) 最近一次成功的 report (沒有時回傳 None)"""
+        rows = self._query("SELECT id, report FROM runs WHERE status = 'ok' AND request_key IN "
+                           "(?, (SELECT request_key FROM request_aliases WHERE alias = ?)) "
+                           "ORDER BY id DESC LIMIT 1", (request_key, request_key))
+        if not rows:
+            return None
+        report = json.loads(rows[0]["report"])
+        report["cached_run_id"] = rows[0]["id"]
+        return report
+
+    # ----------------------------------------------------------
+    # 查詢輔助
+    # ----------------------------------------------------------
+    def runs(self, project=None, status=None, since=None, limit=100):
+        """最近的執行紀錄 (不含完整 report)"""
+        sql = ("SELECT id, name, project, started, elapsed, status, error, geometry, nodes, elements "
+               "FROM runs WHERE 1 = 1")
+        args = []
+        if project is not None:
+            sql += " AND project = ?"
+            args.append(os.path.abspath(project))
+        if status is not None:
+            sql += " AND status = ?"
+            args.append(status)
+        if since is not None:
+            sql += " AND started >= ?"
+            args.append(since)
+        sql += " ORDER BY id DESC LIMIT ?"
+        args.append(int(limit))
+        return self._query(sql, args)
+
+    def stage_stats(self, since=None):
+        """各階段耗時統計：[{stage, runs, avg, min, max}]"""
+        sql = ("SELECT t.stage AS stage, COUNT(*) AS runs, AVG(t.seconds) AS avg, "
+               "MIN(t.seconds) AS min, MAX(t.seconds) AS max "
+               "FROM timings t JOIN runs r ON r.id = t.run_id WHERE r.status = 'ok'")
+        args = []
+        if since is not None:
+            sql += " AND r.started >= ?"
+            args.append(since)
+        return self._query(sql + " GROUP BY t.stage ORDER BY avg DESC", args)
+
+    def trend(self, result_name, project=None, limit=500):
+        """某項結果隨時間的變化：[{run_id, name, started, value}] (依時間排序)"""
+        sql = ("SELECT r.id AS run_id, r.name AS name, r.started AS started, v.value AS value "
+               "FROM results v JOIN runs r ON r.id = v.run_id WHERE v.name = ?")
+        args = [result_name]
+        if project is not None:
+            sql += " AND r.project = ?"
+            args.append(os.path.abspath(project))
+        sql += " ORDER BY r.started LIMIT ?"
+        args.append(int(limit))
+        return self._query(sql, args)
+
+    def param_sweep(self, stage, key, result_name):
+        """參數對結果的影響：[(參數值, 結果值, run_id)]，依參數值排序"""
+        points = []
+        for row in self._query(
+                "SELECT r.id AS run_id, r.params AS params, v.value AS value "
+                "FROM results v JOIN runs r ON r.id = v.run_id "
+                "WHERE v.name = ? AND r.status = 'ok'", (result_name,)):
+            value = json.loads(row["params"]).get(stage, {}).get(key)
+            if value is not None:
+                points.append((value, row["value"], row["run_id"]))
+        points.sort(key=lambda p: (p[0], p[2]))
+        return points
+
+    def reports(self, project=None, solve=None):
+        """完整 report (加上 run_id)，依執行順序；solve=True 時只取有求解的執行"""
+        sql = "SELECT id, report FROM runs WHERE 1 = 1"
+        args = []
+        if project is not None:
+            sql += " AND project = ?"
+            args.append(os.path.abspath(project))
+        if solve is not None:
+            sql += " AND solve = ?"
+            args.append(1 if solve else 0)
+        for row in self._query(sql + " ORDER BY id", args):
+            report = json.loads(row["report"])
+            report["run_id"] = row["id"]
+            yield report
+
+    def recovery_attempts(self, project=None):
+        """所有執行中求解補救的嘗試紀錄 (見 SolveRecovery_V1)，依執行順序"""
+        attempts = []
+        for report in self.reports(project=project, solve=True):
+            results = report.get("results") or {}
+            outcomes = [results.get("solve_recovery")]
+            solve = results.get("solve")
+            if isinstance(solve, dict):
+                outcomes.extend(v.get("recovery") for v in solve.values() if isinstance(v, dict))
+            for outcome in outcomes:
+                for entry in (outcome or {}).get("attempts") or []:
+                    attempts.append(dict(entry, run_id=report["run_id"]))
+        return attempts
+
+    def remedy_stats(self, project=None):
+        """各補救的成效 {補救名稱: {"tries", "fixed", "seconds"}}，用來調整補救順序"""
+        from SolveRecovery_V1 import remedy_stats
+        return remedy_stats(self.recovery_attempts(project))
+
+    def slowest(self, stage, n=10):
+        """某階段最慢的 n 次執行"""
+        return self._query(
+            "SELECT r.id AS run_id, r.name AS name, r.nodes AS nodes, t.seconds AS seconds "
+            "FROM timings t JOIN runs r ON r.id = t.run_id WHERE t.stage = ? "
+            "ORDER BY t.seconds DESC LIMIT ?", (stage, int(n)))
+
+    def report(self):
+        rows = self._query("SELECT status, COUNT(*) AS n FROM runs GROUP BY status")
+        print("-> 執行紀錄 ({})：{}".format(self.path, ", ".join(
+            "{} x {}".format(r["status"], r["n"]) for r in rows) or "無"))
+        for row in self.stage_stats():
+            print("   {:<10} {:>5} 次  平均 {:8.2f} s  最長 {:8.2f} s".format(
+                row["stage"], row["runs"], row["avg"], row["max"]))
+        for name, row in sorted(self.remedy_stats().items()):
+            print("   補救 {:<22} {:>3}/{:<3} 次成功  求解 {:8.1f} s".format(
+                name, row["fixed"], row["tries"], row["seconds"]))
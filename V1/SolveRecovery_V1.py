@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 求解不收斂的自動補救
+# - 求解失敗時讀取 solve.out，判斷失敗型態 (接觸狀態震盪 / 穿透過大 / 達最小步長 / 元素扭曲)
+# - 依失敗型態的補救順序逐一嘗試：縮小初始步長、增加子步、調整接觸剛性、
+#   由最後收斂的重啟點接續求解，每次補救後重新求解
+# - 每次嘗試 (補救內容、失敗型態、耗時) 都寫入紀錄，累積後可看出哪些補救真的有效
+#   (見 RunStore_V1.RunStore.remedy_stats)
+# - 補救前先記下 Step Table / 接觸剛性 / 重啟點，restore() 還原，避免補救在下一次執行中累積
+# ==========================================
+import json
+import os
+import re
+import time
+
+from TransactionBatch_V1 import run_in_transaction
+
+# 失敗型態：(名稱, solve.out 中的特徵字串)；依序比對，越前面越具體
+FAILURE_SIGNATURES = (
+    ("contact_chattering", (r"contact status change", r"status of .*contact .*chang",
+                            r"chattering")),
+    ("excessive_penetration", (r"too much penetration", r"excessive penetration",
+                               r"penetration .*(exceed|too large)")),
+    ("element_distortion", (r"highly distorted", r"excessive distortion")),
+    ("min_time_step", (r"minimum time (increment|step)", r"minimum load increment",
+                       r"min(imum)? .*time step .*reached")),
+    ("not_converged", (r"solution not converged", r"not converged", r"failed to converge")),
+)
+UNKNOWN_FAILURE = "unknown"
+
+# 各失敗型態的補救順序 (名稱對應 SolveRecovery.remedy_<名稱>)
+DEFAULT_STRATEGY = {
+    "contact_chattering": ("soften_contact", "smaller_initial_step", "more_substeps",
+                           "restart_smaller_step"),
+    "excessive_penetration": ("stiffen_contact", "smaller_initial_step", "more_substeps",
+                              "restart_smaller_step"),
+    "element_distortion": ("smaller_initial_step", "more_substeps", "restart_smaller_step"),
+    "min_time_step": ("more_substeps", "smaller_initial_step", "restart_smaller_step"),
+    "not_converged": ("smaller_initial_step", "more_substeps", "restart_smaller_step"),
+    UNKNOWN_FAILURE: ("smaller_initial_step", "more_substeps"),
+}
+
+# 最後完成的子步：*** LOAD STEP 1 SUBSTEP 5 COMPLETED ... *** TIME = 0.35
+_SUBSTEP_DONE = re.compile(r"LOAD STEP\s+(\d+)\s+SUBSTEP\s+(\d+)\s+COMPLETED.*?\*\*\*\s*TIME\s*=\s*"
+                           r"([-+0-9.EeDd]+)", re.S)
+
+DEFAULT_LOG_NAME = "SkyCAETool_recovery.jsonl"
+
+
+def diagnose(text):
+    """
+    由求解輸出判斷失敗型態
+    回傳 {"signature", "matches", "load_step", "substep", "time"}；
+    matches 為所有符合的型態 (依 FAILURE_SIGNATURES 順序)，load_step / substep / time 為最後收斂的子步
+    """
+    lowered = (text or "").lower()
+    matches = []
+    for name, patterns in FAILURE_SIGNATURES:
+        if any(re.search(pattern, lowered) for pattern in patterns):
+            matches.append(name)
+
+    result = {"signature": matches[0] if matches else UNKNOWN_FAILURE, "matches": matches,
+              "load_step": None, "substep": None, "time": None}
+    last = None
+    for last in _SUBSTEP_DONE.finditer(text or ""):
+        pass
+    if last is not None:
+        result["load_step"] = int(last.group(1))
+        result["substep"] = int(last.group(2))
+        result["time"] = float(last.group(3).replace("D", "E").replace("d", "e"))
+    return result
+
+
+def convergence_stats(text):
+    """
+    由求解輸出統計收斂情形：完成的子步數、累計平衡迭代數與每子步平均迭代數
+    (用來比較接觸設定等參數的收斂效率；沒有完成任何子步時回傳空 dict)
+    """
+    substeps = 0
+    last = None
+    for last in _SUBSTEP_DONE.finditer(text or ""):
+        substeps += 1
+    if last is None:
+        return {}
+    iterations = re.findall(r"CUM ITER\s*=\s*(\d+)", text[:last.end()])
+    cum = int(iterations[-1]) if iterations else None
+    return {"substeps": substeps, "iterations": cum,
+            "iterations_per_substep": float(cum) / substeps if cum is not None else None}
+
+
+def append_log(path, entries):
+    """把嘗試紀錄附加到 JSON Lines 檔 (一行一筆)"""
+    folder = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    with open(path, "a") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, sort_keys=True) + "\n")
+
+
+def read_log(path):
+    if not os.path.isfile(path):
+        return []
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def remedy_stats(entries):
+    """
+    各補救的成效：{補救名稱: {"tries", "fixed", "seconds"}}
+    fixed 為套用該補救後的那次求解成功的次數，seconds 為套用後的求解耗時總和
+    """
+    stats = {}
+    for entry in entries:
+        name = entry.get("remedy")
+        if not name:
+            continue
+        row = stats.setdefault(name, {"tries": 0, "fixed": 0, "seconds": 0.0})
+        row["tries"] += 1
+        row["fixed"] += 1 if entry.get("ok") else 0
+        row["seconds"] += float(entry.get("elapsed") or 0.0)
+    return stats
+
+
+class SolveRecovery(object):
+    """
+    包住 SolverTool 的求解：失敗時依失敗型態補救並重試
+    負責：診斷 solve.out、套用補救 (Step Table / 接觸剛性 / 重啟點)、記錄每次嘗試、
+    還原補救前的設定
+    """
+
+    def __init__(self, solver_tool, max_attempts=4, strategy=None, remedies=None,
+                 log_path=None, restart_points=False, normal_stiffness_enum=None,
+                 step_scale=0.25, stiffness_scale=10.0):
+        """
+        solver_tool : SolverTool (決定分析系統、Quantity 與 Transaction)
+        max_attempts : 含第一次求解在內的最多求解次數
+        strategy : {失敗型態: (補救名稱, ...)}，覆蓋 DEFAULT_STRATEGY 中對應的項目
+        remedies : {補救名稱: fn(recovery, diagnosis) -> 說明字串 或 None (不適用)}，自訂補救
+        log_path : 嘗試紀錄 (JSON Lines)；None 表示只保留在 self.attempts
+        restart_points : 第一次求解前開啟重啟點 (restart_smaller_step 需要)
+        normal_stiffness_enum : ContactNormalStiffness (可選)，有傳入時先把剛性切換為 Factor
+        """
+        self.tool = solver_tool
+        self.max_attempts = max(1, int(max_attempts))
+        self.strategy = dict(DEFAULT_STRATEGY)
+        self.strategy.update(strategy or {})
+        self.remedies = dict(remedies or {})
+        self.log_path = log_path
+        self.restart_points = restart_points
+        self.NormalStiffness = normal_stiffness_enum
+        self.step_scale = step_scale
+        self.stiffness_scale = stiffness_scale
+        self.attempts = []
+        self._saved = None  # 補救前的設定 (見 snapshot)
+
+    # ==========================================================
+    # 補救 (回傳說明字串；不適用時回傳 None，改試下一個)
+    # ==========================================================
+    def _scale_steps(self, diagnosis, scale_time, scale_substeps):
+        """[內部] 從失敗的那一步起修改 Step Table；scale_* 為 (initial, min, max) 的倍率"""
+        table = self.tool.read_step_table()
+        first = max(1, diagnosis.get("load_step") or 1)
+        changed = []
+        for i, step in enumerate(table):
+            if i + 1 < first or step.get("auto_time_stepping") is False:
+                continue
+            by_substeps = str(step.get("define_by")) == "Substeps"
+            if by_substeps:
+                keys, scales, cast = (("initial_substeps", "min_substeps", "max_substeps"),
+                                      scale_substeps, lambda v: max(1, int(round(v))))
+            else:
+                keys, scales, cast = (("initial_time_step", "min_time_step", "max_time_step"),
+                                      scale_time, float)
+            for key, scale in zip(keys, scales):
+                if step.get(key) is not None and scale != 1.0:
+                    step[key] = cast(step[key] * scale)
+            # 維持 min <= initial <= max (步長模式收小 initial，子步模式放大 max)
+            initial, lo, hi = [step.get(k) for k in keys]
+            if initial is not None and lo is not None and lo > initial:
+                step[keys[1]] = initial
+            if initial is not None and hi is not None and initial > hi:
+                if by_substeps:
+                    step[keys[2]] = initial
+                else:
+                    step[keys[0]] = hi
+            changed.append(i + 1)
+        if not changed:
+            return None
+
+        def _do_apply():
+            return self.tool.apply_step_table(table)
+
+        writes = run_in_transaction(_do_apply, self.tool.transaction_cls, None,
+                                    tool="SolveRecovery")
+        return "Step {}: {} 個設定".format(",".join(str(s) for s in changed), writes) if writes else None
+
+    def remedy_smaller_initial_step(self, diagnosis):
+        """初始步長縮小 (子步模式則初始子步數增加)，最小步長隨之下修"""
+        s = self.step_scale
+        return self._scale_steps(diagnosis, (s, 1.0, 1.0), (1.0 / s, 1.0, 1.0))
+
+    def remedy_more_substeps(self, diagnosis):
+        """允許更多子步：最小步長 / 10、最大步長減半 (子步模式則最大子步數 x10)"""
+        return self._scale_steps(diagnosis, (1.0, 0.1, 0.5), (1.0, 1.0, 10.0))
+
+    def _contact_regions(self):
+        """[內部] ContactTool 建立的 Contact Region (名稱 Pair_*)"""
+        regions = []
+        for group in self.tool.model.Connections.Children:
+            for child in getattr(group, "Children", []):
+                if str(getattr(child, "Name", "")).startswith("Pair_"):
+                    regions.append(child)
+        return regions
+
+    def _scale_stiffness(self, scale):
+        regions = self._contact_regions()
+        if not regions:
+            return None
+
+        def _do_scale():
+            count = 0
+            for cr in regions:
+                try:
+                    if self.NormalStiffness is not None:
+                        cr.NormalStiffness = self.NormalStiffness.Factor
+                    cr.NormalStiffnessFactor = float(cr.NormalStiffnessFactor or 1.0) * scale
+                    count += 1
+                except Exception as e:
+                    print("   警告：無法調整 {} 的接觸剛性 ({})".format(cr.Name, e))
+            return count
+
+        count = run_in_transaction(_do_scale, self.tool.transaction_cls, None,
+                                   tool="SolveRecovery")
+        return "{} 個接觸 Normal Stiffness Factor x{:g}".format(count, scale) if count else None
+
+    def remedy_soften_contact(self, diagnosis):
+        """接觸狀態震盪：降低接觸剛性"""
+        return self._scale_stiffness(1.0 / self.stiffness_scale)
+
+    def remedy_stiffen_contact(self, diagnosis):
+        """穿透過大：提高接觸剛性"""
+        return self._scale_stiffness(self.stiffness_scale)
+
+    def remedy_restart_smaller_step(self, diagnosis):
+        """由最後一個重啟點接續，並縮小該點之後的步長 (沒有重啟檔時不適用)"""
+        points = self.tool.restart_points()
+        if not points or not self.tool.use_restart_point(len(points)):
+            return None
+        action = self.remedy_smaller_initial_step(diagnosis)
+        return "重啟點 {}{}".format(len(points), "，" + action if action else "")
+
+    # ==========================================================
+    # 補救前的設定
+    # ==========================================================
+    def snapshot(self):
+        """記下 Step Table、Pair_* 接觸的剛性與目前的重啟點 (第一次補救前呼叫)"""
+        stiffness = []
+        for cr in self._contact_regions():
+            try:
+                stiffness.append((cr, getattr(cr, "NormalStiffness", None), cr.NormalStiffnessFactor))
+            except Exception:
+                pass
+        try:
+            restart_point = int(self.tool.settings.CurrentRestartPoint)
+        except Exception:
+            restart_point = None
+        self._saved = {"steps": self.tool.read_step_table(), "stiffness": stiffness,
+                       "restart_point": restart_point}
+
+    def restore(self):
+        """還原 snapshot 記下的設定；回傳還原的項目 list (沒有補救過時為空)"""
+        saved, self._saved = self._saved, None
+        if saved is None:
+            return []
+        applied = set(a["remedy"] for a in self.attempts if a["remedy"])
+        restored = []
+
+        def _do_restore():
+            if applied & set(("smaller_initial_step", "more_substeps", "restart_smaller_step")):
+                self.tool.apply_step_table(saved["steps"])
+                restored.append("step_table")
+            if applied & set(("soften_contact", "stiffen_contact")):
+                for cr, stiffness, factor in saved["stiffness"]:
+                    try:
+                        if stiffness is not None and self.NormalStiffness is not None:
+                            cr.NormalStiffness = stiffness
+                        cr.NormalStiffnessFactor = factor
+                    except Exception as e:
+                        print("   警告：無法還原 {} 的接觸剛性 ({})".format(cr.Name, e))
+                restored.append("contact_stiffness")
+
+        run_in_transaction(_do_restore, self.tool.transaction_cls, None, tool="SolveRecovery")
+        if saved["restart_point"] is not None and "restart_smaller_step" in applied and \
+                self.tool.use_restart_point(saved["restart_point"]):
+            restored.append("restart_point")
+        if restored:
+            print("-> [{}] 已還原補救前的設定: {}".format(self.tool.analysis.Name, ", ".join(restored)))
+        return restored
+
+    # ==========================================================
+    # 主流程
+    # ==========================================================
+    def _remedy(self, name):
+        if name in self.remedies:
+            return lambda diagnosis: self.remedies[name](self, diagnosis)
+        return getattr(self, "remedy_" + name, None)
+
+    def _record(self, attempt, remedy, action, ok, start, elapsed):
+        """[內部] 記錄一次求解；失敗時一併回傳診斷結果"""
+        diagnosis = diagnose(self.tool.read_solve_output()) if not ok else {}
+        self.attempts.append({
+            "attempt": attempt, "analysis": self.tool.analysis.Name, "remedy": remedy,
+            "action": action, "ok": ok, "status": self.tool.solve_status(),
+            "started": start, "elapsed": elapsed,
+            "signature": diagnosis.get("signature"), "matches": diagnosis.get("matches"),
+            "time_reached": diagnosis.get("time")})
+        return ok, diagnosis
+
+    def _solve(self, attempt, remedy, action):
+        start = time.time()
+        ok = self.tool.solve_analysis()
+        return self._record(attempt, remedy, action, ok, start, time.time() - start)
+
+    def run(self, already_failed=False, keep_changes=False):
+        """
+        求解並在失敗時補救重試
+        already_failed=True 表示已在外部求解失敗過 (例如 SolveQueue)，直接由診斷開始
+        keep_changes=False 時結束前還原補救前的設定 (還原會讓 Mechanical 將求解標為過期)；
+        需要先讀取結果時傳入 True，讀完再呼叫 restore()
+
+        Returns
+        -------
+        dict : {"ok", "attempts": [...], "elapsed", "remedies": [已套用的補救], "restored"}
+        """
+        start = time.time()
+        name = self.tool.analysis.Name
+        if self.restart_points:
+            self.tool.enable_restart_points()
+
+        if already_failed:
+            # 外部的那次求解也記錄下來 (耗時未知)
+            ok, diagnosis = self._record(1, None, None, False, start, None)
+        else:
+            ok, diagnosis = self._solve(1, None, None)
+        attempt = 1
+
+        tried = set()
+        while not ok and attempt < self.max_attempts:
+            signature = diagnosis.get("signature", UNKNOWN_FAILURE)
+            print("-> [{}] 求解失敗 ({})，嘗試補救 ({}/{})...".format(
+                name, signature, attempt, self.max_attempts - 1))
+            if self._saved is None:
+                self.snapshot()
+            action = remedy = None
+            for candidate in self.strategy.get(signature, self.strategy[UNKNOWN_FAILURE]):
+                if candidate in tried:
+                    continue
+                tried.add(candidate)
+                fn = self._remedy(candidate)
+                action = fn(diagnosis) if fn is not None else None
+                if action:
+                    remedy = candidate
+                    break
+            if remedy is None:
+                print("   沒有可用的補救，停止重試。")
+                break
+            print("   補救 {}：{}".format(remedy, action))
+            attempt += 1
+            ok, diagnosis = self._solve(attempt, remedy, action)
+
+        if self.log_path:
+            append_log(self.log_path, self.attempts)
+        result = {"ok": ok, "attempts": self.attempts, "elapsed": time.time() - start,
+                  "remedies": [a["remedy"] for a in self.attempts if a["remedy"]],
+                  "restored": [] if keep_changes else self.restore()}
+        print("-> [{}] {} (求解 {} 次，共 {:.1f} s)".format(
+            name, "求解成功" if ok else "補救失敗", len(self.attempts), result["elapsed"]))
+        return result
+
+
+def build_recovery(ext_api, model=None, transaction_cls=None, quantity_cls=None,
+                   auto_time_stepping_enum=None, time_step_define_by_type_enum=None,
+                   restart_controls_enum=None, normal_stiffness_enum=None,
+                   analysis=None, max_attempts=4, log_path=None, restart_points=False):
+    """建立單一分析的 SolveRecovery (分析系統：物件 / 序號 / 名稱，未指定時為第一個)"""
+    from SolverTool_V1 import SolverTool
+
+    tool = SolverTool(ext_api, model=model, transaction_cls=transaction_cls,
+                      quantity_cls=quantity_cls,
+                      auto_time_stepping_enum=auto_time_stepping_enum,
+                      time_step_define_by_type_enum=time_step_define_by_type_enum,
+                      analysis=analysis, restart_controls_enum=restart_controls_enum)
+    return SolveRecovery(tool, max_attempts=max_attempts, log_path=log_path,
+                         restart_points=restart_points,
+                         normal_stiffness_enum=normal_stiffness_enum)
+
+
+def runSolveRecovery(ext_api, model=None, transaction_cls=None, quantity_cls=None,
+                     auto_time_stepping_enum=None, time_step_define_by_type_enum=None,
+                     restart_controls_enum=None, normal_stiffness_enum=None,
+                     analysis=None, max_attempts=4, log_path=None, restart_points=False,
+                     already_failed=False):
+    """以補救重試的方式求解單一分析 (結束時還原補救前的設定)"""
+    recovery = build_recovery(ext_api, model=model, transaction_cls=transaction_cls,
+                              quantity_cls=quantity_cls,
+                              auto_time_stepping_enum=auto_time_stepping_enum,
+                              time_step_define_by_type_enum=time_step_define_by_type_enum,
+                              restart_controls_enum=restart_controls_enum,
+                              normal_stiffness_enum=normal_stiffness_enum, analysis=analysis,
+                              max_attempts=max_attempts, log_path=log_path,
+                              restart_points=restart_points)
+    return recovery.run(already_failed=already_failed)
@@ -1,4 +1,60 @@
 # -*- coding: utf-8 -*-
+import os
+import re
+
+from Analyses_V1 import resolve_analysis
+from TransactionBatch_V1 import run_in_transaction
+
+# Step Table 欄位定義：(record key, AnalysisSettings 屬性, 型別)
+# 順序即寫入順序：必須先切換 AutomaticTimeStepping / DefineBy，再寫入步長數值
+STEP_PROPERTIES = (
+    ("end_time",           "StepEndTime",           "time"),
+    ("auto_time_stepping", "AutomaticTimeStepping", "auto"),
+    ("define_by",          "DefineBy",              "define_by"),
+    ("initial_time_step",  "InitialTimeStep",       "time"),
+    ("min_time_step",      "MinimumTimeStep",       "time"),
+    ("max_time_step",      "MaximumTimeStep",       "time"),
+    ("initial_substeps",   "InitialSubsteps",       "int"),
+    ("min_substeps",       "MinimumSubsteps",       "int"),
+    ("max_substeps",       "MaximumSubsteps",       "int"),
+)
+STEP_FIELDS = tuple(key for key, _, _ in STEP_PROPERTIES)
+
+SOLVE_OUTPUT_NAME = "solve.out"
+RESTART_FILE_PATTERN = r"^file\.r(\d{3})$"
+
+
+def make_step(end_time, auto_time_stepping=True, define_by="Time",
+              initial_time_step=None, min_time_step=None, max_time_step=None,
+              initial_substeps=None, min_substeps=None, max_substeps=None):
+    """
+    建立一筆 Step Table 紀錄 (dict)
+    值為 None 的欄位代表「不指定」，套用時會保留 Mechanical 目前的設定。
+    """
+    return {
+        "end_time": end_time,
+        "auto_time_stepping": auto_time_stepping,
+        "define_by": define_by,
+        "initial_time_step": initial_time_step,
+        "min_time_step": min_time_step,
+        "max_time_step": max_time_step,
+        "initial_substeps": initial_substeps,
+        "min_substeps": min_substeps,
+        "max_substeps": max_substeps,
+    }
+
+
+def _same_value(old, new, rel_tol=1e-9):
+    """[內部] 比較兩個設定值是否相同 (浮點數採相對誤差)"""
+    if old is None:
+        return False
+    if isinstance(new, float) or isinstance(old, float):
+        try:
+            return abs(float(old) - float(new)) <= rel_tol * max(abs(float(old)), abs(float(new)), 1e-30)
+        except (TypeError, ValueError):
+            return False
+    return old == new
+
 
 class SolverTool(object):
     """
@@ -6,7 +62,8 @@ class SolverTool(object):
     負責：設定分析步數、幾何非線性、核心數、觸發求解
     """
     def __init__(self, ext_api, model=None, transaction_cls=None, quantity_cls=None,
-                 auto_time_stepping_enum=None, time_step_define_by_type_enum=None):
+                 auto_time_stepping_enum=None, time_step_define_by_type_enum=None,
+                 analysis=None, restart_controls_enum=None):
         
         self.api = ext_api
         self.model = model if model is not None else ext_api.DataModel.Project.Model
@@ -14,12 +71,11 @@ class SolverTool(object):
         self.Quantity = quantity_cls
         self.AutoTimeStepping = auto_time_stepping_enum
         self.TimeStepDefineByType = time_step_define_by_type_enum
+        self.RestartControls = restart_controls_enum  # RestartControlsType (可選，重啟點設定用)
         
-        if self.model.Analyses.Count > 0:
-            self.analysis = self.model.Analyses[0]
-            self.settings = self.analysis.AnalysisSettings
-        else:
-            raise Exception("錯誤：專案中沒有任何分析系統！")
+        # 要設定的分析系統 (未指定時為第一個分析系統)
+        self.analysis = resolve_analysis(self.model, analysis)
+        self.settings = self.analysis.AnalysisSettings
 
     # ==========================================================
     # [新增] 設定核心數的方法 (移植自 Solver.py)
@@ -42,46 +98,223 @@ class SolverTool(object):
                                 auto_time_stepping=True, 
                                 initial_time_step=0.1, min_time_step=0.01, max_time_step=0.5,
                                 large_deflection=True):
-        
-        print("-> 正在設定分析控制...")
-        
-        # 1. 設定大變形
-        self.settings.LargeDeflection = large_deflection
+        """
+        舊版介面：所有步共用同一組步長設定
+        內部轉成 Step Table 後交給 apply_step_table()，只寫入有變動的值
+        """
+        steps = []
+        for i in range(num_steps):
+            end_time = None
+            if end_time_list and len(end_time_list) > i:
+                end_time = end_time_list[i]
+
+            if auto_time_stepping:
+                steps.append(make_step(end_time, True, "Time",
+                                       initial_time_step, min_time_step, max_time_step))
+            else:
+                steps.append(make_step(end_time, False, None))
+
+        return self.apply_step_table(steps, large_deflection=large_deflection)
+
+    # ==========================================================
+    # Step Table：批次讀取 / 比對 / 寫入每一步的設定
+    # ==========================================================
+    def _read_property(self, prop, kind):
+        """[內部] 讀取目前步的單一屬性，並轉成 Step Table 使用的純數值"""
+        try:
+            val = getattr(self.settings, prop)
+        except Exception:
+            return None
+
+        if val is None:
+            return None
+        if kind == "time":
+            return float(val.Value)
+        if kind == "int":
+            return int(val)
+        if kind == "auto":
+            if self.AutoTimeStepping is None:
+                return None
+            if val == self.AutoTimeStepping.On:
+                return True
+            if val == self.AutoTimeStepping.Off:
+                return False
+            return None  # Program Controlled
+        if kind == "define_by":
+            return str(val)
+        return val
+
+    def _write_property(self, prop, kind, value):
+        """[內部] 寫入目前步的單一屬性；依賴未注入時回傳 False 表示略過"""
+        if kind == "time":
+            setattr(self.settings, prop, self.Quantity(str(value) + " [s]"))
+        elif kind == "int":
+            setattr(self.settings, prop, int(value))
+        elif kind == "auto":
+            if self.AutoTimeStepping is None:
+                return False
+            setattr(self.settings, prop,
+                    self.AutoTimeStepping.On if value else self.AutoTimeStepping.Off)
+        elif kind == "define_by":
+            if self.TimeStepDefineByType is None:
+                return False
+            setattr(self.settings, prop, getattr(self.TimeStepDefineByType, value))
+        else:
+            setattr(self.settings, prop, value)
+        return True
+
+    def read_step_table(self):
+        """
+        讀回目前分析設定的 Step Table (list of dict)，可用於比對或存檔
+        """
+        table = []
+        for i in range(int(self.settings.NumberOfSteps)):
+            self.settings.CurrentStepNumber = i + 1
+            record = {}
+            for key, prop, kind in STEP_PROPERTIES:
+                record[key] = self._read_property(prop, kind)
+            table.append(record)
+        return table
+
+    def diff_step_table(self, steps, current=None):
+        """
+        比對目標 Step Table 與目前設定，回傳需要寫入的變更
+        回傳格式：[(step_id, key, old_value, new_value), ...]
+        """
+        if current is None:
+            current = self.read_step_table()
+
+        changes = []
+        for i, step in enumerate(steps):
+            old = current[i] if i < len(current) else {}
+            for key in STEP_FIELDS:
+                new_val = step.get(key)
+                if new_val is None:
+                    continue
+                if not _same_value(old.get(key), new_val):
+                    changes.append((i + 1, key, old.get(key), new_val))
+        return changes
+
+    def apply_step_table(self, steps, large_deflection=None):
+        """
+        套用 Step Table：只寫入與目前狀態不同的值
+        建議由 caller 包在單一 Transaction 內呼叫 (見 runSolver)
+
+        Parameters
+        ----------
+        steps : list of dict
+            每一步一筆紀錄，欄位見 STEP_FIELDS (可用 make_step 建立)
+        large_deflection : bool, optional
+            None 代表不變更
+
+        Returns
+        -------
+        int
+            實際寫入的屬性數量
+        """
+        print("-> 正在設定分析控制 (Step Table: {} 步)...".format(len(steps)))
 
-        # 2. 設定總步數
-        self.settings.NumberOfSteps = num_steps
-        
         if not self.Quantity:
             print("錯誤：未傳入 Quantity 類別！")
-            return
+            return 0
 
-        # 3. 逐一設定每一步
-        for i in range(num_steps):
-            step_id = i + 1
+        writes = 0
+        if large_deflection is not None and self.settings.LargeDeflection != large_deflection:
+            self.settings.LargeDeflection = large_deflection
+            writes += 1
+
+        if int(self.settings.NumberOfSteps) != len(steps):
+            self.settings.NumberOfSteps = len(steps)
+            writes += 1
+
+        changes = self.diff_step_table(steps)
+
+        # 依步分組，每一步只切換一次 CurrentStepNumber
+        by_step = {}
+        for step_id, key, _, new_val in changes:
+            by_step.setdefault(step_id, {})[key] = new_val
+
+        for step_id in sorted(by_step):
             self.settings.CurrentStepNumber = step_id
-            
-            if end_time_list and len(end_time_list) >= step_id:
-                val = end_time_list[i]
-                self.settings.StepEndTime = self.Quantity(str(val) + " [s]")
-            
-            if auto_time_stepping:
-                if self.AutoTimeStepping:
-                    self.settings.AutomaticTimeStepping = self.AutoTimeStepping.On
-                
-                if self.TimeStepDefineByType:
-                    self.settings.DefineBy = self.TimeStepDefineByType.Time
-                
-                self.settings.InitialTimeStep = self.Quantity(str(initial_time_step) + " [s]")
-                self.settings.MinimumTimeStep = self.Quantity(str(min_time_step) + " [s]")
-                self.settings.MaximumTimeStep = self.Quantity(str(max_time_step) + " [s]")
-            else:
-                if self.AutoTimeStepping:
-                    self.settings.AutomaticTimeStepping = self.AutoTimeStepping.Off
+            step_changes = by_step[step_id]
+            for key, prop, kind in STEP_PROPERTIES:
+                if key in step_changes:
+                    if self._write_property(prop, kind, step_changes[key]):
+                        writes += 1
+
+        print("   已寫入 {} 個變更 (共 {} 步)。".format(writes, len(steps)))
+        return writes
 
     def solve_analysis(self):
+        """求解並回傳是否成功 (Solution.Status 為 Done)；求解失敗時不丟出例外"""
         print("-> 開始求解 (Solving)...")
-        self.analysis.Solution.Solve(True)
-        print("   求解完成！")
+        try:
+            self.analysis.Solution.Solve(True)
+        except Exception as e:
+            print("   求解失敗: " + str(e))
+            return False
+        ok = self.solve_status() == "Done"
+        print("   求解完成！" if ok else "   求解未完成 (狀態: {})".format(self.solve_status()))
+        return ok
+
+    def solve_status(self):
+        return str(self.analysis.Solution.Status)
+
+    # ==========================================================
+    # 求解輸出 / 重啟點
+    # ==========================================================
+    def working_dir(self):
+        try:
+            return self.analysis.WorkingDir
+        except Exception:
+            return None
+
+    def read_solve_output(self):
+        """讀取 MAPDL 的 solve.out (沒有時回傳空字串)"""
+        folder = self.working_dir()
+        path = os.path.join(folder, SOLVE_OUTPUT_NAME) if folder else None
+        if not path or not os.path.isfile(path):
+            return ""
+        with open(path, "r") as f:
+            return f.read()
+
+    def enable_restart_points(self, retain_files=True):
+        """
+        產生重啟點 (Program Controlled：每個 Step 結束時保存) 並在求解成功後保留重啟檔
+        需要注入 restart_controls_enum；未注入時只設定保留檔案
+        """
+        writes = 0
+        try:
+            if self.RestartControls is not None:
+                self.settings.GenerateRestartPoints = self.RestartControls.ProgramControlled
+                writes += 1
+            if retain_files:
+                self.settings.RetainFilesAfterFullSolve = True
+                writes += 1
+        except Exception as e:
+            print("   警告：無法設定重啟點 (可能是版本差異): " + str(e))
+        return writes
+
+    def restart_points(self):
+        """工作目錄中已保存的重啟檔序號 (file.r001 -> 1)，依序排列"""
+        folder = self.working_dir()
+        if not folder or not os.path.isdir(folder):
+            return []
+        found = []
+        for name in os.listdir(folder):
+            match = re.match(RESTART_FILE_PATTERN, name)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def use_restart_point(self, index):
+        """指定下次求解的起點 (0 = 從頭求解；n = 第 n 個重啟點)；回傳是否設定成功"""
+        try:
+            self.settings.CurrentRestartPoint = int(index)
+            return True
+        except Exception as e:
+            print("   警告：無法指定重啟點 {} ({})".format(index, e))
+            return False
 
 
 # ==========================================================
@@ -92,32 +325,34 @@ def runSolver(ext_api, num_steps=1, end_time_list=None,
               initial_time_step=0.1, min_time_step=0.001, max_time_step=1.0,
               large_deflection=True,
               cores=4,  # [新增] 預設 4 核心
+              step_table=None,  # [新增] list of dict (見 make_step)，指定時取代上方的步長參數
               model=None, transaction_cls=None, quantity_cls=None,
               auto_time_stepping_enum=None,
-              time_step_define_by_type_enum=None):
+              time_step_define_by_type_enum=None,
+              batcher=None,
+              analysis=None):  # 分析系統 (物件 / 序號 / 名稱)，未指定時為第一個
     
     if end_time_list is None: end_time_list = [1.0]
 
     tool = SolverTool(ext_api, model=model, transaction_cls=transaction_cls,
                       quantity_cls=quantity_cls,
                       auto_time_stepping_enum=auto_time_stepping_enum,
-                      time_step_define_by_type_enum=time_step_define_by_type_enum)
+                      time_step_define_by_type_enum=time_step_define_by_type_enum,
+                      analysis=analysis)
 
     # 1. 設定核心數 (不需要 Transaction，這是 Application 層級設定)
     tool.set_solver_cores(cores)
 
     # 2. 設定分析參數 (使用 Transaction 加速)
-    if transaction_cls:
-        with transaction_cls():
-            tool.configure_time_settings(num_steps, end_time_list, 
-                                         auto_time_stepping, 
-                                         initial_time_step, min_time_step, max_time_step,
-                                         large_deflection)
-    else:
-        tool.configure_time_settings(num_steps, end_time_list, 
-                                     auto_time_stepping, 
-                                     initial_time_step, min_time_step, max_time_step,
-                                     large_deflection)
+    def _do_configure():
+        if step_table is not None:
+            return tool.apply_step_table(step_table, large_deflection=large_deflection)
+        return tool.configure_time_settings(num_steps, end_time_list, 
+                                            auto_time_stepping, 
+                                            initial_time_step, min_time_step, max_time_step,
+                                            large_deflection)
+
+    run_in_transaction(_do_configure, transaction_cls, batcher, tool="SolverTool")
 
     # 3. 執行求解
     # tool.solve_analysis()
\ No newline at end of file
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 對稱偵測與模型縮減 (1/2、1/4 模型)
+# - 以面表格 (GeoSnapshot 的欄位：重心 / 面積 / bbox / 所屬 Body) 偵測 X / Y 鏡射對稱面：
+#   每個面的鏡射重心以空間雜湊 (spatial hash) 查詢，面積也相符才算配對成功
+# - 縮減：抑制 (Suppress) 對稱面另一側的 Body，建立對稱面的 Named Selection
+#   ([Sym]_[X]，BCTool 預設套用 Frictionless Support)，並從其餘 NS 移除被抑制 Body 的面，
+#   之後的接觸配對與 BC 只會處理保留的一半
+# - Mechanical 無法切割幾何：跨越對稱面的 Body 需先在 SpaceClaim 以對稱面切開，否則只提出建議
+# ==========================================
+import math
+
+from IdSet_V1 import IdSet
+from TransactionBatch_V1 import run_in_transaction
+from ZFaceSelector_V1 import iter_bodies
+
+TOOL_NAME = "SymmetryTool"
+AXES = {"X": 0, "Y": 1, "Z": 2}
+SYMMETRY_NS_NAME = "[Sym]_[{}]"
+KEEP_SIDES = ("positive", "negative")
+
+
+def _flat(data):
+    """[內部] 欄位資料攤平成一維 (NumPy 陣列為 view)"""
+    return data.ravel() if hasattr(data, "ravel") else data
+
+
+def snapshot_tables(snapshot):
+    """由 GeoSnapshot (離線快照) 取得偵測所需的欄位"""
+    names = ("face_id", "face_body", "face_centroid", "face_area", "face_bbox",
+             "body_id", "body_bbox")
+    return dict((name, _flat(snapshot.column(name))) for name in names)
+
+
+class SpatialHash(object):
+    """
+    3D 點的空間雜湊 (格子邊長 >= 查詢容許誤差)
+    查詢只需檢查所在格子與相鄰的 26 格，不必和所有點比較
+    """
+
+    def __init__(self, cell):
+        self.cell = float(cell)
+        self.buckets = {}
+
+    def _key(self, x, y, z):
+        c = self.cell
+        return (int(math.floor(x / c)), int(math.floor(y / c)), int(math.floor(z / c)))
+
+    def insert(self, index, x, y, z):
+        self.buckets.setdefault(self._key(x, y, z), []).append((index, x, y, z))
+
+    def near(self, x, y, z, tolerance):
+        """距離 (x, y, z) 不超過 tolerance 的點序號 list (由近到遠)"""
+        kx, ky, kz = self._key(x, y, z)
+        tol2 = tolerance * tolerance
+        found = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for index, px, py, pz in self.buckets.get((kx + dx, ky + dy, kz + dz), ()):
+                        d2 = (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+                        if d2 <= tol2:
+                            found.append((d2, index))
+        found.sort()
+        return [index for _, index in found]
+
+
+class SymmetryPlane(object):
+    """單一對稱面 (axis = position) 的偵測結果"""
+
+    def __init__(self, axis, position):
+        self.axis = axis
+        self.position = position
+        self.faces = 0
+        self.matched = 0
+        self.matched_area = 0.0
+        self.total_area = 0.0
+        self.unmatched = []      # 找不到鏡射面的面 Id
+        self.plane_faces = []    # 位於對稱面上的面 Id (已切割的幾何)
+        self.body_side = {}      # Body Id -> "positive" / "negative" / "straddle"
+        self.body_pairs = []     # [(負側 Body, 正側 Body)]
+
+    @property
+    def match_fraction(self):
+        return self.matched_area / self.total_area if self.total_area else 0.0
+
+    def is_symmetric(self, min_match=1.0):
+        return self.faces > 0 and self.matched >= min_match * self.faces
+
+    def bodies(self, side):
+        return sorted(b for b, s in self.body_side.items() if s == side)
+
+    def to_dict(self):
+        return {"axis": self.axis, "position": self.position, "faces": self.faces,
+                "matched": self.matched, "match_fraction": self.match_fraction,
+                "unmatched": self.unmatched[:20], "plane_faces": len(self.plane_faces),
+                "straddling_bodies": self.bodies("straddle"), "body_pairs": self.body_pairs}
+
+
+def detect_plane(tables, axis, tolerance=1e-3, area_tolerance=1e-3, position=None):
+    """
+    偵測單一軸向的鏡射對稱
+    position 未指定時取整體 bbox 在該軸的中點 (鏡射對稱面必通過對稱物體的中心)
+    """
+    k = AXES[axis]
+    ids = tables["face_id"]
+    bodies = tables["face_body"]
+    cents = tables["face_centroid"]
+    areas = tables["face_area"]
+    bbox = tables["face_bbox"]
+    n = len(ids)
+
+    if position is None:
+        lo = min(bbox[6 * i + k] for i in range(n)) if n else 0.0
+        hi = max(bbox[6 * i + 3 + k] for i in range(n)) if n else 0.0
+        position = 0.5 * (lo + hi)
+    plane = SymmetryPlane(axis, position)
+
+    index = SpatialHash(max(tolerance * 2.0, 1e-9))
+    for i in range(n):
+        index.insert(i, cents[3 * i], cents[3 * i + 1], cents[3 * i + 2])
+
+    partner_body = {}  # Body -> 鏡射面所在 Body 的集合
+    for i in range(n):
+        point = [cents[3 * i], cents[3 * i + 1], cents[3 * i + 2]]
+        point[k] = 2.0 * position - point[k]
+        area = areas[i]
+        plane.faces += 1
+        plane.total_area += area
+        match = None
+        for j in index.near(point[0], point[1], point[2], tolerance):
+            if abs(areas[j] - area) <= area_tolerance * max(abs(area), abs(areas[j]), 1e-12):
+                match = j
+                break
+        if match is None:
+            plane.unmatched.append(int(ids[i]))
+        else:
+            plane.matched += 1
+            plane.matched_area += area
+            partner_body.setdefault(int(bodies[i]), set()).add(int(bodies[match]))
+
+        # 位於對稱面上的平面 (切割後的斷面)：重心在面上且在該軸方向沒有厚度
+        if abs(cents[3 * i + k] - position) <= tolerance and \
+                bbox[6 * i + 3 + k] - bbox[6 * i + k] <= tolerance:
+            plane.plane_faces.append(int(ids[i]))
+
+    body_ids = tables["body_id"]
+    body_bbox = tables["body_bbox"]
+    for b in range(len(body_ids)):
+        lo, hi = body_bbox[6 * b + k], body_bbox[6 * b + 3 + k]
+        if lo >= position - tolerance:
+            side = "positive"
+        elif hi <= position + tolerance:
+            side = "negative"
+        else:
+            side = "straddle"
+        plane.body_side[int(body_ids[b])] = side
+
+    for body, partners in sorted(partner_body.items()):
+        if plane.body_side.get(body) == "negative" and len(partners) == 1:
+            plane.body_pairs.append((body, list(partners)[0]))
+    return plane
+
+
+def detect_symmetry(tables, axes=("X", "Y"), tolerance=1e-3, area_tolerance=1e-3):
+    """偵測多個軸向，回傳 {軸: SymmetryPlane}"""
+    return dict((axis, detect_plane(tables, axis, tolerance, area_tolerance)) for axis in axes)
+
+
+def plan_reduction(planes, keep="positive", min_match=1.0):
+    """
+    由偵測結果提出縮減方案 (dict)
+    只採用完全對稱的軸向；保留 keep 側的 Body，抑制另一側；
+    有 Body 跨越採用的對稱面時 ok = False (需先切割幾何)
+    """
+    if keep not in KEEP_SIDES:
+        raise ValueError("keep 應為 {}".format(" / ".join(KEEP_SIDES)))
+    drop = "negative" if keep == "positive" else "positive"
+    used = [p for _, p in sorted(planes.items()) if p.is_symmetric(min_match)]
+
+    suppress, straddling = set(), set()
+    for p in used:
+        suppress.update(p.bodies(drop))
+        straddling.update(p.bodies("straddle"))
+    keep_bodies = set()
+    for p in used:
+        keep_bodies.update(b for b in p.body_side if b not in suppress)
+    plane_faces = dict((p.axis, p.plane_faces) for p in used)
+
+    return {
+        "axes": [p.axis for p in used],
+        "positions": dict((p.axis, p.position) for p in used),
+        "keep": keep,
+        "factor": 2 ** len(used),
+        "suppress_bodies": sorted(suppress),
+        "keep_bodies": sorted(keep_bodies),
+        "straddling_bodies": sorted(straddling),
+        "plane_faces": plane_faces,
+        "ok": bool(used) and not straddling,
+    }
+
+
+class SymmetryTool(object):
+    """
+    對稱縮減工具 (Logic Only)
+    負責：偵測對稱面、提出縮減方案、抑制鏡射側 Body 並建立對稱面 NS、
+    縮減其他 NS 的範圍，以及還原 (restore)
+    """
+
+    def __init__(self, ext_api, model=None, transaction_cls=None, selection_type_enum=None,
+                 data_model_object_category_enum=None, manifest=None, batcher=None):
+        self.api = ext_api
+        self.model = model if model is not None else ext_api.DataModel.Project.Model
+        self.transaction_cls = transaction_cls
+        self.selection_type_enum = selection_type_enum
+        self.DataModelObjectCategory = data_model_object_category_enum
+        self.manifest = manifest
+        self.batcher = batcher
+        self.geo_data = ext_api.DataModel.GeoData
+
+    # ----------------------------------------------------------
+    # 偵測 / 方案
+    # ----------------------------------------------------------
+    def analyze(self, axes=("X", "Y"), tolerance=1e-3, area_tolerance=1e-3,
+                parallel=False, workers=None, tables=None):
+        """讀取面表格 (或使用傳入的 tables) 並偵測對稱面"""
+        if tables is None:
+            from GeoSnapshot_V1 import collect_tables
+            tables = collect_tables(self.geo_data, parallel=parallel, workers=workers)
+        planes = detect_symmetry(tables, axes, tolerance, area_tolerance)
+        for axis, p in sorted(planes.items()):
+            print("-> {} 向對稱面 {} = {:.6g}：配對 {}/{} 面 ({:.1%} 面積){}".format(
+                axis, axis, p.position, p.matched, p.faces, p.match_fraction,
+                "" if p.is_symmetric() else "，不對稱"))
+        return planes
+
+    def propose(self, planes, keep="positive"):
+        plan = plan_reduction(planes, keep)
+        if not plan["axes"]:
+            print("   沒有可用的對稱面。")
+        elif plan["straddling_bodies"]:
+            print("   建議以 {} 對稱縮減 (x{})，但有 {} 個 Body 跨越對稱面，"
+                  "需先在 SpaceClaim 以對稱面切割：{}".format(
+                      "/".join(plan["axes"]), plan["factor"], len(plan["straddling_bodies"]),
+                      plan["straddling_bodies"][:10]))
+        else:
+            print("   建議以 {} 對稱縮減：抑制 {} 個 Body，模型約為 1/{}".format(
+                "/".join(plan["axes"]), len(plan["suppress_bodies"]), plan["factor"]))
+        return plan
+
+    # ----------------------------------------------------------
+    # 套用 / 還原
+    # ----------------------------------------------------------
+    def _tree_bodies(self):
+        """[內部] Geo Body Id -> 樹狀結構中的 Body 物件"""
+        if not self.DataModelObjectCategory:
+            raise NameError("DataModelObjectCategory 未提供：請由 caller 傳入 data_model_object_category_enum")
+        bodies = {}
+        for body in self.api.DataModel.GetObjectsByType(self.DataModelObjectCategory.Body):
+            geo_body = body.GetGeoBody()
+            if geo_body:
+                bodies[geo_body.Id] = body
+        return bodies
+
+    def _face_ids_of(self, body_ids):
+        """[內部] 一組 Body 的所有面 Id"""
+        wanted = set(body_ids)
+        ids = []
+        for body in iter_bodies(self.geo_data):
+            if body.Id in wanted:
+                ids.extend(face.Id for face in body.Faces)
+        return IdSet(ids)
+
+    def _set_ns_ids(self, ns, ids):
+        sel = self.api.SelectionManager.CreateSelectionInfo(self.selection_type_enum.GeometryEntities)
+        sel.Ids = IdSet(ids).to_list()
+        ns.Location = sel
+
+    def apply(self, plan):
+        """
+        套用縮減方案：抑制 Body、建立對稱面 NS、縮減其他 NS
+        原本的狀態記錄在 Manifest 中，可用 restore() 還原 (沒有 Manifest 時不套用，丟出 ValueError)
+        成功時 plan["applied_factor"] 設為縮減倍數 (結果需乘上此倍數還原為全模型)
+        """
+        if self.manifest is None:
+            raise ValueError("套用對稱縮減需要 Manifest (還原與後處理的倍數都記錄在 Manifest 中)")
+        if not plan["ok"]:
+            print("   縮減方案無法直接套用 (沒有對稱面或有 Body 跨越對稱面)，未變更模型。")
+            return False
+        if self.selection_type_enum is None:
+            raise NameError("SelectionTypeEnum 未提供：請由 caller 傳入 selection_type_enum=SelectionTypeEnum")
+
+        removed_faces = self._face_ids_of(plan["suppress_bodies"])
+        keep_bodies = set(plan["keep_bodies"])
+
+        def _do_apply():
+            self.restore(quiet=True)
+            tree_bodies = self._tree_bodies()
+            for body_id in plan["suppress_bodies"]:
+                body = tree_bodies.get(body_id)
+                if body is not None and not body.Suppressed:
+                    body.Suppressed = True
+
+            # 其餘 NS 移除被抑制 Body 的面 (接觸 / BC / 網格控制只剩保留的一半)
+            trimmed = {}
+            for ns in self.model.NamedSelections.Children:
+                ids = IdSet.from_selection(ns)
+                remaining = ids.difference(removed_faces)
+                if len(remaining) != len(ids):
+                    trimmed[str(ns.ObjectId)] = ids.to_list()
+                    self._set_ns_ids(ns, remaining)
+
+            created = 0
+            for axis, face_ids in sorted(plan["plane_faces"].items()):
+                # 只取保留側 Body 上的斷面
+                faces = self._faces_in_bodies(face_ids, keep_bodies)
+                if not faces:
+                    print("   警告：{} 向對稱面上找不到保留側的斷面，未建立 NS。".format(axis))
+                    continue
+                ns = self.model.AddNamedSelection()
+                ns.Name = SYMMETRY_NS_NAME.format(axis)
+                self._set_ns_ids(ns, faces)
+                created += 1
+                self.manifest.record(TOOL_NAME, ns, key="planes")
+
+            self.manifest.set_meta(TOOL_NAME, "suppressed", plan["suppress_bodies"])
+            self.manifest.set_meta(TOOL_NAME, "trimmed", trimmed)
+            self.manifest.set_meta(TOOL_NAME, "factor", plan["factor"])
+            self.manifest.save()
+            plan["applied_factor"] = plan["factor"]
+            print("   已抑制 {} 個 Body、縮減 {} 個 NS、建立 {} 個對稱面 NS (結果需 x{} 還原為全模型)".format(
+                len(plan["suppress_bodies"]), len(trimmed), created, plan["factor"]))
+            return True
+
+        return run_in_transaction(_do_apply, self.transaction_cls, self.batcher, tool=TOOL_NAME)
+
+    def _faces_in_bodies(self, face_ids, body_ids):
+        wanted = set(face_ids)
+        faces = []
+        for body in iter_bodies(self.geo_data):
+            if body.Id in body_ids:
+                faces.extend(face.Id for face in body.Faces if face.Id in wanted)
+        return faces
+
+    def restore(self, quiet=False):
+        """還原上次的縮減 (需要 Manifest)：取消抑制、還原 NS 範圍、刪除對稱面 NS"""
+        if self.manifest is None:
+            return False
+        suppressed = self.manifest.get_meta(TOOL_NAME, "suppressed", [])
+        trimmed = self.manifest.get_meta(TOOL_NAME, "trimmed", {})
+        if not suppressed and not trimmed and not self.manifest.tracked_ids(TOOL_NAME):
+            return False
+
+        tree_bodies = self._tree_bodies() if suppressed else {}
+        for body_id in suppressed:
+            body = tree_bodies.get(body_id)
+            if body is not None:
+                body.Suppressed = False
+        for object_id, ids in trimmed.items():
+            try:
+                ns = self.api.DataModel.GetObjectById(int(object_id))
+            except Exception:
+                ns = None
+            if ns is not None:
+                self._set_ns_ids(ns, ids)
+        self.manifest.delete_tracked(TOOL_NAME, key="planes")
+        for name in ("suppressed", "trimmed"):
+            self.manifest.set_meta(TOOL_NAME, name, [] if name == "suppressed" else {})
+        self.manifest.set_meta(TOOL_NAME, "factor", 1)
+        self.manifest.save()
+        if not quiet:
+            print("已還原全模型：取消抑制 {} 個 Body、還原 {} 個 NS。".format(len(suppressed), len(trimmed)))
+        return True
+
+
+def runSymmetry(ext_api, axes=("X", "Y"), tolerance=1e-3, area_tolerance=1e-3,
+                apply=False, keep="positive",
+                model=None, transaction_cls=None, selection_type_enum=None,
+                data_model_object_category_enum=None,
+                manifest=None, batcher=None, parallel=False, workers=None):
+    """
+    便利函式：偵測對稱並提出 (apply=True 時套用，需要 manifest) 縮減方案
+    回傳方案 dict (含 "planes" 偵測明細、"applied" 與 "applied_factor")
+    applied_factor 為實際套用的縮減倍數 (未套用時為 1)，後處理以此還原全模型的反力
+    有 batcher 時套用在 flush 中執行："applied" 為 Deferred，flush 後以
+    TransactionBatch_V1.resolve_deferred 取值 (applied_factor 也在 flush 後才更新)
+    """
+    if apply and manifest is None:
+        raise ValueError("apply=True 需要 manifest：縮減狀態與倍數記錄在 Manifest 中才能還原")
+    tool = SymmetryTool(ext_api, model=model, transaction_cls=transaction_cls,
+                        selection_type_enum=selection_type_enum,
+                        data_model_object_category_enum=data_model_object_category_enum,
+                        manifest=manifest, batcher=batcher)
+    if manifest is not None:
+        manifest.begin_run(TOOL_NAME)
+    planes = tool.analyze(axes, tolerance, area_tolerance, parallel=parallel, workers=workers)
+    plan = tool.propose(planes, keep)
+    plan["planes"] = dict((axis, p.to_dict()) for axis, p in planes.items())
+    plan["applied_factor"] = 1
+    plan["applied"] = tool.apply(plan) if apply else False
+    return plan
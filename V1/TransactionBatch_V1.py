@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+import time
+
+
+class TransactionStats(object):
+    """
+    Transaction 計數與耗時統計
+    用來量化 Mechanical UI 樹狀結構刷新的成本 (每個 Transaction 結束時都會刷新一次)
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.records = []  # [(kind, tools, n_ops, seconds), ...]
+
+    def add(self, kind, tools, n_ops, seconds):
+        self.records.append((kind, tuple(sorted(set(t for t in tools if t))), n_ops, seconds))
+
+    @property
+    def transactions(self):
+        return sum(1 for r in self.records if r[0] == "transaction")
+
+    def total_time(self, kind=None):
+        return sum(r[3] for r in self.records if kind is None or r[0] == kind)
+
+    def summary(self):
+        n_txn = self.transactions
+        t_txn = self.total_time("transaction")
+        n_post = sum(r[2] for r in self.records if r[0] == "post_commit")
+        t_post = self.total_time("post_commit")
+        return ("Transaction x {} ({:.3f} s), 交易外操作 x {} ({:.3f} s)".format(
+            n_txn, t_txn, n_post, t_post))
+
+    def report(self):
+        print("-> Transaction 統計: " + self.summary())
+        for kind, tools, n_ops, seconds in self.records:
+            print("   {:<12} {:>4} ops  {:8.3f} s  {}".format(kind, n_ops, seconds, ", ".join(tools)))
+
+
+# 未指定 stats 時，所有工具共用這一份 (跨工具累計)
+STATS = TransactionStats()
+
+
+class Deferred(object):
+    """排入批次的單一操作；執行後 result 保存回傳值"""
+
+    def __init__(self, fn, tool=None):
+        self.fn = fn
+        self.tool = tool
+        self.done = False
+        self.result = None
+        self.seconds = 0.0
+
+    def run(self):
+        start = time.time()
+        try:
+            self.result = self.fn()
+        finally:
+            self.seconds = time.time() - start
+        self.done = True
+        return self.result
+
+
+class _Phase(object):
+    """[內部] 一個階段 = 一個 Transaction (可交易操作) + 其後的交易外操作"""
+
+    def __init__(self):
+        self.safe = []
+        self.post = []
+        self.committed = False
+
+
+class TransactionBatcher(object):
+    """
+    跨工具的 Transaction 合併器
+    負責：收集各工具排入的資料模型變更，以最少的 Transaction 數量執行；
+    不能在 Transaction 內執行的操作 (例如 BC 的 DiscreteValues 寫入、GenerateMesh)
+    則依排入順序延後到 Transaction 提交之後執行。
+
+    用法：
+        batcher = TransactionBatcher(Transaction)
+        runZFaceSelector(..., batcher=batcher)
+        runContact(..., batcher=batcher)
+        runBC(..., batcher=batcher)
+        batcher.flush()
+    """
+
+    def __init__(self, transaction_cls=None, stats=None):
+        self.transaction_cls = transaction_cls
+        self.stats = stats if stats is not None else STATS
+        self._phases = [_Phase()]
+        self._active = None      # 正在執行的階段
+        self._in_transaction = False
+        # 各工具排入的操作在 flush 中實際執行的秒數 (累計；不含 Transaction 提交的刷新時間)
+        self.tool_seconds = {}
+
+    def _charge(self, item):
+        """[內部] 把操作的執行時間記到所屬工具 (巢狀排入的操作已含在外層操作中，不重複計算)"""
+        self.tool_seconds[item.tool] = self.tool_seconds.get(item.tool, 0.0) + item.seconds
+
+    def _open_phase(self):
+        last = self._phases[-1]
+        if last.committed:
+            last = _Phase()
+            self._phases.append(last)
+        return last
+
+    @property
+    def in_transaction(self):
+        return self._in_transaction
+
+    def queue(self, fn, tool=None):
+        """
+        排入可在 Transaction 內執行的操作
+        若批次正在 Transaction 中執行 (例如由另一個已排入的操作呼叫)，直接加入目前的 Transaction
+        """
+        item = Deferred(fn, tool)
+        if self._in_transaction:
+            item.run()
+            self._active.safe.append(item)
+        else:
+            self._open_phase().safe.append(item)
+        return item
+
+    def defer(self, fn, tool=None):
+        """排入必須在 Transaction 之外執行的操作 (於所屬階段提交後依序執行)"""
+        item = Deferred(fn, tool)
+        phase = self._active if self._active is not None else self._open_phase()
+        phase.post.append(item)
+        return item
+
+    def barrier(self):
+        """強制切分階段：之後排入的操作會在目前階段的交易外操作完成後，才進入新的 Transaction"""
+        if self._phases[-1].safe or self._phases[-1].post:
+            self._phases.append(_Phase())
+
+    def pending_count(self):
+        return sum(len(p.safe) + len(p.post) for p in self._phases if not p.committed)
+
+    def flush(self):
+        """依序執行所有階段，回傳 stats"""
+        index = 0
+        while index < len(self._phases):
+            phase = self._phases[index]
+            index += 1
+            if phase.committed:
+                continue
+
+            self._active = phase
+            try:
+                if phase.safe:
+                    pending = list(phase.safe)
+                    start = time.time()
+                    self._in_transaction = True
+                    try:
+                        if self.transaction_cls:
+                            with self.transaction_cls():
+                                for item in pending:
+                                    item.run()
+                                    self._charge(item)
+                        else:
+                            for item in pending:
+                                item.run()
+                                self._charge(item)
+                    finally:
+                        self._in_transaction = False
+                    self.stats.add("transaction", [i.tool for i in phase.safe],
+                                   len(phase.safe), time.time() - start)
+                phase.committed = True
+
+                # 交易外操作：執行期間可能再排入新的操作 (例如 defer 另一個 defer)
+                done = 0
+                start = time.time()
+                while done < len(phase.post):
+                    phase.post[done].run()
+                    self._charge(phase.post[done])
+                    done += 1
+                if done:
+                    self.stats.add("post_commit", [i.tool for i in phase.post],
+                                   done, time.time() - start)
+            finally:
+                self._active = None
+
+        self._phases = [_Phase()]
+        return self.stats
+
+
+def run_in_transaction(fn, transaction_cls=None, batcher=None, tool=None, stats=None):
+    """
+    以 Transaction 執行 fn (取代各工具重複的 if transaction_cls / else 寫法)
+    有 batcher 時改為排入批次；已在批次 Transaction 中時立即執行並回傳結果，否則回傳 Deferred
+    """
+    if batcher is not None:
+        item = batcher.queue(fn, tool=tool)
+        return item.result if item.done else item
+
+    if not transaction_cls:
+        return fn()
+
+    stats = stats if stats is not None else STATS
+    start = time.time()
+    with transaction_cls():
+        result = fn()
+    stats.add("transaction", [tool], 1, time.time() - start)
+    return result
+
+
+def resolve_deferred(value):
+    """
+    把結果中的 Deferred 換成執行後的回傳值 (dict / list / tuple 逐層處理)
+    run_in_transaction 在有 batcher 時回傳 Deferred；flush 之後再呼叫，尚未執行的為 None
+    """
+    if isinstance(value, Deferred):
+        return resolve_deferred(value.result) if value.done else None
+    if isinstance(value, dict):
+        return dict((k, resolve_deferred(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return type(value)(resolve_deferred(v) for v in value)
+    return value
+
+
+def run_after_commit(fn, batcher=None, tool=None):
+    """執行必須在 Transaction 之外的操作；有 batcher 時延後到目前階段提交之後"""
+    if batcher is not None:
+        return batcher.defer(fn, tool=tool)
+    return fn()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# ==========================================
+# 以重啟點接續求解變體族群
+# - 同一族群的變體：幾何 / 接觸 / 網格等全模型參數相同，只有步設定 (Step Table) 與逐步位移不同
+# - 依每一步的簽章 (步設定 + 該步的位移) 找出共同前綴，例如插入步相同、拔出步不同
+# - 族群內依簽章排序後依序求解：第一個變體從頭求解並保存每一步的重啟點，
+#   之後的變體由與前一個變體分歧的那一步的重啟點接續，只重新求解不同的後段
+# - 之後的變體只就地改寫既有 BC 的位移數值 (刪除重建 BC 會讓重啟點失效)；
+#   重啟檔不足而改為較早的重啟點時，report 的 results["restart_fallback"] 會記錄
+# - 摩擦係數等接觸設定屬於全模型參數 (變更後 Mechanical 的重啟點失效)，
+#   摩擦不同的變體分屬不同族群，各自從頭求解
+# ==========================================
+import json
+
+from Pipeline_V1 import DEFAULT_PARAMS, PER_ANALYSIS_STAGES, STAGES, merge_params, run_pipeline
+from SolverTool_V1 import STEP_FIELDS, make_step
+
+# 由步簽章描述的參數 (不列入族群的共用 key)
+STEP_KEYS = {
+    "solver": ("num_steps", "end_time_list", "auto_time_stepping", "initial_time_step",
+               "min_time_step", "max_time_step", "step_table"),
+    "bc": ("z_steps", "z_magnitude", "direction_sign"),
+}
+# 不影響求解結果的參數 (不列入族群的共用 key)
+SOLVE_NEUTRAL = {
+    "bc": ("update_in_place",),
+    "solver": ("cores",),
+    "post": None,       # None 表示整個階段
+    "recovery": None,
+    "mesh_quality": None,
+}
+
+
+def _canonical(value):
+    """[內部] 標準化 JSON (key 排序)"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def step_rows(solver):
+    """Solver 參數展開成每一步的 Step Table 紀錄 (與 SolverTool.configure_time_settings 相同)"""
+    if solver.get("step_table"):
+        return [dict((key, step.get(key)) for key in STEP_FIELDS) for step in solver["step_table"]]
+    end_times = solver.get("end_time_list") or []
+    rows = []
+    for i in range(int(solver.get("num_steps", len(end_times)) or 1)):
+        end_time = end_times[i] if i < len(end_times) else None
+        if solver.get("auto_time_stepping", True):
+            rows.append(make_step(end_time, True, "Time", solver.get("initial_time_step"),
+                                  solver.get("min_time_step"), solver.get("max_time_step")))
+        else:
+            rows.append(make_step(end_time, False, None))
+    return rows
+
+
+def step_signatures(params):
+    """
+    每一步的簽章 (list of str)：步設定 + 該步結束時的位移
+    未指定 z_steps 時位移在第一步到達 z_magnitude * direction_sign 後保持不變
+    """
+    p = merge_params(DEFAULT_PARAMS, params)
+    bc = p["bc"]
+    rows = step_rows(p["solver"])
+    if bc.get("z_steps") is not None:
+        loads = list(bc["z_steps"])
+    else:
+        loads = [bc.get("z_magnitude", 0.0) * bc.get("direction_sign", 1.0)] + [None] * len(rows)
+    return [_canonical({"step": row, "load": loads[i] if i < len(loads) else None})
+            for i, row in enumerate(rows)]
+
+
+def shared_key(params):
+    """族群的共用 key：去掉步相關與不影響求解的參數後的標準化 JSON"""
+    p = merge_params(DEFAULT_PARAMS, params)
+    shared = {}
+    for stage, values in p.items():
+        if stage in SOLVE_NEUTRAL and SOLVE_NEUTRAL[stage] is None:
+            continue
+        skip = STEP_KEYS.get(stage, ()) + (SOLVE_NEUTRAL.get(stage) or ())
+        shared[stage] = dict((k, v) for k, v in values.items() if k not in skip)
+    return _canonical(shared)
+
+
+def common_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class VariantFamily(object):
+    """
+    共用全模型參數的一組變體與其求解順序
+    plan : [{"name", "params", "steps", "restart_from", "duplicate_of"}]
+        restart_from 為接續的重啟點 (= 與前一個變體相同的步數，0 表示從頭求解)
+        duplicate_of 為參數完全相同、直接沿用結果的變體名稱
+    """
+
+    def __init__(self, key, variants):
+        self.key = key
+        members = sorted(((step_signatures(params), name, params) for name, params in variants),
+                         key=lambda m: (m[0], m[1]))
+        self.plan = []
+        prev = None
+        for signature, name, params in members:
+            entry = {"name": name, "params": params, "steps": len(signature),
+                     "restart_from": 0, "duplicate_of": None}
+            if prev is not None:
+                entry["restart_from"] = common_prefix(prev[0], signature)
+                if prev[0] == signature:
+                    entry["duplicate_of"] = prev[2]["duplicate_of"] or prev[1]
+            self.plan.append(entry)
+            prev = (signature, name, entry)
+
+    @property
+    def names(self):
+        return [entry["name"] for entry in self.plan]
+
+    def steps_total(self):
+        return sum(entry["steps"] for entry in self.plan)
+
+    def steps_solved(self):
+        """實際需要求解的步數 (扣掉由重啟點接續的步與重複的變體)"""
+        return sum(entry["steps"] - entry["restart_from"] for entry in self.plan
+                   if entry["duplicate_of"] is None)
+
+
+def plan_families(variants):
+    """
+    變體依共用 key 分組：variants 為 [(名稱, params)]
+    回傳 [VariantFamily] (依第一次出現的順序)
+    """
+    groups = []
+    index = {}
+    for name, params in variants:
+        key = shared_key(params)
+        if key not in index:
+            index[key] = len(groups)
+            groups.append((key, []))
+        groups[index[key]][1].append((name, params))
+    return [VariantFamily(key, members) for key, members in groups]
+
+
+def run_family(env, family, stages=STAGES, manifest=None, loader=None):
+    """
+    在同一個 Mechanical 工作階段中依序求解族群內的變體
+    第一個變體執行全部階段；之後只重跑 BC / Solver / Post (BC 就地更新數值)，並由分歧步的重啟點接續
+
+    Returns
+    -------
+    dict : {變體名稱: run_pipeline 的 report}
+    """
+    reports = {}
+    for i, entry in enumerate(family.plan):
+        name = entry["name"]
+        if entry["duplicate_of"] is not None:
+            reports[name] = dict(reports[entry["duplicate_of"]], duplicate_of=entry["duplicate_of"])
+            print("-> [{}] 與 {} 相同，沿用結果".format(name, entry["duplicate_of"]))
+            continue
+        params = entry["params"]
+        run_stages = stages
+        if i > 0:
+            run_stages = [s for s in stages if s in PER_ANALYSIS_STAGES]
+            params = merge_params(params, {"bc": {"update_in_place": True}})
+        print("-> [{}] 由重啟點 {} 接續 (共 {} 步)".format(name, entry["restart_from"], entry["steps"]))
+        reports[name] = run_pipeline(env, params, stages=run_stages, solve=True,
+                                     manifest=manifest, loader=loader, run_name=name,
+                                     restart_from=entry["restart_from"])
+        fallback = (reports[name].get("results") or {}).get("restart_fallback")
+        if fallback:
+            print("   警告：[{}] 重啟檔不足，未由重啟點 {} 接續：{}".format(
+                name, entry["restart_from"], fallback))
+    return reports
+
+
+def combine_reports(reports):
+    """多個變體的 report 合併成一份 (status 為最差者，timings 加總，results 依變體分開)"""
+    combined = {"status": "ok", "error": None, "traceback": None, "timings": {},
+                "results": {"variants": {}},
+                "transactions": None}
+    for name in sorted(reports):
+        report = reports[name]
+        if report.get("status") != "ok" and combined["status"] == "ok":
+            combined["status"] = report.get("status", "failed")
+            combined["error"] = "{}: {}".format(name, report.get("error"))
+            combined["traceback"] = report.get("traceback")
+        if report.get("duplicate_of") is None:
+            for stage, seconds in (report.get("timings") or {}).items():
+                combined["timings"][stage] = combined["timings"].get(stage, 0.0) + seconds
+        combined["results"]["variants"][name] = report.get("results") or {}
+    return combined
+
+
+def runVariantFamilies(env, variants, stages=STAGES, manifest=None, loader=None):
+    """
+    便利函式：變體分組後逐族求解
+    variants : [(名稱, params)] 或 Config_V1.RunConfig list
+    """
+    variants = [(v.name, v.params) if hasattr(v, "params") else v for v in variants]
+    families = plan_families(variants)
+    reports = {}
+    for family in families:
+        print("-> 變體族群：{} (求解 {} / {} 步)".format(
+            ", ".join(family.names), family.steps_solved(), family.steps_total()))
+        reports.update(run_family(env, family, stages=stages, manifest=manifest, loader=loader))
+    return reports
@@ -1,5 +1,97 @@
 # -*- coding: utf-8 -*-
 import math
+from array import array
+
+from IdSet_V1 import IdSet
+from Parallel_V1 import parallel_map, time_call
+from TransactionBatch_V1 import Deferred, run_after_commit, run_in_transaction
+
+
+class FaceScan(object):
+    """
+    幾何面快照 (合併所有 Body 的掃描結果)
+    ids / body_ids 為 list，centroids 為攤平的 array('d') [x0, y0, z0, x1, ...]
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.body_ids = []
+        self.centroids = array("d")
+        self.max_z = -1e20
+        self.min_z = 1e20
+
+    def __len__(self):
+        return len(self.ids)
+
+    def merge(self, part):
+        """合併單一 Body 的結果 (保持 Body 順序，與序列掃描結果一致)"""
+        self.ids.extend(part.ids)
+        self.body_ids.extend(part.body_ids)
+        self.centroids.extend(part.centroids)
+        if part.max_z > self.max_z:
+            self.max_z = part.max_z
+        if part.min_z < self.min_z:
+            self.min_z = part.min_z
+        return self
+
+    def ids_near_z(self, z_value, tolerance):
+        """回傳重心 Z 與 z_value 差距小於 tolerance 的面 Id (IdSet)"""
+        zs = self.centroids[2::3]
+        return IdSet(face_id for face_id, z in zip(self.ids, zs) if abs(z - z_value) < tolerance)
+
+
+def _scan_body(body):
+    """[內部] 掃描單一 Body 的所有面 (在工作執行緒中執行，只做讀取)"""
+    part = FaceScan()
+    body_id = body.Id
+    for face in body.Faces:
+        c = face.Centroid
+        x, y, z = c[0], c[1], c[2]
+        part.ids.append(face.Id)
+        part.body_ids.append(body_id)
+        part.centroids.extend((x, y, z))
+        if z > part.max_z:
+            part.max_z = z
+        if z < part.min_z:
+            part.min_z = z
+    return part
+
+
+def iter_bodies(geo_data):
+    """依 Assembly -> Part -> Body 順序列出所有 Body"""
+    bodies = []
+    for assembly in geo_data.Assemblies:
+        for part in assembly.Parts:
+            for body in part.Bodies:
+                bodies.append(body)
+    return bodies
+
+
+def scan_bodies(geo_data, parallel=False, workers=None):
+    """依 Body 掃描所有面並合併結果 (預設序列；parallel=True 時依 Body 分工到 thread pool)"""
+    scan = FaceScan()
+    for part in parallel_map(_scan_body, iter_bodies(geo_data), workers=workers, parallel=parallel):
+        scan.merge(part)
+    return scan
+
+
+def benchmark_scan(geo_data, workers=4, repeat=3):
+    """
+    比較序列與平行掃描的耗時 (geo_data 可為 Mechanical 的 GeoData 或任何具相同結構的替身)
+    回傳 {"faces", "serial_s", "parallel_s", "speedup", "identical"}
+    """
+    t_serial, serial = time_call(lambda: scan_bodies(geo_data, parallel=False), repeat)
+    t_parallel, par = time_call(lambda: scan_bodies(geo_data, parallel=True, workers=workers), repeat)
+    result = {
+        "faces": len(serial),
+        "serial_s": t_serial,
+        "parallel_s": t_parallel,
+        "speedup": t_serial / t_parallel if t_parallel > 0 else 0.0,
+        "identical": serial.ids == par.ids and list(serial.centroids) == list(par.centroids),
+    }
+    print("掃描 {faces} 個面：序列 {serial_s:.3f} s / 平行 {parallel_s:.3f} s (x{speedup:.2f})".format(**result))
+    return result
+
 
 class ZFaceSelector(object):
     """
@@ -7,7 +99,8 @@ class ZFaceSelector(object):
     注意：此檔案設計為「被 import 的 worker」，不要在 import 時就直接執行。
     """
 
-    def __init__(self, ext_api, model=None, transaction_cls=None, selection_type_enum=None):
+    def __init__(self, ext_api, model=None, transaction_cls=None, selection_type_enum=None,
+                 manifest=None, batcher=None):
         """
         Parameters
         ----------
@@ -19,33 +112,38 @@ class ZFaceSelector(object):
             Mechanical 的 Transaction 類別（由 caller 傳入可避免 import scope 找不到）
         selection_type_enum : SelectionTypeEnum, optional
             Mechanical 的 SelectionTypeEnum（由 caller 傳入可避免 import scope 找不到）
+        manifest : ObjectManifest, optional
+            有傳入時，重跑會以 ObjectId 取代上次建立的同名 Named Selection（而非重複新增）
+        batcher : TransactionBatcher, optional
+            有傳入時，建立 NS 的操作排入共用批次，與其他工具合併成最少的 Transaction
         """
         self.api = ext_api
         self.model = model if model is not None else ext_api.DataModel.Project.Model
         self.transaction_cls = transaction_cls
         self.selection_type_enum = selection_type_enum
+        self.manifest = manifest
+        self.batcher = batcher
         self.geo_data = ext_api.DataModel.GeoData
+        # 已建立的 Named Selection {名稱: NS} (有 batcher 時於提交後才會填入)
+        self.named_selections = {}
 
-    def _get_z_limits(self):
-        """[內部] 掃描所有面，找出 Z 的最大值與最小值（以面重心 Centroid 判斷）"""
-        max_z = -1e20
-        min_z =  1e20
-
-        for assembly in self.geo_data.Assemblies:
-            for part in assembly.Parts:
-                for body in part.Bodies:
-                    for face in body.Faces:
-                        z_coord = face.Centroid[2]
-                        if z_coord > max_z:
-                            max_z = z_coord
-                        if z_coord < min_z:
-                            min_z = z_coord
+    def snapshot_faces(self, parallel=False, workers=None):
+        """
+        掃描所有面，回傳 FaceScan
+        parallel=True 時依 Body 分工到 thread pool (環境變數 SKY_CAE_FORCE_SERIAL=1 仍強制單執行緒)
+        """
+        return scan_bodies(self.geo_data, parallel=parallel, workers=workers)
 
-        return max_z, min_z
+    def _get_z_limits(self, scan=None):
+        """[內部] 找出所有面重心 Z 的最大值與最小值"""
+        if scan is None:
+            scan = self.snapshot_faces()
+        return scan.max_z, scan.min_z
 
     def create_selection(self, tolerance=1e-4,
                          top_name="[BC]_[Disp]_Top Face",
-                         bottom_name="[BC]_[Fixed]_Bottom Face"):
+                         bottom_name="[BC]_[Fixed]_Bottom Face",
+                         parallel=False, workers=None):
         """
         [主要功能] 建立最大與最小 Z 的 Named Selection
 
@@ -55,22 +153,16 @@ class ZFaceSelector(object):
             容許誤差（同單位於幾何座標）。用 abs(z - z_extreme) < tolerance 判定。
         top_name, bottom_name : str
             Named Selection 的名稱
+        parallel, workers :
+            幾何掃描是否依 Body 平行執行 (見 snapshot_faces)
         """
-        global_max, global_min = self._get_z_limits()
+        # 只走訪幾何一次：先取得所有面的快照，再從快照找極值與篩選
+        scan = self.snapshot_faces(parallel=parallel, workers=workers)
+        global_max, global_min = self._get_z_limits(scan)
         print("偵測到 Max Z: {:.6g}, Min Z: {:.6g}".format(global_max, global_min))
 
-        top_face_ids = []
-        bottom_face_ids = []
-
-        for assembly in self.geo_data.Assemblies:
-            for part in assembly.Parts:
-                for body in part.Bodies:
-                    for face in body.Faces:
-                        z_coord = face.Centroid[2]
-                        if abs(z_coord - global_max) < tolerance:
-                            top_face_ids.append(face.Id)
-                        if abs(z_coord - global_min) < tolerance:
-                            bottom_face_ids.append(face.Id)
+        top_face_ids = scan.ids_near_z(global_max, tolerance)
+        bottom_face_ids = scan.ids_near_z(global_min, tolerance)
 
         self._create_ns(top_name, top_face_ids)
         self._create_ns(bottom_name, bottom_face_ids)
@@ -78,43 +170,65 @@ class ZFaceSelector(object):
         return top_face_ids, bottom_face_ids
 
     def _create_ns(self, name, ids):
-        """[內部] 在 Mechanical 建立 Named Selection"""
+        """
+        [內部] 在 Mechanical 建立 Named Selection
+        回傳建立的 NS；有 batcher 時 NS 在提交後才建立，此時回傳 None，
+        提交後由 self.named_selections[name] 取得
+        """
         if not ids:
             print("警告：找不到符合 '{}' 的面。".format(name))
             return None
 
         def _do_create():
+            if self.manifest is not None:
+                # 先刪除上次建立的同名 NS (只刪本工具建立的，不掃描樹)
+                self.manifest.delete_tracked("ZFaceSelector", key=name)
+
             ns = self.model.AddNamedSelection()
             ns.Name = name
+            if self.manifest is not None:
+                self.manifest.record("ZFaceSelector", ns, key=name)
+                self.manifest.save()
 
             # SelectionTypeEnum 通常在 Mechanical 的 global scope；建議由 caller 傳入
             if self.selection_type_enum is None:
                 raise NameError("SelectionTypeEnum 未提供：請由 caller 傳入 selection_type_enum=SelectionTypeEnum")
 
             sel_info = self.api.SelectionManager.CreateSelectionInfo(self.selection_type_enum.GeometryEntities)
-            sel_info.Ids = ids
+            sel_info.Ids = IdSet(ids).to_list()
             ns.Location = sel_info
             return ns
 
-        # Transaction 通常也在 Mechanical 的 global scope；建議由 caller 傳入
-        if self.transaction_cls is not None:
-            with self.transaction_cls():
-                ns = _do_create()
-        else:
-            ns = _do_create()
+        def _report():
+            # 提交後才回報 (有 batcher 時 _do_create 尚未執行)
+            ns = created.result
+            self.named_selections[name] = ns
+            print("成功建立: {} (包含 {} 個面)".format(name, len(ids)))
 
-        print("成功建立: {} (包含 {} 個面)".format(name, len(ids)))
-        return ns
+        # Transaction 通常也在 Mechanical 的 global scope；建議由 caller 傳入
+        # 有 batcher 時兩個 NS 會合併在同一個 Transaction
+        created = Deferred(_do_create, tool="ZFaceSelector")
+        run_in_transaction(created.run, self.transaction_cls, self.batcher, tool="ZFaceSelector")
+        run_after_commit(_report, self.batcher, tool="ZFaceSelector")
+        return created.result if created.done else None
 
 
 def runZFaceSelector(ext_api, tolerance=0.001,
         top_name="[BC]_[Disp]_Top Face",
         bottom_name="[BC]_[Fixed]_Bottom Face",
-        model=None, transaction_cls=None, selection_type_enum=None):
+        model=None, transaction_cls=None, selection_type_enum=None,
+        manifest=None, batcher=None,
+        parallel=False, workers=None):
     """
     便利函式：給 caller 一行呼叫用
+    parallel=True 可依 Body 平行掃描幾何 (須確認該版本的 GeoData 可由背景執行緒讀取)
     """
     tool = ZFaceSelector(ext_api, model=model,
                          transaction_cls=transaction_cls,
-                         selection_type_enum=selection_type_enum)
-    return tool.create_selection(tolerance=tolerance, top_name=top_name, bottom_name=bottom_name)
+                         selection_type_enum=selection_type_enum,
+                         manifest=manifest,
+                         batcher=batcher)
+    if manifest is not None:
+        manifest.begin_run("ZFaceSelector")
+    return tool.create_selection(tolerance=tolerance, top_name=top_name, bottom_name=bottom_name,
+                                 parallel=parallel, workers=workers)
@@ -1,95 +1,89 @@
 import sys
 
 # 依你的環境放工具庫位置（保持原本的 D:\Sky_CAETool）
-sys.path.append(r"D:\Sky_CAETool\V1")
+TOOL_DIR = r"D:\Sky_CAETool\V1"
+if TOOL_DIR not in sys.path:
+    sys.path.append(TOOL_DIR)
 
-import ZFaceSelector_V1
-reload(ZFaceSelector_V1)
-from ZFaceSelector_V1 import runZFaceSelector
+# 工具模組改由 loader 延遲載入：第一次使用時才 import，
+# 同一個 session 再次執行時只 reload 原始碼有變更的模組 (不再每次 reload 全部)
+import Loader_V1
+loader = Loader_V1.get_loader(TOOL_DIR)
+loader.refresh()
 
-import ContactTool_V1
-reload(ContactTool_V1)
-from ContactTool_V1 import runContact
+pipeline = loader.get("Pipeline_V1")
+TransactionBatcher = loader.attr("TransactionBatch_V1", "TransactionBatcher")
 
-import MeshTool_V1
-reload(MeshTool_V1)
-from MeshTool_V1 import runMesh
+# 由 Mechanical 主環境傳入 ExtAPI / Model / Transaction / SelectionTypeEnum ...
+# 這樣 worker 模組就不會再遇到：ExtAPI / Model / Transaction / SelectionTypeEnum 找不到
+env = pipeline.env_from_globals(globals())
 
-import BCTool_V1
-reload(BCTool_V1)
-from BCTool_V1 import runBC
+# 只需重跑部分流程時可縮減，例如 STAGES = ("mesh",)
+# (沒用到的工具模組與 Ansys Enums 不會被載入)
+# 加入 "symmetry" (接在 "zface" 之後) 可偵測鏡射對稱並提出 1/2、1/4 模型建議
+STAGES = ("zface", "contact", "mesh", "bc", "solver")
 
-import SolverTool_V1
-reload(SolverTool_V1)
-from SolverTool_V1 import runSolver
-import Ansys.Mechanical.DataModel.Enums as Enums
+PARAMS = {
+    "zface": {"tolerance": 0.001},
+    "contact": {
+        "friction_coeff": 0.2,
+        "delete_existing_groups": True,
+        "contact_name_typo_is_conatct": False,
+    },
+    "mesh": {"element_size": 1.0, "is_quadratic": True, "do_contact_refine": True},
+    "bc": {
+        "z_magnitude": 5.0,        # 位移量 5mm
+        "direction_sign": -1.0,    # -1 代表向下/插入 (-Z)
+        # 逐步位移 (取代 z_magnitude，長度與 end_time_list 相同)，例如插入 5mm 後退回 2mm：
+        # "z_steps": [-5.0, -2.0],
+    },
+    "solver": {
+        "num_steps": 1,
+        "end_time_list": [1.0],
+        "cores": 6,                # 在此指定要用幾個核心跑
+        # --- 非線性控制 ---
+        "large_deflection": True,
+        # --- 時間步長控制 ---
+        "auto_time_stepping": True,
+        "initial_time_step": 0.1,
+        "min_time_step": 0.001,
+        "max_time_step": 0.2,
+    },
+    # 多分析 (例如插入 / 拔出共用同一組網格與接觸)：BC / Solver / Post 對每個分析各做一次
+    # "analyses": {"all": True, "overrides": {"Extraction": {"bc": {"direction_sign": 1.0}}}},
+    # 求解失敗時補救重試 (預設關閉，見 SolveRecovery_V1)：
+    # "recovery": {"enabled": True, "max_attempts": 4},
+    # 網格生成後的品質檢查 (預設關閉：沒有 NumPy 時逐元素計算，大網格較耗時；
+    # 開啟後反轉元素或不良元素過多時在求解前停止，見 MeshQuality_V1)
+    # "mesh_quality": {"enabled": True, "thresholds": {"max_aspect": 30.0},
+    #                  "export_dir": r"D:\Sky_CAETool\mesh_arrays"},
+}
 
-# 由 Mechanical 主環境傳入 ExtAPI / Model / Transaction / SelectionTypeEnum
-# 這樣 worker 模組就不會再遇到：ExtAPI / Model / Transaction / SelectionTypeEnum 找不到
-runZFaceSelector(
-    ExtAPI,
-    tolerance=0.001,
-    model=Model,
-    transaction_cls=Transaction,
-    selection_type_enum=SelectionTypeEnum
-)
+# 也可以改用設定檔 (JSON / YAML，見 Config_V1)：會先驗證所有數值，有錯誤時不會開始執行
+# 例如 CONFIG_PATH = r"D:\Sky_CAETool\configs\connector_A.json"
+CONFIG_PATH = None
+if CONFIG_PATH:
+    config = loader.attr("Config_V1", "load_config")(CONFIG_PATH)
+    PARAMS, STAGES = config.params, config.stages
+
+# 設定檔中的多個變體 (摩擦 / 位移) 可依共同的前段步驟分組，由重啟點接續求解 (見 VariantFamily_V1)：
+# variants = loader.attr("Config_V1", "load_variants")(CONFIG_PATH)
+# reports = loader.attr("VariantFamily_V1", "runVariantFamilies")(env, variants, manifest=manifest)
+
+# 自動化物件清單 (存放於專案資料夾)：各工具以 ObjectId 追蹤自己建立的物件，
+# 後處理的計算紀錄 (求解雜湊) 也跨次執行保留，求解未變更時不重算
+manifest = loader.attr("Manifest_V1", "ObjectManifest")(ExtAPI)
 
-runContact(
-    ExtAPI,
-    model=Model,
-    transaction_cls=Transaction,
-    selection_type_enum=SelectionTypeEnum,
-    contact_type=ContactType,
-    friction_coeff=0.2,
-    delete_existing_groups=True,
-    contact_name_typo_is_conatct=False
-)
+# 所有工具共用一個批次：可交易的變更合併成一個 Transaction，
+# GenerateMesh / BC DiscreteValues 等則在提交後依序執行 (run_pipeline 最後 flush)
+batcher = TransactionBatcher(Transaction)
 
-runMesh(
-    ExtAPI,
-    element_size=1.0,
-    is_quadratic=True,
-    do_contact_refine=True,
-    model=Model,
-    transaction_cls=Transaction,
-    selection_type_enum=SelectionTypeEnum,
-    data_model_object_category_enum=DataModelObjectCategory,
-    quantity_cls=Quantity,
-    element_order_enum=ElementOrder,
-    method_type_enum=MethodType
-)
+# True：ExtAPI / Model 的屬性讀取經過快取 (重複讀取 ns.Name、face.Centroid 等只呼叫一次 interop)
+PROPERTY_CACHE = False
 
-runBC(
-    ExtAPI,
-    z_magnitude=5.0,        # 位移量 5mm
-    direction_sign=-1.0,    # -1 代表向下/插入 (-Z)
-    model=Model,
-    transaction_cls=Transaction,
-    # --- 關鍵依賴注入 ---
-    quantity_cls=Quantity,          # [重要] 傳入單位類別
-    load_define_by_enum=LoadDefineBy # [重要] 傳入 LoadDefineBy Enum
-)
+report = pipeline.run_pipeline(env, params=PARAMS, stages=STAGES, batcher=batcher, loader=loader,
+                               manifest=manifest, property_cache=PROPERTY_CACHE)
 
-runSolver(
-    ExtAPI,
-    num_steps=1,
-    end_time_list=[1.0],
-    
-    # --- 新增：設定核心數 ---
-    cores=6,  # 在此指定要用幾個核心跑
-    
-    # --- 非線性控制 ---
-    large_deflection=True,
-    
-    # --- 時間步長控制 ---
-    auto_time_stepping=True,
-    initial_time_step=0.1,
-    min_time_step=0.001,
-    max_time_step=0.2,
-    
-    model=Model,
-    transaction_cls=Transaction,
-    quantity_cls=Quantity,
-    auto_time_stepping_enum=Enums.AutomaticTimeStepping,
-    time_step_define_by_type_enum=Enums.TimeStepDefineByType
-)
\ No newline at end of file
+# 輸出 Transaction 次數與耗時、模組載入耗時
+batcher.stats.report()
+loader.report()
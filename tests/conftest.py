@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+# V1 工具彼此以模組名稱直接 import (Mechanical 中由 main.py 把 V1 加入 sys.path)
+import os
+import sys
+
+V1_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "V1")
+if V1_DIR not in sys.path:
+    sys.path.insert(0, V1_DIR)
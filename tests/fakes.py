@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# Mechanical 資料模型的最小替身 (只實作測試用到的屬性與方法)
+import time
+
+
+class List(list):
+    """.NET 集合替身 (有 Count)"""
+    Count = property(len)
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class Component(object):
+    def __init__(self):
+        self.Output = Obj(DiscreteValues=None)
+        self.Inputs = [Obj(DiscreteValues=None)]
+
+
+class BoundaryCondition(object):
+    def __init__(self, parent, kind):
+        self.Name = ""
+        self.kind = kind
+        self.parent = parent
+        self.ObjectId = id(self)
+        self.XComponent = Component()
+        self.YComponent = Component()
+        self.ZComponent = Component()
+        self.Magnitude = Component()
+
+    def Delete(self):
+        self.parent.Children.remove(self)
+
+
+class Solution(object):
+    def __init__(self):
+        self.Children = List()
+        self.Status = "SolveRequired"
+        self.ObjectState = "NotSolved"
+
+    def Solve(self, wait=True):
+        self.Status = "Done"
+
+
+class Analysis(object):
+    """Add* 建立 BoundaryCondition；add_delay 模擬每次建立的 interop 耗時"""
+
+    def __init__(self, name="Static Structural", object_id=1, add_delay=0.0):
+        self.Name = name
+        self.ObjectId = object_id
+        self.Children = List()
+        self.Solution = Solution()
+        self.AnalysisSettings = Obj()
+        self.add_delay = add_delay
+
+    def __getattr__(self, name):
+        if not name.startswith("Add"):
+            raise AttributeError(name)
+
+        def add():
+            if self.add_delay:
+                time.sleep(self.add_delay)
+            bc = BoundaryCondition(self, name)
+            self.Children.append(bc)
+            return bc
+        return add
+
+
+class NamedSelection(object):
+    def __init__(self, name, ids):
+        self.Name = name
+        self.Location = Obj(Ids=List(ids))
+
+
+class Transaction(object):
+    count = 0
+
+    def __enter__(self):
+        Transaction.count += 1
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Quantity(object):
+    """Quantity("5 [mm]") 或 Quantity(5.0, "mm")"""
+
+    def __init__(self, value, unit=None):
+        if unit is None and isinstance(value, str):
+            number, _, rest = value.partition("[")
+            value, unit = float(number), rest.rstrip("]").strip() or None
+        self.Value = value
+        self.Unit = unit
+
+
+def environment(analyses, named_selections):
+    """run_pipeline 的 env (依賴注入)"""
+    model = Obj(Analyses=List(analyses), NamedSelections=Obj(Children=List(named_selections)))
+    api = Obj(DataModel=Obj(Project=Obj(Model=model, ProjectDirectory=None),
+                            GetObjectById=lambda object_id: None))
+    return {"ext_api": api, "model": model, "transaction_cls": Transaction,
+            "quantity_cls": Quantity, "load_define_by_enum": Obj(Components="Components")}
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from fakes import Analysis
+from Analyses_V1 import SolveQueue
+
+
+def _failing(name):
+    analysis = Analysis(name)
+
+    def solve(wait=True):
+        raise RuntimeError("license error")
+    analysis.Solution.Solve = solve
+    return analysis
+
+
+def _hanging(name):
+    analysis = Analysis(name)
+    analysis.Solution.Solve = lambda wait=True: None  # 狀態一直停在 SolveRequired
+    return analysis
+
+
+def test_solve_error_is_recorded_per_analysis():
+    for max_concurrent in (1, 2):
+        queue = SolveQueue([_failing("Insertion"), Analysis("Extraction")],
+                           max_concurrent=max_concurrent, poll_interval=0.0)
+        results = queue.run()
+        assert results["Insertion"]["status"] == "failed"
+        assert "license error" in results["Insertion"]["error"]
+        assert results["Extraction"]["status"] == "Done"
+
+
+def test_background_solve_times_out():
+    assert SolveQueue([]).timeout is not None
+    queue = SolveQueue([_hanging("Insertion"), Analysis("Extraction")], max_concurrent=2,
+                       poll_interval=0.01, timeout=0.05)
+    results = queue.run()
+    assert results["Insertion"]["status"] == "timeout"
+    assert results["Extraction"]["status"] == "Done"
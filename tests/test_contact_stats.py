@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from ContactStats_V1 import (STATUS_FAR_OPEN, STATUS_NEAR_OPEN, STATUS_SLIDING, STATUS_STICKING,
+                             GroupIndex, contact_group_stats, read_result_table)
+
+
+def _index():
+    # 節點 3 為兩個群組共用的邊界節點：歸給第一個群組，面積只計一次
+    index = GroupIndex()
+    index.add_group("A", [1, 2, 3], [1.0, 1.0, 2.0])
+    index.add_group("B", [3, 4, 5], [5.0, 1.0, 3.0])
+    return index
+
+
+def test_shared_nodes_belong_to_the_first_group():
+    index = _index()
+    assert index.slot[3] == 0
+    assert index.area[3] == 2.0
+    stats = contact_group_stats(index, [1, 2, 3, 4, 5, 99], [0.0] * 6)
+    assert [(s["group"], s["nodes"], s["area"]) for s in stats] == [("A", 3, 4.0), ("B", 2, 4.0)]
+
+
+def test_without_status_contact_is_positive_pressure_and_area_weighted():
+    stats = contact_group_stats(_index(), [1, 2, 3, 4, 5], [10.0, 0.0, 4.0, 2.0, 6.0],
+                                penetration=[0.01, 0.0, 0.03, -0.01, 0.02])
+    a, b = stats
+    assert a["contact_area"] == 3.0
+    assert a["mean_pressure"] == pytest.approx((10.0 * 1.0 + 4.0 * 2.0) / 3.0)
+    assert a["max_pressure"] == 10.0 and a["max_penetration"] == 0.03
+    assert a["sticking_fraction"] is None and a["sliding_fraction"] is None
+    assert b["mean_pressure"] == pytest.approx((2.0 * 1.0 + 6.0 * 3.0) / 4.0)
+
+
+def test_status_decides_contact_and_sticking_sliding_fractions():
+    status = [STATUS_STICKING, STATUS_SLIDING, STATUS_NEAR_OPEN, STATUS_FAR_OPEN, STATUS_STICKING]
+    stats = contact_group_stats(_index(), [1, 2, 3, 4, 5], [10.0, 2.0, 4.0, 0.0, 6.0],
+                                status=status)
+    a, b = stats
+    # 節點 3 雖有壓力但為 Near Open，不算接觸
+    assert a["contact_area"] == 2.0
+    assert a["mean_pressure"] == pytest.approx(6.0)
+    assert a["sticking_fraction"] == 0.5 and a["sliding_fraction"] == 0.5
+    assert b["contact_area"] == 3.0 and b["sticking_fraction"] == 1.0
+    assert b["max_penetration"] is None
+
+
+def test_group_without_contact_reports_zero_mean():
+    index = GroupIndex()
+    index.add_group("C", [7])
+    stats = contact_group_stats(index, [7], [0.0], status=[STATUS_FAR_OPEN])
+    assert stats[0]["area"] == 1.0 and stats[0]["mean_pressure"] == 0.0
+    assert stats[0]["sticking_fraction"] is None
+
+
+def test_read_result_table_normalizes_headers(tmp_path):
+    path = tmp_path / "pressure.txt"
+    path.write_text(u"Node Number\tPressure (MPa)\n1\t2.5\n2\t0\n")
+    assert read_result_table(str(path)) == {"node": [1.0, 2.0], "pressure": [2.5, 0.0]}
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from ContactTuning_V1 import ContactTuner, classify_gap, learn_rules, pinball_radius
+
+
+def _measure(closest, size=10.0):
+    return {"min": closest, "max": closest, "mean": closest, "size": size, "samples": 1}
+
+
+def test_classify_gap_relative_to_face_size():
+    # 接觸面尺寸 10：|距離| <= 1e-3 為接觸，間隙 <= 0.5 為小間隙
+    assert classify_gap(_measure(-0.01)) == "interference"
+    assert classify_gap(_measure(-0.0005)) == "touching"
+    assert classify_gap(_measure(0.001)) == "touching"
+    assert classify_gap(_measure(0.3)) == "near_gap"
+    assert classify_gap(_measure(0.6)) == "open_gap"
+    assert classify_gap(_measure(0.3, size=1.0)) == "open_gap"
+
+
+def test_pinball_radius_has_a_floor_for_touching_pairs():
+    assert pinball_radius(_measure(-0.2), 2.0) == pytest.approx(0.4)
+    assert pinball_radius(_measure(0.0), 2.0) == pytest.approx(0.2)   # 2 x 0.01 x 10
+    assert pinball_radius(_measure(0.0), 2.0, min_ratio=0.0) == 0.0
+
+
+class _Store(object):
+    def __init__(self, reports):
+        self._reports = reports
+
+    def reports(self, project=None, solve=None):
+        return iter(self._reports)
+
+
+def _report(preset, iterations=None, status="ok"):
+    results = {"contact_tuning": {"rules": {"touching": preset}}}
+    if iterations is not None:
+        results["convergence"] = {"iterations_per_substep": iterations}
+    return {"status": status, "results": results}
+
+
+def test_learn_rules_prefers_reliable_then_fast_presets():
+    store = _Store([_report("soft_touch", 6.0), _report("soft_touch", 4.0),
+                    _report("tight_fit", 3.0), _report("tight_fit", status="failed"),
+                    _report("near_gap", 1.0)])
+    rules, table = learn_rules(store)
+    # tight_fit 較快但有失敗；near_gap 只有一次 (少於 min_runs)
+    assert rules == {"touching": "soft_touch"}
+    assert table["touching"]["soft_touch"]["mean"] == 5.0
+    assert table["touching"]["tight_fit"]["failed"] == 1
+    assert learn_rules(store, min_runs=1)[0] == {"touching": "near_gap"}
+
+
+def test_preset_overrides_vary_the_rules_per_run():
+    tuner = ContactTuner(None, preset_overrides={"touching": "tight_fit"})
+    assert tuner.choose(_measure(0.0))[:2] == ("touching", "tight_fit")
+    assert tuner.choose(_measure(-1.0))[:2] == ("interference", "tight_fit")
+    with pytest.raises(ValueError):
+        ContactTuner(None, preset_overrides={"touching": "missing"})
+    with pytest.raises(ValueError):
+        ContactTuner(None, preset_overrides={"closed": "default"})
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from GeoSnapshot_V1 import GeoSnapshot, export_snapshot
+
+
+class _Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _box(body_id, lo, hi):
+    """長方體 Body：6 個面 (法向量朝外)，面 Id 為 body_id * 10 + 序號"""
+    faces = []
+    for k in range(3):
+        for side, end in ((-1.0, lo), (1.0, hi)):
+            centroid = [0.5 * (a + b) for a, b in zip(lo, hi)]
+            centroid[k] = end[k]
+            normal = [0.0, 0.0, 0.0]
+            normal[k] = side
+            corners = [list(lo), list(hi)]
+            corners[0][k] = corners[1][k] = end[k]
+            size = [b - a for a, b in zip(lo, hi)]
+            faces.append(_Obj(Id=body_id * 10 + len(faces), Centroid=tuple(centroid),
+                              NormalAtParam=lambda u, v, n=tuple(normal): n,
+                              Vertices=[_Obj(X=c[0], Y=c[1], Z=c[2]) for c in corners],
+                              Area=size[(k + 1) % 3] * size[(k + 2) % 3]))
+    volume = (hi[0] - lo[0]) * (hi[1] - lo[1]) * (hi[2] - lo[2])
+    return _Obj(Id=body_id, Faces=faces, Edges=[], Volume=volume)
+
+
+def _snapshot(tmp_path, boxes):
+    geo = _Obj(Assemblies=[_Obj(Parts=[_Obj(Bodies=[_box(*b) for b in boxes])])])
+    export_snapshot(geo, str(tmp_path))
+    return GeoSnapshot.load(str(tmp_path))
+
+
+def test_contact_candidates_pair_touching_faces_of_different_bodies(tmp_path):
+    snapshot = _snapshot(tmp_path, [(1, (0, 0, 0), (1, 1, 1)), (2, (1, 0, 0), (2, 1, 1)),
+                                    (3, (5, 0, 0), (6, 1, 1))])
+    # Body 1 的 +X 面 (11) 與 Body 2 的 -X 面 (20)；Body 3 太遠、同 Body 的面不配對
+    assert snapshot.contact_candidates() == [(11, 20)]
+
+
+def test_contact_candidates_respect_gap_tolerance(tmp_path):
+    snapshot = _snapshot(tmp_path, [(1, (0, 0, 0), (1, 1, 1)), (2, (1.01, 0, 0), (2, 1, 1))])
+    assert snapshot.contact_candidates(tolerance=1e-3) == []
+    assert snapshot.contact_candidates(tolerance=0.02) == [(11, 20)]
+
+
+def test_estimate_mesh_scales_with_size_and_contact_refinement(tmp_path):
+    snapshot = _snapshot(tmp_path, [(1, (0, 0, 0), (1, 1, 1)), (2, (1, 0, 0), (2, 1, 1))])
+    coarse = snapshot.estimate_mesh(0.5, is_quadratic=False)
+    # 體積 1 / 正四面體 (邊長 0.5) 體積 = 67.9 個元素
+    assert coarse["bodies"] == {1: 68, 2: 68}
+    assert coarse["nodes"] < coarse["elements"]
+    assert snapshot.estimate_mesh(0.5)["nodes"] > coarse["elements"]
+    assert snapshot.estimate_mesh(0.25, is_quadratic=False)["elements"] == pytest.approx(
+        8 * coarse["elements"], rel=0.01)
+
+    refined = snapshot.estimate_mesh(0.5, is_quadratic=False, contact_faces=[11, 20])
+    assert refined["refined_area"] == 2.0
+    assert refined["elements"] > coarse["elements"]
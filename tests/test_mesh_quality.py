@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import math
+
+import pytest
+
+from MeshQuality_V1 import MeshArrays, evaluate, tet_metrics
+
+# 正四面體 (Ansys 節點順序，(J-I) x (K-I) . (L-I) > 0)
+REGULAR = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.5, math.sqrt(3.0) / 2.0, 0.0),
+           (0.5, math.sqrt(3.0) / 6.0, math.sqrt(2.0 / 3.0))]
+FLAT = REGULAR[:3] + [(0.5, 0.3, 0.0)]                      # 第四點在底面上：體積為 0
+INVERTED = [REGULAR[0], REGULAR[2], REGULAR[1], REGULAR[3]]  # 交換兩個節點
+
+
+def _arrays(tets):
+    xyz = [c for tet in tets for point in tet for c in point]
+    return MeshArrays(list(range(1, 4 * len(tets) + 1)), xyz,
+                      list(range(1, len(tets) + 1)), list(range(4 * len(tets))))
+
+
+def _metrics(tets, use_numpy=False):
+    arrays = _arrays(tets)
+    return dict((k, list(v)) for k, v in
+                tet_metrics(arrays.node_xyz, arrays.elem_conn, use_numpy=use_numpy).items())
+
+
+def test_python_metrics_for_regular_degenerate_and_inverted_tets():
+    m = _metrics([REGULAR, FLAT, INVERTED])
+    assert m["aspect"][0] == pytest.approx(1.0)
+    assert m["jacobian"][0] == pytest.approx(1.0)
+    assert m["skewness"][0] == pytest.approx(0.0, abs=1e-9)
+    assert m["aspect"][1] == float("inf")
+    assert m["jacobian"][1] == 0.0 and m["skewness"][1] == 1.0
+    assert m["jacobian"][2] == pytest.approx(-1.0)
+    assert m["volume"][2] == pytest.approx(-m["volume"][0])
+
+
+def test_numpy_metrics_match_python():
+    pytest.importorskip("numpy")
+    tets = [REGULAR, FLAT, INVERTED, [(0, 0, 0), (3, 0, 0), (0, 1, 0), (0, 0, 0.2)]]
+    python, vectorized = _metrics(tets), _metrics(tets, use_numpy=True)
+    for key in python:
+        assert [float(v) for v in vectorized[key]] == pytest.approx(python[key])
+
+
+def test_regular_mesh_passes():
+    report = evaluate(_arrays([REGULAR] * 3), use_numpy=False)
+    assert report["ok"] and report["inverted"] == 0 and report["bad"] == 0
+
+
+def test_inverted_and_degenerate_elements_fail():
+    report = evaluate(_arrays([REGULAR] * 8 + [INVERTED, FLAT]), use_numpy=False)
+    assert not report["ok"]
+    assert report["inverted"] == 2 and report["bad"] == 2
+    assert [w["element"] for w in report["worst"]] == [9, 10]
+    assert len(report["failures"]) == 2
+
+
+def test_mostly_inverted_mesh_is_not_hidden():
+    report = evaluate(_arrays([INVERTED] * 3 + [REGULAR]), use_numpy=False)
+    assert not report["ok"]
+    assert report["inverted"] == 3
+    assert "orientation" in report["failures"][0]
+    # 節點順序慣例相反時 (orientation = -1)，反過來只有一個反轉元素
+    assert evaluate(_arrays([INVERTED] * 3 + [REGULAR]), use_numpy=False,
+                    orientation=-1)["inverted"] == 1
+
+
+def test_bad_fraction_threshold():
+    stretched = [(0, 0, 0), (10, 0, 0), (0, 1, 0), (0, 0, 1)]
+    arrays = _arrays([REGULAR] * 9 + [stretched])
+    report = evaluate(arrays, use_numpy=False)
+    assert report["inverted"] == 0 and report["bad"] == 1 and not report["ok"]
+    assert evaluate(arrays, max_bad_fraction=0.1, use_numpy=False)["ok"]
+    # aspect 7.2 在門檻內，不合格的是 Scaled Jacobian (0.014) 與偏斜度 (0.975)
+    assert evaluate(arrays, thresholds={"min_jacobian": 0.01, "max_skewness": 0.98},
+                    use_numpy=False)["ok"]
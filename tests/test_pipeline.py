@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+
+from fakes import Analysis, NamedSelection, environment
+from BatchRunner_V1 import BatchJob, BatchRunner, FakeBackend
+from Pipeline_V1 import run_pipeline
+
+
+def _bc_env(add_delay=0.0):
+    analysis = Analysis(add_delay=add_delay)
+    env = environment([analysis], [NamedSelection("[BC]_[Fixed]_Bottom", [1]),
+                                   NamedSelection("[BC]_[Disp]_Top", [2])])
+    return env, analysis
+
+
+def test_bc_stage_creates_boundary_conditions():
+    env, analysis = _bc_env()
+    report = run_pipeline(env, {"bc": {"z_magnitude": 2.0}}, stages=("bc",))
+    assert report["status"] == "ok", report["traceback"]
+    kinds = sorted(bc.kind for bc in analysis.Children)
+    assert kinds == ["AddDisplacement", "AddFixedSupport"]
+    disp = next(bc for bc in analysis.Children if bc.kind == "AddDisplacement")
+    assert disp.ZComponent.Output.DiscreteValues[0].Value == -2.0
+
+
+def test_flush_time_is_charged_to_the_queueing_stage():
+    # BC 物件在 flush 中才建立：建立耗時要記在 bc，而不是 flush
+    env, _ = _bc_env(add_delay=0.05)
+    report = run_pipeline(env, None, stages=("bc",))
+    assert report["status"] == "ok", report["traceback"]
+    assert report["timings"]["bc"] >= 0.1
+    assert report["timings"]["flush"] < 0.05
+
+
+def test_property_cache_option_wraps_the_api():
+    env, analysis = _bc_env()
+    report = run_pipeline(env, None, stages=("bc",), property_cache=True)
+    assert report["status"] == "ok", report["traceback"]
+    assert len(analysis.Children) == 2
+    stats = report["results"]["property_cache"]
+    assert stats["hits"] + stats["misses"] > 0
+
+
+def test_failure_keeps_traceback():
+    env, _ = _bc_env()
+    report = run_pipeline(env, {"analyses": {"select": ["Missing"]}}, stages=("bc",))
+    assert report["status"] == "failed"
+    assert report["error"].startswith("analyses:")
+    assert "Traceback" in report["traceback"]
+
+
+def test_batch_runner_with_fake_backend(tmp_path):
+    def handler(job):
+        if job.name == "broken":
+            raise RuntimeError("Mechanical 無法啟動")
+        return {"status": "ok", "error": None, "timings": {"bc": 1.5},
+                "results": {"key": {"project": job.project, "nodes": 10}}}
+
+    jobs = [BatchJob("a", "a.mechdb"), BatchJob("b", "b.mechdb"), BatchJob("broken", "c.mechdb")]
+    runner = BatchRunner(backend=FakeBackend(handler), workers=2, work_dir=str(tmp_path))
+    runner.run(jobs)
+    assert runner.summary() == {"ok": 2, "failed": 1}
+    broken = jobs[2]
+    assert "Mechanical 無法啟動" in broken.error
+    assert "RuntimeError" in broken.traceback
+
+    path = runner.write_report(str(tmp_path / "report.json"))
+    with open(path) as f:
+        data = json.load(f)
+    assert [job["status"] for job in data["jobs"]] == ["ok", "ok", "failed"]
+    with open(str(tmp_path / "report.csv")) as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["t_bc"] == "1.500" and rows[0]["nodes"] == "10"
+
+
+def test_batched_stage_results_are_resolved_after_flush():
+    env, _ = _bc_env()
+    report = run_pipeline(env, None, stages=("bc",))
+    assert report["status"] == "ok", report["traceback"]
+    # runBC 在 batcher 下回傳 Deferred；報表中應為 flush 後的 (Fixed, Disp) 數量
+    assert report["results"]["bc"] == [1, 1]
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+from fakes import Analysis, BoundaryCondition, Obj, Quantity, environment
+from PostTool_V1 import PostTool
+
+
+def _tool(step_end_times):
+    analysis = Analysis()
+    analysis.AnalysisSettings = Obj(GetStepEndTime=lambda step: Quantity(step_end_times[step - 1], "s"))
+    env = environment([analysis], [])
+    return PostTool(env["ext_api"], model=env["model"], transaction_cls=env["transaction_cls"])
+
+
+def test_constant_displacement_ramps_in_first_step_then_holds():
+    tool = _tool([1.0, 3.0])
+    bc = BoundaryCondition(None, "AddDisplacement")
+    bc.ZComponent.Output.DiscreteValues = [Quantity(-2.0, "mm")]
+
+    profile = tool.imposed_displacement(bc, "Z", end_time=3.0)
+    assert profile.value_at(0.5) == -1.0
+    assert profile.value_at(1.0) == -2.0
+    assert profile.value_at(2.0) == -2.0
+    assert profile.end_time == 3.0
+
+
+class Result(object):
+    """Evaluate() 只計算這一個結果物件"""
+
+    def __init__(self, name, object_id):
+        self.Name = name
+        self.ObjectId = object_id
+        self.ObjectState = "NotSolved"
+        self.Maximum = Quantity(1.5, "mm")
+        self.evaluations = 0
+
+    def Evaluate(self):
+        self.evaluations += 1
+        self.ObjectState = "Solved"
+
+
+def _solved_tool(tmp_path, by_id, manifest=None, symmetry_factor=None):
+    from Manifest_V1 import ObjectManifest
+
+    analysis = Analysis()
+    result_file = tmp_path / "file.rst"
+    if not result_file.exists():
+        result_file.write_text(u"rst")
+    analysis.ResultFileName = str(result_file)
+    solution = analysis.Solution
+    solution.Status = "Done"
+
+    def add():
+        obj = by_id[len(by_id) + 100] = Result("", len(by_id) + 100)
+        solution.Children.append(obj)
+        return obj
+
+    solution.AddTotalDeformation = solution.AddDirectionalDeformation = \
+        solution.AddEquivalentStress = add
+    env = environment([analysis], [])
+    env["ext_api"].DataModel.GetObjectById = by_id.get
+    if manifest is not None:
+        manifest = ObjectManifest(env["ext_api"], path=str(tmp_path / "manifest.json"))
+    return PostTool(env["ext_api"], model=env["model"], manifest=manifest,
+                    symmetry_factor=symmetry_factor), solution
+
+
+def test_untracked_result_with_same_name_is_not_adopted(tmp_path):
+    tool, solution = _solved_tool(tmp_path, {})
+    user_result = Result("Total Deformation", 1)
+    solution.Children.append(user_result)
+
+    tool.add_basic_results()
+    handle = tool.results["deformation"]
+    assert handle.obj is not user_result
+    assert handle.value() == 1.5
+    assert handle.obj.evaluations == 1
+    assert user_result.evaluations == 0
+
+
+def test_unchanged_solution_hash_skips_evaluation_across_runs(tmp_path):
+    by_id = {}
+    tool, _ = _solved_tool(tmp_path, by_id, manifest=True)
+    tool.add_basic_results()
+    assert tool.evaluate_results() == 3
+    first = tool.results["stress"].obj
+
+    # 下一次執行：由 Manifest 以 ObjectId 取回結果，求解未變更時不重算
+    tool, solution = _solved_tool(tmp_path, by_id, manifest=True)
+    tool.add_basic_results()
+    assert tool.results["stress"].obj is first
+    assert tool.results["stress"].value() == 1.5
+    assert tool.evaluations == 0 and tool.skipped == 1
+    assert first.evaluations == 1
+
+
+def test_symmetry_factor_scales_insertion_force_without_manifest(tmp_path):
+    tool, solution = _solved_tool(tmp_path, {}, symmetry_factor=4)
+    solution.AddForceReaction = solution.AddTotalDeformation
+    tool.analysis.Children.append(Obj(Name="AutoFixed_Bottom"))
+    probe = tool.add_insertion_force_probe().obj
+    probe.ZAxis = Quantity(-3.0, "N")
+
+    values = tool.key_results()
+    assert values["insertion_force"] == -3.0
+    assert values["symmetry_factor"] == 4
+    assert values["insertion_force_full"] == -12.0
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+from ContactTool_V1 import runContact
+from PropertyCache_V1 import PropertyCache
+
+
+class _List(list):
+    """.NET 集合替身 (有 Count)"""
+    Count = property(len)
+
+
+class _Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _Node(object):
+    """資料模型節點替身 (Connections / ConnectionGroup / ContactRegion)"""
+
+    def __init__(self, registry, parent=None):
+        self.Children = []
+        self.Name = ""
+        self.parent = parent
+        self.ObjectId = len(registry) + 1
+        self.DataModelObjectCategory = "ConnectionGroup"
+        self._registry = registry
+        registry[self.ObjectId] = self
+
+    def AddConnectionGroup(self):
+        node = _Node(self._registry, self)
+        self.Children.append(node)
+        return node
+
+    AddContactRegion = AddConnectionGroup
+
+    def Delete(self):
+        self.parent.Children.remove(self)
+        del self._registry[self.ObjectId]
+
+
+class _CountingNS(object):
+    """記錄 Name / Location 的 interop 讀取次數"""
+
+    def __init__(self, name, ids, reads):
+        self._name = name
+        self._location = _Obj(Ids=_List(ids))
+        self._reads = reads
+
+    @property
+    def Name(self):
+        self._reads[0] += 1
+        return self._name
+
+    @property
+    def Location(self):
+        self._reads[0] += 1
+        return self._location
+
+
+class _SelectionManager(object):
+    def CreateSelectionInfo(self, kind):
+        return _Obj(Ids=None)
+
+
+def _model(n_groups, reads):
+    registry = {}
+    ns = ([_CountingNS("[Cont]_[Target]_[{}]".format(i), [i], reads) for i in range(n_groups)] +
+          [_CountingNS("[Cont]_[Contact]_[{}]".format(i), [100 + i, 200 + i], reads)
+           for i in range(n_groups)])
+    connections = _Node(registry)
+    api = _Obj(SelectionManager=_SelectionManager(),
+               DataModel=_Obj(GetObjectById=lambda object_id: registry.get(object_id)))
+    model = _Obj(NamedSelections=_Obj(Children=ns), Connections=connections)
+    return api, model, connections
+
+
+def _run_contact(api, model):
+    runContact(api, model=model, selection_type_enum=_Obj(GeometryEntities=1),
+               data_model_object_category=_Obj(ConnectionGroup="ConnectionGroup"))
+
+
+def test_get_object_by_id_sees_deleted_and_new_objects():
+    api, model, connections = _model(0, [0])
+    cache = PropertyCache()
+    cached_api, cached_connections = cache.wrap(api), cache.wrap(connections)
+
+    group = cached_connections.AddConnectionGroup()
+    object_id = group.ObjectId
+    assert cached_api.DataModel.GetObjectById(object_id) == group
+    group.Delete()
+    assert not cached_api.DataModel.GetObjectById(object_id)
+
+    added = cached_connections.AddConnectionGroup()
+    assert cached_api.DataModel.GetObjectById(added.ObjectId) == added
+
+
+def test_invalidate_releases_objects():
+    _, _, connections = _model(0, [0])
+    with PropertyCache() as cache:
+        cached = cache.wrap(connections)
+        for _ in range(5):
+            cached.AddConnectionGroup()
+        for group in list(cached.Children):
+            assert group.Name == ""
+            group.Delete()
+        # 已刪除 / 已失效的物件不再被快取持有
+        assert len(cache._targets) <= 1
+    assert not cache._targets and not cache._entries
+
+
+def test_contact_name_location_reads():
+    """30 個接觸群組：比較直接呼叫與經由快取的 NS Name / Location 讀取次數"""
+    reads = [0]
+    api, model, connections = _model(30, reads)
+    _run_contact(api, model)
+    raw_reads = reads[0]
+
+    reads[0] = 0
+    api, model, connections = _model(30, reads)
+    with PropertyCache() as cache:
+        _run_contact(cache.wrap(api), cache.wrap(model))
+        cached_reads = reads[0]
+    print("NS Name/Location 讀取：直接 {} 次 / 快取 {} 次".format(raw_reads, cached_reads))
+    assert len(connections.Children) == 30
+    assert sum(len(g.Children) for g in connections.Children) == 60
+    assert cached_reads * 10 < raw_reads
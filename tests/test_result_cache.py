@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from fakes import Obj
+from ResultCache_V1 import MechanicalResultReader, ResultCache, SyntheticResultReader
+
+
+def _build(tmp_path, chunk_rows=64, max_resident_bytes=1 << 20, **reader_kwargs):
+    cache = ResultCache(str(tmp_path / "cache"), max_resident_bytes=max_resident_bytes,
+                        chunk_rows=chunk_rows)
+    reader = SyntheticResultReader(**reader_kwargs)
+    return cache, reader, cache.build("abc123", reader, meta={"run": 1})
+
+
+def test_build_then_open_without_reader(tmp_path):
+    cache, reader, built = _build(tmp_path, n_nodes=200, n_elements=100)
+    assert reader.reads == 3 * len(reader.times)
+    assert cache.has("abc123")
+    assert cache.solutions() == [("abc123", {"run": 1})]
+
+    calls = []
+    solution = cache.get_or_build("abc123", lambda: calls.append(1))
+    assert calls == []
+    assert solution.times == reader.times
+    assert solution.rows("displacement") == 200
+    assert solution.rows("contact_pressure") == 50
+
+
+def test_row_and_id_ranges_span_chunks(tmp_path):
+    _, reader, solution = _build(tmp_path, n_nodes=200, n_elements=100)
+    step = 2
+    values = solution.get("displacement", step, 60, 70)
+    expected = [reader.value("displacement", step, row, comp)
+                for row in range(60, 70) for comp in range(3)]
+    assert values == pytest.approx(expected)
+
+    ids, values = solution.get_by_ids("stress", step, 10, 80)
+    assert ids == list(range(10, 81))
+    assert values == pytest.approx([reader.value("stress", step, i - 1) for i in ids])
+
+    # contact_pressure 每 4 個節點一個：Id 範圍對應到列範圍
+    assert solution.row_range("contact_pressure", 2, 9) == (1, 3)
+    assert solution.row_of("contact_pressure", 2) is None
+
+
+def test_history_and_value(tmp_path):
+    _, reader, solution = _build(tmp_path, n_nodes=100, n_elements=50)
+    history = solution.history("displacement", 42)
+    assert len(history) == len(reader.times)
+    for step, value in enumerate(history):
+        assert value == pytest.approx(tuple(reader.value("displacement", step, 41, c)
+                                            for c in range(3)))
+    assert solution.value("stress", 0, 999) is None
+    assert solution.step_of(0.74) == 2
+
+
+def test_lru_keeps_resident_bytes_under_limit(tmp_path):
+    # 每個 stress 區塊 32 列 x 8 bytes = 256 bytes；上限 3 個區塊
+    cache, _, solution = _build(tmp_path, chunk_rows=32, max_resident_bytes=768,
+                                n_nodes=32, n_elements=320)
+    for step in range(len(solution.times)):
+        solution.get("stress", step)
+    summary = cache.lru.summary()
+    assert summary["resident_bytes"] <= 768
+    assert summary["chunks"] == 3
+    assert summary["evictions"] == summary["misses"] - 3
+
+    solution.get("stress", len(solution.times) - 1, 319, 320)
+    assert cache.lru.summary()["hits"] == summary["hits"] + 1
+
+
+class _ResultObject(object):
+    def __init__(self, rows):
+        self.DisplayTime = "Last"
+        self.rows = rows
+
+    def ExportToTextFile(self, path):
+        t = float(self.DisplayTime)
+        with open(path, "w") as f:
+            f.write("Node Number\tTotal Deformation (mm)\tX Location (mm)\n")
+            for node in self.rows:
+                f.write("{}\t{}\t{}\n".format(node, node * t, 100.0 + node))
+
+
+def test_mechanical_reader_picks_value_column_and_restores_display_time(tmp_path):
+    obj = _ResultObject([3, 1, 2])
+    evaluated = []
+    tool = Obj(results={"deformation": Obj(obj=obj)},
+               ensure_evaluated=lambda o, force=False: evaluated.append(o.DisplayTime))
+    reader = MechanicalResultReader(tool, [0.5, 1.0], str(tmp_path / "export"))
+
+    cache = ResultCache(str(tmp_path / "cache"))
+    solution = cache.build("mech", reader)
+    assert list(solution.ids("displacement")) == [1, 2, 3]
+    assert solution.history("displacement", 2) == pytest.approx([1.0, 2.0])
+    assert obj.DisplayTime == "Last"
+    assert evaluated[-1] == "Last"
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from BatchRunner_V1 import BatchJob, BatchRunner, FakeBackend
+from RunStore_V1 import RunStore
+
+
+def _saving_backend(calls):
+    """模擬 BatchWorker：執行成功後存檔 (專案內容改變)"""
+    def handler(job):
+        calls.append(job.name)
+        if job.save:
+            with open(job.project, "ab") as f:
+                f.write(b"saved")
+        return {"status": "ok", "error": None, "timings": {}, "results": {"key": {"nodes": 1}}}
+    return FakeBackend(handler)
+
+
+def _run(tmp_path, project, backend, save=True):
+    store = RunStore(str(tmp_path / "runs.sqlite"))
+    try:
+        runner = BatchRunner(backend=backend, workers=1, work_dir=str(tmp_path), store=store)
+        return runner.run([BatchJob("job", project, params={"bc": {"z_magnitude": 5.0}},
+                                    save=save)])[0]
+    finally:
+        store.close()
+
+
+def test_saved_project_still_hits_cache(tmp_path):
+    project = str(tmp_path / "model.mechdb")
+    with open(project, "wb") as f:
+        f.write(b"model")
+    calls = []
+    assert _run(tmp_path, project, _saving_backend(calls)).status == "ok"
+    assert _run(tmp_path, project, _saving_backend(calls)).status == "cached"
+    assert calls == ["job"]
+
+
+def test_changed_project_misses_cache(tmp_path):
+    project = str(tmp_path / "model.mechdb")
+    with open(project, "wb") as f:
+        f.write(b"model")
+    calls = []
+    _run(tmp_path, project, _saving_backend(calls))
+    with open(project, "ab") as f:
+        f.write(b"edited by user")
+    assert _run(tmp_path, project, _saving_backend(calls)).status == "ok"
+    assert calls == ["job", "job"]
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from fakes import List, Obj, Transaction
+from SolveRecovery_V1 import SolveRecovery
+
+CHATTERING = "*** ERROR *** Solution not converged: contact status change (chattering)"
+
+
+class _SolverTool(object):
+    """SolveRecovery 使用的 SolverTool 介面 (Step Table 以 list of dict 保存)"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)  # 每次求解的 (成功與否, solve.out)
+        self.output = ""
+        self.steps = [{"end_time": 1.0, "auto_time_stepping": True, "define_by": "Time",
+                       "initial_time_step": 0.1, "min_time_step": 0.001, "max_time_step": 0.2}]
+        self.contact = Obj(Name="Pair_1", NormalStiffness="ProgramControlled",
+                           NormalStiffnessFactor=1.0)
+        self.model = Obj(Connections=Obj(Children=List([Obj(Children=List([self.contact]))])))
+        self.analysis = Obj(Name="Static Structural")
+        self.settings = Obj(CurrentRestartPoint=0)
+        self.transaction_cls = Transaction
+
+    def read_step_table(self):
+        return [dict(step) for step in self.steps]
+
+    def apply_step_table(self, steps, large_deflection=None):
+        writes = sum(1 for old, new in zip(self.steps, steps) for k in new if old.get(k) != new[k])
+        self.steps = [dict(step) for step in steps]
+        return writes
+
+    def solve_analysis(self):
+        ok, self.output = self.outcomes.pop(0)
+        return ok
+
+    def solve_status(self):
+        return "Done"
+
+    def read_solve_output(self):
+        return self.output
+
+    def restart_points(self):
+        return []
+
+    def use_restart_point(self, index):
+        self.settings.CurrentRestartPoint = index
+        return True
+
+
+def test_remedies_do_not_compound_across_runs():
+    tool = _SolverTool([(False, CHATTERING), (True, ""), (False, CHATTERING), (True, "")])
+    for _ in range(2):
+        result = SolveRecovery(tool, normal_stiffness_enum=Obj(Factor="Factor")).run()
+        assert result["ok"]
+        assert result["remedies"] == ["soften_contact"]
+        assert result["restored"] == ["contact_stiffness"]
+        assert tool.contact.NormalStiffnessFactor == 1.0
+        assert tool.contact.NormalStiffness == "ProgramControlled"
+
+
+def test_keep_changes_until_restore():
+    tool = _SolverTool([(False, "solution not converged"), (True, "")])
+    recovery = SolveRecovery(tool)
+    result = recovery.run(keep_changes=True)
+    assert result["remedies"] == ["smaller_initial_step"] and result["restored"] == []
+    assert tool.steps[0]["initial_time_step"] == 0.025
+
+    assert recovery.restore() == ["step_table"]
+    assert tool.steps[0]["initial_time_step"] == 0.1
+    assert recovery.restore() == []
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from fakes import Obj
+from SymmetryTool_V1 import SpatialHash, detect_plane, detect_symmetry, plan_reduction, runSymmetry
+
+
+def _tables(boxes):
+    """{Body Id: (lo, hi)} 的長方體 -> 面表格 (每個 Body 6 個面，欄位與 GeoSnapshot 相同)"""
+    tables = dict((name, []) for name in ("face_id", "face_body", "face_centroid", "face_area",
+                                          "face_bbox", "body_id", "body_bbox"))
+    for body, (lo, hi) in sorted(boxes.items()):
+        tables["body_id"].append(body)
+        tables["body_bbox"].extend(list(lo) + list(hi))
+        mid = [0.5 * (a + b) for a, b in zip(lo, hi)]
+        size = [b - a for a, b in zip(lo, hi)]
+        for k in range(3):
+            for end in (lo, hi):
+                centroid = list(mid)
+                centroid[k] = end[k]
+                face_lo, face_hi = list(lo), list(hi)
+                face_lo[k] = face_hi[k] = end[k]
+                tables["face_id"].append(len(tables["face_id"]) + 1)
+                tables["face_body"].append(body)
+                tables["face_centroid"].extend(centroid)
+                tables["face_area"].append(size[(k + 1) % 3] * size[(k + 2) % 3])
+                tables["face_bbox"].extend(face_lo + face_hi)
+    return tables
+
+
+def test_spatial_hash_finds_points_across_cells_nearest_first():
+    index = SpatialHash(0.1)
+    index.insert(0, 0.099, 0.0, 0.0)
+    index.insert(1, 0.101, 0.0, 0.0)
+    index.insert(2, 0.5, 0.0, 0.0)
+    assert index.near(0.1005, 0.0, 0.0, 0.01) == [1, 0]
+    assert index.near(0.5, 0.0, 0.0, 1e-6) == [2]
+    assert index.near(0.3, 0.0, 0.0, 0.05) == []
+
+
+def test_mirrored_bodies_are_paired_and_reduced():
+    tables = _tables({1: ((-2, 0, 0), (-1, 1, 1)), 2: ((1, 0, 0), (2, 1, 1))})
+    plane = detect_plane(tables, "X")
+    assert plane.position == 0.0
+    assert plane.is_symmetric()
+    assert plane.body_side == {1: "negative", 2: "positive"}
+    assert plane.body_pairs == [(1, 2)]
+
+    plan = plan_reduction({"X": plane})
+    assert plan["ok"] and plan["axes"] == ["X"] and plan["factor"] == 2
+    assert plan["suppress_bodies"] == [1] and plan["keep_bodies"] == [2]
+
+
+def test_two_planes_give_a_quarter_model():
+    tables = _tables(dict((b, ((x, y, 0), (x + 1, y + 1, 1))) for b, (x, y) in
+                          enumerate([(-2, -2), (1, -2), (-2, 1), (1, 1)], 1)))
+    plan = plan_reduction(detect_symmetry(tables))
+    assert plan["axes"] == ["X", "Y"] and plan["factor"] == 4
+    assert plan["suppress_bodies"] == [1, 2, 3] and plan["keep_bodies"] == [4]
+
+
+def test_straddling_body_blocks_the_reduction():
+    # 單一 Body 跨越 X = 0：面都能配對 (對稱) 但 Mechanical 無法切割，不可直接套用
+    tables = _tables({1: ((-1, 0, 0), (1, 1, 1))})
+    plane = detect_plane(tables, "X")
+    assert plane.is_symmetric()
+    assert plane.body_side == {1: "straddle"}
+    plan = plan_reduction({"X": plane})
+    assert not plan["ok"] and plan["straddling_bodies"] == [1]
+
+
+def test_asymmetric_bodies_are_not_reduced():
+    tables = _tables({1: ((-2, 0, 0), (-1, 1, 1)), 2: ((1, 0, 0), (3, 1, 1))})
+    plane = detect_plane(tables, "X")
+    assert not plane.is_symmetric()
+    assert plane.unmatched
+    plan = plan_reduction({"X": plane})
+    assert plan["axes"] == [] and plan["factor"] == 1 and not plan["ok"]
+
+
+def test_apply_without_manifest_is_refused():
+    api = Obj(DataModel=Obj(GeoData=None, Project=Obj(Model=Obj())))
+    with pytest.raises(ValueError):
+        runSymmetry(api, apply=True, manifest=None)
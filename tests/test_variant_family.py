@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import fakes
+from fakes import Analysis, NamedSelection, Obj, environment
+from VariantFamily_V1 import plan_families, run_family
+
+
+def _variant(z_steps):
+    return {"bc": {"z_steps": z_steps},
+            "solver": {"num_steps": len(z_steps), "end_time_list": list(range(1, len(z_steps) + 1))}}
+
+
+def _family_env(tmp_path, restart_files):
+    for i in range(1, restart_files + 1):
+        (tmp_path / "file.r{:03d}".format(i)).write_text(u"")
+    analysis = Analysis()
+    analysis.WorkingDir = str(tmp_path)
+    analysis.AnalysisSettings = Obj(CurrentRestartPoint=0)
+    env = environment([analysis], [NamedSelection("[BC]_[Fixed]_Bottom", [1]),
+                                   NamedSelection("[BC]_[Disp]_Top", [2])])
+    family = plan_families([("a", _variant([-1.0, -2.0, -1.0])),
+                            ("b", _variant([-1.0, -2.0, -3.0]))])[0]
+    assert [e["restart_from"] for e in family.plan] == [0, 2]
+    return env, analysis, family
+
+
+def test_later_members_update_boundary_conditions_in_place(tmp_path, monkeypatch):
+    env, analysis, family = _family_env(tmp_path, restart_files=2)
+    created = []
+    init = fakes.BoundaryCondition.__init__
+
+    def counting_init(self, parent, kind):
+        init(self, parent, kind)
+        created.append(kind)
+    monkeypatch.setattr(fakes.BoundaryCondition, "__init__", counting_init)
+
+    reports = run_family(env, family, stages=("bc",))
+    assert reports["b"]["status"] == "ok", reports["b"]["traceback"]
+    # 只有第一個變體建立 BC；第二個變體沿用同一組物件，只改寫位移數值
+    assert sorted(created) == ["AddDisplacement", "AddFixedSupport"]
+    assert len(analysis.Children) == 2
+    disp = next(bc for bc in analysis.Children if bc.kind == "AddDisplacement")
+    assert disp.ZComponent.Output.DiscreteValues[-1].Value == -3.0
+    assert analysis.AnalysisSettings.CurrentRestartPoint == 2
+    assert "restart_fallback" not in reports["b"]["results"]
+
+
+def test_missing_restart_point_is_reported(tmp_path):
+    env, analysis, family = _family_env(tmp_path, restart_files=1)
+    reports = run_family(env, family, stages=("bc",))
+    results = reports["b"]["results"]
+    assert results["restart_from"] == 1
+    assert results["restart_fallback"] == {
+        "Static Structural": {"requested": 2, "used": 1, "available": 1}}
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from GeoSnapshot_V1 import GeoSnapshot, export_snapshot
+from ZFaceSelector_V1 import benchmark_scan, scan_bodies
+
+
+class _Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _geo(n_bodies=16, faces_per_body=50):
+    """合成幾何：每個 Body 一疊面，重心 Z 由 0 到 n_bodies"""
+    bodies = []
+    for b in range(n_bodies):
+        faces = [_Obj(Id=b * 1000 + f, Centroid=(float(f), float(b), b + f / float(faces_per_body)),
+                      Area=1.0)
+                 for f in range(faces_per_body)]
+        bodies.append(_Obj(Id=b + 1, Faces=faces, Volume=1.0))
+    return _Obj(Assemblies=[_Obj(Parts=[_Obj(Bodies=bodies)])])
+
+
+class _SlowBody(object):
+    """模擬 interop 延遲：每次讀取 Faces 等待 delay 秒 (等待時釋放 GIL，與 COM 呼叫相同)"""
+
+    def __init__(self, body, delay, threads):
+        self._body = body
+        self._delay = delay
+        self._threads = threads
+        self.Id = body.Id
+
+    @property
+    def Faces(self):
+        self._threads.add(threading.current_thread().name)
+        time.sleep(self._delay)
+        return self._body.Faces
+
+
+def _slow(geo, delay, threads):
+    bodies = [_SlowBody(b, delay, threads) for a in geo.Assemblies for p in a.Parts for b in p.Bodies]
+    return _Obj(Assemblies=[_Obj(Parts=[_Obj(Bodies=bodies)])])
+
+
+def test_scan_is_serial_by_default():
+    threads = set()
+    scan_bodies(_slow(_geo(4, 3), 0.0, threads))
+    assert threads == {threading.current_thread().name}
+
+
+def test_benchmark_scan_on_snapshot_stand_in(tmp_path):
+    # 不檢查加速倍率 (取決於機器負載)：只確認平行掃描確實用了多個執行緒，且結果與序列相同
+    export_snapshot(_geo(), str(tmp_path))
+    stand_in = GeoSnapshot.load(str(tmp_path)).as_geo_data()
+    threads = set()
+    result = benchmark_scan(_slow(stand_in, 0.005, threads), workers=4, repeat=1)
+    assert result["faces"] == 16 * 50
+    assert result["identical"]
+    assert len(threads - {threading.current_thread().name}) > 1